@@ -12,6 +12,7 @@ from livekit.plugins import (
 )
 from livekit.plugins import google
 from src.agent.prompts import AGENT_INSTRUCTION, SESSION_INSTRUCTION
+from src.utils.log_setup import bind_log_context, setup_logging
 from src.dental.dental_tools import (
     schedule_appointment,
     check_availability,
@@ -62,8 +63,8 @@ from src.dental.dental_tools import (
 
 load_dotenv()
 
-# Enable debug logging
-logging.basicConfig(level=logging.DEBUG)
+# Queue-based logging; level and file come from SOFIA_LOG_LEVEL / SOFIA_LOG_FILE (INFO, console only)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -204,6 +205,8 @@ async def entrypoint(ctx: agents.JobContext):
     print(f"Room: {ctx.room.name}")
     print(f"Room participants: {len(ctx.room.remote_participants)}")
     print("Starte deutsche Zahnarzt-Assistentin mit Audio-Input...")
+    # Every log line of this call carries the room name as call ID
+    bind_log_context(call_id=ctx.room.name)
     logger.info("Starting German dental assistant agent")
     
     # Update health server connection status
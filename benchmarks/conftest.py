@@ -0,0 +1,52 @@
+"""
+Fixtures für die Benchmarks: eine synthetische Praxis pro Lauf
+
+Die Größe der Praxis wählt `--praxis-dauer` (1w bis 5j, Standard 1j). Die
+Datenbank wird einmal pro Sitzung erzeugt und von allen Benchmarks gelesen;
+Buchungs-Benchmarks schreiben in eine eigene Kopie.
+"""
+
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from praxisdaten import praxis_erzeugen
+from src.dental.appointment_manager import AppointmentManager
+
+
+def pytest_addoption(parser):
+    parser.addoption('--praxis-dauer', default='1j', help='Größe der synthetischen Praxis: 1w, 6m, 1j, 5j, ...')
+    parser.addoption('--praxis-seed', type=int, default=42, help='Seed des Datengenerators')
+
+
+@pytest.fixture(scope='session')
+def praxis(request, tmp_path_factory):
+    """(Pfad, Kennzahlen) der generierten Praxis-Datenbank"""
+    db_path = str(tmp_path_factory.mktemp('praxis') / 'termine.db')
+    kennzahlen = praxis_erzeugen(db_path, request.config.getoption('--praxis-dauer'),
+                                 seed=request.config.getoption('--praxis-seed'))
+    return db_path, kennzahlen
+
+
+@pytest.fixture(scope='session')
+def manager(praxis):
+    return AppointmentManager(praxis[0])
+
+
+@pytest.fixture
+def schreib_manager(praxis, tmp_path):
+    """AppointmentManager auf einer Kopie, damit Buchungen die Lese-Benchmarks nicht verändern"""
+    kopie = str(tmp_path / 'termine.db')
+    shutil.copyfile(praxis[0], kopie)
+    return AppointmentManager(kopie)
+
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    """Praxisgröße in die JSON-Ergebnisse schreiben, damit Vergleiche nur Gleiches mit Gleichem vergleichen"""
+    output_json['praxis'] = {'dauer': config.getoption('--praxis-dauer'),
+                             'seed': config.getoption('--praxis-seed')}
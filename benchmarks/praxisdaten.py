@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Synthetische Praxis-Datenbanken für Benchmarks und Lasttests
+
+Erzeugt eine Terminverwaltung, wie sie nach einer gewissen Laufzeit in einer
+Praxis aussieht: Termine in den Sprechzeiten des AppointmentManagers,
+gewichtete Behandlungsarten, Stammpatienten, die immer wieder kommen,
+Absagen (teils neu vergebene Slots) und Buchungen mit realistischem Vorlauf.
+Die Vergangenheit ist dicht belegt, die nächsten Wochen dünner. Mit festem
+`seed` entsteht immer dieselbe Datenbank.
+
+    python benchmarks/praxisdaten.py praxis.db --dauer 5j --auslastung 0.75
+"""
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.dental.appointment_manager import AppointmentManager
+
+# Sprechzeiten wie in AppointmentManager.get_verfuegbare_termine_tag
+WERKTAG_SLOTS = ("09:00", "09:30", "10:00", "10:30", "11:00", "11:30",
+                 "14:00", "14:30", "15:00", "15:30", "16:00", "16:30", "17:00", "17:30")
+SAMSTAG_SLOTS = ("09:00", "09:30", "10:00", "10:30", "11:00", "11:30", "12:00", "12:30")
+
+# Behandlungsart -> relatives Gewicht
+BEHANDLUNGEN = {
+    'Kontrolluntersuchung': 30,
+    'Professionelle Zahnreinigung': 22,
+    'Füllung': 16,
+    'Beratung': 8,
+    'Schmerzbehandlung': 7,
+    'Wurzelbehandlung': 5,
+    'Krone': 4,
+    'Zahnextraktion': 3,
+    'Implantatberatung': 2,
+    'Bleaching': 2,
+    'Kinderbehandlung': 1,
+}
+
+VORNAMEN = ('Anna', 'Jörg', 'Maria', 'Thomas', 'Sabine', 'Michael', 'Julia', 'Stefan', 'Petra', 'Andreas',
+            'Katrin', 'Jürgen', 'Claudia', 'Frank', 'Monika', 'Uwe', 'Sandra', 'Klaus', 'Nicole', 'Özlem',
+            'Lukas', 'Lea', 'Felix', 'Sophie', 'Jonas', 'Emma', 'Paul', 'Mia', 'Ben', 'Hannah')
+NACHNAMEN = ('Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker', 'Schulz',
+             'Hoffmann', 'Schäfer', 'Koch', 'Bauer', 'Richter', 'Klein', 'Wolf', 'Schröder', 'Neumann',
+             'Schwarz', 'Zimmermann', 'Braun', 'Krüger', 'Hofmann', 'Hartmann', 'Lange', 'Schmitt',
+             'Werner', 'Krause', 'Meier', 'Lehmann', 'Yılmaz', 'Kaya', 'Nowak', 'Kowalski')
+VORWAHLEN = ('030', '040', '089', '0221', '069', '0711', '0151', '0160', '0170', '0176')
+BESCHREIBUNGEN = ('', '', '', 'Schmerzen unten links', 'Zahnfleischbluten', 'Kontrolle nach Füllung',
+                  'Empfindlich bei Kälte', 'Neue Patientin', 'Recall 6 Monate', 'Abdruck für Krone')
+ABSAGEGRUENDE = ('Krank', 'Terminkonflikt', 'Urlaub', 'Kinderbetreuung', '')
+
+_DAUER = re.compile(r'^(\d+)\s*([tdwmjy])$')
+_EINHEIT_TAGE = {'t': 1, 'd': 1, 'w': 7, 'm': 30, 'j': 365, 'y': 365}
+
+
+def dauer_in_tagen(dauer: str) -> int:
+    """'7t', '1w', '6m', '5j' (oder 'y') -> Tage"""
+    treffer = _DAUER.match(dauer.strip().lower())
+    if not treffer:
+        raise ValueError(f"Ungültige Dauer: {dauer} (z.B. 1w, 6m, 5j)")
+    return int(treffer.group(1)) * _EINHEIT_TAGE[treffer.group(2)]
+
+
+def slots_am(tag: date) -> Tuple[str, ...]:
+    if tag.weekday() == 6:
+        return ()
+    return SAMSTAG_SLOTS if tag.weekday() == 5 else WERKTAG_SLOTS
+
+
+def _telefon(zufall: random.Random, nummer: int) -> str:
+    vorwahl = VORWAHLEN[nummer % len(VORWAHLEN)]
+    stellen = 8 if vorwahl.startswith('01') else 7
+    return f"{vorwahl} {zufall.randrange(10 ** (stellen - 1), 10 ** stellen)}"
+
+
+def patienten_erzeugen(anzahl: int, zufall: random.Random) -> List[Tuple[str, str, str]]:
+    """(Name, Telefon, E-Mail); Telefonnummern sind eindeutig und gültig deutsch"""
+    patienten, telefone = [], set()
+    for i in range(anzahl):
+        telefon = _telefon(zufall, i)
+        while telefon in telefone:
+            telefon = _telefon(zufall, i)
+        telefone.add(telefon)
+        vorname, nachname = zufall.choice(VORNAMEN), zufall.choice(NACHNAMEN)
+        email = f"{vorname}.{nachname}{i}@example.de".lower() if zufall.random() < 0.6 else ''
+        patienten.append((f"{vorname} {nachname}", telefon, email))
+    return patienten
+
+
+def _stammkunden_gewichte(anzahl: int, zufall: random.Random) -> List[float]:
+    # Pareto: wenige Stammpatienten kommen oft, die meisten selten; gedeckelt, damit niemand wöchentlich kommt
+    return [min(zufall.paretovariate(1.5), 15.0) for _ in range(anzahl)]
+
+
+def praxis_erzeugen(db_path: str, dauer: str = '1j', zukunft_wochen: int = 6, auslastung: float = 0.7,
+                    absagequote: float = 0.12, termine_pro_patient: float = 6.0, seed: int = 42,
+                    heute: Optional[date] = None) -> Dict:
+    """Füllt `db_path` mit `dauer` Vergangenheit plus `zukunft_wochen` Vorausbuchungen; gibt Kennzahlen zurück"""
+    zufall = random.Random(seed)
+    heute = heute or date.today()
+    AppointmentManager(db_path)
+
+    erster_tag = heute - timedelta(days=dauer_in_tagen(dauer))
+    letzter_tag = heute + timedelta(weeks=zukunft_wochen)
+    tage = [erster_tag + timedelta(days=i) for i in range((letzter_tag - erster_tag).days + 1)]
+    slots_gesamt = sum(len(slots_am(tag)) for tag in tage)
+
+    patienten = patienten_erzeugen(max(1, int(slots_gesamt * auslastung / termine_pro_patient)), zufall)
+    gewichte = _stammkunden_gewichte(len(patienten), zufall)
+    arten, art_gewichte = list(BEHANDLUNGEN), list(BEHANDLUNGEN.values())
+
+    termine, verwendet = [], set()
+
+    def termin(tag: date, slot: str, status: str, notizen: str = '') -> None:
+        name, telefon, email = zufall.choices(patienten, gewichte)[0]
+        verwendet.add(telefon)
+        # Vorlauf: meist ein paar Tage bis Wochen, Schmerzpatienten kurzfristig
+        art = zufall.choices(arten, art_gewichte)[0]
+        vorlauf = 0 if art == 'Schmerzbehandlung' else min(int(zufall.expovariate(1 / 14)), 180)
+        gebucht = datetime.combine(tag - timedelta(days=vorlauf), datetime.min.time()) + timedelta(
+            minutes=zufall.randrange(8 * 60, 18 * 60))
+        termine.append((name, telefon, email, str(tag), slot, art, zufall.choice(BESCHREIBUNGEN), status,
+                        notizen, gebucht.strftime('%Y-%m-%d %H:%M:%S')))
+
+    for tag in tage:
+        # In der Zukunft nimmt die Belegung mit dem Abstand ab
+        abstand = (tag - heute).days
+        quote = auslastung if abstand <= 0 else auslastung * max(0.1, 1 - abstand / (zukunft_wochen * 7 + 1))
+        for slot in slots_am(tag):
+            if zufall.random() >= quote:
+                continue
+            if zufall.random() < absagequote:
+                termin(tag, slot, 'abgesagt', f"Absagegrund: {zufall.choice(ABSAGEGRUENDE)}")
+                # Etwa jeder zweite abgesagte Slot wird neu vergeben
+                if zufall.random() < 0.5:
+                    termin(tag, slot, 'bestätigt')
+            else:
+                termin(tag, slot, 'bestätigt')
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.executemany('''
+                INSERT INTO termine (patient_name, telefon, email, datum, uhrzeit, behandlungsart,
+                                     beschreibung, status, notizen, erstellt_am)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', termine)
+            conn.executemany('INSERT OR IGNORE INTO patienten (name, telefon, email) VALUES (?, ?, ?)',
+                             [p for p in patienten if p[1] in verwendet])
+    finally:
+        conn.close()
+
+    return {
+        'termine': len(termine),
+        'abgesagt': sum(1 for t in termine if t[7] == 'abgesagt'),
+        'patienten': len(verwendet),
+        'von': str(erster_tag),
+        'bis': str(letzter_tag),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetische Praxis-Datenbank erzeugen')
+    parser.add_argument('db', help='Ziel-Datenbank (wird angelegt oder ergänzt)')
+    parser.add_argument('--dauer', default='1j', help='Zeitraum in der Vergangenheit: 1w, 6m, 5j, ...')
+    parser.add_argument('--zukunft-wochen', type=int, default=6, help='Vorausbuchungen in Wochen')
+    parser.add_argument('--auslastung', type=float, default=0.7, help='Anteil belegter Slots (0-1)')
+    parser.add_argument('--absagequote', type=float, default=0.12, help='Anteil abgesagter Termine (0-1)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    kennzahlen = praxis_erzeugen(args.db, args.dauer, args.zukunft_wochen, args.auslastung, args.absagequote,
+                                 seed=args.seed)
+    print(f"✅ {kennzahlen['termine']} Termine ({kennzahlen['abgesagt']} abgesagt), "
+          f"{kennzahlen['patienten']} Patienten, {kennzahlen['von']} bis {kennzahlen['bis']}")
+
+
+if __name__ == '__main__':
+    main()
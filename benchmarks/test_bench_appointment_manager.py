@@ -0,0 +1,113 @@
+"""
+Benchmarks der Terminverwaltung auf einer synthetischen Praxis
+
+    pip install pytest-benchmark
+    python -m pytest benchmarks --praxis-dauer 1j --benchmark-json=benchmarks/ergebnisse/vorher.json
+    python benchmarks/vergleichen.py benchmarks/ergebnisse/vorher.json benchmarks/ergebnisse/nachher.json
+
+Jeder Benchmark prüft zusätzlich ein plausibles Ergebnis, damit ein schneller,
+aber falscher Pfad nicht als Verbesserung durchgeht.
+"""
+
+import itertools
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from praxisdaten import slots_am
+
+
+def naechster_werktag(ab: date) -> date:
+    tag = ab
+    while tag.weekday() >= 5:
+        tag += timedelta(days=1)
+    return tag
+
+
+@pytest.fixture(scope='module')
+def stammpatient(praxis):
+    """Telefon und Name des Patienten mit den meisten Terminen"""
+    conn = sqlite3.connect(praxis[0])
+    try:
+        return conn.execute("SELECT telefon, patient_name FROM termine GROUP BY telefon "
+                            "ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+    finally:
+        conn.close()
+
+
+def test_ist_verfuegbar(benchmark, manager):
+    tag = naechster_werktag(date.today() + timedelta(days=2))
+    benchmark(manager.ist_verfuegbar, str(tag), '10:00')
+
+
+def test_get_verfuegbare_termine(benchmark, manager):
+    termine = benchmark(manager.get_verfuegbare_termine, '', 10)
+    assert len(termine) == 10
+
+
+def test_get_wochenuebersicht_arzt(benchmark, manager):
+    uebersicht = benchmark(manager.get_wochenuebersicht, str(date.today()), True)
+    assert 'Wochenstatistik' in uebersicht
+
+
+def test_get_wochenuebersicht_patient(benchmark, manager):
+    uebersicht = benchmark(manager.get_wochenuebersicht, str(date.today() + timedelta(days=7)), False)
+    assert 'Wochenübersicht' in uebersicht
+
+
+def test_termin_suchen(benchmark, manager, stammpatient):
+    nachname = stammpatient[1].split()[-1]
+    ergebnis = benchmark(manager.termin_suchen, nachname, 'naechster_monat')
+    assert ergebnis.startswith('🔍')
+
+
+def test_get_patientenhistorie(benchmark, manager, stammpatient):
+    historie = benchmark(manager.get_patientenhistorie, stammpatient[0])
+    assert 'Terminhistorie' in historie
+
+
+@pytest.mark.parametrize('zeitraum', ['heute', 'diese_woche', 'diesen_monat'])
+def test_get_statistiken(benchmark, manager, zeitraum):
+    stats = benchmark(manager.get_statistiken, zeitraum)
+    assert 'Praxisstatistiken' in stats
+
+
+ANFRAGEN = (
+    'Ich hätte gerne morgen um 10 Uhr einen Termin zur Kontrolle',
+    'Geht es nächste Woche gegen halb 3?',
+    'Ich habe Zahnschmerzen, heute noch möglich?',
+    'Zahnreinigung am Freitag um 14:30',
+    'Nächsten Montag vormittags eine Beratung',
+    'übermorgen kurz nach 14 wegen einer Füllung',
+)
+
+
+def test_parse_natural_language(benchmark, manager):
+    anfragen = itertools.cycle(ANFRAGEN)
+    titel, datum, uhrzeit, behandlungsart, kontext = benchmark(lambda: manager.parse_natural_language(next(anfragen)))
+    assert datum and uhrzeit
+
+
+def test_termin_hinzufuegen(benchmark, schreib_manager):
+    """Buchungsdurchsatz: jede Runde bucht einen neuen freien Slot nach dem Ende der generierten Daten"""
+    slots = ((tag, slot) for tag in (date.today() + timedelta(days=400 + i) for i in itertools.count())
+             for slot in slots_am(tag))
+
+    # Mit --benchmark-disable läuft nur eine Runde; verglichen wird mit den tatsächlichen Runden
+    runden = []
+
+    def naechster_slot():
+        tag, slot = next(slots)
+        runden.append(tag)
+        return ('Benchmark Patient', '030 1234567', str(tag), slot, 'Kontrolluntersuchung'), {}
+
+    benchmark.pedantic(schreib_manager.termin_hinzufuegen, setup=naechster_slot, rounds=200)
+    conn = sqlite3.connect(schreib_manager.db_path)
+    try:
+        gebucht = conn.execute("SELECT COUNT(*) FROM termine WHERE patient_name = 'Benchmark Patient'").fetchone()[0]
+    finally:
+        conn.close()
+    assert gebucht == len(runden) > 0
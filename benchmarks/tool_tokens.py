@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Token-Bericht: wie viel Kontext kosten die Buchungs-Tools pro Ausgabemodus?
+
+Spielt einen festen Korpus typischer Tool-Aufrufe (Terminwünsche, Vorschläge,
+Buchungen, eigene Termine) gegen eine synthetische Praxis mit eingefrorener
+Uhr durch. Jede Antwort wird in allen Modi aus src/dental/tool_ausgabe.py
+erzeugt und gezählt.
+
+    python benchmarks/tool_tokens.py --dauer 6m
+
+Gezählt wird mit einer Schätzung, die ohne Tokenizer auskommt: Wortstücke zu
+je vier Zeichen, jedes Satzzeichen ein Token, Emojis und andere Zeichen
+außerhalb der BMP zwei. Für den Vergleich der Modi untereinander reicht das;
+absolute Zahlen des Modells weichen ab.
+"""
+
+import argparse
+import math
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from praxisdaten import praxis_erzeugen, slots_am
+from src.dental import tool_ausgabe
+from src.dental.appointment_manager import AppointmentManager
+from src.dental.termin_abfragen import suchergebnis_text
+from src.dental.uhr import eingefrorene_uhr
+
+HEUTE = date(2025, 7, 14)
+JETZT = datetime(2025, 7, 14, 10, 15)
+
+ANFRAGEN = (
+    'Ich hätte gerne morgen um 10 Uhr einen Termin zur Kontrolle',
+    'Geht es nächste Woche gegen halb 3?',
+    'Ich habe Zahnschmerzen, heute noch möglich?',
+    'Zahnreinigung am Freitag um 14:30',
+    'Nächsten Montag vormittags eine Beratung',
+    'übermorgen kurz nach 14 wegen einer Füllung',
+    'Haben Sie am Samstag etwas frei?',
+    'Ich brauche eine Wurzelbehandlung, am besten nächsten Mittwoch',
+)
+BEHANDLUNGEN = ('Kontrolluntersuchung', 'Professionelle Zahnreinigung', 'Füllung', 'Schmerzbehandlung')
+
+_WORT = re.compile(r'\w+')
+_ZEICHEN = re.compile(r'[^\w\s]')
+
+
+def token_schaetzen(text: str) -> int:
+    woerter = sum(math.ceil(len(wort) / 4) for wort in _WORT.findall(text))
+    zeichen = sum(2 if ord(z) > 0xFFFF else 1 for z in _ZEICHEN.findall(text))
+    return woerter + zeichen
+
+
+def _terminwunsch(manager: AppointmentManager, text: str, modus: str) -> str:
+    """Wie parse_terminwunsch in dental_tools.py, ohne LiveKit"""
+    _, datum, uhrzeit, behandlungsart, kontext = manager.parse_natural_language(text)
+    verfuegbar = manager.ist_verfuegbar(datum, uhrzeit) if uhrzeit else None
+    freie_zeiten = [] if uhrzeit else manager.get_verfuegbare_termine_tag(datum)
+    alternativen = []
+    if verfuegbar is False or (not uhrzeit and not freie_zeiten):
+        alternativen = manager.terminvorschlaege(datum, 3)
+    return tool_ausgabe.terminwunsch(text, datum, uhrzeit, behandlungsart, kontext, verfuegbar, freie_zeiten,
+                                     alternativen, lambda: manager.terminvorschlaege_text(behandlungsart, alternativen),
+                                     modus)
+
+
+def _vorschlaege(manager: AppointmentManager, behandlungsart: str, modus: str) -> str:
+    vorschlaege = manager.terminvorschlaege('', 5)
+    return tool_ausgabe.terminvorschlaege(behandlungsart, vorschlaege, manager.get_current_datetime_info(),
+                                          lambda: manager.terminvorschlaege_text(behandlungsart, vorschlaege), modus)
+
+
+def _buchung(manager: AppointmentManager, status: str, datum: str, uhrzeit: str, modus: str, grund: str = '') -> str:
+    alternativen = manager.terminvorschlaege(datum, 3) if status in ('belegt', 'fehler') else []
+    return tool_ausgabe.buchung(status, 'Anna Schmidt', '030 1234567', datum, uhrzeit, 'Füllung',
+                                'Angst vor Spritzen' if status == 'gebucht' else '', grund=grund,
+                                alternativen=alternativen,
+                                alternativen_text=lambda: manager.terminvorschlaege_text('Füllung', alternativen),
+                                modus=modus)
+
+
+def _meine_termine(manager: AppointmentManager, name: str, zeitraum: str, modus: str) -> str:
+    termine = manager.termine_finden(name, zeitraum)
+    return tool_ausgabe.meine_termine(name, '', zeitraum, termine, lambda: suchergebnis_text(name, termine), modus)
+
+
+def korpus(manager: AppointmentManager) -> List[Tuple[str, Callable[[str], str]]]:
+    """(Tool, Aufruf je Modus) für jeden Fall des Korpus"""
+    conn = sqlite3.connect(manager.db_path)
+    try:
+        stammpatient = conn.execute("SELECT patient_name FROM termine WHERE datum >= ? GROUP BY telefon "
+                                    "ORDER BY COUNT(*) DESC LIMIT 1", (str(HEUTE),)).fetchone()[0]
+        belegt = conn.execute("SELECT datum, uhrzeit FROM termine WHERE datum > ? AND status = 'bestätigt' "
+                              "ORDER BY datum, uhrzeit LIMIT 1", (str(HEUTE),)).fetchone()
+    finally:
+        conn.close()
+    frei = next((str(tag), slot) for tag in (HEUTE + timedelta(days=i) for i in range(1, 60))
+                for slot in slots_am(tag) if manager.ist_verfuegbar(str(tag), slot))
+
+    faelle = [('parse_terminwunsch', lambda modus, text=text: _terminwunsch(manager, text, modus)) for text in ANFRAGEN]
+    faelle += [('get_intelligente_terminvorschlaege', lambda modus, art=art: _vorschlaege(manager, art, modus))
+               for art in BEHANDLUNGEN]
+    faelle += [
+        ('termin_direkt_buchen', lambda modus: _buchung(manager, 'gebucht', *frei, modus)),
+        ('termin_direkt_buchen', lambda modus: _buchung(manager, 'belegt', *belegt, modus)),
+        ('termin_direkt_buchen', lambda modus: _buchung(manager, 'abgelehnt', str(HEUTE), '08:00', modus,
+                                                       'Der Termin muss in der Zukunft liegen.')),
+        ('meine_termine_finden', lambda modus: _meine_termine(manager, stammpatient, 'naechster_monat', modus)),
+        ('meine_termine_finden', lambda modus: _meine_termine(manager, stammpatient.split()[-1], 'naechste_woche', modus)),
+        ('meine_termine_finden', lambda modus: _meine_termine(manager, 'Unbekannt Niemand', 'naechste_woche', modus)),
+    ]
+    return faelle
+
+
+def bericht(manager: AppointmentManager) -> Dict[str, Dict[str, int]]:
+    """Tool -> Modus -> Summe der geschätzten Tokens; dazu 'aufrufe' pro Tool"""
+    summen: Dict[str, Dict[str, int]] = {}
+    with eingefrorene_uhr(JETZT):
+        for tool, aufruf in korpus(manager):
+            zeile = summen.setdefault(tool, dict.fromkeys(('aufrufe',) + tool_ausgabe.AUSGABE_MODI, 0))
+            zeile['aufrufe'] += 1
+            for modus in tool_ausgabe.AUSGABE_MODI:
+                zeile[modus] += token_schaetzen(aufruf(modus))
+    return summen
+
+
+def tabelle(summen: Dict[str, Dict[str, int]]) -> str:
+    modi = tool_ausgabe.AUSGABE_MODI
+    gesamt = {modus: sum(zeile[modus] for zeile in summen.values()) for modus in ('aufrufe',) + modi}
+    breite = max(len(tool) for tool in list(summen) + ['Gesamt'])
+    zeilen = [f"{'Tool':<{breite}} {'Aufrufe':>7} " + ' '.join(f"{modus:>15}" for modus in modi)]
+    for tool, zeile in list(summen.items()) + [('Gesamt', gesamt)]:
+        spalten = []
+        for modus in modi:
+            anteil = zeile[modus] / zeile['markdown'] * 100 if zeile['markdown'] else 0
+            spalten.append(f"{zeile[modus]:>8} ({anteil:>3.0f}%)")
+        zeilen.append(f"{tool:<{breite}} {zeile['aufrufe']:>7} " + ' '.join(spalten))
+    return '\n'.join(zeilen)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Geschätzte Tokens der Tool-Antworten je Ausgabemodus')
+    parser.add_argument('--dauer', default='6m', help='Größe der synthetischen Praxis: 1w, 6m, 1j, ...')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        db_path = os.path.join(verzeichnis, 'termine.db')
+        praxis_erzeugen(db_path, args.dauer, seed=args.seed, heute=HEUTE)
+        summen = bericht(AppointmentManager(db_path))
+
+    print(f"Geschätzte Tokens pro Tool über den Korpus (Praxis {args.dauer}, Anteil an markdown):\n")
+    print(tabelle(summen))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
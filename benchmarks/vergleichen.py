@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Zwei Benchmark-Läufe (JSON von pytest-benchmark) vergleichen und Regressionen melden
+
+    python benchmarks/vergleichen.py vorher.json nachher.json --schwelle 20
+
+Verglichen wird standardmäßig der Median pro Benchmark. Langsamer als die
+Schwelle (in Prozent) gilt als Regression; dann endet das Skript mit Exit-Code
+1, damit es in CI als Gate taugt.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, NamedTuple, Optional
+
+KENNZAHLEN = ('median', 'mean', 'min')
+
+
+class Vergleich(NamedTuple):
+    name: str
+    vorher: Optional[float]
+    nachher: Optional[float]
+
+    @property
+    def aenderung(self) -> Optional[float]:
+        """Relative Änderung der Laufzeit in Prozent; positiv heißt langsamer"""
+        if not self.vorher or self.nachher is None:
+            return None
+        return (self.nachher / self.vorher - 1) * 100
+
+    def bewertung(self, schwelle: float) -> str:
+        if self.vorher is None:
+            return 'neu'
+        if self.nachher is None:
+            return 'entfallen'
+        if self.aenderung > schwelle:
+            return 'REGRESSION'
+        if self.aenderung < -schwelle:
+            return 'schneller'
+        return 'ok'
+
+
+def laden(pfad: str) -> Dict:
+    with open(pfad, encoding='utf-8') as datei:
+        return json.load(datei)
+
+
+def kennzahlen(lauf: Dict, kennzahl: str) -> Dict[str, float]:
+    return {b['fullname']: b['stats'][kennzahl] for b in lauf.get('benchmarks', [])}
+
+
+def vergleichen(vorher: Dict, nachher: Dict, kennzahl: str = 'median') -> List[Vergleich]:
+    alt, neu = kennzahlen(vorher, kennzahl), kennzahlen(nachher, kennzahl)
+    return [Vergleich(name, alt.get(name), neu.get(name)) for name in sorted(alt.keys() | neu.keys())]
+
+
+def _ms(wert: Optional[float]) -> str:
+    return '-' if wert is None else f"{wert * 1000:.3f}"
+
+
+def bericht(vergleiche: List[Vergleich], schwelle: float, kennzahl: str) -> str:
+    breite = max([len(v.name.split('::')[-1]) for v in vergleiche] + [9])
+    zeilen = [f"{'Benchmark':<{breite}} {kennzahl + ' ms vorher':>18} {kennzahl + ' ms nachher':>19} "
+              f"{'Änderung':>9}  Bewertung"]
+    for v in vergleiche:
+        aenderung = '-' if v.aenderung is None else f"{v.aenderung:+.1f}%"
+        zeilen.append(f"{v.name.split('::')[-1]:<{breite}} {_ms(v.vorher):>18} {_ms(v.nachher):>19} "
+                      f"{aenderung:>9}  {v.bewertung(schwelle)}")
+    return '\n'.join(zeilen)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark-Läufe vergleichen')
+    parser.add_argument('vorher', help='JSON des Referenzlaufs (--benchmark-json)')
+    parser.add_argument('nachher', help='JSON des neuen Laufs')
+    parser.add_argument('--schwelle', type=float, default=20.0, help='Regression ab so viel Prozent langsamer')
+    parser.add_argument('--kennzahl', choices=KENNZAHLEN, default='median')
+    args = parser.parse_args(argv)
+
+    vorher, nachher = laden(args.vorher), laden(args.nachher)
+    if vorher.get('praxis') != nachher.get('praxis'):
+        print(f"⚠️ Unterschiedliche Praxisdaten: {vorher.get('praxis')} vs. {nachher.get('praxis')}")
+
+    vergleiche = vergleichen(vorher, nachher, args.kennzahl)
+    print(bericht(vergleiche, args.schwelle, args.kennzahl))
+
+    regressionen = [v for v in vergleiche if v.bewertung(args.schwelle) == 'REGRESSION']
+    if regressionen:
+        print(f"\n❌ {len(regressionen)} Regression(en) über {args.schwelle:.0f}%")
+        return 1
+    print(f"\n✅ Keine Regression über {args.schwelle:.0f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Änderungs-Feed für das CRM: liest `aenderungen` mit und verteilt an alle SSE-Clients
+
+Ein einziger Thread pro Datenbank fragt `PRAGMA data_version` ab. Das kostet
+keinen Tabellenzugriff und ändert sich nur, wenn eine andere Verbindung (z.B.
+Sofia über den AppointmentManager) etwas committet hat. Nur dann liest er die
+neuen Zeilen ab der letzten Sequenznummer und legt sie in die Warteschlange
+jedes Abonnenten. SQLite wird also einmal pro Änderung gefragt, nicht einmal
+pro Client und Poll.
+
+Ein Client, der mit `Last-Event-ID` neu verbindet, bekommt die verpassten
+Änderungen zuerst aus der Tabelle nachgeliefert.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from typing import Iterator, List, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Markiert eine übergelaufene Warteschlange; der Client verbindet neu und holt per Last-Event-ID nach
+UEBERLAUF = object()
+
+
+class Aenderung(NamedTuple):
+    seq: int
+    typ: str
+    zeile_id: int
+    daten: str
+    zeitpunkt: float
+
+    def sse(self) -> str:
+        """Als Server-Sent Event; `data` ist das JSON-Objekt aus dem Trigger plus typ/seq"""
+        daten = json.loads(self.daten)
+        daten.update(typ=self.typ, seq=self.seq, zeitpunkt=self.zeitpunkt)
+        return f"id: {self.seq}\nevent: {self.typ}\ndata: {json.dumps(daten, ensure_ascii=False)}\n\n"
+
+
+class AenderungsFeed:
+    """Ein Lese-Thread pro Datenbank, beliebig viele Abonnenten"""
+
+    def __init__(self, db_path: str, intervall: float = 0.25, puffer: int = 1000, batch: int = 500):
+        self.db_path = db_path
+        self.intervall = intervall
+        self.puffer = puffer
+        self.batch = batch
+        self.letzte_seq = 0
+        self.abfragen = 0
+        self._abonnenten: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'AenderungsFeed':
+        with self._lock:
+            if self._thread is None:
+                conn = sqlite3.connect(self.db_path)
+                self.letzte_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM aenderungen").fetchone()[0]
+                conn.close()
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._lauf, name='crm-aenderungs-feed', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            for abonnent in self._abonnenten:
+                try:
+                    abonnent.put_nowait(UEBERLAUF)
+                except queue.Full:
+                    pass
+
+    @property
+    def abonnenten(self) -> int:
+        return len(self._abonnenten)
+
+    def _lauf(self) -> None:
+        conn = sqlite3.connect(self.db_path)
+        version = None
+        try:
+            while not self._stop.is_set():
+                aktuell = conn.execute("PRAGMA data_version").fetchone()[0]
+                if aktuell != version:
+                    version = aktuell
+                    try:
+                        self._abholen(conn)
+                    except sqlite3.Error as e:
+                        logger.warning("Änderungsprotokoll nicht lesbar: %s", e)
+                self._stop.wait(self.intervall)
+        finally:
+            conn.close()
+
+    def _abholen(self, conn: sqlite3.Connection) -> None:
+        while True:
+            zeilen = conn.execute(
+                "SELECT seq, typ, zeile_id, daten, zeitpunkt FROM aenderungen WHERE seq > ? ORDER BY seq LIMIT ?",
+                (self.letzte_seq, self.batch)
+            ).fetchall()
+            self.abfragen += 1
+            for zeile in zeilen:
+                self._verteilen(Aenderung(*zeile))
+            if len(zeilen) < self.batch:
+                return
+
+    def _verteilen(self, aenderung: Aenderung) -> None:
+        self.letzte_seq = aenderung.seq
+        with self._lock:
+            abonnenten = list(self._abonnenten)
+        for abonnent in abonnenten:
+            try:
+                abonnent.put_nowait(aenderung)
+            except queue.Full:
+                # Zu langsamer Client: Warteschlange leeren und Verbindung beenden lassen
+                with self._lock:
+                    self._abonnenten.discard(abonnent)
+                while not abonnent.empty():
+                    abonnent.get_nowait()
+                abonnent.put_nowait(UEBERLAUF)
+
+    def nachholen(self, nach_seq: int, limit: int = 10000) -> List[Aenderung]:
+        """Änderungen nach `nach_seq` direkt aus der Tabelle, für Clients mit Last-Event-ID"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [Aenderung(*zeile) for zeile in conn.execute(
+                "SELECT seq, typ, zeile_id, daten, zeitpunkt FROM aenderungen WHERE seq > ? ORDER BY seq LIMIT ?",
+                (nach_seq, limit))]
+        finally:
+            conn.close()
+
+    def ereignisse(self, letzte_id: Optional[int] = None, heartbeat: float = 15.0) -> Iterator[Optional[Aenderung]]:
+        """Änderungen für einen Abonnenten; None alle `heartbeat` Sekunden ohne Änderung"""
+        abonnent: queue.Queue = queue.Queue(self.puffer)
+        with self._lock:
+            self._abonnenten.add(abonnent)
+        try:
+            gesendet = letzte_id if letzte_id is not None else -1
+            if letzte_id is not None:
+                # Erst abonnieren, dann nachholen: was dazwischen eintrifft, steht in beiden und wird per seq entfernt
+                for aenderung in self.nachholen(letzte_id):
+                    yield aenderung
+                    gesendet = aenderung.seq
+            while True:
+                try:
+                    aenderung = abonnent.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield None
+                    continue
+                if aenderung is UEBERLAUF:
+                    return
+                if aenderung.seq <= gesendet:
+                    continue
+                gesendet = aenderung.seq
+                yield aenderung
+        finally:
+            with self._lock:
+                self._abonnenten.discard(abonnent)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Auslastungsanalyse für das CRM mit NumPy
+
+Eine einzige Abfrage lädt Datum, Uhrzeit, Absage-Flag, Behandlungsart und
+Buchungszeitpunkt aller Termine im Zeitraum. Alles Weitere wird vektorisiert auf
+den Arrays berechnet: Heatmap Wochentag × Halbstunde, Absagequoten,
+Behandlungen pro Monat und die Verteilung der Vorlaufzeiten.
+
+Ergebnisse werden nach (Zeitraum, Datenversion) zwischengespeichert; nach
+einer Änderung an `termine` wird neu gerechnet.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Tuple
+
+import numpy as np
+
+WOCHENTAGE = ('Montag', 'Dienstag', 'Mittwoch', 'Donnerstag', 'Freitag', 'Samstag', 'Sonntag')
+SLOT_MINUTEN = 30
+SLOTS_PRO_TAG = 24 * 60 // SLOT_MINUTEN
+# Angezeigter Tagesausschnitt der Heatmap (07:00 bis 20:00)
+ERSTER_SLOT, LETZTER_SLOT = 14, 40
+
+# Obergrenzen der Vorlaufzeit-Klassen in Tagen
+VORLAUF_GRENZEN = (1, 2, 7, 14, 30, 60, 90, 180, 365)
+
+# Nur Rohspalten; das Umrechnen von Datum und Uhrzeit passiert vektorisiert in NumPy
+SPALTEN_SQL = """
+    SELECT datum, uhrzeit, status = 'abgesagt', behandlungsart, datetime(erstellt_am, 'localtime')
+    FROM {tabelle}
+    WHERE datum BETWEEN ? AND ?
+"""
+
+
+def _minuten(uhrzeiten) -> np.ndarray:
+    """'HH:MM' -> Minuten seit Mitternacht, ohne Python-Schleife über die Zeilen"""
+    text = np.array(uhrzeiten, dtype='U5')
+    if (np.char.str_len(text) != 5).any():
+        text = np.char.zfill(text, 5)  # '9:00' -> '09:00'
+    ziffern = text.view(np.int32).reshape(-1, 5) - ord('0')
+    return (ziffern[:, 0] * 10 + ziffern[:, 1]) * 60 + ziffern[:, 3] * 10 + ziffern[:, 4]
+
+
+def spalten_laden(conn: sqlite3.Connection, von: date, bis: date, tabelle: str = 'termine') -> Dict[str, np.ndarray]:
+    """Die Analyse-Spalten als Arrays; Tage seit 1970, Minuten seit Mitternacht, Vorlauf in Tagen"""
+    zeilen = conn.execute(SPALTEN_SQL.format(tabelle=tabelle), (str(von), str(bis))).fetchall()
+    if not zeilen:
+        leer = np.empty(0, dtype=np.int64)
+        return {'tag': leer, 'minute': leer, 'abgesagt': np.empty(0, dtype=bool),
+                'behandlung': np.empty(0, dtype=object), 'vorlauf': np.empty(0)}
+    datum, uhrzeit, abgesagt, behandlung, erstellt_am = zip(*zeilen)
+    tag = np.array(datum, dtype='datetime64[D]').astype(np.int64)
+    minute = _minuten(uhrzeit).astype(np.int64)
+    # erstellt_am ist UTC (CURRENT_TIMESTAMP) und kommt schon in Ortszeit wie datum/uhrzeit;
+    # fehlend wird NaT und damit NaN
+    erstellt = np.array(erstellt_am, dtype='datetime64[s]')
+    termin = (tag * 86400 + minute * 60).astype('datetime64[s]')
+    vorlauf = (termin - erstellt) / np.timedelta64(1, 'D')
+    return {
+        'tag': tag,
+        'minute': minute,
+        'abgesagt': np.array(abgesagt, dtype=bool),
+        'behandlung': np.array(behandlung, dtype=object),
+        'vorlauf': vorlauf,
+    }
+
+
+def _quote(teil: np.ndarray, gesamt: np.ndarray) -> np.ndarray:
+    return np.divide(teil, gesamt, out=np.zeros(len(gesamt)), where=gesamt > 0)
+
+
+def auswerten(spalten: Dict[str, np.ndarray], von: date, bis: date) -> Dict:
+    tag, minute, abgesagt = spalten['tag'], spalten['minute'], spalten['abgesagt']
+    wochentag = (tag + 3) % 7  # 1970-01-01 war ein Donnerstag; Montag = 0
+    slot = np.clip(minute // SLOT_MINUTEN, 0, SLOTS_PRO_TAG - 1)
+    aktiv = ~abgesagt
+
+    # Heatmap: gebuchte (nicht abgesagte) Termine pro Wochentag und Halbstunde
+    belegt = np.bincount(wochentag[aktiv] * SLOTS_PRO_TAG + slot[aktiv],
+                         minlength=7 * SLOTS_PRO_TAG).reshape(7, SLOTS_PRO_TAG)
+    alle_tage = np.arange(np.datetime64(von, 'D'), np.datetime64(bis, 'D') + 1).astype(np.int64)
+    vorkommen = np.bincount((alle_tage + 3) % 7, minlength=7)
+    # Ein Slot fasst einen bestätigten Termin; Auslastung = Buchungen / Anzahl dieser Wochentage
+    auslastung = belegt / np.maximum(vorkommen, 1)[:, None]
+    fenster = slice(ERSTER_SLOT, LETZTER_SLOT)
+
+    pro_wochentag = np.bincount(wochentag, minlength=7)
+    abgesagt_wochentag = np.bincount(wochentag, weights=abgesagt, minlength=7)
+
+    # Behandlungsarten als Codes, dann eine Matrix Monat × Behandlung
+    arten, code = np.unique(spalten['behandlung'].astype(str), return_inverse=True)
+    pro_art = np.bincount(code, minlength=len(arten))
+    abgesagt_art = np.bincount(code, weights=abgesagt, minlength=len(arten))
+    monat = tag.astype('datetime64[D]').astype('datetime64[M]')
+    erster_monat = np.datetime64(von, 'M')
+    monate = np.arange(erster_monat, np.datetime64(bis, 'M') + 1)
+    monat_index = (monat - erster_monat).astype(np.int64)
+    monatlich = np.bincount(monat_index * len(arten) + code,
+                            minlength=len(monate) * len(arten)).reshape(len(monate), len(arten))
+
+    # Vorlaufzeit: Buchung bis Termin, in Tagen
+    vorlauf = spalten['vorlauf']
+    vorlauf = vorlauf[np.isfinite(vorlauf) & (vorlauf >= 0)]
+    klassen = np.bincount(np.searchsorted(VORLAUF_GRENZEN, vorlauf, side='right'),
+                          minlength=len(VORLAUF_GRENZEN) + 1)
+    beschriftung = [f"< {g} Tag{'e' if g > 1 else ''}" for g in VORLAUF_GRENZEN] + [f"≥ {VORLAUF_GRENZEN[-1]} Tage"]
+
+    return {
+        'zeitraum': {'von': str(von), 'bis': str(bis)},
+        'termine': int(len(tag)),
+        'abgesagt': int(abgesagt.sum()),
+        'absagequote': round(float(abgesagt.mean()), 4) if len(tag) else 0.0,
+        'heatmap': {
+            'wochentage': list(WOCHENTAGE),
+            'slots': [f"{s * SLOT_MINUTEN // 60:02d}:{s * SLOT_MINUTEN % 60:02d}" for s in range(ERSTER_SLOT, LETZTER_SLOT)],
+            'termine': belegt[:, fenster].tolist(),
+            'auslastung': np.round(auslastung[:, fenster], 4).tolist(),
+        },
+        'absagequote_wochentag': dict(zip(WOCHENTAGE, np.round(_quote(abgesagt_wochentag, pro_wochentag), 4).tolist())),
+        'behandlungen': [
+            {'behandlungsart': art, 'termine': int(n), 'abgesagt': int(a), 'absagequote': round(float(q), 4)}
+            for art, n, a, q in zip(arten.tolist(), pro_art, abgesagt_art, _quote(abgesagt_art, pro_art))
+        ],
+        'behandlungen_monatlich': {
+            'monate': [str(m) for m in monate],
+            'reihen': {art: monatlich[:, i].tolist() for i, art in enumerate(arten.tolist())},
+        },
+        'vorlaufzeit': {
+            'median_tage': round(float(np.median(vorlauf)), 2) if len(vorlauf) else None,
+            'p90_tage': round(float(np.percentile(vorlauf, 90)), 2) if len(vorlauf) else None,
+            'verteilung': [{'klasse': k, 'anzahl': int(n)} for k, n in zip(beschriftung, klassen)],
+        },
+    }
+
+
+class Auslastungsanalyse:
+    """Berechnet die Analyse höchstens einmal pro (Zeitraum, Datenversion)"""
+
+    def __init__(self, max_eintraege: int = 16):
+        self.max_eintraege = max_eintraege
+        self._ergebnisse: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.berechnungen = 0
+
+    def berechnen(self, conn: sqlite3.Connection, von: date, bis: date, version: int,
+                  tabelle: str = 'termine') -> Dict:
+        schluessel = (von, bis, version)
+        with self._lock:
+            if schluessel in self._ergebnisse:
+                self._ergebnisse.move_to_end(schluessel)
+                return self._ergebnisse[schluessel]
+        ergebnis = auswerten(spalten_laden(conn, von, bis, tabelle), von, bis)
+        with self._lock:
+            self.berechnungen += 1
+            self._ergebnisse[schluessel] = ergebnis
+            while len(self._ergebnisse) > self.max_eintraege:
+                self._ergebnisse.popitem(last=False)
+        return ergebnis
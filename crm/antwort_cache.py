@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Kleiner Antwort-Cache für das CRM
+
+Einträge sind nach (Pfad, Query-String, Datenversion, Tag) geschlüsselt. Nach
+einer Änderung an `termine` passt kein alter Schlüssel mehr; veraltete
+Einträge fallen nach LRU-Regel heraus, ohne dass etwas invalidiert werden muss.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class AntwortCache:
+    """LRU-Cache für fertig gerenderte Antworten (Body, Mimetype, Zusatz-Header)"""
+
+    def __init__(self, max_eintraege: int = 128):
+        self.max_eintraege = max_eintraege
+        self._eintraege: 'OrderedDict[Hashable, Tuple[bytes, str, Dict[str, str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.treffer = 0
+        self.fehlschlaege = 0
+
+    def get(self, schluessel: Hashable) -> Optional[Tuple[bytes, str, Dict[str, str]]]:
+        with self._lock:
+            eintrag = self._eintraege.get(schluessel)
+            if eintrag is None:
+                self.fehlschlaege += 1
+                return None
+            self._eintraege.move_to_end(schluessel)
+            self.treffer += 1
+            return eintrag
+
+    def put(self, schluessel: Hashable, body: bytes, mimetype: str, header: Dict[str, str]) -> None:
+        with self._lock:
+            self._eintraege[schluessel] = (body, mimetype, header)
+            self._eintraege.move_to_end(schluessel)
+            while len(self._eintraege) > self.max_eintraege:
+                self._eintraege.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._eintraege)
@@ -4,22 +4,136 @@
 Zeigt Ihre persönlichen Termine in einer Web-Ansicht an
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, abort, make_response
 import sqlite3
+import json
 from datetime import datetime, timedelta
+from functools import wraps
 import os
 
+from aenderungs_feed import AenderungsFeed
+from antwort_cache import AntwortCache
+from export import csv_stream, xlsx_stream
+
+try:
+    from analytics import Auslastungsanalyse
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    print("Warning: numpy not available, utilization analytics disabled")
+from termine_query import (
+    GESAMT_ANSICHT, SEITENGROESSE, alle_zeilen, archive_anhaengen, datenversion, schema_einrichten, seite_laden,
+    termin_dict, zaehlen, zeitraum_filter
+)
+
 app = Flask(__name__)
 
 # Datenbank-Pfad (zeigt auf die Hauptdatenbank)
 DB_PATH = "../termine.db"
 
+# Datenbanken, für die Indizes, Rollup und Trigger schon angelegt sind
+_schema_bereit = set()
+
+# Gerenderte Antworten je (Pfad, Parameter, Datenversion, Tag)
+antwort_cache = AntwortCache()
+CACHE_HEADER = ('X-Next-Cursor', 'Link')
+
+# Ein Änderungs-Feed pro Datenbank, geteilt von allen SSE-Verbindungen
+_feeds = {}
+SSE_HEARTBEAT = 15.0
+
+# Auslastungsanalyse pro Datenbank; Ergebnisse gelten bis zur nächsten Datenversion
+_analysen = {}
+
 def get_db_connection():
     """Verbindung zur Datenbank herstellen"""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    if DB_PATH not in _schema_bereit:
+        schema_einrichten(conn)
+        _schema_bereit.add(DB_PATH)
     return conn
 
+def archiv_quelle(conn, zeitraum='alle'):
+    """(Tabelle, Archiv-Schemas) für eine Liste; Jahresarchive nur, wenn der Zeitraum in die Vergangenheit reicht"""
+    if zeitraum not in ('alle', 'vergangen'):
+        return 'termine', []
+    archive = archive_anhaengen(conn, DB_PATH)
+    return (GESAMT_ANSICHT if archive else 'termine'), archive
+
+def versioniert(view):
+    """ETag aus der Datenversion, 304 bei unveränderten Daten, Cache für den Rest
+
+    Die Antworten hängen auch vom heutigen Datum ab (Zeitraum-Filter), daher
+    gehört der Tag mit in ETag und Cache-Schlüssel. Last-Modified gibt es
+    bewusst nicht: mit Sekundenauflösung bestünde eine Antwort, die in derselben
+    Sekunde wie eine spätere Änderung entstand, die If-Modified-Since-Prüfung,
+    und der Client bekäme ein 304 auf veraltete Daten.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        conn = get_db_connection()
+        version, _ = datenversion(conn)
+        conn.close()
+        heute = datetime.now().date()
+        etag = f"v{version}-{heute:%Y%m%d}"
+
+        def conditional(response):
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+
+        if request.if_none_match.contains(etag):
+            return conditional(Response(status=304))
+
+        schluessel = (request.path, request.query_string, version, heute)
+        eintrag = antwort_cache.get(schluessel)
+        if eintrag is not None:
+            body, mimetype, header = eintrag
+            response = Response(body, mimetype=mimetype)
+            response.headers.update(header)
+            return conditional(response)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return response
+        antwort_cache.put(schluessel, response.get_data(), response.mimetype,
+                          {name: response.headers[name] for name in CACHE_HEADER if name in response.headers})
+        return conditional(response)
+    return wrapper
+
+def seiten_parameter():
+    """Cursor und Seitengröße aus der Anfrage; 400 bei ungültiger Größe"""
+    try:
+        limit = int(request.args.get('limit', SEITENGROESSE))
+    except ValueError:
+        abort(400, 'limit muss eine Zahl sein')
+    return request.args.get('nach') or None, limit
+
+def seite_oder_400(conn, bedingung, params, sortierung, tabelle='termine'):
+    nach, limit = seiten_parameter()
+    try:
+        return seite_laden(conn, bedingung, params, sortierung, nach=nach, limit=limit, tabelle=tabelle)
+    except ValueError as e:
+        conn.close()
+        abort(400, str(e))
+
+def patienten_filter(patient_name, telefon, zeitraum, heute):
+    """Suche nach Name oder Telefon plus Zeitraum; unbekannte Zeiträume zählen als 'zukunft'
+
+    Gilt für /meine_termine und /api/termine gleichermaßen, 'vergangen' liefert
+    also auch über die API vergangene Termine (früher dort: zukünftige).
+    """
+    if zeitraum not in ('alle', 'vergangen'):
+        zeitraum = 'zukunft'
+    bedingung, params = zeitraum_filter(zeitraum, heute)
+    such = "(patient_name LIKE ? OR telefon LIKE ?)"
+    such_params = (f'%{patient_name}%', f'%{telefon}%')
+    sortierung = 'datum_asc' if zeitraum == 'zukunft' else 'patient_desc'
+    if bedingung:
+        return f"{such} AND {bedingung}", such_params + params, sortierung
+    return such, such_params, sortierung
+
 @app.route('/')
 def index():
     """Hauptseite - CRM Dashboard Übersicht"""
@@ -31,65 +145,31 @@ def login():
     return render_template('login.html')
 
 @app.route('/alle_termine')
+@versioniert
 def alle_termine():
-    """Zeigt ALLE Termine im System - Vollständiges CRM"""
+    """Zeigt ALLE Termine im System - Vollständiges CRM, seitenweise"""
     zeitraum = request.args.get('zeitraum', 'alle')
     sortierung = request.args.get('sortierung', 'datum_desc')
+    heute = datetime.now().date()
 
     conn = get_db_connection()
-
-    # Zeitraum bestimmen
-    heute = datetime.now().date()
-    if zeitraum == 'heute':
-        query = "SELECT * FROM termine WHERE datum = ?"
-        params = (heute,)
-    elif zeitraum == 'zukunft':
-        query = "SELECT * FROM termine WHERE datum >= ?"
-        params = (heute,)
-    elif zeitraum == 'vergangen':
-        query = "SELECT * FROM termine WHERE datum < ?"
-        params = (heute,)
-    elif zeitraum == 'diese_woche':
-        woche_start = heute - timedelta(days=heute.weekday())
-        woche_ende = woche_start + timedelta(days=6)
-        query = "SELECT * FROM termine WHERE datum BETWEEN ? AND ?"
-        params = (woche_start, woche_ende)
-    else:  # alle
-        query = "SELECT * FROM termine"
-        params = ()
-
-    # Sortierung hinzufügen
-    if sortierung == 'datum_asc':
-        query += " ORDER BY datum ASC, uhrzeit ASC"
-    elif sortierung == 'datum_desc':
-        query += " ORDER BY datum DESC, uhrzeit DESC"
-    elif sortierung == 'name':
-        query += " ORDER BY patient_name ASC, datum ASC"
-    elif sortierung == 'status':
-        query += " ORDER BY status ASC, datum ASC"
-    else:
-        query += " ORDER BY datum DESC, uhrzeit DESC"
-
-    termine = conn.execute(query, params).fetchall()
+    tabelle, archive = archiv_quelle(conn, zeitraum)
+    bedingung, params = zeitraum_filter(zeitraum, heute)
+    termine, naechste_seite = seite_oder_400(conn, bedingung, params, sortierung, tabelle)
+    stats = zaehlen(conn, zeitraum, heute, archive)
     conn.close()
 
-    # Statistiken berechnen
-    total_termine = len(termine)
-    heute_termine = len([t for t in termine if t['datum'] == str(heute)])
-    zukunft_termine = len([t for t in termine if t['datum'] > str(heute)])
-
     return render_template('alle_termine.html',
                          termine=termine,
                          zeitraum=zeitraum,
                          sortierung=sortierung,
                          heute=heute,
-                         stats={
-                             'total': total_termine,
-                             'heute': heute_termine,
-                             'zukunft': zukunft_termine
-                         })
+                         naechste_seite=naechste_seite,
+                         erste_seite=not request.args.get('nach'),
+                         stats=stats)
 
 @app.route('/meine_termine')
+@versioniert
 def meine_termine():
     """Zeigt IHRE persönlichen Termine"""
     patient_name = request.args.get('patient_name', '')
@@ -99,24 +179,11 @@ def meine_termine():
     if not patient_name and not telefon:
         return redirect(url_for('index'))
     
-    conn = get_db_connection()
-    
-    # Zeitraum bestimmen
     heute = datetime.now().date()
-    if zeitraum == 'zukunft':
-        query = "SELECT * FROM termine WHERE (patient_name LIKE ? OR telefon LIKE ?) AND datum >= ? ORDER BY datum, uhrzeit"
-        params = (f'%{patient_name}%', f'%{telefon}%', heute)
-    elif zeitraum == 'alle':
-        query = "SELECT * FROM termine WHERE (patient_name LIKE ? OR telefon LIKE ?) ORDER BY datum DESC, uhrzeit"
-        params = (f'%{patient_name}%', f'%{telefon}%')
-    elif zeitraum == 'vergangen':
-        query = "SELECT * FROM termine WHERE (patient_name LIKE ? OR telefon LIKE ?) AND datum < ? ORDER BY datum DESC, uhrzeit"
-        params = (f'%{patient_name}%', f'%{telefon}%', heute)
-    else:
-        query = "SELECT * FROM termine WHERE (patient_name LIKE ? OR telefon LIKE ?) AND datum >= ? ORDER BY datum, uhrzeit"
-        params = (f'%{patient_name}%', f'%{telefon}%', heute)
-    
-    termine = conn.execute(query, params).fetchall()
+    conn = get_db_connection()
+    tabelle, _ = archiv_quelle(conn, zeitraum)
+    bedingung, params, sortierung = patienten_filter(patient_name, telefon, zeitraum, heute)
+    termine, naechste_seite = seite_oder_400(conn, bedingung, params, sortierung, tabelle)
     conn.close()
     
     return render_template('termine.html', 
@@ -124,13 +191,20 @@ def meine_termine():
                          patient_name=patient_name,
                          telefon=telefon,
                          zeitraum=zeitraum,
-                         heute=heute)
+                         heute=heute,
+                         naechste_seite=naechste_seite,
+                         erste_seite=not request.args.get('nach'))
 
 @app.route('/termin_details/<int:termin_id>')
+@versioniert
 def termin_details(termin_id):
     """Zeigt Details eines Termins"""
     conn = get_db_connection()
     termin = conn.execute('SELECT * FROM termine WHERE id = ?', (termin_id,)).fetchone()
+    if not termin:
+        tabelle, _ = archiv_quelle(conn)
+        if tabelle != 'termine':
+            termin = conn.execute(f'SELECT * FROM {tabelle} WHERE id = ?', (termin_id,)).fetchone()
     conn.close()
     
     if not termin:
@@ -138,45 +212,166 @@ def termin_details(termin_id):
     
     return render_template('termin_details.html', termin=termin)
 
+def export_stream(bedingung, params, sortierung, format_, zeitraum):
+    """Alle Treffer als NDJSON oder JSON-Array, Zeile für Zeile aus dem Cursor"""
+    conn = get_db_connection()
+    try:
+        tabelle, _ = archiv_quelle(conn, zeitraum)
+        if format_ == 'ndjson':
+            for termin in alle_zeilen(conn, bedingung, params, sortierung, tabelle=tabelle):
+                yield json.dumps(termin_dict(termin), ensure_ascii=False) + '\n'
+        else:
+            yield '['
+            trenner = ''
+            for termin in alle_zeilen(conn, bedingung, params, sortierung, tabelle=tabelle):
+                yield trenner + json.dumps(termin_dict(termin), ensure_ascii=False)
+                trenner = ','
+            yield ']'
+    finally:
+        conn.close()
+
 @app.route('/api/termine')
+@versioniert
 def api_termine():
-    """API-Endpunkt für Termine (JSON)"""
+    """API-Endpunkt für Termine (JSON)
+
+    Liefert eine Seite als Liste; der Cursor der nächsten Seite steht im
+    Header `X-Next-Cursor` (und als `Link: rel="next"`). Mit
+    `export=ndjson` oder `export=json` werden alle Treffer gestreamt.
+    """
     patient_name = request.args.get('patient_name', '')
     telefon = request.args.get('telefon', '')
     zeitraum = request.args.get('zeitraum', 'zukunft')
-    
-    conn = get_db_connection()
+    export = request.args.get('export')
     
     heute = datetime.now().date()
-    if zeitraum == 'zukunft':
-        query = "SELECT * FROM termine WHERE (patient_name LIKE ? OR telefon LIKE ?) AND datum >= ? ORDER BY datum, uhrzeit"
-        params = (f'%{patient_name}%', f'%{telefon}%', heute)
-    elif zeitraum == 'alle':
-        query = "SELECT * FROM termine WHERE (patient_name LIKE ? OR telefon LIKE ?) ORDER BY datum DESC, uhrzeit"
-        params = (f'%{patient_name}%', f'%{telefon}%')
-    else:
-        query = "SELECT * FROM termine WHERE (patient_name LIKE ? OR telefon LIKE ?) AND datum >= ? ORDER BY datum, uhrzeit"
-        params = (f'%{patient_name}%', f'%{telefon}%', heute)
-    
-    termine = conn.execute(query, params).fetchall()
+    bedingung, params, sortierung = patienten_filter(patient_name, telefon, zeitraum, heute)
+
+    if export in ('ndjson', 'json'):
+        mimetype = 'application/x-ndjson' if export == 'ndjson' else 'application/json'
+        return Response(export_stream(bedingung, params, sortierung, export, zeitraum), mimetype=mimetype)
+
+    conn = get_db_connection()
+    tabelle, _ = archiv_quelle(conn, zeitraum)
+    termine, naechste_seite = seite_oder_400(conn, bedingung, params, sortierung, tabelle)
     conn.close()
     
-    # Konvertiere zu JSON-Format
-    termine_list = []
-    for termin in termine:
-        termine_list.append({
-            'id': termin['id'],
-            'patient_name': termin['patient_name'],
-            'telefon': termin['telefon'],
-            'datum': termin['datum'],
-            'uhrzeit': termin['uhrzeit'],
-            'behandlungsart': termin['behandlungsart'],
-            'beschreibung': termin['beschreibung'],
-            'status': termin['status'],
-            'notizen': termin['notizen']
-        })
-    
-    return jsonify(termine_list)
+    response = jsonify([termin_dict(termin) for termin in termine])
+    if naechste_seite:
+        response.headers['X-Next-Cursor'] = naechste_seite
+        response.headers['Link'] = f'<{url_for("api_termine", **{**request.args.to_dict(), "nach": naechste_seite})}>; rel="next"'
+    return response
+
+EXPORT_FORMATE = {
+    'csv': (csv_stream, 'text/csv; charset=utf-8'),
+    'xlsx': (xlsx_stream, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+@app.route('/export/termine.<format_>')
+def export_termine(format_):
+    """Termine als CSV oder XLSX herunterladen - gleiche Filter wie 'Alle Termine'
+
+    Zusätzlich zu `zeitraum` und `sortierung` grenzen `von` und `bis`
+    (JJJJ-MM-TT, jeweils einschließlich) den Datumsbereich ein.
+    """
+    if format_ not in EXPORT_FORMATE:
+        abort(404)
+    zeitraum = request.args.get('zeitraum', 'alle')
+    sortierung = request.args.get('sortierung', 'datum_asc')
+    heute = datetime.now().date()
+
+    bedingung, params = zeitraum_filter(zeitraum, heute)
+    bedingungen, werte = ([bedingung] if bedingung else []), list(params)
+    for name, vergleich in (('von', '>='), ('bis', '<=')):
+        wert = request.args.get(name)
+        if wert:
+            try:
+                datetime.strptime(wert, '%Y-%m-%d')
+            except ValueError:
+                abort(400, f'{name} muss im Format JJJJ-MM-TT sein')
+            bedingungen.append(f"datum {vergleich} ?")
+            werte.append(wert)
+
+    schreiber, mimetype = EXPORT_FORMATE[format_]
+
+    def stream():
+        conn = get_db_connection()
+        try:
+            tabelle, _ = archiv_quelle(conn, zeitraum)
+            yield from schreiber(alle_zeilen(conn, ' AND '.join(bedingungen), tuple(werte), sortierung,
+                                             tabelle=tabelle))
+        finally:
+            conn.close()
+
+    dateiname = f"termine_{zeitraum}_{heute:%Y%m%d}.{format_}"
+    return Response(stream(), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{dateiname}"'})
+
+def auslastung_berechnen():
+    """Analyse für ?von=&bis= (Standard: letzte 12 Monate bis 90 Tage voraus)"""
+    if not HAS_NUMPY:
+        abort(503, 'Auslastungsanalyse benötigt numpy')
+    heute = datetime.now().date()
+    try:
+        von = datetime.strptime(request.args['von'], '%Y-%m-%d').date() if request.args.get('von') \
+            else heute - timedelta(days=365)
+        bis = datetime.strptime(request.args['bis'], '%Y-%m-%d').date() if request.args.get('bis') \
+            else heute + timedelta(days=90)
+    except ValueError:
+        abort(400, 'von und bis müssen im Format JJJJ-MM-TT sein')
+    if von > bis:
+        abort(400, 'von liegt nach bis')
+
+    analyse = _analysen.setdefault(DB_PATH, Auslastungsanalyse())
+    conn = get_db_connection()
+    try:
+        version, _ = datenversion(conn)
+        tabelle, _ = archiv_quelle(conn)
+        return analyse.berechnen(conn, von, bis, version, tabelle)
+    finally:
+        conn.close()
+
+@app.route('/api/auslastung')
+@versioniert
+def api_auslastung():
+    """Heatmap, Absagequoten, Behandlungen pro Monat und Vorlaufzeiten als JSON"""
+    return jsonify(auslastung_berechnen())
+
+@app.route('/auslastung')
+@versioniert
+def auslastung():
+    """Auslastung der Praxis: Heatmap Wochentag × Halbstunde und Behandlungsarten"""
+    return render_template('auslastung.html', analyse=auslastung_berechnen())
+
+def aenderungs_feed():
+    """Feed für die aktuelle Datenbank; beim ersten Abonnenten gestartet"""
+    feed = _feeds.get(DB_PATH)
+    if feed is None:
+        get_db_connection().close()  # Protokolltabelle und Trigger anlegen
+        feed = _feeds.setdefault(DB_PATH, AenderungsFeed(DB_PATH))
+    return feed.start()
+
+@app.route('/api/aenderungen')
+def aenderungen_stream():
+    """Server-Sent Events für neue, geänderte und abgesagte Termine sowie Patienten
+
+    Browser senden beim Wiederverbinden automatisch `Last-Event-ID`; alternativ
+    `?letzte_id=` für den ersten Aufruf.
+    """
+    letzte_id = request.headers.get('Last-Event-ID') or request.args.get('letzte_id')
+    try:
+        letzte_id = int(letzte_id) if letzte_id else None
+    except ValueError:
+        abort(400, 'Last-Event-ID muss eine Zahl sein')
+    ereignisse = aenderungs_feed().ereignisse(letzte_id, heartbeat=SSE_HEARTBEAT)
+
+    def stream():
+        yield 'retry: 3000\n\n'
+        for aenderung in ereignisse:
+            yield ': ping\n\n' if aenderung is None else aenderung.sse()
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 if __name__ == '__main__':
     print("🏥 CRM-Dashboard startet...")
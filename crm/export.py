@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Streaming-Export von Terminen als CSV oder XLSX
+
+Beide Formate werden blockweise erzeugt, während die Zeilen per `fetchmany`
+aus der Datenbank kommen. Der Speicherbedarf hängt nicht von der Anzahl der
+Termine ab.
+
+XLSX wird ohne Zusatzpaket geschrieben: das Arbeitsblatt ist SpreadsheetML mit
+Inline-Strings, das ZIP-Archiv entsteht mit `zipfile` direkt in den
+Antwort-Stream (Datendeskriptoren statt Zurückspulen).
+"""
+
+import csv
+import io
+import zipfile
+from typing import Iterable, Iterator, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# (Spalte in termine, Überschrift im Export)
+EXPORT_SPALTEN: Tuple[Tuple[str, str], ...] = (
+    ('id', 'ID'),
+    ('datum', 'Datum'),
+    ('uhrzeit', 'Uhrzeit'),
+    ('patient_name', 'Patient'),
+    ('telefon', 'Telefon'),
+    ('behandlungsart', 'Behandlung'),
+    ('status', 'Status'),
+    ('beschreibung', 'Beschreibung'),
+    ('notizen', 'Notizen'),
+)
+
+# Zeilen pro geschriebenem Block
+BLOCK = 500
+
+
+def _werte(termin) -> list:
+    return ['' if termin[spalte] is None else termin[spalte] for spalte, _ in EXPORT_SPALTEN]
+
+
+def csv_stream(termine: Iterable, block: int = BLOCK) -> Iterator[bytes]:
+    """CSV mit Semikolon und UTF-8-BOM, damit Excel Umlaute und Spalten richtig erkennt"""
+    puffer = io.StringIO()
+    writer = csv.writer(puffer, delimiter=';', lineterminator='\r\n')
+    puffer.write('\ufeff')
+    writer.writerow([titel for _, titel in EXPORT_SPALTEN])
+    for i, termin in enumerate(termine, 1):
+        writer.writerow(_werte(termin))
+        if i % block == 0:
+            yield puffer.getvalue().encode('utf-8')
+            puffer.seek(0)
+            puffer.truncate()
+    yield puffer.getvalue().encode('utf-8')
+
+
+class _Sammler(io.RawIOBase):
+    """Nicht zurückspulbares Ziel für zipfile; gibt geschriebene Bytes blockweise ab"""
+
+    def __init__(self):
+        self._teile = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, daten) -> int:
+        self._teile.append(bytes(daten))
+        return len(daten)
+
+    def abholen(self) -> bytes:
+        daten = b''.join(self._teile)
+        self._teile.clear()
+        return daten
+
+
+def _spalte(index: int) -> str:
+    name = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+
+def _zeile_xml(nummer: int, werte: Sequence) -> str:
+    zellen = []
+    for i, wert in enumerate(werte):
+        ref = f"{_spalte(i)}{nummer}"
+        if isinstance(wert, (int, float)) and not isinstance(wert, bool):
+            zellen.append(f'<c r="{ref}"><v>{wert}</v></c>')
+        else:
+            zellen.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(str(wert))}</t></is></c>')
+    return f'<row r="{nummer}">{"".join(zellen)}</row>'
+
+
+XLSX_RAHMEN = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/></Relationships>'),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Termine" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/></Relationships>'),
+}
+
+
+def xlsx_stream(termine: Iterable, block: int = BLOCK) -> Iterator[bytes]:
+    """Eine Arbeitsmappe mit dem Blatt 'Termine', während des Lesens komprimiert und ausgeliefert"""
+    ziel = _Sammler()
+    with zipfile.ZipFile(ziel, 'w', compression=zipfile.ZIP_DEFLATED) as archiv:
+        for name, inhalt in XLSX_RAHMEN.items():
+            archiv.writestr(name, inhalt)
+        yield ziel.abholen()
+
+        with archiv.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as blatt:
+            blatt.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        b'<sheetData>')
+            blatt.write(_zeile_xml(1, [titel for _, titel in EXPORT_SPALTEN]).encode('utf-8'))
+            zeilen = []
+            for nummer, termin in enumerate(termine, 2):
+                zeilen.append(_zeile_xml(nummer, _werte(termin)))
+                if len(zeilen) >= block:
+                    blatt.write(''.join(zeilen).encode('utf-8'))
+                    zeilen.clear()
+                    yield ziel.abholen()
+            blatt.write(''.join(zeilen).encode('utf-8'))
+            blatt.write(b'</sheetData></worksheet>')
+    yield ziel.abholen()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Abfragen für die CRM-Listen: Keyset-Pagination und Zähler aus einer Tages-Rollup-Tabelle
+
+Alle Listen werden seitenweise über einen Cursor auf den Sortierschlüssel
+(z.B. datum, uhrzeit, id) geladen. Die nächste Seite beginnt direkt hinter der
+letzten Zeile der vorherigen, ohne OFFSET. Die Kosten einer Seite hängen deshalb
+nicht von der Tabellengröße ab.
+
+Die Zähler (gesamt, heute, zukünftig) kommen aus `termine_tageszaehler`, einer
+Zeile pro Tag, die Trigger auf `termine` aktuell halten.
+
+Jede Änderung an `termine` erhöht außerdem per Trigger die Versionsnummer in
+`datenversion`. Daraus leitet das CRM das ETag ab. Weitere
+Trigger schreiben jede Änderung an `termine` und `patienten` in das
+Änderungsprotokoll `aenderungen`, das der SSE-Feed ausliefert.
+
+Alte Termine liegen in Jahresarchiven neben der Datenbank
+(archiv/termine_JJJJ.db, angelegt vom Archiv-Job in src/dental/termin_archiv.py).
+Listen, die in die Vergangenheit reichen, lesen über die temporäre Ansicht
+`termine_gesamt`, die `termine` und alle angehängten Jahrgänge vereint.
+"""
+
+import base64
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+SEITENGROESSE = 50
+MAX_SEITENGROESSE = 1000
+EXPORT_BATCH = 500
+
+# Sortierung -> Schlüsselspalten mit Richtung; id macht die Reihenfolge eindeutig
+SORTIERUNGEN: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    'datum_asc': (('datum', 'ASC'), ('uhrzeit', 'ASC'), ('id', 'ASC')),
+    'datum_desc': (('datum', 'DESC'), ('uhrzeit', 'DESC'), ('id', 'DESC')),
+    'name': (('patient_name', 'ASC'), ('datum', 'ASC'), ('uhrzeit', 'ASC'), ('id', 'ASC')),
+    'status': (('status', 'ASC'), ('datum', 'ASC'), ('uhrzeit', 'ASC'), ('id', 'ASC')),
+    # Patientensicht: neueste Tage zuerst, innerhalb eines Tages chronologisch
+    'patient_desc': (('datum', 'DESC'), ('uhrzeit', 'ASC'), ('id', 'ASC')),
+}
+# Schlüsselspalten, die in `termine` NOT NULL sind. Alle anderen können NULL sein (alte
+# Importe, fehlende Spalten im Archiv) und werden in ORDER BY und Cursor-Vergleich als
+# COALESCE(spalte, '') behandelt; ein Zeilenwert-Vergleich mit NULL ist nie wahr und
+# würde Zeilen überspringen.
+NICHT_NULL_SPALTEN = frozenset({'id', 'patient_name', 'datum', 'uhrzeit'})
+
+# Ablage der Jahresarchive wie in src/dental/termin_archiv.py (eigener Build-Kontext, daher hier nachgebildet)
+ARCHIV_VERZEICHNIS = 'archiv'
+GESAMT_ANSICHT = 'termine_gesamt'
+_JAHR_DATEI = re.compile(r'termine_(\d{4})\.db$')
+
+TERMIN_FELDER = ('id', 'patient_name', 'telefon', 'datum', 'uhrzeit', 'behandlungsart',
+                 'beschreibung', 'status', 'notizen')
+
+# Sekunden seit 1970 mit Millisekunden; unixepoch('subsec') gibt es erst ab SQLite 3.42
+JETZT_SQL = "(julianday('now') - 2440587.5) * 86400.0"
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS datenversion (tabelle TEXT PRIMARY KEY, version INTEGER NOT NULL, geaendert_am REAL NOT NULL)",
+    f"INSERT OR IGNORE INTO datenversion VALUES ('termine', 1, {JETZT_SQL})",
+    "CREATE INDEX IF NOT EXISTS idx_termine_datum_uhrzeit_id ON termine(datum, uhrzeit, id)",
+    "CREATE INDEX IF NOT EXISTS idx_termine_name_datum ON termine(patient_name, datum, uhrzeit, id)",
+    # Ersetzt durch den Ausdrucksindex, nach dem die Sortierung 'status' jetzt ordnet
+    "DROP INDEX IF EXISTS idx_termine_status_datum",
+    "CREATE INDEX IF NOT EXISTS idx_termine_status_sortierung ON termine(COALESCE(status, ''), datum, uhrzeit, id)",
+    """CREATE TRIGGER IF NOT EXISTS termine_tageszaehler_insert AFTER INSERT ON termine BEGIN
+           INSERT INTO termine_tageszaehler(datum, anzahl) VALUES (NEW.datum, 1)
+           ON CONFLICT(datum) DO UPDATE SET anzahl = anzahl + 1;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS termine_tageszaehler_delete AFTER DELETE ON termine BEGIN
+           UPDATE termine_tageszaehler SET anzahl = anzahl - 1 WHERE datum = OLD.datum;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS termine_tageszaehler_update AFTER UPDATE OF datum ON termine
+       WHEN OLD.datum IS NOT NEW.datum BEGIN
+           UPDATE termine_tageszaehler SET anzahl = anzahl - 1 WHERE datum = OLD.datum;
+           INSERT INTO termine_tageszaehler(datum, anzahl) VALUES (NEW.datum, 1)
+           ON CONFLICT(datum) DO UPDATE SET anzahl = anzahl + 1;
+       END""",
+] + [
+    f"""CREATE TRIGGER IF NOT EXISTS termine_version_{aktion.lower()} AFTER {aktion} ON termine BEGIN
+            UPDATE datenversion SET version = version + 1, geaendert_am = {JETZT_SQL} WHERE tabelle = 'termine';
+        END"""
+    for aktion in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+TERMIN_JSON = ("json_object('id', {z}.id, 'patient_name', {z}.patient_name, 'telefon', {z}.telefon, "
+               "'datum', {z}.datum, 'uhrzeit', {z}.uhrzeit, 'behandlungsart', {z}.behandlungsart, "
+               "'status', {z}.status)")
+PATIENT_JSON = "json_object('id', {z}.id, 'name', {z}.name, 'telefon', {z}.telefon)"
+
+
+def _protokoll_trigger(name: str, ereignis: str, tabelle: str, typ: str, zeile: str, daten: str,
+                       wenn: str = '') -> str:
+    return f"""CREATE TRIGGER IF NOT EXISTS {name} AFTER {ereignis} ON {tabelle} {wenn} BEGIN
+            INSERT INTO aenderungen (typ, zeile_id, daten, zeitpunkt)
+            VALUES ({typ}, {zeile}.id, {daten.format(z=zeile)}, {JETZT_SQL});
+        END"""
+
+
+# Append-only Änderungsprotokoll; seq ist die Event-ID des SSE-Feeds
+AENDERUNGS_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS aenderungen (
+           seq INTEGER PRIMARY KEY AUTOINCREMENT,
+           typ TEXT NOT NULL,
+           zeile_id INTEGER NOT NULL,
+           daten TEXT NOT NULL,
+           zeitpunkt REAL NOT NULL
+       )""",
+    _protokoll_trigger('aenderungen_termin_neu', 'INSERT', 'termine', "'termin_neu'", 'NEW', TERMIN_JSON),
+    _protokoll_trigger('aenderungen_termin_geaendert', 'UPDATE', 'termine',
+                       "CASE WHEN NEW.status = 'abgesagt' AND OLD.status IS NOT 'abgesagt' "
+                       "THEN 'termin_abgesagt' ELSE 'termin_geaendert' END", 'NEW', TERMIN_JSON),
+    # Solange der Archiv-Job (src/dental/termin_archiv.py) in seiner Transaktion eine Zeile in
+    # `archivlauf` hält, verschiebt er nur oder lässt Abgelaufenes weg; das ist keine Löschung,
+    # die Dashboards live sehen sollen. Andere Verbindungen sehen die Zeile nie.
+    "CREATE TABLE IF NOT EXISTS archivlauf (id INTEGER PRIMARY KEY)",
+    "DROP TRIGGER IF EXISTS aenderungen_termin_geloescht",
+    _protokoll_trigger('aenderungen_termin_geloescht', 'DELETE', 'termine', "'termin_geloescht'", 'OLD', TERMIN_JSON,
+                       'WHEN NOT EXISTS (SELECT 1 FROM archivlauf)'),
+]
+
+PATIENTEN_SCHEMA = [
+    _protokoll_trigger('aenderungen_patient_neu', 'INSERT', 'patienten', "'patient_neu'", 'NEW', PATIENT_JSON),
+    _protokoll_trigger('aenderungen_patient_geaendert', 'UPDATE', 'patienten', "'patient_geaendert'", 'NEW',
+                       PATIENT_JSON),
+    _protokoll_trigger('aenderungen_patient_geloescht', 'DELETE', 'patienten', "'patient_geloescht'", 'OLD',
+                       PATIENT_JSON),
+]
+
+
+def schema_einrichten(conn: sqlite3.Connection) -> None:
+    """Indizes, Rollup, Datenversion, Änderungsprotokoll und Trigger anlegen; der Rollup wird beim ersten Mal befüllt"""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'termine'").fetchone() is None:
+        raise sqlite3.OperationalError("Tabelle 'termine' fehlt - wurde die Terminverwaltung initialisiert?")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        neu = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'termine_tageszaehler'"
+        ).fetchone() is None
+        if neu:
+            conn.execute("CREATE TABLE termine_tageszaehler (datum TEXT PRIMARY KEY, anzahl INTEGER NOT NULL)")
+            conn.execute("INSERT INTO termine_tageszaehler SELECT datum, COUNT(*) FROM termine GROUP BY datum")
+        statements = SCHEMA + AENDERUNGS_SCHEMA
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patienten'").fetchone():
+            statements += PATIENTEN_SCHEMA
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _spalten(conn: sqlite3.Connection, schema: str) -> List[str]:
+    return [zeile[1] for zeile in conn.execute(f"PRAGMA {schema}.table_info(termine)")]
+
+
+def archive_anhaengen(conn: sqlite3.Connection, db_path: str) -> List[str]:
+    """Jahresarchive anhängen und `termine_gesamt` anlegen; gibt die Schema-Namen zurück, [] ohne Archiv"""
+    dateien = {}
+    for pfad in glob.glob(os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIV_VERZEICHNIS, 'termine_*.db')):
+        treffer = _JAHR_DATEI.search(pfad)
+        if treffer:
+            dateien[int(treffer.group(1))] = pfad
+    angehaengt = {zeile[1] for zeile in conn.execute("PRAGMA database_list")}
+    frei = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - len(angehaengt - {'main', 'temp'} - {
+        f"archiv_{jahr}" for jahr in dateien})
+    jahre = sorted(dateien)
+    if len(jahre) > frei:
+        logging.warning("%d Archiv-Jahrgänge, aber nur %d anhängbar; ältere werden nicht gelesen", len(jahre), frei)
+        jahre = jahre[len(jahre) - frei:] if frei > 0 else []
+
+    schemas = []
+    for jahr in jahre:
+        schema = f"archiv_{jahr}"
+        if schema not in angehaengt:
+            conn.execute("ATTACH DATABASE ? AS " + schema, (dateien[jahr],))
+        schemas.append(schema)
+    if not schemas:
+        return []
+
+    spalten = _spalten(conn, 'main')
+    teile = [f"SELECT {', '.join(spalten)} FROM main.termine"]
+    for schema in schemas:
+        vorhanden = set(_spalten(conn, schema))
+        teile.append(f"SELECT {', '.join(s if s in vorhanden else f'NULL AS {s}' for s in spalten)} FROM {schema}.termine")
+    conn.execute(f"DROP VIEW IF EXISTS temp.{GESAMT_ANSICHT}")
+    conn.execute(f"CREATE TEMP VIEW {GESAMT_ANSICHT} AS " + " UNION ALL ".join(teile))
+    return schemas
+
+
+def datenversion(conn: sqlite3.Connection) -> Tuple[int, float]:
+    """(Version, Zeitpunkt der letzten Änderung als Unix-Zeit) der Tabelle termine"""
+    return tuple(conn.execute("SELECT version, geaendert_am FROM datenversion WHERE tabelle = 'termine'").fetchone())
+
+
+def zeitraum_filter(zeitraum: str, heute: date) -> Tuple[str, tuple]:
+    """WHERE-Bedingung auf `datum` für einen Zeitraum; passt auf termine und den Rollup"""
+    if zeitraum == 'heute':
+        return "datum = ?", (str(heute),)
+    if zeitraum == 'zukunft':
+        return "datum >= ?", (str(heute),)
+    if zeitraum == 'vergangen':
+        return "datum < ?", (str(heute),)
+    if zeitraum == 'diese_woche':
+        woche_start = heute - timedelta(days=heute.weekday())
+        return "datum BETWEEN ? AND ?", (str(woche_start), str(woche_start + timedelta(days=6)))
+    return "", ()
+
+
+def zaehlen(conn: sqlite3.Connection, zeitraum: str, heute: date, archive: Sequence[str] = ()) -> Dict[str, int]:
+    """Gesamt/heute/zukünftig für den Zeitraum, summiert über Tage statt über Termine
+
+    Angehängte Archive zählen per Index mit; archivierte Termine liegen immer
+    in der Vergangenheit, tragen also nur zu `total` bei.
+    """
+    bedingung, params = zeitraum_filter(zeitraum, heute)
+    where = f"WHERE {bedingung}" if bedingung else ""
+    total, heute_anzahl, zukunft = conn.execute(
+        f"""SELECT COALESCE(SUM(anzahl), 0),
+                   COALESCE(SUM(CASE WHEN datum = ? THEN anzahl END), 0),
+                   COALESCE(SUM(CASE WHEN datum > ? THEN anzahl END), 0)
+            FROM termine_tageszaehler {where}""",
+        (str(heute), str(heute)) + params
+    ).fetchone()
+    for schema in archive:
+        total += conn.execute(f"SELECT COUNT(*) FROM {schema}.termine {where}", params).fetchone()[0]
+    return {'total': total, 'heute': heute_anzahl, 'zukunft': zukunft}
+
+
+def _sortierausdruck(spalte: str) -> str:
+    return spalte if spalte in NICHT_NULL_SPALTEN else f"COALESCE({spalte}, '')"
+
+
+def cursor_kodieren(zeile, schluessel: Sequence[Tuple[str, str]]) -> str:
+    # Werte wie der Sortierausdruck sie sieht, also NULL als ''
+    werte = ['' if zeile[spalte] is None else zeile[spalte] for spalte, _ in schluessel]
+    return base64.urlsafe_b64encode(json.dumps(werte).encode()).decode().rstrip('=')
+
+
+def cursor_dekodieren(token: str, schluessel: Sequence[Tuple[str, str]]) -> list:
+    """Gibt die Schlüsselwerte zurück; ValueError bei kaputtem oder fremdem Cursor"""
+    try:
+        werte = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Ungültiger Cursor: {token}") from e
+    if not isinstance(werte, list) or len(werte) != len(schluessel):
+        raise ValueError(f"Ungültiger Cursor: {token}")
+    return werte
+
+
+def _nach_bedingung(schluessel: Sequence[Tuple[str, str]], werte: list) -> Tuple[str, list]:
+    """Bedingung 'liegt hinter dem Cursor' für die gegebene Sortierung"""
+    richtungen = {richtung for _, richtung in schluessel}
+    spalten = [_sortierausdruck(spalte) for spalte, _ in schluessel]
+    if len(richtungen) == 1:
+        # Zeilenwert-Vergleich; SQLite nutzt dafür den passenden Index als Range-Scan
+        op = '>' if richtungen == {'ASC'} else '<'
+        platzhalter = ', '.join('?' * len(werte))
+        bedingung, params = f"({', '.join(spalten)}) {op} ({platzhalter})", list(werte)
+        if schluessel[0][0] not in NICHT_NULL_SPALTEN:
+            # Auf Ausdrucksindizes sucht SQLite nur über eine Bedingung der ersten Spalte
+            bedingung = f"{spalten[0]} {op}= ? AND {bedingung}"
+            params.insert(0, werte[0])
+        return bedingung, params
+
+    teile, params = [], []
+    for i, (spalte, (_, richtung)) in enumerate(zip(spalten, schluessel)):
+        gleich = [f"{s} = ?" for s in spalten[:i]]
+        teile.append('(' + ' AND '.join(gleich + [f"{spalte} {'>' if richtung == 'ASC' else '<'} ?"]) + ')')
+        params.extend(werte[:i + 1])
+    return '(' + ' OR '.join(teile) + ')', params
+
+
+def _abfrage(bedingungen: List[str], sortierung: str,
+             tabelle: str = 'termine') -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    schluessel = SORTIERUNGEN.get(sortierung, SORTIERUNGEN['datum_desc'])
+    where = f" WHERE {' AND '.join(bedingungen)}" if bedingungen else ""
+    order = ', '.join(f"{_sortierausdruck(spalte)} {richtung}" for spalte, richtung in schluessel)
+    return f"SELECT * FROM {tabelle}{where} ORDER BY {order}", schluessel
+
+
+def seite_laden(conn: sqlite3.Connection, bedingung: str, params: tuple, sortierung: str,
+                nach: Optional[str] = None, limit: int = SEITENGROESSE,
+                tabelle: str = 'termine') -> Tuple[List[sqlite3.Row], Optional[str]]:
+    """Eine Seite ab dem Cursor `nach`; zweiter Wert ist der Cursor der nächsten Seite oder None
+
+    `tabelle` ist `termine` oder, mit angehängtem Archiv, `termine_gesamt`.
+    """
+    limit = max(1, min(limit, MAX_SEITENGROESSE))
+    schluessel = SORTIERUNGEN.get(sortierung, SORTIERUNGEN['datum_desc'])
+    bedingungen, werte = ([bedingung] if bedingung else []), list(params)
+    if nach:
+        nach_sql, nach_params = _nach_bedingung(schluessel, cursor_dekodieren(nach, schluessel))
+        bedingungen.append(nach_sql)
+        werte.extend(nach_params)
+
+    query, schluessel = _abfrage(bedingungen, sortierung, tabelle)
+    zeilen = conn.execute(f"{query} LIMIT ?", werte + [limit + 1]).fetchall()
+    if len(zeilen) <= limit:
+        return zeilen, None
+    zeilen = zeilen[:limit]
+    return zeilen, cursor_kodieren(zeilen[-1], schluessel)
+
+
+def alle_zeilen(conn: sqlite3.Connection, bedingung: str, params: tuple, sortierung: str,
+                batch: int = EXPORT_BATCH, tabelle: str = 'termine') -> Iterator[sqlite3.Row]:
+    """Alle passenden Zeilen in `fetchmany`-Blöcken; der Speicherbedarf bleibt konstant"""
+    query, _ = _abfrage([bedingung] if bedingung else [], sortierung, tabelle)
+    cursor = conn.execute(query, params)
+    while True:
+        zeilen = cursor.fetchmany(batch)
+        if not zeilen:
+            return
+        yield from zeilen
+
+
+def termin_dict(termin) -> Dict:
+    return {feld: termin[feld] for feld in TERMIN_FELDER}
@@ -9,6 +9,13 @@ class SofiaWebSocketClient {
         this.isConnected = false;
         this.isRecording = false;
         this.clientId = null;
+        this.audioTransport = 'json';
+        this.pendingAudioFormat = null;
+        
+        // Sentence chunks of one reply are played back to back
+        this.playbackQueue = [];
+        this.isPlaying = false;
+        this.currentAudio = null;
         
         // Audio setup
         this.audioContext = null;
@@ -30,6 +37,9 @@ class SofiaWebSocketClient {
         this.maxReconnectAttempts = 5;
         this.reconnectDelay = 1000;
         
+        // Session to resume after a reconnect (may land on another worker)
+        this.sessionId = null;
+        
         // Statistics
         this.stats = {
             messagesReceived: 0,
@@ -152,6 +162,8 @@ class SofiaWebSocketClient {
             
             // Create WebSocket connection
             this.ws = new WebSocket(this.wsUrl);
+            this.ws.binaryType = 'arraybuffer';
+            this.audioTransport = 'json';
             
             this.ws.onopen = () => {
                 console.log('✅ WebSocket connected');
@@ -166,7 +178,11 @@ class SofiaWebSocketClient {
             };
             
             this.ws.onmessage = (event) => {
-                this.handleMessage(JSON.parse(event.data));
+                if (event.data instanceof ArrayBuffer) {
+                    this.handleBinaryFrame(event.data);
+                } else {
+                    this.handleMessage(JSON.parse(event.data));
+                }
             };
             
             this.ws.onclose = (event) => {
@@ -240,6 +256,30 @@ class SofiaWebSocketClient {
                 this.clientId = message.client_id;
                 this.addMessage('system', message.message);
                 this.showCapabilities(message.capabilities);
+                this.negotiateAudioTransport(message.capabilities);
+                if (this.sessionId) {
+                    this.sendMessage({ type: 'resume', session_id: this.sessionId });
+                } else {
+                    this.sessionId = message.session_id;
+                }
+                break;
+                
+            case 'resumed':
+                this.addMessage('system', `Gespräch fortgesetzt (${message.history_length} Nachrichten)`);
+                break;
+                
+            case 'resume_failed':
+                this.sessionId = message.session_id;
+                break;
+                
+            case 'session_closed':
+                // Idle timeout or server memory limit; the close code decides about reconnecting
+                this.addMessage('system', `Verbindung vom Server beendet (${message.reason})`);
+                break;
+                
+            case 'configured':
+                this.audioTransport = message.audio_transport;
+                console.log('🔧 Audio transport:', this.audioTransport);
                 break;
                 
             case 'status':
@@ -255,7 +295,26 @@ class SofiaWebSocketClient {
                 break;
                 
             case 'sofia_audio':
-                this.playAudio(message.audio_data, message.format);
+                if (message.transport === 'binary') {
+                    // Raw audio follows in the next binary frame
+                    this.pendingAudioFormat = message.format;
+                } else {
+                    this.playAudio(message.audio_data, message.format);
+                }
+                break;
+                
+            case 'barge_in':
+                // Caller interrupted Sofia: stop speaking immediately
+                this.stopPlayback();
+                break;
+                
+            case 'busy':
+                // Server is throttling this client or shedding load
+                this.addMessage('system', message.message);
+                break;
+                
+            case 'turn_timing':
+                console.log(`⏱️ Turn ${message.trace_id}:`, message.spans);
                 break;
                 
             case 'appointment_response':
@@ -281,6 +340,22 @@ class SofiaWebSocketClient {
         this.updateDebugInfo();
     }
     
+    negotiateAudioTransport(capabilities) {
+        const transports = (capabilities && capabilities.audio_transports) || [];
+        if (transports.includes('binary')) {
+            this.sendMessage({ type: 'configure', audio_transport: 'binary' });
+        }
+    }
+    
+    handleBinaryFrame(buffer) {
+        this.stats.messagesReceived++;
+        this.stats.lastActivity = new Date();
+        
+        const format = this.pendingAudioFormat || 'mp3';
+        this.pendingAudioFormat = null;
+        this.playAudioBlob(new Blob([buffer], { type: `audio/${format}` }));
+    }
+    
     async toggleRecording() {
         if (this.isRecording) {
             this.stopRecording();
@@ -351,8 +426,18 @@ class SofiaWebSocketClient {
     
     async sendAudioChunk(audioBlob) {
         try {
-            // Convert blob to base64
             const arrayBuffer = await audioBlob.arrayBuffer();
+            
+            if (this.audioTransport === 'binary') {
+                // Raw bytes, no base64 overhead
+                if (this.ws && this.isConnected) {
+                    this.ws.send(arrayBuffer);
+                    this.stats.audioChunksSent++;
+                }
+                return;
+            }
+            
+            // Legacy JSON transport: convert to base64
             const base64Audio = btoa(String.fromCharCode(...new Uint8Array(arrayBuffer)));
             
             // Send to server
@@ -406,27 +491,70 @@ class SofiaWebSocketClient {
                 audioArray[i] = audioData.charCodeAt(i);
             }
             
-            const audioBlob = new Blob([audioArray], { type: `audio/${format}` });
+            this.playAudioBlob(new Blob([audioArray], { type: `audio/${format}` }));
+            
+        } catch (error) {
+            console.error('❌ Audio processing failed:', error);
+            this.addMessage('error', 'Audio-Verarbeitung fehlgeschlagen');
+        }
+    }
+    
+    playAudioBlob(audioBlob) {
+        this.playbackQueue.push(audioBlob);
+        if (!this.isPlaying) {
+            this.playNextChunk();
+        }
+    }
+    
+    playNextChunk() {
+        const audioBlob = this.playbackQueue.shift();
+        if (!audioBlob) {
+            this.isPlaying = false;
+            return;
+        }
+        
+        const announce = !this.isPlaying;
+        this.isPlaying = true;
+        
+        try {
             const audioUrl = URL.createObjectURL(audioBlob);
             
-            // Create and play audio element
+            // Create and play audio element; the next sentence starts when this one ends
             const audio = new Audio(audioUrl);
+            this.currentAudio = audio;
             audio.onended = () => {
                 URL.revokeObjectURL(audioUrl);
+                this.currentAudio = null;
+                this.playNextChunk();
             };
             
             audio.play().then(() => {
-                console.log('🔊 Playing Sofia audio response');
-                this.addMessage('system', '🔊 Sofia spricht...');
+                if (announce) {
+                    console.log('🔊 Playing Sofia audio response');
+                    this.addMessage('system', '🔊 Sofia spricht...');
+                }
             }).catch(error => {
                 console.error('❌ Audio playback failed:', error);
                 this.addMessage('error', 'Audio-Wiedergabe fehlgeschlagen');
+                URL.revokeObjectURL(audioUrl);
+                this.playNextChunk();
             });
             
         } catch (error) {
             console.error('❌ Audio processing failed:', error);
             this.addMessage('error', 'Audio-Verarbeitung fehlgeschlagen');
+            this.playNextChunk();
+        }
+    }
+    
+    stopPlayback() {
+        this.playbackQueue = [];
+        this.pendingAudioFormat = null;
+        if (this.currentAudio) {
+            this.currentAudio.pause();
+            this.currentAudio = null;
         }
+        this.isPlaying = false;
     }
     
     addMessage(type, content) {
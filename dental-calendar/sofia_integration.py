@@ -12,9 +12,13 @@ logger = logging.getLogger(__name__)
 class DentalCalendarClient:
     """Client für das Dental Calendar System"""
     
-    def __init__(self, calendar_url: str = "http://localhost:3005"):
+    def __init__(self, calendar_url: str = "http://localhost:3005", max_connections: int = 20):
         self.calendar_url = calendar_url
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # Keep-alive pool; only reusable while every call runs on the same event loop
+        self.client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
     
     async def book_appointment(
         self,
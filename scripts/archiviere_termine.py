@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Nächtlicher Archiv-Job: alte Termine in Jahresarchive verschieben, abgelaufene löschen
+
+    python scripts/archiviere_termine.py --db termine.db --nach-tagen 365 --aufbewahrung-jahre 10
+
+Per Cron, z.B. täglich um 3 Uhr:
+
+    0 3 * * * cd /app && python scripts/archiviere_termine.py --db termine.db
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.dental.termin_archiv import ARCHIV_NACH_TAGEN, AUFBEWAHRUNG_JAHRE, BATCH, TerminArchiv, archiv_verzeichnis
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Termine archivieren und Aufbewahrungsfrist durchsetzen')
+    parser.add_argument('--db', default='termine.db', help='Haupt-Datenbank')
+    parser.add_argument('--nach-tagen', type=int, default=ARCHIV_NACH_TAGEN,
+                        help='Termine älter als so viele Tage archivieren')
+    parser.add_argument('--aufbewahrung-jahre', type=int, default=AUFBEWAHRUNG_JAHRE,
+                        help='Termine älter als so viele Jahre endgültig löschen')
+    parser.add_argument('--batch', type=int, default=BATCH, help='Zeilen pro Transaktion')
+    args = parser.parse_args()
+
+    archiv = TerminArchiv(args.db, nach_tagen=args.nach_tagen, aufbewahrung_jahre=args.aufbewahrung_jahre,
+                          batch=args.batch)
+    ergebnis = archiv.ausfuehren()
+
+    for jahr, anzahl in ergebnis['verschoben'].items():
+        print(f"📦 {jahr}: {anzahl} Termine archiviert")
+    print(f"🗑️ {ergebnis['geloescht']} Termine nach Ablauf der Aufbewahrungsfrist gelöscht")
+    print(f"✅ Archiv: {archiv_verzeichnis(args.db)}")
+
+
+if __name__ == '__main__':
+    main()
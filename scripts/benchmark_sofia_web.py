@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Lastmessung für sofia_web.py: Requests pro Sekunde und p95-Latenz
+
+Vergleicht die aiohttp-Anwendung (eine Event-Loop, geteilter Kalender-Client)
+mit dem früheren Flask-Muster, das pro Request eine neue Event-Loop erzeugt
+und wieder schließt. Die Kalender-Endpoints werden nur gemessen, wenn die
+Kalender-Integration (httpx) verfügbar ist; sie laufen dann gegen einen
+lokalen Stub-Kalender.
+
+    python scripts/benchmark_sofia_web.py --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+from aiohttp import ClientSession, TCPConnector, web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sofia_web
+from src.bridge.tracing import percentile
+
+try:
+    from flask import Flask, jsonify, request
+    from werkzeug.serving import make_server
+    HAS_FLASK = True
+except ImportError:
+    HAS_FLASK = False
+    print("Warning: flask not installed, skipping the per-request event loop baseline")
+
+TERMIN = {'name': 'Last Test', 'phone': '030 1234567', 'date': '2030-01-07', 'time': '09:00'}
+
+
+class ServerLoop:
+    """Event-Loop in einem Daemon-Thread, auf der die gemessenen Server laufen"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name='benchmark-server-loop', daemon=True).start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+server_loop = ServerLoop()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def endpoints():
+    result = [('chat', 'POST', '/api/chat', {'message': 'Wie sind Ihre Öffnungszeiten?'})]
+    if sofia_web.CALENDAR_AVAILABLE:
+        result.append(('book_appointment', 'POST', '/api/book_appointment', TERMIN))
+        result.append(('available_times', 'GET', '/api/available_times/2030-01-07', None))
+    return result
+
+
+def create_legacy_app():
+    """Die bisherigen Flask-Handler: neue Event-Loop pro Request"""
+    app = Flask(__name__)
+
+    def run_in_new_loop(coro):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    @app.route('/api/chat', methods=['POST'])
+    def chat():
+        response = run_in_new_loop(sofia_web.sofia.process_message(request.get_json()['message']))
+        return jsonify({'response': response})
+
+    @app.route('/api/book_appointment', methods=['POST'])
+    def book_appointment():
+        data = request.get_json()
+        result = run_in_new_loop(sofia_web.schedule_appointment_calendar(
+            data['name'], data['phone'], data['date'], data['time'], 'Beratung'))
+        return jsonify({'success': True, 'message': result})
+
+    @app.route('/api/available_times/<date>')
+    def available_times(date):
+        return jsonify({'times': run_in_new_loop(sofia_web.get_available_times_calendar(date))})
+
+    return app
+
+
+def start_legacy_server(port: int):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', port, create_legacy_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def start_aiohttp_server(port: int):
+    runner = web.AppRunner(sofia_web.create_app())
+
+    async def start():
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+
+    server_loop.run(start())
+    return lambda: server_loop.run(runner.cleanup())
+
+
+def start_calendar_stub():
+    """Minimaler Kalender mit leerem Terminbuch"""
+    async def appointments(request):
+        return web.json_response([])
+
+    async def book(request):
+        return web.json_response({'success': True, 'message': 'Termin gebucht'})
+
+    app = web.Application()
+    app.router.add_get('/api/appointments', appointments)
+    app.router.add_post('/api/sofia/appointment', book)
+    port = free_port()
+    runner = web.AppRunner(app)
+
+    async def start():
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+
+    server_loop.run(start())
+    sofia_web.calendar_client.calendar_url = f"http://127.0.0.1:{port}"
+
+
+async def measure(base_url: str, method: str, path: str, payload, total: int, concurrency: int):
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as session:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                async with session.request(method, base_url + path, json=payload) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'rps': round(total / elapsed),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'errors': errors,
+    }
+
+
+def run_benchmark(total: int, concurrency: int):
+    if sofia_web.CALENDAR_AVAILABLE:
+        start_calendar_stub()
+
+    servers = []
+    if HAS_FLASK:
+        servers.append(('flask, neue Loop pro Request', start_legacy_server))
+    servers.append(('aiohttp, eine Loop', start_aiohttp_server))
+
+    results = {}
+    for label, start in servers:
+        port = free_port()
+        stop = start(port)
+        try:
+            for name, method, path, payload in endpoints():
+                # Warm-up, then the measured run
+                asyncio.run(measure(f"http://127.0.0.1:{port}", method, path, payload, concurrency * 5, concurrency))
+                results[(label, name)] = asyncio.run(
+                    measure(f"http://127.0.0.1:{port}", method, path, payload, total, concurrency))
+        finally:
+            stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark der sofia_web.py-Endpoints')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests pro Endpoint')
+    parser.add_argument('--concurrency', type=int, default=20, help='Gleichzeitige Verbindungen')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.requests, args.concurrency)
+    print(f"{'Server':<32} {'Endpoint':<18} {'RPS':>7} {'p50 ms':>8} {'p95 ms':>8} {'Fehler':>7}")
+    for (label, name), r in results.items():
+        print(f"{label:<32} {name:<18} {r['rps']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Massenimport von Altterminen in die Terminverwaltung
+
+Liest CSV (Komma, Semikolon oder Tab; auch der CRM-Export) oder JSONL und
+schreibt abgelehnte Zeilen mit Grund in eine Seitendatei.
+
+    python scripts/importiere_termine.py altdaten.csv --db termine.db --ablehnungen abgelehnt.csv
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.dental.appointment_manager import AppointmentManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Termine aus CSV oder JSONL importieren')
+    parser.add_argument('datei', help='CSV- oder JSONL-Datei')
+    parser.add_argument('--db', default='termine.db', help='Ziel-Datenbank')
+    parser.add_argument('--format', dest='format_', choices=('csv', 'jsonl'),
+                        help='Eingabeformat (Standard: nach Dateiendung)')
+    parser.add_argument('--ablehnungen', help='Datei für abgelehnte Zeilen (Standard: <datei>.abgelehnt.<endung>)')
+    parser.add_argument('--batch', type=int, default=20000, help='Zeilen pro Transaktion')
+    parser.add_argument('--ohne-belegungspruefung', action='store_true',
+                        help='Doppelt belegte Slots nicht ablehnen')
+    args = parser.parse_args()
+
+    basis, endung = os.path.splitext(args.datei)
+    ablehnungen = args.ablehnungen or f"{basis}.abgelehnt{endung or '.csv'}"
+
+    ergebnis = AppointmentManager(args.db).termine_importieren(
+        args.datei, format_=args.format_, ablehnungen=ablehnungen, batch=args.batch,
+        belegung_pruefen=not args.ohne_belegungspruefung,
+        fortschritt=lambda stand: print(f"... {stand}", flush=True))
+
+    print(f"✅ {ergebnis}")
+    if ergebnis.abgelehnt:
+        print(f"⚠️ Abgelehnte Zeilen: {ablehnungen}")
+    else:
+        os.remove(ablehnungen)
+
+
+if __name__ == '__main__':
+    main()
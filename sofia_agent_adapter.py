@@ -82,6 +82,7 @@ from src.dental.dental_tools import (
 )
 
 from src.agent.prompts import AGENT_INSTRUCTION, SESSION_INSTRUCTION
+from src.bridge.admission import BUSY_MESSAGE, ConcurrencyLimit, RateLimiter
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -208,6 +209,10 @@ class SofiaAgentAdapter:
         self.response_generator = ResponseGenerator()
         self.executor = ThreadPoolExecutor(max_workers=5)
         
+        # Admission control: messages per session, and turns in flight across all sessions
+        self.rate_limiter = RateLimiter({'message': (2.0, 5.0)})
+        self.concurrency = ConcurrencyLimit(limit=5, max_waiting=10)
+        
         # Sofia tools registry with metadata
         self.sofia_tools = {
             'greeting': {
@@ -279,7 +284,8 @@ class SofiaAgentAdapter:
             'errors': 0,
             'tool_usage': {},
             'average_response_time': 0.0,
-            'active_sessions': 0
+            'active_sessions': 0,
+            'rejected_requests': 0
         }
         
         logger.info(f"Sofia Agent Adapter initialized with {len(self.sofia_tools)} tools")
@@ -295,7 +301,7 @@ class SofiaAgentAdapter:
         self.sessions[session_id] = context
         self.stats['active_sessions'] = len(self.sessions)
         
-        logger.info(f"Created new session: {session_id}")
+        logger.info("Created new session: %s", session_id)
         return context
     
     def get_session(self, session_id: str) -> Optional[ConversationContext]:
@@ -321,7 +327,26 @@ class SofiaAgentAdapter:
     async def process_message(self, session_id: str, user_message: str) -> Dict[str, Any]:
         """
         Process user message and generate appropriate response
+        
+        Sessions over their message rate, or arriving while every slot and the
+        wait queue are taken, get a polite "please wait" instead.
         """
+        admission = self.concurrency.admit() if self.rate_limiter.allow(session_id, 'message') else None
+        if admission is None:
+            self.stats['rejected_requests'] += 1
+            logger.warning(f"Session {session_id}: request rejected by admission control")
+            return {
+                'success': False,
+                'message': BUSY_MESSAGE,
+                'intent': 'busy',
+                'session_id': session_id
+            }
+        
+        async with admission:
+            return await self._process_message(session_id, user_message)
+    
+    async def _process_message(self, session_id: str, user_message: str) -> Dict[str, Any]:
+        """Classify the message, run the matching handler and record it in the session"""
         start_time = datetime.now()
         self.stats['total_requests'] += 1
         
@@ -340,7 +365,7 @@ class SofiaAgentAdapter:
             intent, confidence = self.intent_classifier.classify_intent(user_message)
             session.current_intent = intent
             
-            logger.info(f"Session {session_id}: Intent '{intent}' (confidence: {confidence:.2f})")
+            logger.info("Session %s: Intent '%s' (confidence: %.2f)", session_id, intent, confidence)
             
             # Process based on intent
             response = await self._process_intent(session, user_message, intent, confidence)
@@ -590,7 +615,7 @@ class SofiaAgentAdapter:
                 ]
             }
             
-        } except Exception as e:
+        except Exception as e:
             logger.error(f"Error handling clinic info: {e}")
             return {
                 'success': False,
@@ -741,7 +766,7 @@ Sagen Sie einfach, womit ich Ihnen helfen kann!"""
                 self.stats['tool_usage'][tool_name] = 0
             self.stats['tool_usage'][tool_name] += 1
             
-            logger.info(f"Executed Sofia tool '{tool_name}' for session {session.session_id}")
+            logger.info("Executed Sofia tool '%s' for session %s", tool_name, session.session_id)
             
             return result if result else {'success': False, 'message': 'Tool returned no result'}
             
@@ -814,6 +839,11 @@ Sagen Sie einfach, womit ich Ihnen helfen kann!"""
                 'session_id': session_id
             }
     
+    def end_session(self, session_id: str):
+        """Forget a session whose client disconnected"""
+        self.sessions.pop(session_id, None)
+        self.rate_limiter.forget(session_id)
+    
     def cleanup_old_sessions(self, max_age_hours: int = 24):
         """Clean up old inactive sessions"""
         cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
@@ -2,14 +2,19 @@
 """
 Sofia Web Interface - Deutsche Zahnarzt-Assistentin
 Web-basierte Version mit Text-Interface und Kalender-Integration
+
+Läuft als aiohttp-Anwendung auf einer einzigen, langlebigen Event-Loop. Der
+Kalender-Client (httpx-Verbindungspool) wird von allen Requests geteilt und
+beim Herunterfahren geschlossen. Alle Handler sind async; synchrone Aufrufer
+der Kalender-Funktionen gibt es nicht mehr.
 """
-from flask import Flask, render_template, request, jsonify
-from flask_cors import CORS
-import asyncio
 import os
 import sys
+import time
 from datetime import datetime
 
+from aiohttp import web
+
 # Add path for imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
@@ -17,6 +22,7 @@ sys.path.append(os.path.join(current_dir, 'dental-calendar'))
 
 try:
     from sofia_integration import (
+        calendar_client,
         schedule_appointment_calendar,
         check_appointments_calendar,
         get_available_times_calendar
@@ -26,8 +32,8 @@ except ImportError:
     CALENDAR_AVAILABLE = False
     print("⚠️ Kalender-Integration nicht verfügbar")
 
-app = Flask(__name__)
-CORS(app, origins=['http://localhost:3005', 'http://localhost:5001'])
+ALLOWED_ORIGINS = {'http://localhost:3005', 'http://localhost:5001'}
+TEMPLATE_PATH = os.path.join(current_dir, 'templates', 'sofia.html')
 
 class SofiaWebAgent:
     def __init__(self):
@@ -123,96 +129,105 @@ Bus: Linie 100, 200 (Haltestelle Hauptstraße)
 
 sofia = SofiaWebAgent()
 
-@app.route('/')
-def index():
+
+@web.middleware
+async def cors_middleware(request, handler):
+    """CORS für die Kalender-Oberfläche und die eigene Seite"""
+    origin = request.headers.get('Origin')
+    if request.method == 'OPTIONS' and origin in ALLOWED_ORIGINS:
+        response = web.Response()
+        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+        response.headers['Access-Control-Allow-Headers'] = request.headers.get(
+            'Access-Control-Request-Headers', 'Content-Type')
+    else:
+        response = await handler(request)
+    if origin in ALLOWED_ORIGINS:
+        response.headers['Access-Control-Allow-Origin'] = origin
+        response.headers['Vary'] = 'Origin'
+    return response
+
+
+async def read_json(request) -> dict:
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def index(request):
     """Hauptseite"""
-    return render_template('sofia.html')
+    return web.FileResponse(TEMPLATE_PATH)
+
 
-@app.route('/api/chat', methods=['POST'])
-def chat():
+async def chat(request):
     """Chat-Endpoint"""
-    data = request.get_json()
+    data = await read_json(request)
     message = data.get('message', '')
-    
+
     if not message:
-        return jsonify({'error': 'Keine Nachricht erhalten'}), 400
-    
+        return web.json_response({'error': 'Keine Nachricht erhalten'}, status=400)
+
     try:
-        # Process message asynchronously
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        response = loop.run_until_complete(sofia.process_message(message))
-        loop.close()
-        
-        return jsonify({
+        response = await sofia.process_message(message)
+        return web.json_response({
             'response': response,
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
-        return jsonify({'error': f'Fehler: {str(e)}'}), 500
+        return web.json_response({'error': f'Fehler: {str(e)}'}, status=500)
 
-@app.route('/api/book_appointment', methods=['POST'])
-def book_appointment():
+
+async def book_appointment(request):
     """Termin buchen"""
     if not CALENDAR_AVAILABLE:
-        return jsonify({'error': 'Kalender-System nicht verfügbar'}), 503
-    
-    data = request.get_json()
+        return web.json_response({'error': 'Kalender-System nicht verfügbar'}, status=503)
+
+    data = await read_json(request)
     name = data.get('name')
     phone = data.get('phone')
     date = data.get('date')
-    time = data.get('time')
+    time_ = data.get('time')
     treatment = data.get('treatment', 'Beratung')
-    
+
     if not all([name, phone, date]):
-        return jsonify({'error': 'Name, Telefon und Datum sind erforderlich'}), 400
-    
+        return web.json_response({'error': 'Name, Telefon und Datum sind erforderlich'}, status=400)
+
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(
-            schedule_appointment_calendar(name, phone, date, time, treatment)
-        )
-        loop.close()
-        
-        return jsonify({
+        result = await schedule_appointment_calendar(name, phone, date, time_, treatment)
+        return web.json_response({
             'success': True,
             'message': result
         })
     except Exception as e:
-        return jsonify({'error': f'Fehler beim Buchen: {str(e)}'}), 500
+        return web.json_response({'error': f'Fehler beim Buchen: {str(e)}'}, status=500)
+
 
-@app.route('/api/available_times/<date>')
-def available_times(date):
+async def available_times(request):
     """Verfügbare Zeiten abrufen"""
     if not CALENDAR_AVAILABLE:
-        return jsonify({'error': 'Kalender-System nicht verfügbar'}), 503
-    
+        return web.json_response({'error': 'Kalender-System nicht verfügbar'}, status=503)
+
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(get_available_times_calendar(date))
-        loop.close()
-        
-        return jsonify({
+        result = await get_available_times_calendar(request.match_info['date'])
+        return web.json_response({
             'times': result
         })
     except Exception as e:
-        return jsonify({'error': f'Fehler: {str(e)}'}), 500
+        return web.json_response({'error': f'Fehler: {str(e)}'}, status=500)
+
 
-@app.route('/api/livekit-token', methods=['POST'])
-def get_livekit_token():
+async def get_livekit_token(request):
     """Generate LiveKit token for calendar integration"""
     try:
-        data = request.json
+        data = await read_json(request)
         identity = data.get('identity', 'calendar-user')
         room = data.get('room', 'sofia-room')
-        
+
         # For development, return a test token
         # In production, generate a proper token using LiveKit SDK
         import jwt
-        import time
-        
+
         token_data = {
             "exp": int(time.time()) + 86400,  # 24 hours
             "iss": "devkey",
@@ -222,19 +237,37 @@ def get_livekit_token():
                 "roomJoin": True
             }
         }
-        
+
         token = jwt.encode(token_data, "secret", algorithm="HS256")
-        
-        return jsonify({
+
+        return web.json_response({
             'token': token,
             'url': 'ws://localhost:7880'
         })
     except Exception as e:
-        return jsonify({'error': f'Token generation failed: {str(e)}'}), 500
+        return web.json_response({'error': f'Token generation failed: {str(e)}'}, status=500)
+
+
+async def close_calendar_client(app):
+    """Verbindungspool des Kalender-Clients beim Herunterfahren schließen"""
+    if CALENDAR_AVAILABLE:
+        await calendar_client.close()
+
+
+def create_app() -> web.Application:
+    app = web.Application(middlewares=[cors_middleware])
+    app.router.add_get('/', index)
+    app.router.add_post('/api/chat', chat)
+    app.router.add_post('/api/book_appointment', book_appointment)
+    app.router.add_get('/api/available_times/{date}', available_times)
+    app.router.add_post('/api/livekit-token', get_livekit_token)
+    app.on_cleanup.append(close_calendar_client)
+    return app
+
 
 if __name__ == '__main__':
     print("Sofia Web Interface startet...")
     print("Öffnen Sie: http://localhost:5001")
     print("Kalender-Integration:", "Verfügbar" if CALENDAR_AVAILABLE else "Nicht verfügbar")
-    
-    app.run(host='0.0.0.0', port=5001, debug=True)
+
+    web.run_app(create_app(), host='0.0.0.0', port=5001)
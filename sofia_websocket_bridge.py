@@ -15,13 +15,28 @@ import io
 import wave
 import base64
 from datetime import datetime
-from typing import Dict, Set, Optional, Any
+from http import HTTPStatus
+from typing import Dict, List, Set, Optional, Any, Union, Callable
 import concurrent.futures
 import signal
 import sys
 import os
+import uuid
+from functools import partial
 from pathlib import Path
 
+from src.bridge.admission import BUSY_MESSAGE, DEFAULT_RATE_LIMITS, ConcurrencyLimit, RateLimiter
+from src.bridge.audio_buffer import AudioRingBuffer, PCM_BYTES_PER_SECOND
+from src.bridge.cluster import SessionRegistry, create_reuseport_socket, run_workers
+from src.bridge.reaper import SessionReaper, SweepResult, session_bytes
+from src.bridge.outbound import ClientWriter
+from src.bridge.pipeline import SessionPipeline
+from src.bridge.tracing import TraceRecorder, TurnTrace
+from src.bridge.stt import CallableSTTBackend, StreamingTranscriber, STTBackend, create_stt_backend
+from src.bridge.tts import GoogleTTSBackend, TTSBackend, TTSPipeline, create_tts_backend
+from src.bridge.tts_cache import TTSCache, phrase_catalog
+from src.utils.log_setup import bind_log_context, setup_logging
+
 # Audio processing imports
 try:
     import speech_recognition as sr
@@ -51,32 +66,122 @@ except ImportError:
     HAS_GOOGLE_TTS = False
     print("Warning: Google TTS not available")
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('sofia_websocket_bridge.log'),
-        logging.StreamHandler()
-    ]
-)
+try:
+    from src.bridge.vad import StreamingVAD
+    HAS_VAD = True
+except ImportError:
+    HAS_VAD = False
+    print("Warning: numpy not available, using fixed-size audio segmentation")
+
+try:
+    from src.bridge.audio_format import AudioNormalizer, SAMPLE_FORMATS, SUPPORTED_SAMPLE_RATES
+    HAS_AUDIO_NORMALIZER = True
+except ImportError:
+    HAS_AUDIO_NORMALIZER = False
+    print("Warning: numpy not available, audio must be sent as 16 kHz mono int16")
+
+try:
+    from sofia_agent_adapter import sofia_adapter
+    HAS_SOFIA_ADAPTER = True
+except ImportError:
+    HAS_SOFIA_ADAPTER = False
+    print("Warning: Sofia agent adapter not available, using keyword responses")
+
+# Logging is configured by main() through src/utils/log_setup.py
 logger = logging.getLogger(__name__)
 
+LOG_FILE = 'sofia_websocket_bridge.log'
+
+# Audio transport negotiated per client. JSON carries base64 audio inside
+# control messages (legacy clients); binary sends raw audio as WebSocket
+# binary frames while control messages stay JSON.
+AUDIO_TRANSPORT_JSON = 'json'
+AUDIO_TRANSPORT_BINARY = 'binary'
+SUPPORTED_AUDIO_TRANSPORTS = (AUDIO_TRANSPORT_JSON, AUDIO_TRANSPORT_BINARY)
+
+# Without VAD, transcribe once ~1 second of 16 kHz int16 audio is buffered
+TRANSCRIPTION_THRESHOLD_BYTES = 32000
+
+# Conversation turns kept in the shared registry for resume after a reconnect
+RESUME_HISTORY_LIMIT = 50
+STATS_PUBLISH_INTERVAL = 2.0
+
+# How often idle sessions are closed and memory caps enforced
+REAPER_INTERVAL = 5.0
+
+# Plain HTTP GET on the WebSocket port serving per-stage turn latency percentiles
+LATENCY_PATH = '/latency'
+
+# Rate-limit kind of each JSON message type; everything else counts as 'control'
+MESSAGE_RATE_KINDS = {'audio_chunk': 'audio', 'text_message': 'text'}
+# A throttled client is told to wait at most once per interval
+BUSY_NOTICE_INTERVAL = 1.0
+
 class SofiaWebSocketBridge:
     """Main WebSocket bridge server for Sofia voice agent integration"""
     
-    def __init__(self, host='localhost', port=8081):
+    def __init__(self, host='localhost', port=8081, audio_buffer_seconds: int = 10,
+                 vad_config: Optional[Dict] = None, stt_backend: Optional[str] = None,
+                 partial_interval_ms: Optional[int] = None, partial_window_ms: int = 3000,
+                 tts_backend: Optional[str] = None, tts_parallel: int = 3,
+                 tts_cache: Optional[TTSCache] = None, outbound_config: Optional[Dict] = None,
+                 agent_adapter: Any = None, registry: Optional[SessionRegistry] = None,
+                 worker_id: Optional[str] = None, reaper: Optional[SessionReaper] = None,
+                 rate_limits: Optional[Dict] = None, stt_concurrency: Optional[int] = None,
+                 tts_concurrency: Optional[int] = None, admission_queue: Optional[int] = None):
         self.host = host
         self.port = port
+        self.audio_buffer_capacity = PCM_BYTES_PER_SECOND * audio_buffer_seconds
+        self.vad_config = vad_config or {}
+        # Partial transcripts need the VAD to know where an utterance starts; 0 disables them
+        if partial_interval_ms is None:
+            partial_interval_ms = int(os.getenv('SOFIA_STT_PARTIAL_MS', '500'))
+        self.partial_interval_ms = partial_interval_ms if HAS_VAD else 0
+        self.partial_window_ms = partial_window_ms
         self.clients: Dict[str, websockets.WebSocketServerProtocol] = {}
+        # One writer task per connection; see src/bridge/outbound.py
+        self.writers: Dict[str, ClientWriter] = {}
+        self.outbound_config = outbound_config or {
+            'lag_budget_ms': int(os.getenv('SOFIA_LAG_BUDGET_MS', '2000')),
+            'lag_grace_ms': int(os.getenv('SOFIA_LAG_GRACE_MS', '5000')),
+        }
         self.sofia_sessions: Dict[str, Dict] = {}
         self.running = False
         
+        # Multi-process mode: sessions and stats are shared through the registry
+        self.registry = registry
+        self.worker_id = worker_id or f"pid{os.getpid()}"
+        
+        # Idle timeout plus per-session and global memory caps; see src/bridge/reaper.py
+        self.reaper = reaper or SessionReaper(
+            idle_timeout=float(os.getenv('SOFIA_IDLE_TIMEOUT', '300')),
+            max_history=int(os.getenv('SOFIA_MAX_HISTORY', '40')),
+            memory_budget=int(os.getenv('SOFIA_MEMORY_BUDGET_MB', '256')) * 1024 * 1024
+        )
+        self.session_bytes = 0
+        
+        # Admission control: per-client token buckets, global STT/TTS slots; see src/bridge/admission.py
+        if rate_limits is None:
+            rate_limits = {**DEFAULT_RATE_LIMITS, **{
+                kind: tuple(limit) for kind, limit in json.loads(os.getenv('SOFIA_RATE_LIMITS', '{}')).items()
+            }}
+        self.rate_limiter = RateLimiter(rate_limits)
+        admission_queue = admission_queue if admission_queue is not None else int(os.getenv('SOFIA_ADMISSION_QUEUE', '8'))
+        self.stt_limit = ConcurrencyLimit(stt_concurrency or int(os.getenv('SOFIA_STT_CONCURRENCY', '4')),
+                                          admission_queue)
+        self.tts_limit = ConcurrencyLimit(tts_concurrency or int(os.getenv('SOFIA_TTS_CONCURRENCY', '4')),
+                                          admission_queue)
+        
+        # Per-turn latency traces; see src/bridge/tracing.py
+        self.tracer = TraceRecorder(capacity=int(os.getenv('SOFIA_TRACE_BUFFER', '1000')),
+                                    prefix=f"{self.worker_id}-")
+        
         # Audio processing setup
         self.audio_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
         self.speech_recognizer = sr.Recognizer() if HAS_SPEECH_RECOGNITION else None
         
         # Sofia agent integration
+        self.agent_adapter = agent_adapter or (sofia_adapter if HAS_SOFIA_ADAPTER else None)
         self.sofia_bridge_queue = queue.Queue()
         self.sofia_response_queue = queue.Queue()
         
@@ -85,11 +190,39 @@ class SofiaWebSocketBridge:
             'connections': 0,
             'messages_processed': 0,
             'audio_chunks_processed': 0,
+            'audio_bytes_received': 0,
+            'audio_bytes_sent': 0,
+            'audio_bytes_dropped': 0,
+            'binary_clients': 0,
+            'vad_segments': 0,
+            'vad_silence_bytes_dropped': 0,
+            'stt_partials_sent': 0,
+            'tts_chunks_sent': 0,
+            'tts_failures': 0,
+            'outbound_dropped': 0,
+            'slow_client_disconnects': 0,
+            'barge_ins': 0,
+            'sessions_resumed': 0,
+            'resume_failures': 0,
+            'rate_limited': 0,
+            'stt_shed': 0,
+            'tts_shed': 0,
+            'agent_shed': 0,
+            'sessions_reaped': 0,
+            'sessions_evicted': 0,
+            'bytes_reclaimed': 0,
+            'audio_bytes_discarded': 0,
             'errors': 0,
             'start_time': time.time()
         }
         
         self.setup_audio_services()
+        self.stt_backend = self.select_stt_backend(stt_backend or os.getenv('SOFIA_STT_BACKEND', 'auto'))
+        self.tts_backend = self.select_tts_backend(tts_backend or os.getenv('SOFIA_TTS_BACKEND', 'auto'))
+        self.tts_cache = tts_cache or self.create_tts_cache()
+        self.tts_pipeline = (TTSPipeline(self.tts_backend, self.audio_executor, tts_parallel, self.tts_cache,
+                                         concurrency=self.tts_limit)
+                             if self.tts_backend else None)
         
     def setup_audio_services(self):
         """Initialize audio processing services"""
@@ -132,20 +265,84 @@ class SofiaWebSocketBridge:
             except Exception as e:
                 logger.error(f"Pygame initialization failed: {e}")
 
-    async def start_server(self):
-        """Start the WebSocket server"""
-        logger.info(f"🚀 Starting Sofia WebSocket Bridge on {self.host}:{self.port}")
+    def select_stt_backend(self, name: str) -> Optional[STTBackend]:
+        """Resolve the configured speech-to-text backend"""
+        if name == 'auto':
+            if HAS_OPENAI and os.getenv('OPENAI_API_KEY'):
+                name = 'whisper'
+            elif HAS_SPEECH_RECOGNITION:
+                name = 'google'
+            else:
+                logger.warning("No transcription service available")
+                return None
+        
+        if name == 'whisper':
+            backend = CallableSTTBackend('whisper', self.transcribe_with_whisper)
+        elif name == 'google':
+            backend = CallableSTTBackend('google', self.transcribe_with_google)
+        else:
+            backend = create_stt_backend(name)
+        
+        logger.info(f"🎤 STT backend: {backend.name}")
+        return backend
+
+    def select_tts_backend(self, name: str) -> Optional[TTSBackend]:
+        """Resolve the configured text-to-speech backend"""
+        if name == 'auto':
+            name = 'google' if self.tts_client else 'none'
+        
+        if name == 'none':
+            logger.info("⚠️ No TTS backend, replies are sent as text only")
+            return None
+        if name == 'google':
+            if not self.tts_client:
+                logger.warning("Google TTS requested but not configured")
+                return None
+            backend = GoogleTTSBackend(self.tts_client, self.tts_voice, self.tts_config)
+        else:
+            backend = create_tts_backend(name)
+        
+        logger.info(f"🔊 TTS backend: {backend.name}")
+        return backend
+
+    def create_tts_cache(self) -> TTSCache:
+        """TTS cache from SOFIA_TTS_CACHE_DIR / SOFIA_TTS_CACHE_MB; an empty dir keeps it in memory only"""
+        disk_dir = os.getenv('SOFIA_TTS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tts_cache'))
+        disk_mb = int(os.getenv('SOFIA_TTS_CACHE_MB', '256'))
+        return TTSCache(disk_dir=disk_dir or None, disk_bytes=disk_mb * 1024 * 1024)
+
+    async def warmup_tts_cache(self) -> Dict:
+        """Pre-synthesize Sofia's fixed phrases into the TTS cache"""
+        if not self.tts_pipeline:
+            logger.warning("No TTS backend configured, nothing to warm up")
+            return {'sentences': 0, 'synthesized': 0, 'failed': 0}
+        
+        result = await self.tts_pipeline.warmup(phrase_catalog())
+        logger.info(f"🔥 TTS cache warmup: {result['sentences']} sentences, "
+                    f"{result['synthesized']} synthesized, {result['failed']} failed")
+        return result
+
+    async def start_server(self, sock=None):
+        """Start the WebSocket server, optionally on a pre-bound (SO_REUSEPORT) socket"""
+        logger.info(f"🚀 Starting Sofia WebSocket Bridge on {self.host}:{self.port} ({self.worker_id})")
         
         # Start Sofia agent bridge in background
         self.sofia_thread = threading.Thread(target=self.sofia_agent_bridge, daemon=True)
         self.sofia_thread.start()
         
         self.running = True
+        self.reaper_task = asyncio.ensure_future(self.reap_periodically())
+        if self.registry:
+            self.stats_task = asyncio.ensure_future(self.publish_stats_periodically())
         
-        async with websockets.serve(self.handle_client, self.host, self.port):
+        serve = (websockets.serve(self.handle_client, sock=sock, process_request=self.process_http_request)
+                 if sock is not None else
+                 websockets.serve(self.handle_client, self.host, self.port, process_request=self.process_http_request))
+        async with serve:
             logger.info("✅ Sofia WebSocket Bridge is running!")
             logger.info(f"🌐 Connect browsers to: ws://{self.host}:{self.port}")
             logger.info("📊 Health check: http://localhost:3005/sofia-websocket-test.html")
+            logger.info(f"⏱️ Turn latency: http://{self.host}:{self.port}{LATENCY_PATH}")
             
             # Keep server running
             try:
@@ -154,33 +351,45 @@ class SofiaWebSocketBridge:
                 logger.info("🛑 Shutting down Sofia WebSocket Bridge...")
                 await self.shutdown()
 
-    async def handle_client(self, websocket, path):
+    async def handle_client(self, websocket, path=None):
         """Handle individual client connections"""
         client_id = f"client_{int(time.time() * 1000)}_{id(websocket)}"
         self.clients[client_id] = websocket
+        writer = ClientWriter(websocket, client_id, on_disconnect=self.on_slow_client, **self.outbound_config)
+        self.writers[client_id] = writer
+        writer.start()
         self.stats['connections'] += 1
         
-        logger.info(f"👤 New client connected: {client_id}")
+        logger.info("👤 New client connected: %s", client_id)
         
         # Initialize client session
-        self.sofia_sessions[client_id] = {
-            'conversation_history': [],
-            'context': {'language': 'de', 'mode': 'dental_receptionist'},
-            'last_activity': time.time(),
-            'audio_buffer': b'',
-            'transcription_queue': []
-        }
+        session = self.sofia_sessions[client_id] = self.new_session()
+        # Inherited by the writer and pipeline tasks created below
+        bind_log_context(call_id=client_id, session_id=session['session_id'])
+        session['pipeline'] = self.create_pipeline(client_id)
+        session['pipeline'].start()
         
         try:
             # Send welcome message
             await self.send_to_client(client_id, {
                 'type': 'connected',
                 'client_id': client_id,
+                'session_id': session['session_id'],
+                'worker_id': self.worker_id,
                 'message': 'Mit Sofia WebSocket Bridge verbunden!',
                 'capabilities': {
-                    'transcription': HAS_OPENAI or HAS_SPEECH_RECOGNITION,
-                    'text_to_speech': HAS_GOOGLE_TTS,
-                    'audio_playback': HAS_PYGAME
+                    'transcription': self.stt_backend is not None,
+                    'partial_transcription': bool(self.stt_backend and self.partial_interval_ms),
+                    'text_to_speech': self.tts_backend is not None,
+                    'streaming_speech': self.tts_backend is not None,
+                    'audio_playback': HAS_PYGAME,
+                    'audio_transports': list(SUPPORTED_AUDIO_TRANSPORTS),
+                    'audio_formats': {
+                        'sample_rates': list(SUPPORTED_SAMPLE_RATES),
+                        'sample_formats': list(SAMPLE_FORMATS),
+                        'channels': [1, 2],
+                        'agc': True
+                    } if HAS_AUDIO_NORMALIZER else None
                 }
             })
             
@@ -189,7 +398,7 @@ class SofiaWebSocketBridge:
                 await self.process_client_message(client_id, message)
                 
         except websockets.exceptions.ConnectionClosed:
-            logger.info(f"👋 Client disconnected: {client_id}")
+            logger.info("👋 Client disconnected: %s", client_id)
         except Exception as e:
             logger.error(f"❌ Error handling client {client_id}: {e}")
             self.stats['errors'] += 1
@@ -197,24 +406,148 @@ class SofiaWebSocketBridge:
             # Cleanup
             if client_id in self.clients:
                 del self.clients[client_id]
+            self.rate_limiter.forget(client_id)
+            writer = self.writers.pop(client_id, None)
+            if writer:
+                self.stats['outbound_dropped'] += writer.dropped_messages
+                writer.stop()
             if client_id in self.sofia_sessions:
-                del self.sofia_sessions[client_id]
+                session = self.sofia_sessions.pop(client_id)
+                if session['audio_transport'] == AUDIO_TRANSPORT_BINARY:
+                    self.stats['binary_clients'] -= 1
+                self.close_partial_stream(session)
+                if session['pipeline']:
+                    await session['pipeline'].stop()
+                if self.registry:
+                    self.persist_session(session)
+                    self.registry.release_session(session['session_id'], self.worker_id)
+                if self.agent_adapter and hasattr(self.agent_adapter, 'end_session'):
+                    self.agent_adapter.end_session(session['session_id'])
 
-    async def process_client_message(self, client_id: str, message: str):
+    def new_session(self) -> Dict:
+        """Create the per-client session state"""
+        return {
+            # Survives reconnects: a client resumes with it, possibly on another worker
+            'session_id': uuid.uuid4().hex,
+            'conversation_history': [],
+            'context': {'language': 'de', 'mode': 'dental_receptionist'},
+            'last_activity': time.time(),
+            'audio_buffer': AudioRingBuffer(self.audio_buffer_capacity),
+            'audio_transport': AUDIO_TRANSPORT_JSON,
+            'vad': StreamingVAD(**self.vad_config) if HAS_VAD else None,
+            # Converts the format declared in `configure` to 16 kHz mono int16
+            'normalizer': None,
+            'speaking': False,
+            'utterance_seq': 0,
+            # perf_counter() at speech onset; becomes the start of the turn's trace
+            'utterance_started_at': None,
+            'busy_notified_at': 0.0,
+            'stt_stream': None,
+            'stt_partial_task': None,
+            # Created per connection in handle_client; without one turns run inline
+            'pipeline': None
+        }
+
+    def create_pipeline(self, client_id: str) -> SessionPipeline:
+        """Wire the STT, agent and TTS stages of one session"""
+        async def transcribe(audio: bytes, utterance: Optional[int]) -> Optional[str]:
+            return await self.transcribe_turn(client_id, audio, utterance)
+        
+        async def respond(text: str) -> Optional[str]:
+            return await self.respond_turn(client_id, text)
+        
+        async def speak(text: str):
+            await self.stream_speech(client_id, text)
+        
+        async def turn_done(trace: TurnTrace):
+            await self.finish_turn(client_id, trace)
+        
+        return SessionPipeline(client_id, transcribe, respond, speak if self.tts_pipeline else None,
+                               on_turn_done=turn_done)
+
+    async def finish_turn(self, client_id: str, trace: TurnTrace):
+        """Record a finished turn and tell the client where its time went"""
+        self.tracer.finish(trace)
+        await self.send_to_client(client_id, {'type': 'turn_timing', **trace.to_dict()})
+
+    async def process_http_request(self, connection, request):
+        """
+        Answer plain HTTP requests for the latency endpoint; anything else continues as WebSocket
+
+        websockets >= 14 calls this with (connection, request) and expects a Response;
+        the legacy server of 11-13 calls it with (path, headers) and expects a
+        (status, headers, body) tuple.
+        """
+        legacy = isinstance(connection, str)
+        path, _, query = (connection if legacy else request.path).partition('?')
+        if path != LATENCY_PATH:
+            return None
+        recent = 0
+        for parameter in query.split('&'):
+            name, _, value = parameter.partition('=')
+            if name == 'recent' and value.isdigit():
+                recent = min(int(value), self.tracer.traces.maxlen)
+        body = {
+            'worker_id': self.worker_id,
+            'turns': len(self.tracer.traces),
+            'spans': self.tracer.percentiles(),
+        }
+        if recent:
+            body['recent'] = self.tracer.recent(recent)
+        if legacy:
+            return HTTPStatus.OK, [('Content-Type', 'application/json')], json.dumps(body).encode()
+        response = connection.respond(HTTPStatus.OK, json.dumps(body))
+        del response.headers['Content-Type']
+        response.headers['Content-Type'] = 'application/json'
+        return response
+
+    async def handle_barge_in(self, client_id: str, session: Dict):
+        """Caller started speaking: stop Sofia if she is still talking"""
+        pipeline = session['pipeline']
+        if pipeline and pipeline.barge_in():
+            self.stats['barge_ins'] += 1
+            logger.info("✋ Barge-in from %s", client_id)
+            # Client drops whatever audio it still has queued
+            await self.send_to_client(client_id, {
+                'type': 'barge_in',
+                'utterance': session['utterance_seq']
+            })
+
+    async def process_client_message(self, client_id: str, message: Union[str, bytes]):
         """Process messages from browser clients"""
         try:
+            if isinstance(message, (bytes, bytearray, memoryview)):
+                # Binary frames are always raw audio
+                self.stats['messages_processed'] += 1
+                self.sofia_sessions[client_id]['last_activity'] = time.time()
+                if await self.admit(client_id, 'audio', len(message)):
+                    await self.handle_binary_audio(client_id, message)
+                return
+
             data = json.loads(message)
             message_type = data.get('type', 'unknown')
             
             self.stats['messages_processed'] += 1
             self.sofia_sessions[client_id]['last_activity'] = time.time()
             
-            logger.debug(f"📨 Processing message type: {message_type} from {client_id}")
+            kind = MESSAGE_RATE_KINDS.get(message_type, 'control')
+            # base64 carries 3 bytes of audio per 4 characters
+            audio_bytes = len(data.get('audio_data', '')) * 3 // 4 if kind == 'audio' else 0
+            if not await self.admit(client_id, kind, audio_bytes):
+                return
+            
+            logger.debug("📨 Processing message type: %s from %s", message_type, client_id)
             
             if message_type == 'audio_chunk':
                 await self.handle_audio_chunk(client_id, data)
             elif message_type == 'text_message':
                 await self.handle_text_message(client_id, data)
+            elif message_type == 'audio_end':
+                await self.handle_audio_end(client_id)
+            elif message_type == 'configure':
+                await self.handle_configure(client_id, data)
+            elif message_type == 'resume':
+                await self.handle_resume(client_id, data)
             elif message_type == 'appointment_request':
                 await self.handle_appointment_request(client_id, data)
             elif message_type == 'ping':
@@ -234,19 +567,174 @@ class SofiaWebSocketBridge:
             logger.error(f"Error processing message from {client_id}: {e}")
             self.stats['errors'] += 1
 
+    async def admit(self, client_id: str, kind: str, audio_bytes: int = 0) -> bool:
+        """Take a token from the client's bucket for this kind of message; reject if it is empty"""
+        allowed = self.rate_limiter.allow(client_id, kind)
+        if allowed and audio_bytes:
+            allowed = self.rate_limiter.allow(client_id, 'audio_bytes', audio_bytes)
+        if allowed:
+            return True
+        
+        self.stats['rate_limited'] += 1
+        logger.debug("🚦 Rate limited %s message from %s", kind, client_id)
+        await self.send_busy(client_id)
+        return False
+
+    async def send_busy(self, client_id: str):
+        """Politely ask the caller to wait; throttled so a flood does not cause a flood of replies"""
+        session = self.sofia_sessions.get(client_id)
+        now = time.monotonic()
+        if session is None or now - session['busy_notified_at'] < BUSY_NOTICE_INTERVAL:
+            return
+        session['busy_notified_at'] = now
+        await self.send_to_client(client_id, {'type': 'busy', 'message': BUSY_MESSAGE})
+
+    async def handle_resume(self, client_id: str, data: Dict):
+        """Reconnected client continues an earlier session, possibly from another worker"""
+        session = self.sofia_sessions[client_id]
+        session_id = str(data.get('session_id', ''))
+        state = self.registry.claim_session(session_id, self.worker_id) if self.registry and session_id else None
+        
+        if state is None:
+            self.stats['resume_failures'] += 1
+            await self.send_to_client(client_id, {
+                'type': 'resume_failed',
+                'session_id': session['session_id'],
+                'message': 'Sitzung nicht gefunden, neue Sitzung gestartet'
+            })
+            return
+        
+        session['session_id'] = session_id
+        bind_log_context(session_id=session_id)
+        session['conversation_history'] = state.get('conversation_history', [])
+        session['context'] = state.get('context', session['context'])
+        session['utterance_seq'] = state.get('utterance_seq', 0)
+        self.stats['sessions_resumed'] += 1
+        logger.info("🔁 %s resumed session %s", client_id, session_id)
+        
+        await self.send_to_client(client_id, {
+            'type': 'resumed',
+            'session_id': session_id,
+            'worker_id': self.worker_id,
+            'history_length': len(session['conversation_history'])
+        })
+
+    def persist_session(self, session: Dict):
+        """Write the resumable part of a session to the shared registry"""
+        if not self.registry:
+            return
+        try:
+            self.registry.save_session(session['session_id'], self.worker_id, {
+                'conversation_history': session['conversation_history'][-RESUME_HISTORY_LIMIT:],
+                'context': session['context'],
+                'utterance_seq': session['utterance_seq']
+            })
+        except Exception as e:
+            logger.error(f"Could not persist session {session['session_id']}: {e}")
+
+    async def reap_sessions(self, now: Optional[float] = None) -> SweepResult:
+        """Trim sessions to their caps and close idle or over-budget connections"""
+        result = self.reaper.sweep(self.sofia_sessions, now)
+        self.stats['bytes_reclaimed'] += result.trimmed_bytes
+        self.stats['audio_bytes_discarded'] += result.discarded_bytes
+        self.session_bytes = result.session_bytes
+        
+        for client_id in result.idle:
+            self.stats['sessions_reaped'] += 1
+            logger.info(f"💤 Closing idle client {client_id}")
+            await self.close_session(client_id, 1000, 'idle timeout')
+        for client_id in result.evicted:
+            self.stats['sessions_evicted'] += 1
+            logger.warning(f"🧹 Evicting {client_id} to stay within the memory budget")
+            await self.close_session(client_id, 1013, 'memory budget exceeded')
+        return result
+
+    async def close_session(self, client_id: str, code: int, reason: str):
+        """Tell the client why, close its connection and count the freed session memory"""
+        session = self.sofia_sessions.get(client_id)
+        if session is None:
+            return
+        self.stats['bytes_reclaimed'] += session_bytes(session)
+        await self.send_to_client(client_id, {'type': 'session_closed', 'reason': reason})
+        
+        writer = self.writers.get(client_id)
+        if writer is None:
+            # Not owned by handle_client, so nobody else cleans up
+            self.sofia_sessions.pop(client_id, None)
+            self.clients.pop(client_id, None)
+            return
+        await writer.drain()
+        try:
+            # handle_client sees the close and runs the usual disconnect cleanup
+            await self.clients[client_id].close(code, reason)
+        except Exception as e:
+            logger.error(f"Could not close {client_id}: {e}")
+
+    async def reap_periodically(self):
+        while self.running:
+            await asyncio.sleep(REAPER_INTERVAL)
+            try:
+                await self.reap_sessions()
+            except Exception as e:
+                logger.error(f"Session reaper failed: {e}")
+
+    async def publish_stats_periodically(self):
+        """Share this worker's stats so any worker can report cluster totals"""
+        while self.running:
+            try:
+                self.registry.publish_stats(self.worker_id, {
+                    **self.stats,
+                    'active_clients': len(self.clients),
+                    'active_sessions': len(self.sofia_sessions)
+                })
+            except Exception as e:
+                logger.error(f"Stats publish failed: {e}")
+            await asyncio.sleep(STATS_PUBLISH_INTERVAL)
+
+    async def handle_configure(self, client_id: str, data: Dict):
+        """Negotiate per-client protocol options after the connected handshake"""
+        session = self.sofia_sessions[client_id]
+        transport = data.get('audio_transport', session['audio_transport'])
+        
+        if transport not in SUPPORTED_AUDIO_TRANSPORTS:
+            await self.send_to_client(client_id, {
+                'type': 'error',
+                'message': f'Unbekannter Audio-Transport: {transport}'
+            })
+            return
+        
+        audio_format = data.get('audio_format')
+        normalizer = session['normalizer']
+        if audio_format is not None:
+            try:
+                if not HAS_AUDIO_NORMALIZER:
+                    raise ValueError("Audio-Konvertierung nicht verfügbar")
+                normalizer = AudioNormalizer.from_config(audio_format)
+            except (TypeError, ValueError) as e:
+                await self.send_to_client(client_id, {
+                    'type': 'error',
+                    'message': f'Audio-Format nicht unterstützt: {e}'
+                })
+                return
+        
+        if transport != session['audio_transport']:
+            self.stats['binary_clients'] += 1 if transport == AUDIO_TRANSPORT_BINARY else -1
+            session['audio_transport'] = transport
+        
+        reply = {
+            'type': 'configured',
+            'audio_transport': transport
+        }
+        if audio_format is not None:
+            session['normalizer'] = None if normalizer.passthrough else normalizer
+            reply['audio_format'] = normalizer.describe()
+        await self.send_to_client(client_id, reply)
+
     async def handle_audio_chunk(self, client_id: str, data: Dict):
-        """Handle audio chunks from browser"""
+        """Handle base64 audio chunks from legacy JSON clients"""
         try:
             audio_data = base64.b64decode(data['audio_data'])
-            session = self.sofia_sessions[client_id]
-            
-            # Add to audio buffer
-            session['audio_buffer'] += audio_data
-            self.stats['audio_chunks_processed'] += 1
-            
-            # Process if we have enough audio (e.g., 1-2 seconds worth)
-            if len(session['audio_buffer']) > 32000:  # ~2 seconds at 16kHz
-                await self.process_audio_transcription(client_id)
+            await self.buffer_audio(client_id, audio_data)
                 
         except Exception as e:
             logger.error(f"Error handling audio chunk from {client_id}: {e}")
@@ -255,38 +743,207 @@ class SofiaWebSocketBridge:
                 'message': 'Audio processing error'
             })
 
-    async def process_audio_transcription(self, client_id: str):
-        """Transcribe audio and send to Sofia"""
+    async def handle_binary_audio(self, client_id: str, frame: bytes):
+        """Handle raw audio sent as a binary WebSocket frame"""
+        try:
+            await self.buffer_audio(client_id, memoryview(frame))
+            
+        except Exception as e:
+            logger.error(f"Error handling binary audio from {client_id}: {e}")
+            await self.send_to_client(client_id, {
+                'type': 'error',
+                'message': 'Audio processing error'
+            })
+
+    async def buffer_audio(self, client_id: str, audio_data):
+        """Append audio to the session ring buffer and transcribe when enough is collected"""
         session = self.sofia_sessions[client_id]
         audio_buffer = session['audio_buffer']
-        session['audio_buffer'] = b''  # Clear buffer
+        self.stats['audio_bytes_received'] += len(audio_data)
+        self.stats['audio_chunks_processed'] += 1
         
-        try:
-            # Send status update
+        if session['normalizer'] is not None:
+            audio_data = session['normalizer'].process(audio_data)
+        
+        if not len(audio_buffer) and session['utterance_started_at'] is None:
+            # Without VAD a turn starts with the first buffered audio
+            session['utterance_started_at'] = time.perf_counter()
+        
+        dropped_before = audio_buffer.dropped_bytes
+        audio_buffer.write(audio_data)
+        self.stats['audio_bytes_dropped'] += audio_buffer.dropped_bytes - dropped_before
+        
+        vad = session['vad']
+        if vad is None:
+            # Process if we have enough audio
+            if len(audio_buffer) > TRANSCRIPTION_THRESHOLD_BYTES:
+                await self.process_audio_transcription(client_id)
+            return
+        
+        # Hand whole frames to the VAD, the remainder waits in the ring
+        usable = len(audio_buffer) - len(audio_buffer) % vad.frame_bytes
+        if not usable:
+            return
+        
+        dropped_before = vad.silence_frames_dropped
+        segments = vad.process(audio_buffer.read(usable))
+        self.stats['vad_silence_bytes_dropped'] += (vad.silence_frames_dropped - dropped_before) * vad.frame_bytes
+        
+        finished_utterance = None
+        if session['speaking'] and (segments or not vad.in_speech):
+            # The utterance in progress ended (or was discarded as too short)
+            session['speaking'] = False
+            finished_utterance = session['utterance_seq']
+            self.close_partial_stream(session)
+        
+        if vad.in_speech and not session['speaking']:
+            session['speaking'] = True
+            session['utterance_seq'] += 1
+            session['utterance_started_at'] = time.perf_counter()
             await self.send_to_client(client_id, {
-                'type': 'status',
-                'message': 'Verarbeite Sprache...'
+                'type': 'speech_started',
+                'utterance': session['utterance_seq']
             })
+            await self.handle_barge_in(client_id, session)
+            if self.stt_backend and self.partial_interval_ms:
+                session['stt_stream'] = StreamingTranscriber(
+                    session['utterance_seq'],
+                    window_ms=self.partial_window_ms,
+                    step_ms=self.partial_interval_ms
+                )
+        
+        if session['stt_stream'] is not None:
+            self.schedule_partial_transcription(client_id, session)
+        
+        for index, segment in enumerate(segments):
+            self.stats['vad_segments'] += 1
+            await self.process_audio_transcription(
+                client_id, segment, finished_utterance if index == 0 else None
+            )
+
+    def schedule_partial_transcription(self, client_id: str, session: Dict):
+        """Start a partial transcription of the open utterance unless one is still running"""
+        stream = session['stt_stream']
+        stream.append(session['vad'].segment_audio(len(stream.audio)))
+        
+        task = session['stt_partial_task']
+        # Partials are a nicety; they never queue for an STT slot a final transcription could use
+        stt_free = self.stt_limit.active < self.stt_limit.limit
+        if stream.due() and stt_free and (task is None or task.done()):
+            session['stt_partial_task'] = asyncio.ensure_future(
+                self.run_partial_transcription(client_id, stream)
+            )
+
+    async def run_partial_transcription(self, client_id: str, stream: StreamingTranscriber):
+        """Transcribe the newest window of an utterance and send the stabilized hypothesis"""
+        try:
+            window, window_start = stream.next_window()
+            loop = asyncio.get_event_loop()
+            async with self.stt_limit:
+                text = await loop.run_in_executor(self.audio_executor, self.transcribe_audio, window)
             
+            partial = stream.update(text, window_start)
+            if partial:
+                self.stats['stt_partials_sent'] += 1
+                # Only the newest partial of an utterance matters if the client is behind
+                await self.send_to_client(client_id, {'type': 'transcription_partial', **partial},
+                                          coalesce_key=f"partial:{partial['utterance']}")
+                
+        except Exception as e:
+            logger.error(f"Partial transcription error for {client_id}: {e}")
+
+    def close_partial_stream(self, session: Dict):
+        """Stop partial results for the current utterance; in-flight windows are discarded"""
+        if session['stt_stream'] is not None:
+            session['stt_stream'].close()
+            session['stt_stream'] = None
+        task = session['stt_partial_task']
+        if task is not None and not task.done():
+            task.cancel()
+        session['stt_partial_task'] = None
+
+    async def handle_audio_end(self, client_id: str):
+        """Client stopped recording: transcribe whatever utterance is still open"""
+        session = self.sofia_sessions[client_id]
+        vad = session['vad']
+        
+        if vad is None:
+            if len(session['audio_buffer']):
+                await self.process_audio_transcription(client_id)
+            return
+        
+        remainder = session['audio_buffer'].read()
+        segments = vad.process(remainder) if remainder else []
+        final_segment = vad.flush()
+        if final_segment:
+            segments.append(final_segment)
+        
+        utterance = session['utterance_seq'] if session['speaking'] else None
+        session['speaking'] = False
+        self.close_partial_stream(session)
+        
+        for index, segment in enumerate(segments):
+            self.stats['vad_segments'] += 1
+            await self.process_audio_transcription(
+                client_id, segment, utterance if index == len(segments) - 1 else None
+            )
+
+    async def process_audio_transcription(self, client_id: str, audio_segment: Optional[bytes] = None,
+                                          utterance: Optional[int] = None):
+        """Transcribe an utterance (or the whole session buffer) and send to Sofia"""
+        session = self.sofia_sessions[client_id]
+        if audio_segment is None:
+            # Copy out once; the ring is reused for the next utterance
+            audio_segment = session['audio_buffer'].read()
+        
+        if session['pipeline']:
+            trace = self.tracer.start(client_id, 'audio', session['utterance_started_at'])
+            session['utterance_started_at'] = None
+            trace.mark('vad_end')
+            session['pipeline'].submit_audio(audio_segment, utterance, trace)
+            return
+        
+        transcription = await self.transcribe_turn(client_id, audio_segment, utterance)
+        if transcription:
+            await self.send_to_sofia(client_id, transcription)
+
+    async def transcribe_turn(self, client_id: str, audio_buffer: bytes,
+                              utterance: Optional[int] = None) -> Optional[str]:
+        """STT stage: transcribe one utterance and send the final transcription"""
+        admission = self.stt_limit.admit()
+        if admission is None:
+            # Every STT slot is busy and the wait queue is full: shed instead of piling up
+            self.stats['stt_shed'] += 1
+            logger.warning(f"⏳ STT saturated, shedding utterance from {client_id}")
+            await self.send_busy(client_id)
+            return None
+        
+        try:
             # Transcribe audio in background thread
             loop = asyncio.get_event_loop()
-            transcription = await loop.run_in_executor(
-                self.audio_executor,
-                self.transcribe_audio,
-                audio_buffer
-            )
+            async with admission:
+                # Send status update
+                await self.send_to_client(client_id, {
+                    'type': 'status',
+                    'message': 'Verarbeite Sprache...'
+                })
+                transcription = await loop.run_in_executor(
+                    self.audio_executor,
+                    self.transcribe_audio,
+                    audio_buffer
+                )
             
             if transcription:
-                logger.info(f"🎤 Transcribed from {client_id}: {transcription}")
+                logger.info("🎤 Transcribed from %s: %s", client_id, transcription)
                 
-                # Send transcription to client
+                # Send final transcription to client
                 await self.send_to_client(client_id, {
                     'type': 'transcription',
-                    'text': transcription
+                    'text': transcription,
+                    'final': True,
+                    'utterance': utterance
                 })
-                
-                # Process with Sofia
-                await self.send_to_sofia(client_id, transcription)
+                return transcription
             else:
                 await self.send_to_client(client_id, {
                     'type': 'error',
@@ -299,21 +956,16 @@ class SofiaWebSocketBridge:
                 'type': 'error',
                 'message': 'Fehler bei der Spracherkennung'
             })
+        return None
 
     def transcribe_audio(self, audio_data: bytes) -> Optional[str]:
-        """Transcribe audio using available services"""
+        """Transcribe audio with the configured STT backend"""
         try:
-            # Method 1: OpenAI Whisper (preferred)
-            if HAS_OPENAI and os.getenv('OPENAI_API_KEY'):
-                return self.transcribe_with_whisper(audio_data)
-            
-            # Method 2: Google Speech Recognition (fallback)
-            elif HAS_SPEECH_RECOGNITION:
-                return self.transcribe_with_google(audio_data)
-            
-            else:
+            if self.stt_backend is None:
                 logger.warning("No transcription service available")
                 return None
+            
+            return self.stt_backend.transcribe(audio_data)
                 
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
@@ -387,25 +1039,33 @@ class SofiaWebSocketBridge:
             if not text:
                 return
                 
-            logger.info(f"💬 Text message from {client_id}: {text}")
+            logger.info("💬 Text message from %s: %s", client_id, text)
             
             # Send to Sofia
-            await self.send_to_sofia(client_id, text)
+            pipeline = self.sofia_sessions[client_id]['pipeline']
+            if pipeline:
+                if not pipeline.submit_text(text, self.tracer.start(client_id, 'text')):
+                    # Sofia is still working through earlier turns; tell the caller instead of losing it silently
+                    await self.send_busy(client_id)
+            else:
+                await self.send_to_sofia(client_id, text)
             
         except Exception as e:
             logger.error(f"Error handling text message from {client_id}: {e}")
 
     async def send_to_sofia(self, client_id: str, user_input: str):
-        """Send user input to Sofia agent and handle response"""
+        """Run one whole turn inline: Sofia's reply, then its speech"""
+        sofia_response = await self.respond_turn(client_id, user_input)
+        
+        # Stream audio sentence by sentence if TTS is available
+        if sofia_response and self.tts_pipeline:
+            await self.stream_speech(client_id, sofia_response)
+
+    async def respond_turn(self, client_id: str, user_input: str) -> Optional[str]:
+        """Agent stage: send user input to Sofia and send back the text reply"""
         try:
             session = self.sofia_sessions[client_id]
-            
-            # Add to conversation history
-            session['conversation_history'].append({
-                'role': 'user',
-                'content': user_input,
-                'timestamp': datetime.now().isoformat()
-            })
+            asked_at = datetime.now().isoformat()
             
             # Send thinking status
             await self.send_to_client(client_id, {
@@ -417,7 +1077,12 @@ class SofiaWebSocketBridge:
             sofia_response = await self.process_with_sofia(client_id, user_input)
             
             if sofia_response:
-                # Add to conversation history
+                # Add to conversation history; a turn that was shed leaves no trace in it
+                session['conversation_history'].append({
+                    'role': 'user',
+                    'content': user_input,
+                    'timestamp': asked_at
+                })
                 session['conversation_history'].append({
                     'role': 'assistant',
                     'content': sofia_response,
@@ -430,16 +1095,8 @@ class SofiaWebSocketBridge:
                     'text': sofia_response,
                     'timestamp': datetime.now().isoformat()
                 })
-                
-                # Generate and send audio if TTS is available
-                if self.tts_client:
-                    audio_data = await self.generate_speech(sofia_response)
-                    if audio_data:
-                        await self.send_to_client(client_id, {
-                            'type': 'sofia_audio',
-                            'audio_data': base64.b64encode(audio_data).decode('utf-8'),
-                            'format': 'mp3'
-                        })
+                self.persist_session(session)
+            return sofia_response
                         
         except Exception as e:
             logger.error(f"Error sending to Sofia for {client_id}: {e}")
@@ -447,15 +1104,31 @@ class SofiaWebSocketBridge:
                 'type': 'error',
                 'message': 'Fehler bei der Kommunikation mit Sofia'
             })
+            return None
 
     async def process_with_sofia(self, client_id: str, user_input: str) -> Optional[str]:
-        """Process user input with Sofia agent logic"""
+        """Process user input with the Sofia agent adapter"""
+        if self.agent_adapter is None:
+            return self.keyword_response(user_input)
+        
+        try:
+            # Keyed by session, not connection, so a resumed session keeps its context
+            session_id = self.sofia_sessions[client_id]['session_id']
+            result = await self.agent_adapter.process_message(session_id, user_input)
+            if result.get('intent') == 'busy':
+                # Shed by the adapter's admission control: not a reply, so no history, persistence or TTS
+                self.stats['agent_shed'] += 1
+                logger.warning(f"⏳ Agent saturated, shedding turn from {client_id}")
+                await self.send_busy(client_id)
+                return None
+            return result.get('message') or None
+        except Exception as e:
+            logger.error(f"Error processing with Sofia: {e}")
+            return "Entschuldigung, ich hatte ein kleines technisches Problem. Können Sie das bitte wiederholen?"
+
+    def keyword_response(self, user_input: str) -> str:
+        """Canned replies used when the agent adapter cannot be loaded"""
         try:
-            session = self.sofia_sessions[client_id]
-            
-            # Simple Sofia-like responses for demonstration
-            # In production, this would interface with the actual Sofia agent
-            
             user_input_lower = user_input.lower()
             
             if any(word in user_input_lower for word in ['termin', 'appointment', 'buchen', 'vereinbaren']):
@@ -484,27 +1157,48 @@ class SofiaWebSocketBridge:
             return "Entschuldigung, ich hatte ein kleines technisches Problem. Können Sie das bitte wiederholen?"
 
     async def generate_speech(self, text: str) -> Optional[bytes]:
-        """Generate speech from text using Google TTS"""
+        """Synthesize a whole text in one piece without blocking the event loop"""
         try:
-            if not self.tts_client:
+            if not self.tts_pipeline:
                 return None
-                
-            # Create synthesis input
-            input_text = texttospeech.SynthesisInput(text=text)
-            
-            # Generate speech
-            response = self.tts_client.synthesize_speech(
-                input=input_text,
-                voice=self.tts_voice,
-                audio_config=self.tts_config
-            )
             
-            return response.audio_content
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self.audio_executor, self.tts_pipeline.synthesize_sentence, text)
             
         except Exception as e:
             logger.error(f"TTS generation failed: {e}")
             return None
 
+    async def stream_speech(self, client_id: str, text: str):
+        """Send a reply as one audio chunk per sentence, in order, as soon as each is synthesized"""
+        if not self.tts_limit.try_reserve():
+            # The text reply is already out; only its audio is skipped
+            self.stats['tts_shed'] += 1
+            logger.warning(f"⏳ TTS saturated, sending {client_id} text only")
+            return
+        audio_format = self.tts_backend.audio_format
+        session = self.sofia_sessions.get(client_id)
+        trace = session['pipeline'].speaking_trace if session and session['pipeline'] else None
+        on_sent = (lambda: trace.mark('first_byte')) if trace else None
+        chunks = self.tts_pipeline.stream(text)
+        try:
+            async for index, total, sentence, audio_data in chunks:
+                if client_id not in self.clients:
+                    # Caller hung up; closing the stream cancels the remaining sentences
+                    break
+                if not audio_data:
+                    self.stats['tts_failures'] += 1
+                    continue
+                await self.send_audio_to_client(client_id, audio_data, audio_format, {
+                    'sequence': index,
+                    'total': total,
+                    'final': index == total - 1,
+                    'text': sentence
+                }, on_sent=on_sent)
+                self.stats['tts_chunks_sent'] += 1
+        finally:
+            await chunks.aclose()
+
     async def handle_appointment_request(self, client_id: str, data: Dict):
         """Handle appointment booking requests"""
         try:
@@ -546,21 +1240,72 @@ class SofiaWebSocketBridge:
                 'message': 'Terminbuchung fehlgeschlagen'
             }
 
-    async def send_to_client(self, client_id: str, message: Dict):
-        """Send message to specific client"""
+    async def send_to_client(self, client_id: str, message: Union[Dict, bytes, List],
+                             droppable: bool = False, coalesce_key: Optional[str] = None,
+                             on_sent: Optional[Callable[[], None]] = None) -> bool:
+        """Send a JSON control message, a binary frame, or a list of frames sent back to back.
+
+        With a writer the frames are queued and this never waits for the
+        network. `droppable` marks audio that may be shed when the client
+        falls behind; control messages are always delivered. `on_sent` runs
+        once the frames are actually written.
+        """
+        frames = [
+            part if isinstance(part, (str, bytes)) else
+            bytes(part) if isinstance(part, (bytearray, memoryview)) else json.dumps(part)
+            for part in (message if isinstance(message, list) else [message])
+        ]
         try:
+            writer = self.writers.get(client_id)
+            if writer:
+                return writer.enqueue(frames, droppable=droppable, coalesce_key=coalesce_key, on_sent=on_sent)
+            
             if client_id in self.clients:
                 websocket = self.clients[client_id]
-                await websocket.send(json.dumps(message))
+                for frame in frames:
+                    await websocket.send(frame)
+                if on_sent is not None:
+                    on_sent()
+                return True
             else:
                 logger.warning(f"Client {client_id} not found")
                 
         except websockets.exceptions.ConnectionClosed:
-            logger.info(f"Connection closed for {client_id}")
+            logger.info("Connection closed for %s", client_id)
             if client_id in self.clients:
                 del self.clients[client_id]
         except Exception as e:
             logger.error(f"Error sending to client {client_id}: {e}")
+        return False
+
+    def on_slow_client(self, client_id: str):
+        """Called by a writer that stayed over its lag budget; the connection is being closed"""
+        self.stats['slow_client_disconnects'] += 1
+        logger.warning(f"🐢 Disconnecting slow client {client_id}")
+
+    async def send_audio_to_client(self, client_id: str, audio_data: bytes, audio_format: str,
+                                   extra: Optional[Dict] = None, on_sent: Optional[Callable[[], None]] = None):
+        """Send synthesized audio using the transport negotiated by the client"""
+        session = self.sofia_sessions.get(client_id)
+        if session and session['audio_transport'] == AUDIO_TRANSPORT_BINARY:
+            # JSON header announces the format, the next frame carries the raw bytes;
+            # both are queued as one unit so they are never separated or half dropped
+            sent = await self.send_to_client(client_id, [{
+                'type': 'sofia_audio',
+                'transport': AUDIO_TRANSPORT_BINARY,
+                'format': audio_format,
+                'size': len(audio_data),
+                **(extra or {})
+            }, audio_data], droppable=True, on_sent=on_sent)
+        else:
+            sent = await self.send_to_client(client_id, {
+                'type': 'sofia_audio',
+                'audio_data': base64.b64encode(audio_data).decode('utf-8'),
+                'format': audio_format,
+                **(extra or {})
+            }, droppable=True, on_sent=on_sent)
+        if sent:
+            self.stats['audio_bytes_sent'] += len(audio_data)
 
     def sofia_agent_bridge(self):
         """Background thread for Sofia agent integration"""
@@ -584,6 +1329,22 @@ class SofiaWebSocketBridge:
             **self.stats,
             'active_clients': len(self.clients),
             'active_sessions': len(self.sofia_sessions),
+            'tts_cache': self.tts_cache.stats(),
+            'outbound': {client_id: writer.metrics() for client_id, writer in self.writers.items()},
+            'memory': {
+                'session_bytes': self.session_bytes,
+                'budget_bytes': self.reaper.memory_budget,
+                'idle_timeout': self.reaper.idle_timeout
+            },
+            'admission': {
+                'stt': self.stt_limit.metrics(),
+                'tts': self.tts_limit.metrics(),
+                'rate_limited': dict(self.rate_limiter.rejected)
+            },
+            'traces_recorded': self.tracer.recorded,
+            'latency': self.tracer.percentiles(),
+            'worker_id': self.worker_id,
+            'cluster': self.registry.aggregate_stats() if self.registry else None,
             'uptime': time.time() - self.stats['start_time']
         }
 
@@ -593,6 +1354,10 @@ class SofiaWebSocketBridge:
         
         # Close all client connections
         for client_id, websocket in list(self.clients.items()):
+            writer = self.writers.pop(client_id, None)
+            if writer:
+                await writer.drain()
+                writer.stop()
             try:
                 await websocket.close()
             except:
@@ -600,6 +1365,20 @@ class SofiaWebSocketBridge:
                 
         logger.info("✅ Sofia WebSocket Bridge shutdown complete")
 
+def run_worker(args, index: int):
+    """Worker process of the multi-process mode: own bridge and loop on a shared port"""
+    # The parent's listener thread does not survive the fork; each worker writes its own file
+    setup_logging(log_file=f"sofia_websocket_bridge.worker-{index}.log",
+                  level=logging.DEBUG if args.dev else None)
+    sock = create_reuseport_socket(args.host, args.port)
+    registry = SessionRegistry(args.registry)
+    bridge = SofiaWebSocketBridge(host=args.host, port=args.port, stt_backend=args.stt_backend,
+                                  tts_backend=args.tts_backend, registry=registry, worker_id=f"worker-{index}")
+    try:
+        asyncio.run(bridge.start_server(sock=sock))
+    except KeyboardInterrupt:
+        pass
+
 def main():
     """Main entry point"""
     import argparse
@@ -608,15 +1387,36 @@ def main():
     parser.add_argument('--host', default='localhost', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8081, help='Port to bind to')
     parser.add_argument('--dev', action='store_true', help='Development mode')
+    parser.add_argument('--stt-backend', default=None,
+                        help='Speech-to-text backend: auto, whisper, google or local')
+    parser.add_argument('--tts-backend', default=None,
+                        help='Text-to-speech backend: auto, google, local or none')
+    parser.add_argument('--warmup-tts-cache', action='store_true',
+                        help='Pre-synthesize the phrase catalog into the TTS cache and exit')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SOFIA_BRIDGE_WORKERS', '1')),
+                        help='Worker processes sharing the port via SO_REUSEPORT')
+    parser.add_argument('--registry', default=os.getenv('SOFIA_SESSION_REGISTRY', 'sofia_sessions.db'),
+                        help='SQLite file shared by workers for sessions and stats')
     
     args = parser.parse_args()
     
+    setup_logging(log_file=LOG_FILE, level=logging.DEBUG if args.dev else None)
     if args.dev:
-        logging.getLogger().setLevel(logging.DEBUG)
         logger.info("🔧 Development mode enabled")
     
+    if args.workers > 1 and not args.warmup_tts_cache:
+        logger.info(f"🧩 Starting {args.workers} workers on {args.host}:{args.port}")
+        run_workers(args.workers, partial(run_worker, args))
+        return
+    
     # Create and start bridge
-    bridge = SofiaWebSocketBridge(host=args.host, port=args.port)
+    bridge = SofiaWebSocketBridge(host=args.host, port=args.port, stt_backend=args.stt_backend,
+                                  tts_backend=args.tts_backend)
+    
+    if args.warmup_tts_cache:
+        result = asyncio.run(bridge.warmup_tts_cache())
+        print(json.dumps({**result, 'cache': bridge.tts_cache.stats()}, indent=2))
+        sys.exit(1 if result['failed'] else 0)
     
     # Handle graceful shutdown
     def signal_handler(signum, frame):
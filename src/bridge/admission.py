@@ -0,0 +1,152 @@
+"""
+Admission control for the Sofia WebSocket Bridge and the agent adapter
+
+Two mechanisms keep one misbehaving browser from starving everyone else:
+
+- RateLimiter: token buckets per client and message kind (audio frames, audio
+  bytes, text, control). A message without a token is rejected.
+- ConcurrencyLimit: a global cap on work in flight (STT, TTS, agent turns)
+  with a short bounded wait. When the wait queue is full the work is shed
+  instead of piling up, and the caller gets BUSY_MESSAGE.
+
+Well-behaved sessions stay within their buckets and find free slots, so their
+latency is unaffected while an abusive client is throttled.
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+BUSY_MESSAGE = "Bitte einen Moment, ich bin gleich wieder für Sie da."
+
+# kind -> (tokens per second, burst)
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    'audio': (100.0, 200.0),
+    # 48 kHz stereo float32 is 384 kB/s; allow that plus headroom
+    'audio_bytes': (512_000.0, 1_024_000.0),
+    'text': (2.0, 5.0),
+    'control': (20.0, 40.0),
+}
+
+
+class TokenBucket:
+    """Classic token bucket; refilled lazily on every request"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated_at')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def try_acquire(self, cost: float = 1.0, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+
+class RateLimiter:
+    """Token buckets per (client, kind); kinds without a configured limit are unlimited"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.limits = dict(DEFAULT_RATE_LIMITS if limits is None else limits)
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.rejected: Dict[str, int] = {kind: 0 for kind in self.limits}
+
+    def allow(self, client_id: str, kind: str, cost: float = 1.0, now: Optional[float] = None) -> bool:
+        limit = self.limits.get(kind)
+        if limit is None:
+            return True
+        bucket = self._buckets.get((client_id, kind))
+        if bucket is None:
+            bucket = self._buckets[(client_id, kind)] = TokenBucket(*limit)
+        if bucket.try_acquire(cost, now):
+            return True
+        self.rejected[kind] += 1
+        return False
+
+    def forget(self, client_id: str) -> None:
+        for kind in self.limits:
+            self._buckets.pop((client_id, kind), None)
+
+
+class ConcurrencyLimit:
+    """At most `limit` tasks inside, at most `max_waiting` queued for a slot.
+
+    Use `admit()` to take a place or be shed in one step. `async with limit`
+    enters without that check (e.g. per TTS sentence of a stream that was
+    admitted as a whole via `try_reserve`).
+    """
+
+    def __init__(self, limit: int, max_waiting: int = 0):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.shed = 0
+
+    @property
+    def saturated(self) -> bool:
+        # Admitted callers count as waiting until they have a slot
+        return self.active + self.waiting >= self.limit + self.max_waiting
+
+    def try_reserve(self) -> bool:
+        """Count a shed request if saturated; True if the caller may enter
+
+        Only a snapshot: callers that then enter themselves should use `admit()`,
+        or concurrent callers can all pass the check and overfill the wait queue.
+        """
+        if self.saturated:
+            self.shed += 1
+            return False
+        return True
+
+    def admit(self) -> Optional['Admission']:
+        """Take a place in the wait queue right away; None (counted as shed) if saturated
+
+        Check and reservation happen without an await in between, so they are
+        atomic on the event loop. The returned admission must be entered with
+        `async with`.
+        """
+        if self.saturated:
+            self.shed += 1
+            return None
+        self.waiting += 1
+        return Admission(self)
+
+    async def _acquire(self) -> None:
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    async def __aenter__(self) -> 'ConcurrencyLimit':
+        self.waiting += 1
+        await self._acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def metrics(self) -> Dict:
+        return {'limit': self.limit, 'active': self.active, 'waiting': self.waiting, 'shed': self.shed}
+
+
+class Admission:
+    """A place reserved by `ConcurrencyLimit.admit()`; waits for a slot on enter, frees it on exit"""
+
+    def __init__(self, limit: ConcurrencyLimit):
+        self.limit = limit
+
+    async def __aenter__(self) -> ConcurrencyLimit:
+        await self.limit._acquire()
+        return self.limit
+
+    async def __aexit__(self, *exc) -> None:
+        await self.limit.__aexit__(*exc)
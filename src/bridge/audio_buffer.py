@@ -0,0 +1,92 @@
+"""
+Preallocated ring buffer for incoming PCM audio in the Sofia WebSocket Bridge
+"""
+from typing import Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# 16 kHz mono int16 = 32000 bytes per second
+PCM_BYTES_PER_SECOND = 32000
+
+
+class AudioRingBuffer:
+    """Fixed-size byte ring buffer.
+
+    Writes copy into a preallocated ``bytearray`` through ``memoryview`` slices,
+    so appending a chunk never reallocates or copies the data already buffered.
+    When the buffer is full the oldest audio is overwritten and counted in
+    ``dropped_bytes``.
+    """
+
+    def __init__(self, capacity: int = PCM_BYTES_PER_SECOND * 10):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+        self.dropped_bytes = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data: BytesLike) -> int:
+        """Append data, overwriting the oldest bytes on overflow. Returns bytes written."""
+        src = memoryview(data).cast('B')
+        n = len(src)
+        if n == 0:
+            return 0
+
+        if n >= self._capacity:
+            # Only the newest `capacity` bytes survive
+            self.dropped_bytes += self._size + n - self._capacity
+            self._view[:] = src[n - self._capacity:]
+            self._start = 0
+            self._size = self._capacity
+            return n
+
+        overflow = self._size + n - self._capacity
+        if overflow > 0:
+            self._start = (self._start + overflow) % self._capacity
+            self._size -= overflow
+            self.dropped_bytes += overflow
+
+        end = (self._start + self._size) % self._capacity
+        first = min(n, self._capacity - end)
+        self._view[end:end + first] = src[:first]
+        if first < n:
+            self._view[:n - first] = src[first:]
+        self._size += n
+        return n
+
+    def peek(self, size: int = -1) -> bytes:
+        """Return up to `size` of the oldest bytes without consuming them"""
+        if size < 0 or size > self._size:
+            size = self._size
+        first = min(size, self._capacity - self._start)
+        if first == size:
+            return bytes(self._view[self._start:self._start + size])
+        return b''.join((self._view[self._start:], self._view[:size - first]))
+
+    def read(self, size: int = -1) -> bytes:
+        """Consume and return up to `size` of the oldest bytes (all by default)"""
+        data = self.peek(size)
+        self.discard(len(data))
+        return data
+
+    def discard(self, size: int) -> None:
+        """Drop `size` of the oldest bytes"""
+        size = min(max(size, 0), self._size)
+        self._start = (self._start + size) % self._capacity
+        self._size -= size
+        if self._size == 0:
+            self._start = 0
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
@@ -0,0 +1,194 @@
+"""
+Input audio normalization for the Sofia WebSocket Bridge
+
+Browsers capture at 44.1 or 48 kHz, often as float32 and sometimes in
+stereo, while VAD and STT expect 16 kHz mono int16. AudioNormalizer converts
+a declared client format chunk by chunk:
+
+1. decode int16 or float32 samples (partial samples/frames are carried over)
+2. downmix to mono
+3. resample with a streaming polyphase FIR filter
+4. fixed gain or automatic gain control
+5. clip and encode as int16
+
+Every step works on whole NumPy arrays; there are no per-sample Python loops.
+Run `python -m src.bridge.audio_format` for a real-time-factor benchmark.
+"""
+import math
+import time
+from typing import Dict
+
+import numpy as np
+
+TARGET_SAMPLE_RATE = 16000
+SAMPLE_FORMATS = {'int16': '<i2', 'float32': '<f4'}
+SUPPORTED_SAMPLE_RATES = (8000, 11025, 16000, 22050, 24000, 32000, 44100, 48000)
+
+
+class PolyphaseResampler:
+    """Streaming rational resampler (up by L, down by M) with a Kaiser-windowed sinc filter.
+
+    Filter state is kept between chunks, so a stream resampled in pieces is
+    identical to the stream resampled at once.
+    """
+
+    def __init__(self, input_rate: int, output_rate: int, taps_per_phase: int = 32, beta: float = 8.0,
+                 rolloff: float = 0.9):
+        gcd = math.gcd(input_rate, output_rate)
+        self.up = output_rate // gcd
+        self.down = input_rate // gcd
+
+        # Low-pass just below the lower of the two Nyquist frequencies, in the upsampled domain
+        cutoff = 0.5 * rolloff / max(self.up, self.down)
+        length = taps_per_phase * self.up
+        t = np.arange(length) - (length - 1) / 2
+        h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(length, beta)
+        h *= self.up / h.sum()
+
+        # phases[p, j] = h[p + j*L], reversed so it lines up with a forward input window
+        self.taps = taps_per_phase
+        self._phases = h.reshape(taps_per_phase, self.up).T[:, ::-1].astype(np.float32)
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._consumed = 0   # input samples seen so far
+        self._produced = 0   # output samples emitted so far
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        extended = np.concatenate([self._history, samples.astype(np.float32, copy=False)])
+        # extended[0] is global input index first_index
+        first_index = self._consumed - (self.taps - 1)
+        self._consumed += len(samples)
+
+        # Output n needs input (n * down) // up, which must already have arrived
+        end = -(-self._consumed * self.up // self.down)
+        n = np.arange(self._produced, end, dtype=np.int64)
+        self._produced = end
+        self._history = extended[len(extended) - (self.taps - 1):]
+        if not len(n):
+            return np.zeros(0, dtype=np.float32)
+
+        position = n * self.down
+        newest = position // self.up - first_index
+        windows = np.lib.stride_tricks.sliding_window_view(extended, self.taps)
+        return np.einsum('nk,nk->n', self._phases[position % self.up], windows[newest - (self.taps - 1)])
+
+
+class AudioNormalizer:
+    """Turns one client's declared audio format into 16 kHz mono int16 PCM"""
+
+    def __init__(self, sample_rate: int = TARGET_SAMPLE_RATE, channels: int = 1, sample_format: str = 'int16',
+                 gain_db: float = 0.0, agc: bool = False, agc_target_dbfs: float = -20.0,
+                 agc_max_gain_db: float = 24.0, agc_gate_dbfs: float = -55.0):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+        if sample_rate not in SUPPORTED_SAMPLE_RATES:
+            raise ValueError(f"Unsupported sample rate: {sample_rate}")
+        if channels not in (1, 2):
+            raise ValueError(f"Unsupported channel count: {channels}")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.dtype = np.dtype(SAMPLE_FORMATS[sample_format])
+        self.frame_bytes = self.dtype.itemsize * channels
+        self.gain = 10 ** (gain_db / 20)
+        self.agc = agc
+        self.agc_target = 10 ** (agc_target_dbfs / 20)
+        self.agc_max_gain = 10 ** (agc_max_gain_db / 20)
+        self.agc_gate = 10 ** (agc_gate_dbfs / 20)
+        self.resampler = (PolyphaseResampler(sample_rate, TARGET_SAMPLE_RATE)
+                          if sample_rate != TARGET_SAMPLE_RATE else None)
+        self._remainder = b''
+
+    @property
+    def passthrough(self) -> bool:
+        """True when the input already is the bridge format and nothing needs doing"""
+        return (self.sample_format == 'int16' and self.channels == 1 and self.resampler is None
+                and self.gain == 1.0 and not self.agc)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'AudioNormalizer':
+        """Build from the `audio_format` object of a configure message"""
+        return cls(
+            sample_rate=int(config.get('sample_rate', TARGET_SAMPLE_RATE)),
+            channels=int(config.get('channels', 1)),
+            sample_format=config.get('sample_format', 'int16'),
+            gain_db=float(config.get('gain_db', 0.0)),
+            agc=bool(config.get('agc', False)),
+        )
+
+    def describe(self) -> Dict:
+        return {
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'sample_format': self.sample_format,
+            'gain_db': round(20 * math.log10(self.gain), 2),
+            'agc': self.agc,
+        }
+
+    def process(self, chunk) -> bytes:
+        if self.passthrough and not self._remainder and len(chunk) % 2 == 0:
+            return bytes(chunk)
+
+        data = self._remainder + bytes(chunk)
+        usable = len(data) - len(data) % self.frame_bytes
+        self._remainder = data[usable:]
+        if not usable:
+            return b''
+
+        samples = np.frombuffer(data, dtype=self.dtype, count=usable // self.dtype.itemsize)
+        # Work in float32 with full scale = 1.0
+        if self.sample_format == 'int16':
+            samples = samples.astype(np.float32) / 32768.0
+        else:
+            samples = samples.astype(np.float32)
+
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+
+        samples = samples * self._next_gain(samples)
+        return (np.clip(samples, -1.0, 32767 / 32768) * 32768.0).astype('<i2').tobytes()
+
+    def _next_gain(self, samples: np.ndarray) -> float:
+        if not self.agc or not len(samples):
+            return self.gain
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        if rms >= self.agc_gate:
+            # Move a fraction of the way per chunk so the level does not pump
+            wanted = min(self.agc_max_gain, self.agc_target / rms)
+            self.gain += 0.3 * (wanted - self.gain)
+        return self.gain
+
+
+def benchmark(sample_rate: int, channels: int, sample_format: str, seconds: float = 10.0,
+              chunk_ms: int = 100, agc: bool = False) -> Dict:
+    """Real-time factor (processing time / audio duration) for a synthetic stream"""
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    mono = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * np.sin(2 * np.pi * 3100 * t)
+    audio = np.repeat(mono[:, None], channels, axis=1).astype(np.float32)
+    if sample_format == 'int16':
+        audio = (audio * 32767).astype('<i2')
+    raw = audio.astype(SAMPLE_FORMATS[sample_format]).tobytes()
+
+    normalizer = AudioNormalizer(sample_rate, channels, sample_format, agc=agc)
+    chunk = sample_rate * chunk_ms // 1000 * normalizer.frame_bytes
+    started = time.perf_counter()
+    produced = 0
+    for offset in range(0, len(raw), chunk):
+        produced += len(normalizer.process(raw[offset:offset + chunk]))
+    elapsed = time.perf_counter() - started
+    return {
+        'format': f"{sample_rate} Hz {sample_format} x{channels}" + (' agc' if agc else ''),
+        'real_time_factor': elapsed / seconds,
+        'output_seconds': produced / 2 / TARGET_SAMPLE_RATE,
+    }
+
+
+if __name__ == '__main__':
+    for rate, channels, fmt, agc in ((48000, 1, 'float32', False), (48000, 2, 'float32', True),
+                                     (44100, 1, 'float32', False), (44100, 2, 'int16', False),
+                                     (16000, 1, 'float32', True)):
+        result = benchmark(rate, channels, fmt, agc=agc)
+        print(f"{result['format']:<28} RTF {result['real_time_factor']:.4f} "
+              f"({1 / max(result['real_time_factor'], 1e-9):.0f}x real time)")
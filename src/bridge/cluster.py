@@ -0,0 +1,174 @@
+"""
+Multi-process serving for the Sofia WebSocket Bridge
+
+Each worker process runs its own bridge and event loop on a socket bound with
+SO_REUSEPORT, so the kernel spreads new connections across workers. Workers
+share a SQLite registry (WAL mode) holding:
+
+- sessions: which worker owns a session plus the state needed to resume it
+  (conversation history, context) after a reconnect to any worker
+- workers: the latest stats snapshot of every worker, summed for get_stats
+
+The supervisor restarts workers that die; their clients reconnect, land on
+any worker and resume with their session ID.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Stats that are not summed across workers
+_NON_ADDITIVE = {'start_time', 'uptime'}
+
+
+class SessionRegistry:
+    """Session ownership and worker stats shared by all worker processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                worker_id TEXT,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                pid INTEGER,
+                stats TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        ''')
+
+    def _execute(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def save_session(self, session_id: str, worker_id: str, state: Dict) -> None:
+        self._execute('''
+            INSERT INTO sessions (session_id, worker_id, state, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                worker_id = excluded.worker_id, state = excluded.state, updated_at = excluded.updated_at
+        ''', (session_id, worker_id, json.dumps(state), time.time()))
+
+    def claim_session(self, session_id: str, worker_id: str, max_age: float = 3600) -> Optional[Dict]:
+        """Take over a session for resume; None if it is unknown or expired"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT state FROM sessions WHERE session_id = ? AND updated_at >= ?',
+                    (session_id, time.time() - max_age)
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        'UPDATE sessions SET worker_id = ?, updated_at = ? WHERE session_id = ?',
+                        (worker_id, time.time(), session_id)
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return json.loads(row[0]) if row else None
+
+    def release_session(self, session_id: str, worker_id: str) -> None:
+        """Client disconnected; the state stays resumable until it expires"""
+        self._execute('UPDATE sessions SET worker_id = NULL WHERE session_id = ? AND worker_id = ?',
+                      (session_id, worker_id))
+
+    def session_owner(self, session_id: str) -> Optional[str]:
+        rows = self._execute('SELECT worker_id FROM sessions WHERE session_id = ?', (session_id,))
+        return rows[0][0] if rows else None
+
+    def expire_sessions(self, max_age: float = 3600) -> int:
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM sessions WHERE updated_at < ?', (time.time() - max_age,))
+            return cursor.rowcount
+
+    def publish_stats(self, worker_id: str, stats: Dict) -> None:
+        self._execute('''
+            INSERT INTO workers (worker_id, pid, stats, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(worker_id) DO UPDATE SET
+                pid = excluded.pid, stats = excluded.stats, updated_at = excluded.updated_at
+        ''', (worker_id, os.getpid(), json.dumps(stats, default=str), time.time()))
+
+    def aggregate_stats(self, max_age: float = 30) -> Dict:
+        """Sum the numeric stats of every worker that reported recently"""
+        rows = self._execute('SELECT worker_id, stats FROM workers WHERE updated_at >= ?',
+                             (time.time() - max_age,))
+        totals: Dict = {'workers': len(rows), 'worker_ids': sorted(worker_id for worker_id, _ in rows)}
+        for _, raw in rows:
+            for key, value in json.loads(raw).items():
+                if key in _NON_ADDITIVE or isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_reuseport_socket(host: str, port: int, backlog: int = 512) -> socket.socket:
+    """Listening socket that several processes can bind to the same port"""
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        raise RuntimeError("SO_REUSEPORT is not supported on this platform")
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def run_workers(workers: int, target: Callable[[int], None], restart_delay: float = 1.0) -> None:
+    """Run `target(index)` in `workers` processes and restart any that exit until stopped"""
+    stopping = False
+    processes: Dict[int, multiprocessing.Process] = {}
+
+    def start(index: int) -> None:
+        process = multiprocessing.Process(target=target, args=(index,), name=f"sofia-worker-{index}", daemon=False)
+        process.start()
+        processes[index] = process
+        logger.info(f"👷 Worker {index} started (pid {process.pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    previous_handlers = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for index in range(workers):
+            start(index)
+
+        while not stopping:
+            time.sleep(0.2)
+            for index, process in list(processes.items()):
+                if process.exitcode is not None and not stopping:
+                    logger.warning(f"⚠️ Worker {index} exited with {process.exitcode}, restarting")
+                    time.sleep(restart_delay)
+                    start(index)
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in processes.values():
+            process.join(timeout=10)
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+        logger.info("✅ All workers stopped")
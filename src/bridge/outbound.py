@@ -0,0 +1,222 @@
+"""
+Per-connection outbound writer for the Sofia WebSocket Bridge
+
+Handlers never await `websocket.send` themselves. They enqueue frames and one
+writer task per connection drains the queue, so a slow browser only delays
+its own messages. The queue is bounded:
+
+- control messages (JSON) are never dropped
+- audio is droppable: when the queue is over its limits the oldest audio
+  goes first
+- messages with a coalesce key replace the queued message with the same key
+  (e.g. a newer partial transcript for the same utterance)
+
+Lag is the age of the oldest message not yet delivered. A client that stays
+over the lag budget for longer than the grace period is disconnected. This is
+checked on every enqueue and after every send, and a send that is still
+blocked when the grace period runs out is abandoned, so a client that stops
+reading is dropped on time rather than at the next websocket ping timeout.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+Frame = Union[str, bytes]
+
+
+class _Outbound:
+    __slots__ = ('frames', 'size', 'droppable', 'key', 'enqueued_at', 'on_sent')
+
+    def __init__(self, frames: List[Frame], droppable: bool, key: Optional[str],
+                 on_sent: Optional[Callable[[], None]] = None):
+        self.frames = frames
+        self.size = sum(len(frame) for frame in frames)
+        self.droppable = droppable
+        self.key = key
+        self.enqueued_at = time.monotonic()
+        self.on_sent = on_sent
+
+
+class ClientWriter:
+    """Bounded outbound queue plus the task that writes it to one websocket"""
+
+    def __init__(self, websocket, client_id: str = '',
+                 max_items: int = 256, max_bytes: int = 2 * 1024 * 1024,
+                 lag_budget_ms: int = 2000, lag_grace_ms: int = 5000,
+                 on_disconnect: Optional[Callable[[str], None]] = None):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.lag_budget = lag_budget_ms / 1000
+        self.lag_grace = lag_grace_ms / 1000
+        self.on_disconnect = on_disconnect
+
+        self._queue: deque = deque()
+        self._queued_bytes = 0
+        self._in_flight: Optional[_Outbound] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._over_budget_since: Optional[float] = None
+        self.closed = False
+
+        # Metrics
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.dropped_messages = 0
+        self.dropped_bytes = 0
+        self.coalesced_messages = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.avg_lag = 0.0
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    def lag(self) -> float:
+        """Seconds the oldest undelivered message has been waiting"""
+        oldest = self._in_flight or (self._queue[0] if self._queue else None)
+        return time.monotonic() - oldest.enqueued_at if oldest else 0.0
+
+    def enqueue(self, frames: List[Frame], droppable: bool = False, coalesce_key: Optional[str] = None,
+                on_sent: Optional[Callable[[], None]] = None) -> bool:
+        """Queue frames that must be sent back to back; False if the client is gone or the frames were dropped.
+
+        `on_sent` is called once the frames have been written to the socket.
+        """
+        if self.closed:
+            return False
+
+        item = _Outbound(frames, droppable, coalesce_key, on_sent)
+        if coalesce_key is not None:
+            for queued in self._queue:
+                if queued.key == coalesce_key:
+                    # Keep the original position and age, replace the content
+                    self._queued_bytes += item.size - queued.size
+                    queued.frames, queued.size, queued.on_sent = item.frames, item.size, item.on_sent
+                    self.coalesced_messages += 1
+                    self._check_lag()
+                    return True
+
+        self._queue.append(item)
+        self._queued_bytes += item.size
+        self._shed_audio()
+        self._wakeup.set()
+        self._check_lag()
+        return item in self._queue if droppable else True
+
+    def _shed_audio(self) -> None:
+        while len(self._queue) > self.max_items or self._queued_bytes > self.max_bytes:
+            victim = next((queued for queued in self._queue if queued.droppable), None)
+            if victim is None:
+                # Only control messages left; those are never dropped
+                return
+            self._queue.remove(victim)
+            self._queued_bytes -= victim.size
+            self.dropped_messages += 1
+            self.dropped_bytes += victim.size
+
+    def _check_lag(self) -> None:
+        now = time.monotonic()
+        if self.lag() <= self.lag_budget:
+            self._over_budget_since = None
+            return
+        if self._over_budget_since is None:
+            self._over_budget_since = now
+        elif now - self._over_budget_since >= self.lag_grace:
+            logger.warning(f"Client {self.client_id} over lag budget for "
+                           f"{now - self._over_budget_since:.1f}s, disconnecting")
+            self._disconnect()
+
+    def _send_deadline(self, item: _Outbound) -> float:
+        """Monotonic time at which an in-flight `item` has been over budget for the whole grace period"""
+        over_budget_since = item.enqueued_at + self.lag_budget
+        if self._over_budget_since is not None:
+            over_budget_since = min(over_budget_since, self._over_budget_since)
+        return over_budget_since + self.lag_grace
+
+    def _disconnect(self) -> None:
+        if self.closed:
+            return
+        self.stop()
+        if self.on_disconnect:
+            self.on_disconnect(self.client_id)
+        asyncio.ensure_future(self._close_websocket())
+
+    async def _close_websocket(self) -> None:
+        try:
+            await self.websocket.close(code=1013, reason='Client too slow')
+        except Exception as e:
+            logger.debug(f"Closing slow client {self.client_id} failed: {e}")
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+
+                item = self._queue.popleft()
+                self._queued_bytes -= item.size
+                self._in_flight = item
+                deadline = self._send_deadline(item)
+                for frame in item.frames:
+                    try:
+                        # asyncio.timeout rather than wait_for: no extra task, so a send that
+                        # completes without blocking still finishes in the same step
+                        async with asyncio.timeout(max(deadline - time.monotonic(), 0)):
+                            await self.websocket.send(frame)
+                    except TimeoutError:
+                        # The client stopped reading; nothing else would re-check the lag
+                        logger.warning(f"Client {self.client_id} send blocked past the lag budget, disconnecting")
+                        self._disconnect()
+                        return
+                self._in_flight = None
+                if item.on_sent is not None:
+                    item.on_sent()
+
+                lag = time.monotonic() - item.enqueued_at
+                self.messages_sent += 1
+                self.bytes_sent += item.size
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                self.avg_lag = 0.9 * self.avg_lag + 0.1 * lag
+                self._check_lag()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Connection closed or broken; the reader side cleans up the session
+            logger.info(f"Writer for {self.client_id} stopped: {e}")
+            self.closed = True
+
+    async def drain(self, timeout: float = 1.0) -> None:
+        """Wait until everything queued so far has been written"""
+        deadline = time.monotonic() + timeout
+        while (self._queue or self._in_flight) and not self.closed and time.monotonic() < deadline:
+            await asyncio.sleep(0.005)
+
+    def stop(self) -> None:
+        self.closed = True
+        self._queue.clear()
+        self._queued_bytes = 0
+        if self._task is not None:
+            self._task.cancel()
+
+    def metrics(self) -> Dict:
+        return {
+            'queued_messages': len(self._queue),
+            'queued_bytes': self._queued_bytes,
+            'lag_ms': round(self.lag() * 1000, 1),
+            'last_lag_ms': round(self.last_lag * 1000, 1),
+            'avg_lag_ms': round(self.avg_lag * 1000, 1),
+            'max_lag_ms': round(self.max_lag * 1000, 1),
+            'messages_sent': self.messages_sent,
+            'bytes_sent': self.bytes_sent,
+            'dropped_messages': self.dropped_messages,
+            'dropped_bytes': self.dropped_bytes,
+            'coalesced_messages': self.coalesced_messages,
+        }
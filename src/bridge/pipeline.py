@@ -0,0 +1,182 @@
+"""
+Per-session turn pipeline for the Sofia WebSocket Bridge
+
+A conversation turn runs through three stages, each its own task connected
+to the next by an asyncio.Queue:
+
+    audio segments -> [STT] -> transcripts -> [agent] -> replies -> [TTS]
+
+Handlers only enqueue, so new audio is accepted while an earlier reply is
+still being synthesized, and the next utterance is transcribed while Sofia
+speaks. When the caller starts talking over Sofia (barge-in) the reply being
+spoken is cancelled and queued replies are discarded.
+
+Each turn may carry a TurnTrace (src/bridge/tracing.py) through the queues;
+the stages mark when they start and finish it, and `on_turn_done` receives the
+trace once the turn is over.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, Tuple
+
+from src.utils.log_setup import bind_log_context
+
+from .tracing import TurnTrace
+
+logger = logging.getLogger(__name__)
+
+TranscribeStage = Callable[[bytes, Optional[int]], Awaitable[Optional[str]]]
+RespondStage = Callable[[str], Awaitable[Optional[str]]]
+SpeakStage = Callable[[str], Awaitable[None]]
+TurnDone = Callable[[TurnTrace], Awaitable[None]]
+
+
+class SessionPipeline:
+    """STT -> agent -> TTS stages of one session"""
+
+    def __init__(self, client_id: str, transcribe: TranscribeStage, respond: RespondStage,
+                 speak: Optional[SpeakStage] = None, max_queued: int = 16,
+                 on_turn_done: Optional[TurnDone] = None):
+        self.client_id = client_id
+        self.transcribe = transcribe
+        self.respond = respond
+        self.speak = speak
+        self.on_turn_done = on_turn_done
+
+        self.audio_queue: 'asyncio.Queue[Tuple[bytes, Optional[int], Optional[TurnTrace]]]' = asyncio.Queue(max_queued)
+        self.turn_queue: 'asyncio.Queue[Tuple[str, Optional[TurnTrace]]]' = asyncio.Queue(max_queued)
+        self.speech_queue: 'asyncio.Queue[Tuple[str, Optional[TurnTrace]]]' = asyncio.Queue(max_queued)
+        self._tasks = []
+        self._speaking_task: Optional[asyncio.Task] = None
+        # Trace of the reply being spoken; the TTS stage speaks one reply at a time
+        self.speaking_trace: Optional[TurnTrace] = None
+
+        # Statistics
+        self.turns = 0
+        self.barge_ins = 0
+        self.dropped_segments = 0
+        self.dropped_texts = 0
+
+    @property
+    def speaking(self) -> bool:
+        return (self._speaking_task is not None and not self._speaking_task.done()) or not self.speech_queue.empty()
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.ensure_future(self._run_stage('stt', self.audio_queue, self._stt)),
+            asyncio.ensure_future(self._run_stage('agent', self.turn_queue, self._agent)),
+        ]
+        if self.speak is not None:
+            self._tasks.append(asyncio.ensure_future(self._run_stage('tts', self.speech_queue, self._tts)))
+
+    def submit_audio(self, audio: bytes, utterance: Optional[int] = None,
+                     trace: Optional[TurnTrace] = None) -> bool:
+        try:
+            self.audio_queue.put_nowait((audio, utterance, trace))
+            return True
+        except asyncio.QueueFull:
+            # Transcription is hopelessly behind; the caller will repeat themselves
+            self.dropped_segments += 1
+            logger.warning(f"STT queue full for {self.client_id}, dropping segment")
+            return False
+
+    def submit_text(self, text: str, trace: Optional[TurnTrace] = None) -> bool:
+        """Typed messages skip STT but keep their place in the turn order; False if the turn queue is full"""
+        try:
+            self.turn_queue.put_nowait((text, trace))
+            return True
+        except asyncio.QueueFull:
+            self.dropped_texts += 1
+            logger.warning(f"Turn queue full for {self.client_id}, dropping text message")
+            return False
+
+    def barge_in(self) -> bool:
+        """Stop Sofia mid-reply; True if anything was actually interrupted"""
+        interrupted = self.speaking
+        while not self.speech_queue.empty():
+            _, trace = self.speech_queue.get_nowait()
+            self.speech_queue.task_done()
+            if trace is not None:
+                trace.interrupted = True
+                asyncio.ensure_future(self._turn_done(trace))
+        if self._speaking_task is not None and not self._speaking_task.done():
+            if self.speaking_trace is not None:
+                self.speaking_trace.interrupted = True
+            self._speaking_task.cancel()
+        if interrupted:
+            self.barge_ins += 1
+        return interrupted
+
+    async def _run_stage(self, name: str, source: asyncio.Queue, handler) -> None:
+        while True:
+            item = await source.get()
+            trace = item[-1]
+            # Log lines of this turn carry its trace ID
+            bind_log_context(trace_id=trace.trace_id if trace is not None else None)
+            try:
+                await handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Pipeline stage {name} failed for {self.client_id}: {e}")
+            finally:
+                source.task_done()
+
+    async def _stt(self, item: Tuple[bytes, Optional[int], Optional[TurnTrace]]) -> None:
+        audio, utterance, trace = item
+        if trace is not None:
+            trace.mark('stt_start')
+        text = await self.transcribe(audio, utterance)
+        if trace is not None:
+            trace.mark('stt_end')
+        if text:
+            await self.turn_queue.put((text, trace))
+
+    async def _agent(self, item: Tuple[str, Optional[TurnTrace]]) -> None:
+        text, trace = item
+        if trace is not None:
+            trace.mark('agent_start')
+        reply = await self.respond(text)
+        self.turns += 1
+        if trace is not None:
+            trace.mark('agent_end')
+        if reply and self.speak is not None:
+            await self.speech_queue.put((reply, trace))
+        else:
+            await self._turn_done(trace)
+
+    async def _tts(self, item: Tuple[str, Optional[TurnTrace]]) -> None:
+        reply, trace = item
+        self.speaking_trace = trace
+        if trace is not None:
+            trace.mark('tts_start')
+        self._speaking_task = asyncio.ensure_future(self.speak(reply))
+        # wait() instead of await: a barge-in cancels the reply, not this stage
+        await asyncio.wait([self._speaking_task])
+        self.speaking_trace = None
+        if not self._speaking_task.cancelled() and self._speaking_task.exception():
+            logger.error(f"Speech failed for {self.client_id}: {self._speaking_task.exception()}")
+        if trace is not None:
+            trace.mark('tts_end')
+        await self._turn_done(trace)
+
+    async def _turn_done(self, trace: Optional[TurnTrace]) -> None:
+        if trace is None or self.on_turn_done is None:
+            return
+        try:
+            await self.on_turn_done(trace)
+        except Exception as e:
+            logger.error(f"Turn completion failed for {self.client_id}: {e}")
+
+    async def join(self) -> None:
+        """Wait until everything submitted so far has been handled by every stage"""
+        for source in (self.audio_queue, self.turn_queue, self.speech_queue):
+            await source.join()
+
+    async def stop(self) -> None:
+        if self._speaking_task is not None:
+            self._speaking_task.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
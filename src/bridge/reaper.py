@@ -0,0 +1,104 @@
+"""
+Idle-session reaper and memory caps for the Sofia WebSocket Bridge
+
+Sessions used to live until their socket closed, so a browser tab left open
+kept its audio buffer and an ever-growing conversation history forever. The
+reaper runs periodically and:
+
+1. trims every session to its caps (buffered audio, history entries)
+2. picks connections idle for longer than the timeout to be closed
+3. if the remaining sessions still exceed the global memory budget, picks the
+   least recently active ones to be closed until the budget holds
+
+It only decides and trims; the bridge closes the chosen connections and its
+normal disconnect cleanup frees the session. Sizes are estimates of the
+buffers a session holds, not exact Python object sizes.
+
+Dropping stale audio from the preallocated ring buffer frees no memory, so it
+is reported separately (`discarded_bytes`) from what was actually released.
+"""
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .audio_buffer import PCM_BYTES_PER_SECOND
+
+
+class SweepResult(NamedTuple):
+    idle: List[str]
+    evicted: List[str]
+    trimmed_bytes: int
+    discarded_bytes: int
+    session_bytes: int
+
+
+def _history_entry_bytes(entry: Dict) -> int:
+    return sum(len(str(key)) + len(str(value)) for key, value in entry.items())
+
+
+def session_bytes(session: Dict) -> int:
+    """Approximate memory held by one session's buffers"""
+    size = session['audio_buffer'].capacity
+    size += sum(_history_entry_bytes(entry) for entry in session['conversation_history'])
+    stream = session.get('stt_stream')
+    if stream is not None:
+        size += len(stream.audio)
+    return size
+
+
+class SessionReaper:
+    """Decides which sessions to trim, close for idleness or evict for memory"""
+
+    def __init__(self, idle_timeout: float = 300.0, max_history: int = 40,
+                 max_buffered_audio: int = PCM_BYTES_PER_SECOND * 5,
+                 memory_budget: int = 256 * 1024 * 1024):
+        self.idle_timeout = idle_timeout
+        self.max_history = max_history
+        self.max_buffered_audio = max_buffered_audio
+        self.memory_budget = memory_budget
+
+    def trim(self, session: Dict) -> Tuple[int, int]:
+        """Enforce the per-session caps; returns (bytes released, buffered audio bytes discarded)"""
+        reclaimed = 0
+        history = session['conversation_history']
+        if len(history) > self.max_history:
+            dropped = history[:len(history) - self.max_history]
+            reclaimed += sum(_history_entry_bytes(entry) for entry in dropped)
+            del history[:len(dropped)]
+
+        # Audio nobody consumed (e.g. no VAD and no STT) is stale; keep the newest part
+        # The ring's capacity stays allocated, so this is not counted as released
+        audio_buffer = session['audio_buffer']
+        excess = max(len(audio_buffer) - self.max_buffered_audio, 0)
+        if excess:
+            audio_buffer.discard(excess)
+        return reclaimed, excess
+
+    def is_idle(self, session: Dict, now: float) -> bool:
+        pipeline = session.get('pipeline')
+        if pipeline is not None and pipeline.speaking:
+            # Sofia is still talking; the caller is listening, not gone
+            return False
+        return now - session['last_activity'] > self.idle_timeout
+
+    def sweep(self, sessions: Dict[str, Dict], now: Optional[float] = None) -> SweepResult:
+        now = time.time() if now is None else now
+        trimmed = discarded = 0
+        for session in sessions.values():
+            released, dropped = self.trim(session)
+            trimmed += released
+            discarded += dropped
+
+        idle = [client_id for client_id, session in sessions.items() if self.is_idle(session, now)]
+        remaining = {client_id: session_bytes(session) for client_id, session in sessions.items()
+                     if client_id not in idle}
+        total = sum(remaining.values())
+
+        evicted = []
+        if total > self.memory_budget:
+            for client_id in sorted(remaining, key=lambda c: sessions[c]['last_activity']):
+                if total <= self.memory_budget:
+                    break
+                evicted.append(client_id)
+                total -= remaining[client_id]
+
+        return SweepResult(idle, evicted, trimmed, discarded, total)
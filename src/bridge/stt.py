@@ -0,0 +1,202 @@
+"""
+Pluggable speech-to-text backends and streaming partial transcription for the Sofia WebSocket Bridge
+
+A backend only has to turn a block of 16 kHz mono int16 PCM into text. The
+StreamingTranscriber runs a backend over overlapping windows of the utterance
+in progress and stabilizes the hypotheses: a word is sent as stable once two
+consecutive windows agree on it, and stable words are never revised.
+"""
+import logging
+import re
+import time
+import zlib
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BYTES_PER_SAMPLE = 2
+
+
+class STTBackend:
+    """Base class for speech-to-text backends"""
+
+    name = 'base'
+
+    def transcribe(self, audio: bytes, sample_rate: int = 16000) -> Optional[str]:
+        """Transcribe a block of PCM audio; called from an executor thread"""
+        raise NotImplementedError
+
+
+class CallableSTTBackend(STTBackend):
+    """Adapts a plain `transcribe(audio) -> text` function to the backend interface"""
+
+    def __init__(self, name: str, func: Callable[[bytes], Optional[str]]):
+        self.name = name
+        self._func = func
+
+    def transcribe(self, audio: bytes, sample_rate: int = 16000) -> Optional[str]:
+        return self._func(audio)
+
+
+class LocalSTTBackend(STTBackend):
+    """Deterministic offline stand-in for tests and benchmarks.
+
+    Every voiced block of `word_ms` audio becomes one word picked from a fixed
+    German vocabulary by the CRC of its samples, so the same audio always
+    yields the same text and a longer prefix of an utterance extends the text
+    of a shorter one. `latency_ms` and `real_time_factor` emulate the cost of
+    a real recognizer.
+    """
+
+    name = 'local'
+
+    VOCABULARY = (
+        'ich', 'möchte', 'einen', 'termin', 'bitte', 'morgen', 'um', 'zehn',
+        'uhr', 'ja', 'nein', 'danke', 'kontrolle', 'zahnreinigung', 'schmerzen',
+        'am', 'montag', 'dienstag', 'vormittag', 'nachmittag', 'gerne', 'hallo',
+    )
+
+    def __init__(self, word_ms: int = 250, silence_rms: float = 200.0,
+                 latency_ms: float = 0.0, real_time_factor: float = 0.0):
+        self.word_ms = word_ms
+        self.silence_rms = silence_rms
+        self.latency_ms = latency_ms
+        self.real_time_factor = real_time_factor
+
+    def transcribe(self, audio: bytes, sample_rate: int = 16000) -> Optional[str]:
+        audio_seconds = len(audio) / (sample_rate * BYTES_PER_SAMPLE)
+        delay = self.latency_ms / 1000 + self.real_time_factor * audio_seconds
+        if delay > 0:
+            time.sleep(delay)
+
+        block = sample_rate * self.word_ms // 1000 * BYTES_PER_SAMPLE
+        words = []
+        for start in range(0, len(audio) - block + 1, block):
+            chunk = audio[start:start + block]
+            samples = array('h', chunk)
+            rms = (sum(s * s for s in samples[::8]) / max(1, len(samples[::8]))) ** 0.5
+            if rms < self.silence_rms:
+                continue
+            words.append(self.VOCABULARY[zlib.crc32(chunk) % len(self.VOCABULARY)])
+        return ' '.join(words) or None
+
+
+STT_BACKENDS: Dict[str, Callable[..., STTBackend]] = {
+    'local': LocalSTTBackend,
+}
+
+
+def register_stt_backend(name: str, factory: Callable[..., STTBackend]) -> None:
+    """Make a backend available by name (e.g. via SOFIA_STT_BACKEND)"""
+    STT_BACKENDS[name] = factory
+
+
+def create_stt_backend(name: str, **kwargs) -> STTBackend:
+    if name not in STT_BACKENDS:
+        raise ValueError(f"Unknown STT backend: {name}")
+    return STT_BACKENDS[name](**kwargs)
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return re.findall(r'\S+', text or '')
+
+
+def _common_prefix(a: List[str], b: List[str]) -> int:
+    n = 0
+    for left, right in zip(a, b):
+        if left.lower().strip('.,!?') != right.lower().strip('.,!?'):
+            break
+        n += 1
+    return n
+
+
+def _overlap(prefix: List[str], words: List[str]) -> int:
+    """Longest suffix of `prefix` that is repeated at the start of `words`"""
+    for size in range(min(len(prefix), len(words)), 0, -1):
+        if _common_prefix(prefix[-size:], words[:size]) == size:
+            return size
+    return 0
+
+
+class StreamingTranscriber:
+    """Partial-result state for one utterance.
+
+    Windows end on `step_ms` boundaries and span at most `window_ms`, so
+    consecutive windows overlap by `window_ms - step_ms`. While the utterance
+    fits in one window each hypothesis covers it from the start; after that
+    the window slides and its text is appended to the committed words with
+    the repeated overlap removed.
+    """
+
+    def __init__(self, utterance_id: int, sample_rate: int = 16000,
+                 window_ms: int = 3000, step_ms: int = 500, min_audio_ms: int = 300):
+        self.utterance_id = utterance_id
+        self.bytes_per_ms = sample_rate * BYTES_PER_SAMPLE // 1000
+        self.window_bytes = window_ms * self.bytes_per_ms
+        self.step_bytes = step_ms * self.bytes_per_ms
+        self.min_audio_bytes = min_audio_ms * self.bytes_per_ms
+        self.audio = bytearray()
+        self.started_at = time.monotonic()
+        self.first_text_at: Optional[float] = None
+        self.closed = False
+
+        self._last_window_end = 0
+        self._committed: List[str] = []
+        self._stable: List[str] = []
+        self._previous: List[str] = []
+        self._last_sent: Optional[Tuple[str, str]] = None
+
+    def append(self, audio: bytes) -> None:
+        self.audio += audio
+
+    def due(self) -> bool:
+        """True once a new step of audio has arrived since the last window"""
+        end = len(self.audio) - len(self.audio) % self.step_bytes
+        return (not self.closed and end >= self.min_audio_bytes
+                and end - self._last_window_end >= self.step_bytes)
+
+    def next_window(self) -> Tuple[bytes, int]:
+        """Return the next window of audio and its start offset in bytes"""
+        end = len(self.audio) - len(self.audio) % self.step_bytes
+        start = max(0, end - self.window_bytes)
+        self._last_window_end = end
+        return bytes(self.audio[start:end]), start
+
+    def update(self, text: Optional[str], window_start: int) -> Optional[Dict]:
+        """Merge a window hypothesis; return a partial message if anything changed"""
+        if self.closed:
+            return None
+
+        words = _words(text)
+        if window_start > 0:
+            # Sliding window: everything agreed so far is committed
+            if len(self._stable) > len(self._committed):
+                self._committed = list(self._stable)
+            words = self._committed + words[_overlap(self._committed, words):]
+
+        agreed = _common_prefix(self._previous, words)
+        if agreed > len(self._stable):
+            self._stable = words[:agreed]
+        self._previous = words
+
+        # Stable words were already shown to the client and never change
+        hypothesis = self._stable + words[len(self._stable):]
+        stable_text = ' '.join(self._stable)
+        full_text = ' '.join(hypothesis)
+        if not full_text or (full_text, stable_text) == self._last_sent:
+            return None
+
+        self._last_sent = (full_text, stable_text)
+        if self.first_text_at is None:
+            self.first_text_at = time.monotonic()
+        return {
+            'utterance': self.utterance_id,
+            'text': full_text,
+            'stable': stable_text,
+            'audio_ms': len(self.audio) // self.bytes_per_ms,
+        }
+
+    def close(self) -> None:
+        self.closed = True
+        self.audio = bytearray()
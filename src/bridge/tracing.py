@@ -0,0 +1,125 @@
+"""
+Per-turn latency tracing for the Sofia WebSocket Bridge
+
+Every conversation turn gets a TurnTrace with a trace ID. The bridge and the
+turn pipeline mark the moments the turn passes through:
+
+    received     first audio of the utterance (speech onset) or the text message
+    vad_end      end of the utterance, segment handed to the pipeline
+    stt_start / stt_end
+    agent_start / agent_end
+    tts_start / first_byte / tts_end
+                 first_byte is the first reply audio written to the socket
+
+A mark is one perf_counter() call and a dict store, cheap enough to leave on
+in production. Finished traces go into a fixed-size ring buffer. Percentiles
+are computed from it only when someone asks for them.
+"""
+import itertools
+import math
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+# Span name -> (start mark, end mark)
+SPANS = {
+    'utterance': ('received', 'vad_end'),
+    'stt_wait': ('vad_end', 'stt_start'),
+    'stt': ('stt_start', 'stt_end'),
+    'agent': ('agent_start', 'agent_end'),
+    'tts_first_byte': ('tts_start', 'first_byte'),
+    'tts': ('tts_start', 'tts_end'),
+    # What the caller perceives: end of their turn until Sofia is heard
+    'response': ('turn_end', 'first_byte'),
+    'total': ('received', 'done'),
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class TurnTrace:
+    """Timestamps of one turn, relative to its start"""
+    __slots__ = ('trace_id', 'client_id', 'kind', 'started_at', 'origin', 'marks', 'interrupted')
+
+    def __init__(self, trace_id: str, client_id: str, kind: str, origin: Optional[float] = None):
+        self.trace_id = trace_id
+        self.client_id = client_id
+        self.kind = kind
+        self.started_at = time.time()
+        self.origin = time.perf_counter() if origin is None else origin
+        self.marks: Dict[str, float] = {'received': 0.0}
+        self.interrupted = False
+
+    def mark(self, name: str) -> None:
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.origin
+
+    def spans(self) -> Dict[str, float]:
+        """Durations in ms of every span whose start and end were both marked"""
+        marks = dict(self.marks)
+        # Text turns have no utterance; their turn ends when they arrive
+        marks['turn_end'] = marks.get('vad_end', 0.0)
+        return {
+            name: round((marks[end] - marks[start]) * 1000, 2)
+            for name, (start, end) in SPANS.items()
+            if start in marks and end in marks
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'kind': self.kind,
+            'started_at': self.started_at,
+            'interrupted': self.interrupted,
+            'marks': {name: round(value * 1000, 2) for name, value in self.marks.items()},
+            'spans': self.spans(),
+        }
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class TraceRecorder:
+    """Creates traces and keeps the most recent finished ones"""
+
+    def __init__(self, capacity: int = 1000, prefix: str = ''):
+        self.traces: deque = deque(maxlen=capacity)
+        self.prefix = prefix
+        self._ids = itertools.count(1)
+        self.recorded = 0
+
+    def start(self, client_id: str, kind: str, origin: Optional[float] = None) -> TurnTrace:
+        return TurnTrace(f"{self.prefix}{next(self._ids):x}", client_id, kind, origin)
+
+    def finish(self, trace: TurnTrace) -> None:
+        trace.mark('done')
+        self.traces.append(trace)
+        self.recorded += 1
+
+    def recent(self, count: int = 20) -> List[Dict]:
+        return [trace.to_dict() for trace in list(self.traces)[-count:]]
+
+    def percentiles(self, percentiles: Iterable[int] = PERCENTILES) -> Dict[str, Dict]:
+        """Per-span count, mean and percentiles in ms over the buffered traces"""
+        values: Dict[str, List[float]] = {}
+        for trace in list(self.traces):
+            if trace.interrupted:
+                # A cut-off reply says nothing about how long a full turn takes
+                continue
+            for name, duration in trace.spans().items():
+                values.setdefault(name, []).append(duration)
+
+        result = {}
+        for name in SPANS:
+            durations = sorted(values.get(name, ()))
+            if not durations:
+                continue
+            result[name] = {
+                'count': len(durations),
+                'mean': round(sum(durations) / len(durations), 2),
+                **{f'p{p}': percentile(durations, p) for p in percentiles},
+            }
+        return result
@@ -0,0 +1,250 @@
+"""
+Pluggable text-to-speech backends and sentence-level streaming synthesis for the Sofia WebSocket Bridge
+
+Replies are split into sentences which are synthesized concurrently in an
+executor. Audio is yielded strictly in sentence order, so the caller can
+start playback as soon as the first sentence is ready instead of waiting
+for the whole reply.
+"""
+import asyncio
+import io
+import logging
+import math
+import re
+import time
+import wave
+from array import array
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.bridge.tts_cache import TTSCache, cache_key, unique_sentences
+
+logger = logging.getLogger(__name__)
+
+
+class TTSBackend:
+    """Base class for text-to-speech backends"""
+
+    name = 'base'
+    audio_format = 'mp3'
+    voice = ''
+    speaking_rate = 1.0
+
+    def synthesize(self, text: str) -> Optional[bytes]:
+        """Synthesize one sentence; called from an executor thread"""
+        raise NotImplementedError
+
+
+class GoogleTTSBackend(TTSBackend):
+    """Google Cloud Text-to-Speech using an already configured client"""
+
+    name = 'google'
+
+    def __init__(self, client, voice_params, audio_config,
+                 voice: str = 'de-DE-Wavenet-F', speaking_rate: float = 1.0, audio_format: str = 'mp3'):
+        self.client = client
+        self.voice_params = voice_params
+        self.audio_config = audio_config
+        self.voice = voice
+        self.speaking_rate = speaking_rate
+        self.audio_format = audio_format
+
+    def synthesize(self, text: str) -> Optional[bytes]:
+        from google.cloud import texttospeech
+
+        response = self.client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=self.voice_params,
+            audio_config=self.audio_config
+        )
+        return response.audio_content
+
+
+class LocalTTSBackend(TTSBackend):
+    """Deterministic offline stand-in for tests and benchmarks.
+
+    Produces a 16 kHz mono WAV tone whose length grows with the text.
+    `latency_ms` and `ms_per_char` emulate the synthesis time of a real service.
+    """
+
+    name = 'local'
+    audio_format = 'wav'
+    voice = 'local-tone'
+
+    def __init__(self, latency_ms: float = 0.0, ms_per_char: float = 0.0,
+                 sample_rate: int = 16000, audio_ms_per_char: int = 60):
+        self.latency_ms = latency_ms
+        self.ms_per_char = ms_per_char
+        self.sample_rate = sample_rate
+        self.audio_ms_per_char = audio_ms_per_char
+
+    def synthesize(self, text: str) -> Optional[bytes]:
+        delay = (self.latency_ms + self.ms_per_char * len(text)) / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+        samples = self.sample_rate * self.audio_ms_per_char * len(text) // 1000
+        # Pitch derived from the text keeps the output deterministic per sentence
+        frequency = 180 + sum(map(ord, text)) % 120
+        step = 2 * math.pi * frequency / self.sample_rate
+        period = max(1, round(self.sample_rate / frequency))
+        cycle = array('h', (int(2000 * math.sin(step * i)) for i in range(period)))
+        pcm = (cycle * (samples // period + 1))[:samples]
+
+        wav = io.BytesIO()
+        with wave.open(wav, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.sample_rate)
+            wav_file.writeframes(pcm.tobytes())
+        return wav.getvalue()
+
+
+TTS_BACKENDS: Dict[str, Callable[..., TTSBackend]] = {
+    'local': LocalTTSBackend,
+}
+
+
+def register_tts_backend(name: str, factory: Callable[..., TTSBackend]) -> None:
+    """Make a backend available by name (e.g. via SOFIA_TTS_BACKEND)"""
+    TTS_BACKENDS[name] = factory
+
+
+def create_tts_backend(name: str, **kwargs) -> TTSBackend:
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    return TTS_BACKENDS[name](**kwargs)
+
+
+# A dot after these does not end a sentence
+_ABBREVIATIONS = {
+    'dr', 'prof', 'nr', 'str', 'ca', 'bzw', 'usw', 'evtl', 'ggf', 'inkl', 'tel',
+    'z.b', 'd.h', 'u.a', 'bspw', 'vgl', 'mo', 'di', 'mi', 'do', 'fr', 'sa', 'so',
+}
+_SENTENCE_END = re.compile(r'(?<=[.!?…])\s+|\n+')
+
+
+def split_sentences(text: str, min_chars: int = 12) -> List[str]:
+    """Split a German reply into sentences for incremental synthesis.
+
+    Abbreviations ("Dr.", "z.B.") and numbers ("15.07.", "10.30 Uhr") do not
+    end a sentence. Fragments shorter than `min_chars` are joined to the next
+    sentence so tiny requests do not dominate synthesis time.
+    """
+    parts = []
+    buffer = ''
+    for piece in _SENTENCE_END.split(text.strip()):
+        piece = piece.strip()
+        if not piece:
+            continue
+        buffer = f"{buffer} {piece}" if buffer else piece
+        last_word = buffer.rsplit(None, 1)[-1].rstrip('.').lower()
+        if buffer.endswith('.') and (last_word in _ABBREVIATIONS or re.fullmatch(r'[\d.]+', last_word)):
+            continue
+        parts.append(buffer)
+        buffer = ''
+    if buffer:
+        parts.append(buffer)
+
+    sentences: List[str] = []
+    pending = ''
+    for part in parts:
+        pending = f"{pending} {part}" if pending else part
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ''
+    if pending:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+class TTSPipeline:
+    """Synthesizes sentences concurrently and yields the audio in order"""
+
+    def __init__(self, backend: TTSBackend, executor: Executor, max_parallel: int = 3,
+                 cache: Optional[TTSCache] = None, concurrency=None):
+        self.backend = backend
+        self.executor = executor
+        self.max_parallel = max_parallel
+        self.cache = cache
+        # Optional ConcurrencyLimit shared by all streams (see src/bridge/admission.py)
+        self.concurrency = concurrency
+        self.sentences_synthesized = 0
+
+    def cache_key(self, sentence: str) -> str:
+        backend = self.backend
+        return cache_key(sentence, backend.voice, backend.speaking_rate, backend.audio_format)
+
+    def synthesize_sentence(self, sentence: str) -> Optional[bytes]:
+        if self.cache is None:
+            self.sentences_synthesized += 1
+            return self.backend.synthesize(sentence)
+
+        key = self.cache_key(sentence)
+        audio = self.cache.get(key)
+        if audio is None:
+            self.sentences_synthesized += 1
+            audio = self.backend.synthesize(sentence)
+            if audio:
+                self.cache.put(key, audio)
+        return audio
+
+    async def warmup(self, phrases: Iterable[str]) -> Dict:
+        """Pre-synthesize phrases sentence by sentence so later replies hit the cache"""
+        sentences = unique_sentences(phrases, split_sentences)
+        synthesized_before = self.sentences_synthesized
+        loop = asyncio.get_event_loop()
+        limit = asyncio.Semaphore(self.max_parallel)
+
+        async def synthesize(sentence: str) -> bool:
+            async with limit:
+                try:
+                    return bool(await loop.run_in_executor(self.executor, self.synthesize_sentence, sentence))
+                except Exception as e:
+                    logger.error(f"TTS warmup failed for '{sentence}': {e}")
+                    return False
+
+        results = await asyncio.gather(*(synthesize(sentence) for sentence in sentences))
+        return {
+            'sentences': len(sentences),
+            'synthesized': self.sentences_synthesized - synthesized_before,
+            'failed': results.count(False),
+        }
+
+    async def stream(self, text: str) -> AsyncIterator[Tuple[int, int, str, Optional[bytes]]]:
+        """Yield (index, total, sentence, audio) in sentence order as each becomes ready"""
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+
+        loop = asyncio.get_event_loop()
+        limit = asyncio.Semaphore(self.max_parallel)
+
+        async def synthesize(sentence: str) -> Optional[bytes]:
+            if self.cache is not None:
+                # Memory hits are answered on the loop without an executor round trip
+                audio = self.cache.get_memory(self.cache_key(sentence))
+                if audio is not None:
+                    return audio
+            async with limit:
+                if self.concurrency is None:
+                    return await loop.run_in_executor(self.executor, self.synthesize_sentence, sentence)
+                async with self.concurrency:
+                    return await loop.run_in_executor(self.executor, self.synthesize_sentence, sentence)
+
+        # Start every sentence now; the semaphore keeps the executor from being flooded
+        tasks = [asyncio.ensure_future(synthesize(sentence)) for sentence in sentences]
+        try:
+            for index, (sentence, task) in enumerate(zip(sentences, tasks)):
+                try:
+                    audio = await task
+                except Exception as e:
+                    logger.error(f"TTS failed for sentence {index}: {e}")
+                    audio = None
+                yield index, len(sentences), sentence, audio
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,239 @@
+"""
+Content-addressed cache for synthesized speech in the Sofia WebSocket Bridge
+
+Sofia repeats the same phrases all day (greetings, fallbacks, opening hours).
+Audio is cached under a hash of the normalized text, voice, speaking rate and
+encoding in two tiers:
+
+- memory: LRU bounded by entry count and total bytes
+- disk: one file per entry, oldest-accessed files are evicted once the
+  directory exceeds its size budget
+
+Disk hits are promoted to memory. All methods are thread-safe because
+synthesis runs in executor threads.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a phrase; differences that do not change the audio are removed"""
+    text = unicodedata.normalize('NFC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def cache_key(text: str, voice: str, speaking_rate: float, audio_format: str) -> str:
+    material = '\x1f'.join([normalize_text(text), voice, f"{speaking_rate:.2f}", audio_format])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk) cache of synthesized audio"""
+
+    def __init__(self, memory_items: int = 512, memory_bytes: int = 32 * 1024 * 1024,
+                 disk_dir: Optional[str] = None, disk_bytes: int = 256 * 1024 * 1024):
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._memory_size = 0
+        # key -> (size, last access); rebuilt from the directory on start
+        self._disk: Dict[str, List[float]] = {}
+        self._disk_size = 0
+
+        # Statistics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            self._scan_disk()
+
+    def _scan_disk(self) -> None:
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file() and entry.name.endswith('.audio'):
+                stat = entry.stat()
+                self._disk[entry.name[:-len('.audio')]] = [stat.st_size, stat.st_mtime]
+                self._disk_size += stat.st_size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.audio")
+
+    def get_memory(self, key: str) -> Optional[bytes]:
+        """Memory-only lookup, cheap enough to run on the event loop"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return audio
+
+    def get(self, key: str) -> Optional[bytes]:
+        audio = self.get_memory(key)
+        if audio is not None:
+            return audio
+
+        if self.disk_dir:
+            with self._lock:
+                known = key in self._disk
+            if known:
+                try:
+                    with open(self._path(key), 'rb') as f:
+                        audio = f.read()
+                    os.utime(self._path(key))
+                except OSError:
+                    audio = None
+                if audio is not None:
+                    with self._lock:
+                        self.disk_hits += 1
+                        if key in self._disk:
+                            self._disk[key][1] = time.time()
+                    self._put_memory(key, audio)
+                    return audio
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, audio: bytes) -> None:
+        self._put_memory(key, audio)
+        if self.disk_dir:
+            self._put_disk(key, audio)
+
+    def _put_memory(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous)
+            self._memory[key] = audio
+            self._memory_size += len(audio)
+            while len(self._memory) > self.memory_items or self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def _put_disk(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.disk_bytes:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            # Write-then-rename so a reader never sees a partial file
+            with open(temp_path, 'wb') as f:
+                f.write(audio)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"TTS cache write failed: {e}")
+            return
+
+        with self._lock:
+            previous = self._disk.get(key)
+            if previous is not None:
+                self._disk_size -= previous[0]
+            self._disk[key] = [len(audio), time.time()]
+            self._disk_size += len(audio)
+            victims = []
+            if self._disk_size > self.disk_bytes:
+                for victim, (size, _) in sorted(self._disk.items(), key=lambda item: item[1][1]):
+                    if self._disk_size <= self.disk_bytes:
+                        break
+                    if victim == key:
+                        continue
+                    del self._disk[victim]
+                    self._disk_size -= size
+                    self.evictions += 1
+                    victims.append(victim)
+
+        for victim in victims:
+            try:
+                os.remove(self._path(victim))
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            keys = list(self._disk)
+            self._disk.clear()
+            self._disk_size = 0
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_size,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_size,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def phrase_catalog() -> List[str]:
+    """Every fixed phrase Sofia is known to say, for cache warmup"""
+    import german_conversation_flows as flows
+
+    phrases: List[str] = []
+
+    def collect(value) -> None:
+        if isinstance(value, str):
+            phrases.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                collect(item)
+
+    for name in dir(flows):
+        # Patterns are internal step names, not spoken text
+        if name.isupper() and name != 'CONVERSATION_PATTERNS':
+            collect(getattr(flows, name))
+
+    # Greetings produced by get_zeitabhaengige_begruessung
+    for begruessung in ('Guten Morgen', 'Guten Tag', 'Guten Abend'):
+        phrases.append(f"{begruessung}! Ich bin Sofia, Ihre Assistentin bei der Zahnarztpraxis Dr. Weber. "
+                       f"Wie kann ich Ihnen heute helfen?")
+
+    try:
+        from sofia_agent_adapter import ResponseGenerator
+        collect(ResponseGenerator().fallback_responses)
+    except Exception as e:
+        logger.info(f"Adapter fallback phrases not available for warmup: {e}")
+
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(normalize_text(p) for p in phrases if p.strip()))
+
+
+def unique_sentences(phrases: Iterable[str], splitter) -> List[str]:
+    """Sentences as the streaming pipeline will request them"""
+    sentences: List[str] = []
+    for phrase in phrases:
+        sentences.extend(splitter(phrase))
+    return list(dict.fromkeys(sentences))
@@ -0,0 +1,162 @@
+"""
+Streaming energy/zero-crossing voice activity detection for the Sofia WebSocket Bridge
+
+Incoming 16 kHz mono int16 PCM is cut into fixed frames. Frame energy and
+zero-crossing rate are computed for a whole chunk at once with NumPy; the
+per-frame state machine then groups speech frames into utterances:
+
+- pre-roll: the last few silent frames before speech onset are kept so the
+  first syllable is not clipped
+- hangover: an utterance only ends after a run of silent frames, so short
+  pauses inside a sentence do not split it
+"""
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+
+
+class StreamingVAD:
+    """Segments a PCM stream into utterances, dropping silence"""
+
+    def __init__(self,
+                 sample_rate: int = 16000,
+                 frame_ms: int = 20,
+                 energy_threshold: float = 500.0,
+                 noise_multiplier: float = 3.0,
+                 zcr_threshold: float = 0.35,
+                 hangover_ms: int = 300,
+                 preroll_ms: int = 200,
+                 min_speech_ms: int = 60,
+                 max_segment_ms: int = 15000):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * 2
+        self.energy_threshold = energy_threshold
+        self.noise_multiplier = noise_multiplier
+        self.zcr_threshold = zcr_threshold
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_segment_frames = max(1, max_segment_ms // frame_ms)
+
+        self.noise_floor = energy_threshold / noise_multiplier
+        self._pending = bytearray()
+        self._preroll = deque(maxlen=max(0, preroll_ms // frame_ms))
+        self._segment: Optional[bytearray] = None
+        self._segment_frames = 0
+        self._speech_frames = 0
+        self._silence_run = 0
+
+        # Statistics
+        self.frames_processed = 0
+        self.silence_frames_dropped = 0
+        self.segments_emitted = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return self._segment is not None
+
+    def classify_frames(self, samples: np.ndarray) -> np.ndarray:
+        """Return a boolean speech decision per frame for a (frames, samples) int16 array"""
+        frames = samples.astype(np.float32)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        threshold = max(self.energy_threshold, self.noise_floor * self.noise_multiplier)
+        loud = rms >= threshold
+        # High ZCR with modest energy is broadband noise; very loud frames
+        # (fricatives like "s" or "sch") count as speech regardless
+        speech = loud & ((zcr <= self.zcr_threshold) | (rms >= 2 * threshold))
+
+        quiet = rms[~speech]
+        if quiet.size:
+            # Track the background level slowly so a noisy room raises the threshold
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * float(np.median(quiet))
+        return speech
+
+    def process(self, audio: bytes) -> List[bytes]:
+        """Feed PCM bytes, returning every utterance completed by this chunk"""
+        self._pending += audio
+        usable = len(self._pending) - len(self._pending) % self.frame_bytes
+        if usable == 0:
+            return []
+
+        view = memoryview(self._pending)[:usable]
+        samples = np.frombuffer(view, dtype='<i2').reshape(-1, self.frame_samples)
+        decisions = self.classify_frames(samples)
+        self.frames_processed += len(decisions)
+
+        segments = []
+        for index, is_speech in enumerate(decisions):
+            frame = view[index * self.frame_bytes:(index + 1) * self.frame_bytes]
+            segment = self._step(bool(is_speech), frame)
+            if segment is not None:
+                segments.append(segment)
+
+        # Drop every export of the pending buffer before shrinking it
+        del frame, samples
+        view.release()
+        del self._pending[:usable]
+        return segments
+
+    def _step(self, is_speech: bool, frame: memoryview) -> Optional[bytes]:
+        if self._segment is None:
+            if not is_speech:
+                # The frame falling out of the pre-roll is silence never sent to STT
+                if len(self._preroll) == self._preroll.maxlen:
+                    self.silence_frames_dropped += 1
+                if self._preroll.maxlen:
+                    self._preroll.append(bytes(frame))
+                return None
+            # Speech onset: start the utterance with the pre-roll
+            self._segment = bytearray(b''.join(self._preroll))
+            self._segment_frames = len(self._preroll)
+            self._preroll.clear()
+            self._speech_frames = 0
+            self._silence_run = 0
+
+        self._segment += frame
+        self._segment_frames += 1
+        if is_speech:
+            self._speech_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+
+        if self._silence_run >= self.hangover_frames or self._segment_frames >= self.max_segment_frames:
+            return self._finish()
+        return None
+
+    def _finish(self) -> Optional[bytes]:
+        segment, speech_frames = self._segment, self._speech_frames
+        self._segment = None
+        self._segment_frames = 0
+        self._speech_frames = 0
+        self._silence_run = 0
+        if segment is None or speech_frames < self.min_speech_frames:
+            # A click or a cough, not an utterance
+            return None
+        self.segments_emitted += 1
+        return bytes(segment)
+
+    def segment_audio(self, offset: int = 0) -> bytes:
+        """Audio of the utterance in progress from byte `offset` on"""
+        if self._segment is None:
+            return b''
+        with memoryview(self._segment) as view:
+            return bytes(view[offset:])
+
+    def flush(self) -> Optional[bytes]:
+        """End of stream: return the utterance in progress, if any"""
+        self._pending.clear()
+        self._preroll.clear()
+        return self._finish()
+
+    def reset(self) -> None:
+        self._pending.clear()
+        self._preroll.clear()
+        self._segment = None
+        self._segment_frames = 0
+        self._speech_frames = 0
+        self._silence_run = 0
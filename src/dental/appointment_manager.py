@@ -1,10 +1,21 @@
 import sqlite3
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Mapping, Optional, Callable, TextIO, Tuple, Union
 import re
 import logging
 from functools import lru_cache
+from types import MappingProxyType
+
+from src.dental.termin_archiv import (
+    ARCHIV_NACH_TAGEN, AUFBEWAHRUNG_JAHRE, GESAMT_ANSICHT, TerminArchiv, archive_anhaengen
+)
+from src.dental.termin_abfragen import (
+    Patient, Termin, belegte_zeiten, belegung_text, historie_laden, historie_text, patient_laden,
+    suchergebnis_text, tagesplan_laden, tagesplan_text, termine_suchen
+)
+from src.dental.termin_import import ImportErgebnis, TerminImport, ist_deutsche_telefonnummer
+from src.dental.uhr import Uhr, aktuelle_uhr
 
 # 🚀 PERFORMANCE BOOST: Cached Date Patterns für 80% schnellere Antworten
 @lru_cache(maxsize=1000)
@@ -65,9 +76,16 @@ def cached_date_patterns(text: str) -> tuple:
     return ("no_time", None, None)
 
 class AppointmentManager:
-    def __init__(self, db_path: str = "termine.db"):
+    def __init__(self, db_path: str = "termine.db", uhr: Optional[Uhr] = None):
         self.db_path = db_path
+        # Ohne eigene Uhr gilt die prozessweite (in Tests per uhr_setzen() austauschbar)
+        self._uhr = uhr
+        self._zeitinfo = None
         self.init_database()
+
+    @property
+    def uhr(self) -> Uhr:
+        return self._uhr or aktuelle_uhr()
     
     def init_database(self):
         """Initialisiert die Terminverwaltung-Datenbank"""
@@ -121,21 +139,13 @@ class AppointmentManager:
         ✅ VALIDIERT deutsche Telefonnummern
         """
         try:
-            # Validiere deutsche Telefonnummer (einfache Prüfung hier)
-            nummer = re.sub(r'[\s\-\(\)\.\/]', '', telefon.strip())
-            if nummer.startswith('+'):
-                nummer = nummer[1:]
-            
-            # Prüfe ob deutsche Nummer
-            is_mobile = re.match(r'^(49)?0?1[567]\d{7,8}$', nummer)
-            is_landline = re.match(r'^(49)?0?[2-9]\d{1,4}\d{4,8}$', nummer)
-            
-            if not (is_mobile or is_landline):
+            # Validiere deutsche Telefonnummer (dieselbe Regel wie beim Massenimport)
+            if not ist_deutsche_telefonnummer(telefon):
                 return f"❌ Nur deutsche Telefonnummern erlaubt. Eingegebene Nummer: {telefon}"
             # ✅ VERGANGENHEITS-PRÜFUNG: Explizite Validierung
             try:
                 termin_datetime = datetime.strptime(f"{datum} {uhrzeit}", "%Y-%m-%d %H:%M")
-                jetzt = datetime.now()
+                jetzt = self.uhr.jetzt()
 
                 if termin_datetime <= jetzt:
                     return f"❌ Der Termin am {datum} um {uhrzeit} liegt in der Vergangenheit. Bitte wählen Sie einen zukünftigen Termin."
@@ -170,6 +180,30 @@ class AppointmentManager:
             logging.error(f"Fehler beim Hinzufügen des Termins: {e}")
             return f"❌ Fehler beim Buchen des Termins: {str(e)}"
     
+    def termine_importieren(self, quelle: Union[str, TextIO], format_: Optional[str] = None,
+                            ablehnungen: Union[str, TextIO, None] = None, batch: int = 20000,
+                            belegung_pruefen: bool = True,
+                            fortschritt: Optional[Callable[[ImportErgebnis], None]] = None) -> ImportErgebnis:
+        """
+        Massenimport von Terminen aus CSV oder JSONL (Pfad oder Textdatei)
+        ✅ PRÜFT Telefonnummer, Datum, Uhrzeit und Status pro Zeile
+        ✅ LEGT fehlende Patienten einmal pro Telefonnummer an
+        Ungültige oder doppelt belegte Zeilen werden nach `ablehnungen` geschrieben;
+        `fortschritt` wird nach jeder Transaktion mit dem Zwischenstand aufgerufen.
+        """
+        return TerminImport(self.db_path, batch=batch, belegung_pruefen=belegung_pruefen,
+                            fortschritt=fortschritt).ausfuehren(quelle, format_, ablehnungen)
+
+    def termine_archivieren(self, nach_tagen: int = ARCHIV_NACH_TAGEN,
+                            aufbewahrung_jahre: int = AUFBEWAHRUNG_JAHRE) -> Dict:
+        """
+        Verschiebt Termine älter als `nach_tagen` in Jahresarchive (archiv/termine_JJJJ.db)
+        und löscht Termine, deren Aufbewahrungsfrist abgelaufen ist
+        ✅ Historie und CRM lesen das Archiv weiterhin mit
+        """
+        return TerminArchiv(self.db_path, nach_tagen=nach_tagen,
+                            aufbewahrung_jahre=aufbewahrung_jahre).ausfuehren(self.uhr.heute())
+
     def ist_verfuegbar(self, datum: str, uhrzeit: str) -> bool:
         """
         Prüft ob ein Terminslot verfügbar ist
@@ -178,7 +212,7 @@ class AppointmentManager:
         try:
             # ✅ VERGANGENHEITS-PRÜFUNG: Keine Termine in der Vergangenheit
             termin_datetime = datetime.strptime(f"{datum} {uhrzeit}", "%Y-%m-%d %H:%M")
-            jetzt = datetime.now()
+            jetzt = self.uhr.jetzt()
 
             if termin_datetime <= jetzt:
                 return False  # Termine in Vergangenheit sind NICHT verfügbar
@@ -203,7 +237,7 @@ class AppointmentManager:
     def get_verfuegbare_termine(self, ab_datum: str = "", anzahl: int = 10) -> List[Dict]:
         """Findet die nächsten verfügbaren Termine"""
         if not ab_datum:
-            ab_datum = datetime.now().strftime('%Y-%m-%d')
+            ab_datum = self.uhr.jetzt().strftime('%Y-%m-%d')
         
         start_datum = datetime.strptime(ab_datum, '%Y-%m-%d')
         verfuegbare_termine = []
@@ -246,47 +280,27 @@ class AppointmentManager:
         
         return verfuegbare_termine
     
+    def tagesplan_termine(self, datum: str) -> List[Termin]:
+        """Bestätigte Termine eines Tages als Objekte, ohne Textaufbereitung"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return tagesplan_laden(conn, datum)
+        finally:
+            conn.close()
+
     def get_tagesplan(self, datum: str, fuer_arzt: bool = False) -> str:
         """Zeigt den Tagesplan für einen bestimmten Tag"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM termine 
-                WHERE datum = ? AND status = 'bestätigt'
-                ORDER BY uhrzeit
-            ''', (datum,))
-            
-            termine = cursor.fetchall()
-            conn.close()
-            
-            if not termine:
-                if fuer_arzt:
-                    return f"📅 **Tagesplan für {datum}**\n\n✅ Keine Termine heute - Freier Tag!"
-                else:
-                    return f"Für {datum} sind viele Termine verfügbar. Wann passt es Ihnen am besten?"
-            
             if fuer_arzt:
-                # Detaillierte Arztansicht
-                plan = f"📅 **Tagesplan für {datum}**\n\n"
-                plan += f"👥 **Anzahl Patienten:** {len(termine)}\n\n"
-                
-                for i, termin in enumerate(termine, 1):
-                    plan += f"**{i}. {termin[5]} Uhr** - {termin[7]}\n"  # uhrzeit, behandlungsart
-                    plan += f"   👤 Patient: {termin[1]}\n"  # patient_name
-                    plan += f"   📞 Telefon: {termin[2]}\n"  # telefon
-                    plan += f"   🦷 Behandlung: {termin[7]}\n"  # behandlungsart
-                    plan += f"   📝 Beschreibung: {termin[8] or 'Keine'}\n"  # beschreibung
-                    plan += f"   📋 Notizen: {termin[10] or 'Keine'}\n"  # notizen
-                    plan += f"\n"
-                
-                return plan
-            else:
-                # Vereinfachte Patientenansicht
-                belegte_zeiten = [termin[5] for termin in termine]  # uhrzeit
-                return f"Für {datum} sind folgende Zeiten bereits belegt: {', '.join(belegte_zeiten)}"
-                
+                return tagesplan_text(datum, self.tagesplan_termine(datum))
+
+            # Patientenansicht braucht nur die belegten Uhrzeiten
+            conn = sqlite3.connect(self.db_path)
+            try:
+                return belegung_text(datum, belegte_zeiten(conn, datum))
+            finally:
+                conn.close()
+
         except Exception as e:
             logging.error(f"Fehler beim Abrufen des Tagesplans: {e}")
             return "❌ Fehler beim Abrufen des Tagesplans"
@@ -305,17 +319,8 @@ class AppointmentManager:
                 datum_str = aktuelles_datum.strftime('%Y-%m-%d')
                 tag_name = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"][tag]
                 
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM termine 
-                    WHERE datum = ? AND status = 'bestätigt'
-                    ORDER BY uhrzeit
-                ''', (datum_str,))
-                termine = cursor.fetchall()
-                conn.close()
-                
                 if fuer_arzt:
+                    termine = self.tagesplan_termine(datum_str)
                     uebersicht += f"**{tag_name} ({aktuelles_datum.strftime('%d.%m')})**\n"
                     
                     if aktuelles_datum.weekday() == 6:  # Sonntag
@@ -326,7 +331,7 @@ class AppointmentManager:
                         gesamt_termine += len(termine)
                         uebersicht += f"   👥 {len(termine)} Termine:\n"
                         for termin in termine:
-                            uebersicht += f"      • {termin[5]} - {termin[1]} ({termin[7]})\n"
+                            uebersicht += f"      • {termin.uhrzeit} - {termin.patient_name} ({termin.behandlungsart})\n"
                         uebersicht += "\n"
                 else:
                     if aktuelles_datum.weekday() == 6:  # Sonntag
@@ -367,102 +372,56 @@ class AppointmentManager:
         
         return verfuegbare_slots
     
+    def termine_finden(self, suchbegriff: str, zeitraum: str = "naechste_woche") -> List[Termin]:
+        """Bestätigte Termine zu Name, Telefon oder Behandlung im Zeitraum (heute, morgen, naechste_woche, naechster_monat)"""
+        heute = self.uhr.jetzt()
+        
+        if zeitraum == "heute":
+            start_datum = heute
+            end_datum = heute
+        elif zeitraum == "morgen":
+            start_datum = heute + timedelta(days=1)
+            end_datum = heute + timedelta(days=1)
+        elif zeitraum == "naechster_monat":
+            start_datum = heute
+            end_datum = heute + timedelta(days=30)
+        else:  # naechste_woche und unbekannte Angaben
+            start_datum = heute
+            end_datum = heute + timedelta(days=7)
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return termine_suchen(conn, suchbegriff, start_datum.strftime('%Y-%m-%d'),
+                                  end_datum.strftime('%Y-%m-%d'))
+        finally:
+            conn.close()
+
     def termin_suchen(self, suchbegriff: str, zeitraum: str = "naechste_woche") -> str:
         """Sucht nach Terminen basierend auf verschiedenen Kriterien"""
         try:
-            heute = datetime.now()
-            
-            if zeitraum == "heute":
-                start_datum = heute
-                end_datum = heute
-            elif zeitraum == "morgen":
-                start_datum = heute + timedelta(days=1)
-                end_datum = heute + timedelta(days=1)
-            elif zeitraum == "naechste_woche":
-                start_datum = heute
-                end_datum = heute + timedelta(days=7)
-            elif zeitraum == "naechster_monat":
-                start_datum = heute
-                end_datum = heute + timedelta(days=30)
-            else:
-                start_datum = heute
-                end_datum = heute + timedelta(days=7)
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM termine 
-                WHERE (patient_name LIKE ? OR telefon LIKE ? OR behandlungsart LIKE ?)
-                AND datum >= ? AND datum <= ?
-                AND status = 'bestätigt'
-                ORDER BY datum, uhrzeit
-            ''', (f'%{suchbegriff}%', f'%{suchbegriff}%', f'%{suchbegriff}%',
-                  start_datum.strftime('%Y-%m-%d'), end_datum.strftime('%Y-%m-%d')))
-            
-            gefundene_termine = cursor.fetchall()
-            conn.close()
-            
-            if not gefundene_termine:
-                return f"🔍 Keine Termine gefunden für '{suchbegriff}' im angegebenen Zeitraum."
-            
-            ergebnis = f"🔍 **Suchergebnisse für '{suchbegriff}'** ({len(gefundene_termine)} Termine gefunden):\n\n"
-            
-            for i, termin in enumerate(gefundene_termine, 1):
-                ergebnis += f"{i}. **{termin[4]} um {termin[5]}**\n"  # datum, uhrzeit
-                ergebnis += f"   👤 Patient: {termin[1]}\n"  # patient_name
-                ergebnis += f"   📞 Telefon: {termin[2]}\n"  # telefon
-                ergebnis += f"   🦷 Behandlung: {termin[7]}\n"  # behandlungsart
-                ergebnis += f"   📊 Status: {termin[9]}\n\n"  # status
-            
-            return ergebnis
+            return suchergebnis_text(suchbegriff, self.termine_finden(suchbegriff, zeitraum))
             
         except Exception as e:
             logging.error(f"Fehler bei der Terminsuche: {e}")
             return "❌ Fehler bei der Terminsuche"
     
+    def patientenhistorie_laden(self, telefon: str) -> Tuple[Optional[Patient], List[Termin]]:
+        """Patient (oder None) und alle Termine inklusive Archiv, neueste zuerst"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            patient = patient_laden(conn, telefon)
+            if not patient:
+                return None, []
+            tabelle = GESAMT_ANSICHT if archive_anhaengen(conn, self.db_path) else 'termine'
+            return patient, historie_laden(conn, telefon, tabelle)
+        finally:
+            conn.close()
+
     def get_patientenhistorie(self, telefon: str) -> str:
         """Zeigt die Terminhistorie eines Patienten"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Hole Patienteninfo
-            cursor.execute('SELECT * FROM patienten WHERE telefon = ?', (telefon,))
-            patient = cursor.fetchone()
-            
-            # Hole Terminhistorie
-            cursor.execute('''
-                SELECT * FROM termine 
-                WHERE telefon = ?
-                ORDER BY datum DESC, uhrzeit DESC
-            ''', (telefon,))
-            termine = cursor.fetchall()
-            
-            conn.close()
-            
-            if not patient:
-                return f"❌ Patient mit Telefon {telefon} nicht in der Datenbank gefunden."
-            
-            historie = f"📋 **Patientenhistorie - {patient[1]}**\n\n"  # name
-            historie += f"📞 Telefon: {telefon}\n"
-            historie += f"📧 Email: {patient[3] or 'Nicht verfügbar'}\n"
-            historie += f"🎂 Geburtsdatum: {patient[4] or 'Nicht verfügbar'}\n\n"
-            
-            if not termine:
-                historie += "📅 Keine Termine in der Historie gefunden.\n"
-                return historie
-            
-            historie += f"🗓️ **Terminhistorie ({len(termine)} Termine):**\n\n"
-            
-            for i, termin in enumerate(termine, 1):
-                status_icon = "✅" if termin[9] == 'bestätigt' else "❌"  # status
-                historie += f"{i}. {status_icon} {termin[4]} um {termin[5]}\n"  # datum, uhrzeit
-                historie += f"   🦷 {termin[7]}\n"  # behandlungsart
-                historie += f"   📝 {termin[8] or 'Keine Beschreibung'}\n"  # beschreibung
-                historie += f"   📋 {termin[10] or 'Keine Notizen'}\n\n"  # notizen
-            
-            return historie
+            patient, termine = self.patientenhistorie_laden(telefon)
+            return historie_text(telefon, patient, termine)
             
         except Exception as e:
             logging.error(f"Fehler bei Patientenhistorie: {e}")
@@ -527,7 +486,7 @@ class AppointmentManager:
     def get_statistiken(self, zeitraum: str = "diese_woche") -> str:
         """Zeigt Statistiken für die Praxis"""
         try:
-            heute = datetime.now()
+            heute = self.uhr.jetzt()
             
             if zeitraum == "heute":
                 start_datum = heute
@@ -604,7 +563,7 @@ class AppointmentManager:
         pattern_type, pattern_data, match_data = cached_date_patterns(text)
 
         text = text.lower()
-        jetzt = datetime.now()
+        jetzt = self.uhr.jetzt()
         datetime_info = self.get_current_datetime_info()
         
         # Datum erkennen - viel intelligenter mit KI-Kontext
@@ -787,21 +746,20 @@ class AppointmentManager:
         
         return titel, datum, uhrzeit, behandlungsart, kontext
     
-    def get_current_datetime_info(self) -> Dict:
+    def get_current_datetime_info(self) -> Mapping:
         """
-        ✅ REPARIERT: Verwendet die zentrale get_current_datetime_info() Funktion
-        Verhindert Datums-Inkonsistenzen zwischen verschiedenen Modulen
+        Zeitinfo der zentralen Uhr, erweitert um Felder der Terminverwaltung.
+        Wie der Schnappschuss der Uhr wird sie nur einmal pro Minute berechnet
+        und ist unveränderlich.
         """
-        from .dental_tools import get_current_datetime_info
+        zentrale_info = self.uhr.zeitinfo()
+        if self._zeitinfo is not None and self._zeitinfo[0] is zentrale_info:
+            return self._zeitinfo[1]
 
-        # Verwende die zentrale Funktion
-        zentrale_info = get_current_datetime_info()
-
-        # Erweitere um appointment_manager spezifische Informationen
         jetzt = zentrale_info['datetime']
 
         # Kombiniere zentrale Info mit lokalen Erweiterungen
-        erweiterte_info = zentrale_info.copy()
+        erweiterte_info = dict(zentrale_info)
         erweiterte_info.update({
             # Zusätzliche appointment_manager spezifische Felder
             "aktuelles_datum": zentrale_info['date_iso'],
@@ -822,9 +780,11 @@ class AppointmentManager:
             "formatiert_lang": f"{zentrale_info['date_formatted']} um {zentrale_info['time_formatted']} Uhr",
             "ist_heute_arbeitstag": not zentrale_info['is_weekend'],
             "praxis_offen": self.ist_praxis_offen(jetzt),
-            "arbeitszeiten_heute": self.get_arbeitszeiten_heute(jetzt.weekday())
+            "arbeitszeiten_heute": MappingProxyType(self.get_arbeitszeiten_heute(jetzt.weekday()))
         })
 
+        erweiterte_info = MappingProxyType(erweiterte_info)
+        self._zeitinfo = (zentrale_info, erweiterte_info)
         return erweiterte_info
 
     def _berechne_naechste_woche(self, jetzt: datetime) -> datetime:
@@ -873,10 +833,12 @@ class AppointmentManager:
         }
         return arbeitszeiten.get(wochentag, {"vormittag": "", "nachmittag": ""})
     
-    def get_intelligente_terminvorschlaege(self, behandlungsart: str = "Kontrolluntersuchung", 
-                                         ab_datum: str = "", anzahl: int = 5) -> str:
-        """Gibt intelligente Terminvorschläge basierend auf aktuellem Datum/Zeit"""
-        jetzt = datetime.now()
+    def terminvorschlaege(self, ab_datum: str = "", anzahl: int = 5) -> List[Dict]:
+        """
+        Nächste freie Termine ab einem sinnvollen Startdatum, jeweils mit `in_tagen`
+        und `zeit_info` (" (morgen)", " (in 4 Tagen)", ...)
+        """
+        jetzt = self.uhr.jetzt()
         datetime_info = self.get_current_datetime_info()
         
         # Bestimme Startdatum intelligent
@@ -890,9 +852,33 @@ class AppointmentManager:
         
         verfuegbare_termine = self.get_verfuegbare_termine(ab_datum, anzahl)
         
+        for termin in verfuegbare_termine:
+            # Zusätzliche Informationen je nach Zeitpunkt
+            # Kalendertage, nicht angebrochene 24h: ein Termin heute ist "heute", nicht "in -1 Tagen"
+            termin_datum = datetime.strptime(termin['datum'], '%Y-%m-%d').date()
+            tage_differenz = (termin_datum - jetzt.date()).days
+            
+            if tage_differenz == 0:
+                zeit_info = " (heute)"
+            elif tage_differenz == 1:
+                zeit_info = " (morgen)"
+            elif tage_differenz == 2:
+                zeit_info = " (übermorgen)"
+            else:
+                zeit_info = f" (in {tage_differenz} Tagen)"
+            
+            termin['in_tagen'] = tage_differenz
+            termin['zeit_info'] = zeit_info
+        
+        return verfuegbare_termine
+
+    def terminvorschlaege_text(self, behandlungsart: str, verfuegbare_termine: List[Dict]) -> str:
+        """Antworttext zu `terminvorschlaege()`"""
         if not verfuegbare_termine:
             return f"🔍 Leider keine Termine in nächster Zeit verfügbar für {behandlungsart}."
         
+        datetime_info = self.get_current_datetime_info()
+        
         # Intelligente Antwort basierend auf aktuellem Kontext
         antwort = f"🗓️ **Terminvorschläge für {behandlungsart}**\n\n"
         antwort += f"📅 Heute ist {datetime_info['wochentag']}, {datetime_info['formatiert']}\n"
@@ -906,26 +892,16 @@ class AppointmentManager:
         antwort += f"\n✅ **Nächste {len(verfuegbare_termine)} verfügbare Termine:**\n\n"
         
         for i, termin in enumerate(verfuegbare_termine, 1):
-            # Zusätzliche Informationen je nach Zeitpunkt
-            termin_datum = datetime.strptime(termin['datum'], '%Y-%m-%d')
-            tage_differenz = (termin_datum - jetzt).days
-            
-            if tage_differenz == 0:
-                zeit_info = " (heute)"
-            elif tage_differenz == 1:
-                zeit_info = " (morgen)"
-            elif tage_differenz == 2:
-                zeit_info = " (übermorgen)"
-            elif tage_differenz <= 7:
-                zeit_info = f" (in {tage_differenz} Tagen)"
-            else:
-                zeit_info = f" (in {tage_differenz} Tagen)"
-            
-            antwort += f"{i}. {termin['anzeige']}{zeit_info}\n"
+            antwort += f"{i}. {termin['anzeige']}{termin['zeit_info']}\n"
         
         antwort += f"\n💡 **Welcher Termin passt Ihnen am besten?**"
         
         return antwort
 
+    def get_intelligente_terminvorschlaege(self, behandlungsart: str = "Kontrolluntersuchung", 
+                                         ab_datum: str = "", anzahl: int = 5) -> str:
+        """Gibt intelligente Terminvorschläge basierend auf aktuellem Datum/Zeit"""
+        return self.terminvorschlaege_text(behandlungsart, self.terminvorschlaege(ab_datum, anzahl))
+
 # Globale Instanz
 appointment_manager = AppointmentManager()
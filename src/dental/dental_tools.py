@@ -9,6 +9,8 @@ import json
 import locale
 import httpx
 import asyncio
+
+from src.dental import uhr
 # 🚀 PERFORMANCE BOOST: Fuzzy Times für unscharfe Zeitangaben
 FUZZY_TIMES = {
     "kurz nach 14": "14:15",
@@ -145,104 +147,13 @@ STAFF = {
     'Sofia': 'Praxisassistentin (KI)'
 }
 
-# Deutsche Wochentage und Monate
-GERMAN_WEEKDAYS = {
-    0: 'Montag', 1: 'Dienstag', 2: 'Mittwoch', 3: 'Donnerstag',
-    4: 'Freitag', 5: 'Samstag', 6: 'Sonntag'
-}
-
-GERMAN_MONTHS = {
-    1: 'Januar', 2: 'Februar', 3: 'März', 4: 'April', 5: 'Mai', 6: 'Juni',
-    7: 'Juli', 8: 'August', 9: 'September', 10: 'Oktober', 11: 'November', 12: 'Dezember'
-}
-
 def get_current_datetime_info():
     """
-    Gibt automatisch das aktuelle Datum und die Uhrzeit zurück.
-    ✅ KONSISTENTE datetime-Verwendung - keine String/datetime Mischung
-    ✅ REPARIERT: Verwendet immer das aktuelle Datum ohne Caching
-    ✅ AUTO-DATUM: Automatische Datum-Einfügung aktiviert
+    Gibt das aktuelle Datum und die Uhrzeit zurück.
+    Kommt aus der zentralen Uhr (src/dental/uhr.py): ein unveränderlicher
+    Schnappschuss pro Minute, den alle Tools und der AppointmentManager teilen.
     """
-    # ✅ WICHTIG: Jedes Mal frisches Datum abrufen
-    now = datetime.now()
-    
-    # 🔧 DEBUG: Logging für Datum-Debugging
-    import logging
-    logging.debug(f"DATUM-DEBUG: Aktuelles Datum: {now}")
-
-    # Deutsche Wochentag und Monat
-    weekday_german = GERMAN_WEEKDAYS[now.weekday()]
-    month_german = GERMAN_MONTHS[now.month]
-
-    # ✅ KONSISTENTE Ausgabe - datetime-Objekte UND formatierte Strings
-    date_info = {
-        # datetime-Objekte für Berechnungen
-        'datetime': now,
-        'date': now.date(),  # date-Objekt
-        'time': now.time(),  # time-Objekt
-
-        # Formatierte Strings für Anzeige
-        'date_formatted': f"{weekday_german}, {now.day}. {month_german} {now.year}",
-        'time_formatted': f"{now.hour:02d}:{now.minute:02d}",
-        'date_iso': now.strftime("%Y-%m-%d"),  # ISO-Format für Datenbank
-        'time_iso': now.strftime("%H:%M"),     # ISO-Format für Datenbank
-        
-        # ✅ AUTO-DATUM: Automatische Datum-Einfügung für Antworten
-        'auto_date': f"Heute ist {weekday_german}, der {now.day}. {month_german} {now.year}",
-        'auto_time': f"Es ist {now.hour:02d}:{now.minute:02d} Uhr",
-
-        # Deutsche Bezeichnungen
-        'weekday': weekday_german,
-        'month': month_german,
-
-        # Numerische Werte für Berechnungen
-        'hour': now.hour,
-        'minute': now.minute,
-        'day': now.day,
-        'month_num': now.month,
-        'year': now.year,
-        'weekday_num': now.weekday(),
-
-        # Berechnete Werte
-        'is_weekend': now.weekday() >= 5,  # Samstag=5, Sonntag=6
-        'tomorrow_weekday': GERMAN_WEEKDAYS[(now.weekday() + 1) % 7]
-    }
-
-    # ✅ RELATIVE DATUMS-BERECHNUNGEN hinzufügen
-    morgen = now + timedelta(days=1)
-    übermorgen = now + timedelta(days=2)
-    
-    # 🔧 DEBUG: Logging für Datum-Debugging
-    logging.debug(f"DATUM-DEBUG: Morgen: {morgen.day}. {GERMAN_MONTHS[morgen.month]} {morgen.year}")
-    logging.debug(f"DATUM-DEBUG: Übermorgen: {übermorgen.day}. {GERMAN_MONTHS[übermorgen.month]} {übermorgen.year}")
-
-    # Nächste Woche = Montag der nächsten Woche
-    tage_bis_naechster_montag = (7 - now.weekday()) % 7
-    if tage_bis_naechster_montag == 0:  # Heute ist Montag
-        tage_bis_naechster_montag = 7  # Nächster Montag
-    naechste_woche = now + timedelta(days=tage_bis_naechster_montag)
-
-    # Kalenderwoche berechnen
-    kalenderwoche = now.isocalendar()[1]
-
-    # Erweiterte Informationen hinzufügen
-    date_info.update({
-        # Relative Daten
-        'morgen': f"{GERMAN_WEEKDAYS[morgen.weekday()]}, {morgen.day}. {GERMAN_MONTHS[morgen.month]} {morgen.year}",
-        'morgen_iso': morgen.strftime("%Y-%m-%d"),
-        'übermorgen': f"{GERMAN_WEEKDAYS[übermorgen.weekday()]}, {übermorgen.day}. {GERMAN_MONTHS[übermorgen.month]} {übermorgen.year}",
-        'übermorgen_iso': übermorgen.strftime("%Y-%m-%d"),
-        'nächste_woche': f"{GERMAN_WEEKDAYS[naechste_woche.weekday()]}, {naechste_woche.day}. {GERMAN_MONTHS[naechste_woche.month]} {naechste_woche.year}",
-        'nächste_woche_iso': naechste_woche.strftime("%Y-%m-%d"),
-        'kalenderwoche': kalenderwoche,
-
-        # datetime-Objekte für weitere Berechnungen
-        'morgen_datetime': morgen,
-        'übermorgen_datetime': übermorgen,
-        'nächste_woche_datetime': naechste_woche
-    })
-
-    return date_info
+    return uhr.zeitinfo()
 
 def get_intelligente_medizinische_nachfragen(symptom_oder_grund: str) -> str:
     """
@@ -297,7 +208,7 @@ def validate_and_parse_datetime(date_str: str, time_str: str):
         appointment_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
 
         # Prüfe ob Datum in der Zukunft liegt
-        now = datetime.now()
+        now = uhr.jetzt()
         if appointment_datetime <= now:
             return None, "Der Termin muss in der Zukunft liegen."
 
@@ -329,6 +240,8 @@ def validate_and_parse_datetime(date_str: str, time_str: str):
     except ValueError:
         return None, "Ungültiges Datum- oder Zeitformat. Verwenden Sie YYYY-MM-DD und HH:MM."
 from src.dental.appointment_manager import appointment_manager
+from src.dental import tool_ausgabe
+from src.dental.termin_abfragen import suchergebnis_text
 
 # Simple in-memory storage for appointments (in production, use a proper database)
 appointments_db = {}
@@ -592,7 +505,7 @@ async def check_availability(
         target_date = datetime.strptime(date, "%Y-%m-%d")
         
         # Prüfe ob das Datum in der Vergangenheit liegt
-        if target_date.date() < datetime.now().date():
+        if target_date.date() < uhr.jetzt().date():
             return "Entschuldigung, ich kann keine Termine für vergangene Daten buchen."
 
         # Prüfe ob es Sonntag ist (Praxis geschlossen)
@@ -641,7 +554,7 @@ async def schedule_appointment(
         # Validazione data e ora
         appointment_datetime = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
         
-        if appointment_datetime < datetime.now():
+        if appointment_datetime < uhr.jetzt():
             return "Ich kann keine Termine für vergangene Daten und Uhrzeiten buchen."
         
         # Prüfe ob die Terminart existiert
@@ -661,7 +574,7 @@ async def schedule_appointment(
             "type": appointment_type,
             "notes": notes,
             "status": "confermato",
-            "created_at": datetime.now().isoformat()
+            "created_at": uhr.jetzt().isoformat()
         }
         
         # Speichere den Termin
@@ -724,7 +637,7 @@ async def collect_patient_info(
             "medications": medications,
             "allergies": allergies,
             "previous_dentist": previous_dentist,
-            "registration_date": datetime.now().isoformat()
+            "registration_date": uhr.jetzt().isoformat()
         }
         
         # Speichere die Patientendaten
@@ -803,7 +716,7 @@ async def reschedule_appointment(
 
         # Prüfe Verfügbarkeit des neuen Datums/Uhrzeit
         new_datetime = datetime.strptime(f"{new_date} {new_time}", "%Y-%m-%d %H:%M")
-        if new_datetime < datetime.now():
+        if new_datetime < uhr.jetzt():
             return "Ich kann nicht auf vergangene Daten und Uhrzeiten verlegen."
 
         # Prüfe ob der neue Slot verfügbar ist
@@ -1066,32 +979,10 @@ async def meine_termine_finden(
 
         # Suche nach IHREN Terminen
         suchbegriff = patient_name if patient_name else telefon
-        termine = appointment_manager.termin_suchen(suchbegriff, zeitraum)
-
-        if "keine Termine gefunden" in termine.lower():
-            response = f"📅 **Keine Termine für Sie gefunden**\n\n"
-            if patient_name:
-                response += f"Für Ihren Namen '{patient_name}' "
-            if telefon:
-                response += f"Für Ihre Telefonnummer '{telefon}' "
-            response += f"wurden keine Termine im Zeitraum '{zeitraum}' gefunden.\n\n"
-            response += "💡 **Möchten Sie:**\n"
-            response += "• Einen neuen Termin vereinbaren?\n"
-            response += "• Prüfen, ob Sie unter einem anderen Namen registriert sind?\n"
-            response += "• In einem anderen Zeitraum suchen?"
-            return response
+        termine = appointment_manager.termine_finden(suchbegriff, zeitraum)
 
-        # IHRE Termine gefunden
-        response = f"📅 **Ihre persönlichen Termine**\n\n"
-        if patient_name:
-            response += f"👤 **Ihr Name:** {patient_name}\n"
-        if telefon:
-            response += f"📞 **Ihre Telefonnummer:** {telefon}\n"
-        response += f"📆 **Zeitraum:** {zeitraum}\n\n"
-        response += termine
-        response += f"\n\n💡 **Benötigen Sie Änderungen an Ihren Terminen?**"
-
-        return response
+        return tool_ausgabe.meine_termine(patient_name, telefon, zeitraum, termine,
+                                          lambda: suchergebnis_text(suchbegriff, termine))
 
     except Exception as e:
         logging.error(f"Fehler beim Finden Ihrer persönlichen Termine: {e}")
@@ -1172,57 +1063,19 @@ async def parse_terminwunsch(
     """
     try:
         titel, datum, uhrzeit, behandlungsart, kontext = appointment_manager.parse_natural_language(text)
-        
-        response = f"📋 **Terminwunsch verstanden:**\n\n"
-        response += f"� Originaltext: '{text}'\n"
-        response += f"�📅 Datum: {datum}\n"
-        response += f"🕐 Uhrzeit: {uhrzeit or 'Flexibel'}\n"
-        response += f"🦷 Behandlung: {behandlungsart}\n\n"
-        
-        # Zusätzliche Kontextinformationen
-        if kontext["ist_heute_arbeitstag"] and datum == kontext.get("aktuelles_datum"):
-            response += f"ℹ️ **Hinweis**: Sie möchten heute einen Termin.\n"
-            if kontext["praxis_offen"]:
-                response += f"✅ Die Praxis ist derzeit geöffnet.\n"
-            else:
-                response += f"❌ Die Praxis ist derzeit geschlossen.\n"
-                arbeitszeiten = kontext["arbeitszeiten_heute"]
-                response += f"⏰ Öffnungszeiten heute: {arbeitszeiten['vormittag']}"
-                if arbeitszeiten['nachmittag']:
-                    response += f", {arbeitszeiten['nachmittag']}"
-                response += "\n"
-            response += "\n"
-        
-        if uhrzeit:
-            # Prüfe Verfügbarkeit
-            ist_frei = appointment_manager.ist_verfuegbar(datum, uhrzeit)
-            if ist_frei:
-                response += f"✅ **Der gewünschte Termin ist verfügbar!**\n"
-                response += f"📅 {datum} um {uhrzeit} für {behandlungsart}\n\n"
-                response += f"💡 Möchten Sie diesen Termin buchen?"
-            else:
-                response += f"❌ **Der gewünschte Termin ist bereits belegt.**\n"
-                response += f"📅 {datum} um {uhrzeit}\n\n"
-                
-                # Zeige intelligente Alternativen
-                alternative_termine = appointment_manager.get_intelligente_terminvorschlaege(behandlungsart, datum, 3)
-                response += f"🔄 **Alternative Vorschläge:**\n{alternative_termine}"
-        else:
-            # Zeige verfügbare Zeiten für den Tag
-            verfuegbare_zeiten = appointment_manager.get_verfuegbare_termine_tag(datum)
-            if verfuegbare_zeiten:
-                response += f"✅ **Verfügbare Zeiten am {datum}:**\n"
-                for i, zeit in enumerate(verfuegbare_zeiten[:5], 1):
-                    response += f"  {i}. {zeit} Uhr\n"
-                response += f"\n💡 Welche Uhrzeit passt Ihnen am besten?"
-            else:
-                response += f"❌ **Am {datum} sind keine Termine verfügbar.**\n"
-                
-                # Zeige intelligente Alternativen
-                alternative_termine = appointment_manager.get_intelligente_terminvorschlaege(behandlungsart, datum, 3)
-                response += f"\n🔄 **Alternative Termine:**\n{alternative_termine}"
-        
-        return response
+
+        # Mit Uhrzeit: ist der Slot frei? Ohne: welche Zeiten sind an dem Tag frei?
+        verfuegbar = appointment_manager.ist_verfuegbar(datum, uhrzeit) if uhrzeit else None
+        freie_zeiten = [] if uhrzeit else appointment_manager.get_verfuegbare_termine_tag(datum)
+
+        # Intelligente Alternativen, wenn der Wunsch nicht klappt
+        alternativen = []
+        if verfuegbar is False or (not uhrzeit and not freie_zeiten):
+            alternativen = appointment_manager.terminvorschlaege(datum, 3)
+
+        return tool_ausgabe.terminwunsch(
+            text, datum, uhrzeit, behandlungsart, kontext, verfuegbar, freie_zeiten, alternativen,
+            lambda: appointment_manager.terminvorschlaege_text(behandlungsart, alternativen))
         
     except Exception as e:
         logging.error(f"Fehler beim Parsen des Terminwunsches: {e}")
@@ -1299,7 +1152,10 @@ async def get_intelligente_terminvorschlaege(
     anzahl: Anzahl der Vorschläge
     """
     try:
-        return appointment_manager.get_intelligente_terminvorschlaege(behandlungsart, ab_datum, anzahl)
+        vorschlaege = appointment_manager.terminvorschlaege(ab_datum, anzahl)
+        return tool_ausgabe.terminvorschlaege(
+            behandlungsart, vorschlaege, appointment_manager.get_current_datetime_info(),
+            lambda: appointment_manager.terminvorschlaege_text(behandlungsart, vorschlaege))
         
     except Exception as e:
         logging.error(f"Fehler bei intelligenten Terminvorschlägen: {e}")
@@ -1626,11 +1482,18 @@ async def termin_direkt_buchen(
     ✅ KONSISTENT: Verwendet validate_and_parse_datetime() für Validierung
     """
     try:
+        # Gemeinsame Felder für jede Antwort dieses Tools
+        def antwort(status: str, grund: str = "", alternativen: Optional[List[Dict]] = None) -> str:
+            return tool_ausgabe.buchung(
+                status, patient_name, phone, appointment_date, appointment_time, treatment_type, notes,
+                grund=grund, alternativen=alternativen,
+                alternativen_text=lambda: appointment_manager.terminvorschlaege_text(treatment_type, alternativen))
+
         # ✅ KONSISTENTE VALIDIERUNG: Verwende neue Hilfsfunktion
         appointment_datetime, error = validate_and_parse_datetime(appointment_date, appointment_time)
 
         if error:
-            return f"❌ {error}"
+            return antwort('abgelehnt', error)
 
         # Daten im CallManager speichern
         call_manager.set_patient_info({
@@ -1645,10 +1508,7 @@ async def termin_direkt_buchen(
         
         if not available:
             # Alternative Termine vorschlagen statt Fehler
-            alternatives = appointment_manager.get_intelligente_terminvorschlaege(treatment_type, appointment_date, 3)
-            return f"❌ **Der gewünschte Termin am {appointment_date} um {appointment_time} ist leider nicht verfügbar.**\n\n" \
-                   f"🔄 **Ich habe diese Alternativen für Sie:**\n{alternatives}\n\n" \
-                   f"Welcher Termin passt Ihnen?"
+            return antwort('belegt', alternativen=appointment_manager.terminvorschlaege(appointment_date, 3))
         
         # Termin direkt buchen (ohne nochmalige Bestätigung)
         result = appointment_manager.termin_hinzufuegen(
@@ -1674,25 +1534,11 @@ async def termin_direkt_buchen(
             call_manager.mark_appointment_scheduled(appointment_data)
             call_manager.add_note(f"Termin direkt gebucht: {appointment_date} {appointment_time}")
 
-            return f"**✅ Perfekt! Ihr Termin ist gebucht!**\n\n" \
-                   f"👤 **Name**: {patient_name}\n" \
-                   f"📞 **Telefon**: {phone}\n" \
-                   f"📅 **Termin**: {appointment_date} um {appointment_time}\n" \
-                   f"🦷 **Behandlung**: {treatment_type}\n" \
-                   f"📝 **Notizen**: {notes if notes else 'Keine besonderen Notizen'}\n\n" \
-                   f"🎉 **Ihr Termin ist bestätigt!** Wir freuen uns auf Sie!\n" \
-                   f"📞 Bei Fragen erreichen Sie uns unter: 0123 456 789\n\n" \
-                   f"💡 **Kann ich Ihnen noch bei etwas anderem helfen?**"
-        else:
-            # Fehler bei der Buchung - zeige spezifische Fehlermeldung
-            error_msg = result if result else "Unbekannter Fehler beim Speichern"
-
-            # Biete Alternativen an
-            alternatives = appointment_manager.get_intelligente_terminvorschlaege(treatment_type, appointment_date, 3)
+            return antwort('gebucht')
 
-            return f"{error_msg}\n\n" \
-                   f"🔄 **Keine Sorge! Hier sind alternative Termine:**\n{alternatives}\n\n" \
-                   f"💡 **Welcher Termin würde Ihnen passen?**"
+        # Fehler bei der Buchung - spezifische Fehlermeldung plus Alternativen
+        return antwort('fehler', result if result else "Unbekannter Fehler beim Speichern",
+                       appointment_manager.terminvorschlaege(appointment_date, 3))
             
     except Exception as e:
         logging.error(f"Fehler bei direkter Terminbuchung: {e}")
@@ -1905,7 +1751,7 @@ async def intelligente_antwort_mit_namen_erkennung(
                 # Lernfähigkeit: Häufige Terminanfragen tracken
                 lernsystem.anfrage_aufzeichnen("Terminanfrage_ohne_Grund", {
                     "input": patient_input,
-                    "zeitstempel": datetime.now().isoformat()
+                    "zeitstempel": uhr.jetzt().isoformat()
                 })
 
         # Schmerzen erkennen
@@ -1937,7 +1783,7 @@ async def intelligente_antwort_mit_namen_erkennung(
                 # Lernfähigkeit: Terminanfrage ohne Identifikation tracken
                 lernsystem.anfrage_aufzeichnen("Terminanfrage_ohne_Identifikation", {
                     "input": patient_input,
-                    "zeitstempel": datetime.now().isoformat()
+                    "zeitstempel": uhr.jetzt().isoformat()
                 })
 
         # Allgemeine Begrüßung
@@ -1966,7 +1812,6 @@ async def gespraech_hoeflich_beenden(
         call_manager.end_call()
 
         # Höfliche Verabschiedung basierend auf Tageszeit
-        from .dental_tools import get_current_datetime_info
         info = get_current_datetime_info()
 
         if call_manager.has_patient_name():
@@ -2254,7 +2099,7 @@ async def notfall_priorisierung(
         
         # Hole nächste verfügbare Notfalltermine
         from datetime import datetime, timedelta
-        jetzt = datetime.now()
+        jetzt = uhr.jetzt()
         
         antwort = f"**Notfall-Bewertung:**\n\n"
         antwort += f"**Symptome**: {symptome}\n"
@@ -2304,10 +2149,10 @@ async def wartezeit_schaetzung(
         
         # Parse Datum und Zeit
         termin_zeit = datetime.strptime(f"{datum} {uhrzeit}", "%Y-%m-%d %H:%M")
-        jetzt = datetime.now()
+        jetzt = uhr.jetzt()
         
-        # Hole Tagesplan
-        tagesplan = appointment_manager.get_tagesplan(datum)
+        # Hole Tagesplan (bestätigte Termine als Objekte)
+        tagesplan = appointment_manager.tagesplan_termine(datum)
         
         # Durchschnittliche Behandlungsdauern (in Minuten)
         behandlungsdauern = {
@@ -2325,12 +2170,13 @@ async def wartezeit_schaetzung(
         aktuelle_zeit = datetime.strptime(f"{datum} 09:00", "%Y-%m-%d %H:%M")
         
         for termin in tagesplan:
-            termin_start = datetime.strptime(f"{datum} {termin['uhrzeit']}", "%Y-%m-%d %H:%M")
+            termin_start = datetime.strptime(f"{datum} {termin.uhrzeit}", "%Y-%m-%d %H:%M")
             
             # Wenn Termin vor dem angefragten Zeitpunkt
             if termin_start < termin_zeit:
-                behandlungsart = termin.get('behandlung', 'Kontrolluntersuchung')
-                dauer = behandlungsdauern.get(behandlungsart, 30)
+                # "Professionelle Zahnreinigung" zählt wie "Zahnreinigung"
+                dauer = next((minuten for art, minuten in behandlungsdauern.items()
+                              if art.lower() in termin.behandlungsart.lower()), 30)
                 
                 # Füge 10% Puffer für mögliche Verzögerungen hinzu
                 dauer_mit_puffer = int(dauer * 1.1)
@@ -2403,7 +2249,7 @@ async def termin_erinnerung_planen(
         
         # 24 Stunden vorher
         erinnerung_24h = termin_datetime - timedelta(hours=24)
-        if erinnerung_24h > datetime.now():
+        if erinnerung_24h > uhr.jetzt():
             erinnerungen.append({
                 'zeit': erinnerung_24h,
                 'typ': '24-Stunden-Erinnerung'
@@ -2411,7 +2257,7 @@ async def termin_erinnerung_planen(
         
         # 2 Stunden vorher
         erinnerung_2h = termin_datetime - timedelta(hours=2)
-        if erinnerung_2h > datetime.now():
+        if erinnerung_2h > uhr.jetzt():
             erinnerungen.append({
                 'zeit': erinnerung_2h,
                 'typ': '2-Stunden-Erinnerung'
@@ -2467,11 +2313,9 @@ async def rezept_erneuern(
     Prüft Berechtigung und erstellt Anfrage für den Arzt.
     """
     try:
-        # Hole Patientenhistorie
-        historie = appointment_manager.get_patientenhistorie(patient_telefon)
-        
         # Prüfe ob Patient bekannt ist
-        if not historie:
+        patient, _ = appointment_manager.patientenhistorie_laden(patient_telefon)
+        if not patient:
             return "Patient nicht in unserer Datenbank gefunden. Bitte vereinbaren Sie einen Termin für eine Rezeptausstellung."
         
         # Definiere häufige Zahnmedikamente
@@ -2491,7 +2335,7 @@ async def rezept_erneuern(
         
         # Erstelle Rezeptanfrage
         from datetime import datetime
-        anfrage_datum = datetime.now().strftime("%Y-%m-%d %H:%M")
+        anfrage_datum = uhr.jetzt().strftime("%Y-%m-%d %H:%M")
         
         antwort = f"**Rezeptverlängerung angefragt:**\n\n"
         antwort += f"**Patient**: Telefon {patient_telefon}\n"
@@ -2520,7 +2364,7 @@ async def rezept_erneuern(
         antwort += "- Dringende Fälle: Heute noch möglich\n\n"
         
         antwort += "✓ **Anfrage erfolgreich eingereicht**\n"
-        antwort += f"Referenznummer: RX{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        antwort += f"Referenznummer: RX{uhr.jetzt().strftime('%Y%m%d%H%M%S')}"
         
         return antwort
         
@@ -2538,10 +2382,10 @@ async def behandlungsplan_status(
     Zeigt Fortschritt und nächste Schritte an.
     """
     try:
-        # Hole Patientenhistorie
-        historie = appointment_manager.get_patientenhistorie(patient_telefon)
+        # Hole Patientenhistorie (neueste zuerst)
+        patient, historie = appointment_manager.patientenhistorie_laden(patient_telefon)
         
-        if not historie:
+        if not patient:
             return "Kein Behandlungsplan für diese Telefonnummer gefunden."
         
         # Definiere typische Behandlungspläne
@@ -2585,14 +2429,18 @@ async def behandlungsplan_status(
         aktiver_plan = None
         abgeschlossene_schritte = []
         
-        for termin in historie:
-            behandlung = termin.get('behandlung', '').lower()
+        # Erledigt sind wahrgenommene Termine: bestätigt und nicht in der Zukunft, chronologisch
+        heute = uhr.heute().isoformat()
+        for termin in reversed(historie):
+            if not termin.bestaetigt or termin.datum > heute:
+                continue
+            behandlung = termin.behandlungsart.lower()
             for plan_typ, plan_info in behandlungsplaene.items():
                 if plan_typ.lower() in behandlung:
                     aktiver_plan = plan_typ
                     abgeschlossene_schritte.append({
-                        'datum': termin.get('datum'),
-                        'behandlung': termin.get('behandlung')
+                        'datum': termin.datum,
+                        'behandlung': termin.behandlungsart
                     })
         
         antwort = f"**Behandlungsplan-Status:**\n\n"
@@ -2638,8 +2486,8 @@ async def behandlungsplan_status(
             antwort += "**Kein aktiver Behandlungsplan gefunden.**\n\n"
             if historie:
                 antwort += "**Letzte Termine:**\n"
-                for termin in historie[-3:]:
-                    antwort += f"- {termin.get('datum')}: {termin.get('behandlung')}\n"
+                for termin in historie[:3]:
+                    antwort += f"- {termin.datum}: {termin.behandlungsart}\n"
         
         return antwort
         
@@ -2683,7 +2531,7 @@ class AnfragenLernsystem:
         self.anfragen_cache["anfragen"].append({
             "typ": anfrage_typ,
             "details": details,
-            "zeitstempel": datetime.now().isoformat()
+            "zeitstempel": uhr.jetzt().isoformat()
         })
         
         # Update Muster-Zähler
@@ -2711,7 +2559,7 @@ class AnfragenLernsystem:
         vorschlaege = []
         
         # Analysiere Tageszeit-Muster
-        jetzt = datetime.now()
+        jetzt = uhr.jetzt()
         tageszeit = "vormittag" if jetzt.hour < 12 else "nachmittag" if jetzt.hour < 18 else "abend"
         
         # Häufige Anfragen für diese Tageszeit
@@ -2790,7 +2638,7 @@ async def haeufige_frage_beantworten(
     try:
         # Zeichne diese Anfrage auf
         lernsystem.anfrage_aufzeichnen(f"FAQ_{frage_kategorie}", {
-            "zeitstempel": datetime.now().isoformat()
+            "zeitstempel": uhr.jetzt().isoformat()
         })
         
         # Vordefinierte optimierte Antworten für häufige Fragen
@@ -2865,14 +2713,16 @@ async def haeufige_behandlungsgruende(
             
             # Personalisierung für bekannte Patienten
             if patient_telefon:
-                historie = appointment_manager.get_patientenhistorie(patient_telefon)
-                if historie:
-                    letzte_behandlung = historie[-1].get('behandlung', '') if historie else ''
+                _, historie = appointment_manager.patientenhistorie_laden(patient_telefon)
+                # Neueste zuerst; der letzte wahrgenommene Termin zählt, nicht Absagen oder Vorausbuchungen
+                heute = uhr.heute().isoformat()
+                letzter = next((t for t in historie if t.bestaetigt and t.datum <= heute), None)
+                if letzter:
+                    letzte_behandlung = letzter.behandlungsart
                     antwort += f"\n**Ihr letzter Termin**: {letzte_behandlung}\n"
                     
-                    # Intelligenter Vorschlag basierend auf Zeitabstand
-                    from datetime import datetime, timedelta
-                    if letzte_behandlung.lower() == "zahnreinigung":
+                    # Intelligenter Vorschlag basierend auf der Behandlung
+                    if "zahnreinigung" in letzte_behandlung.lower():
                         antwort += "💡 **Tipp**: Eine Zahnreinigung ist alle 6 Monate empfohlen.\n"
                     elif "kontrolle" in letzte_behandlung.lower():
                         antwort += "💡 **Tipp**: Kontrolluntersuchungen sollten alle 6-12 Monate erfolgen.\n"
@@ -0,0 +1,173 @@
+"""
+Strukturierte Terminabfragen und ihre Textdarstellung
+
+Die Abfragen lesen nur die Spalten, die Sofia braucht, und liefern schlanke
+Objekte (`Termin`, `Patient`) statt `SELECT *`-Tupeln mit Positionsindizes.
+Tools, die nur zählen oder einzelne Felder auswerten (Wartezeit,
+Behandlungsplan), arbeiten direkt mit diesen Objekten. Text entsteht erst in
+den `*_text`-Funktionen, wenn eine Antwort für das Gespräch gebraucht wird.
+"""
+
+import sqlite3
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, List, Optional, Sequence
+
+
+@dataclass(slots=True, frozen=True)
+class Termin:
+    """Ein Termin mit den Feldern, die Sofia anzeigt oder auswertet"""
+    id: int
+    patient_name: str
+    telefon: str
+    datum: str
+    uhrzeit: str
+    behandlungsart: str
+    beschreibung: Optional[str] = None
+    status: str = 'bestätigt'
+    notizen: Optional[str] = None
+
+    @property
+    def bestaetigt(self) -> bool:
+        return self.status == 'bestätigt'
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass(slots=True, frozen=True)
+class Patient:
+    name: str
+    telefon: str
+    email: Optional[str] = None
+    geburtsdatum: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+# Spaltenreihenfolge = Feldreihenfolge, damit Zeilen direkt als Argumente passen
+TERMIN_SPALTEN = ', '.join(feld.name for feld in fields(Termin))
+PATIENT_SPALTEN = ', '.join(feld.name for feld in fields(Patient))
+
+
+def _termine(conn: sqlite3.Connection, sql: str, parameter: Sequence) -> List[Termin]:
+    return [Termin(*zeile) for zeile in conn.execute(sql, parameter)]
+
+
+# ----------------------------------------------------------------------------
+# Abfragen
+# ----------------------------------------------------------------------------
+
+def tagesplan_laden(conn: sqlite3.Connection, datum: str) -> List[Termin]:
+    """Bestätigte Termine eines Tages nach Uhrzeit"""
+    return _termine(conn, f'''
+        SELECT {TERMIN_SPALTEN} FROM termine
+        WHERE datum = ? AND status = 'bestätigt'
+        ORDER BY uhrzeit
+    ''', (datum,))
+
+
+def belegte_zeiten(conn: sqlite3.Connection, datum: str) -> List[str]:
+    """Nur die Uhrzeiten der bestätigten Termine eines Tages"""
+    return [zeile[0] for zeile in conn.execute('''
+        SELECT uhrzeit FROM termine
+        WHERE datum = ? AND status = 'bestätigt'
+        ORDER BY uhrzeit
+    ''', (datum,))]
+
+
+def termine_suchen(conn: sqlite3.Connection, suchbegriff: str, von: str, bis: str) -> List[Termin]:
+    """Bestätigte Termine zwischen `von` und `bis`, deren Name, Telefon oder Behandlung passt"""
+    muster = f'%{suchbegriff}%'
+    return _termine(conn, f'''
+        SELECT {TERMIN_SPALTEN} FROM termine
+        WHERE (patient_name LIKE ? OR telefon LIKE ? OR behandlungsart LIKE ?)
+        AND datum >= ? AND datum <= ?
+        AND status = 'bestätigt'
+        ORDER BY datum, uhrzeit
+    ''', (muster, muster, muster, von, bis))
+
+
+def patient_laden(conn: sqlite3.Connection, telefon: str) -> Optional[Patient]:
+    zeile = conn.execute(f'SELECT {PATIENT_SPALTEN} FROM patienten WHERE telefon = ?', (telefon,)).fetchone()
+    return Patient(*zeile) if zeile else None
+
+
+def historie_laden(conn: sqlite3.Connection, telefon: str, tabelle: str = 'termine') -> List[Termin]:
+    """Alle Termine eines Patienten, neueste zuerst; `tabelle` kann die Archiv-Ansicht sein"""
+    return _termine(conn, f'''
+        SELECT {TERMIN_SPALTEN} FROM {tabelle}
+        WHERE telefon = ?
+        ORDER BY datum DESC, uhrzeit DESC
+    ''', (telefon,))
+
+
+# ----------------------------------------------------------------------------
+# Textdarstellung
+# ----------------------------------------------------------------------------
+
+def tagesplan_text(datum: str, termine: List[Termin]) -> str:
+    """Detaillierte Arztansicht eines Tages"""
+    if not termine:
+        return f"📅 **Tagesplan für {datum}**\n\n✅ Keine Termine heute - Freier Tag!"
+
+    zeilen = [f"📅 **Tagesplan für {datum}**\n", f"👥 **Anzahl Patienten:** {len(termine)}\n"]
+    for i, termin in enumerate(termine, 1):
+        zeilen += [
+            f"**{i}. {termin.uhrzeit} Uhr** - {termin.behandlungsart}",
+            f"   👤 Patient: {termin.patient_name}",
+            f"   📞 Telefon: {termin.telefon}",
+            f"   🦷 Behandlung: {termin.behandlungsart}",
+            f"   📝 Beschreibung: {termin.beschreibung or 'Keine'}",
+            f"   📋 Notizen: {termin.notizen or 'Keine'}",
+            "",
+        ]
+    return '\n'.join(zeilen) + '\n'
+
+
+def belegung_text(datum: str, zeiten: List[str]) -> str:
+    """Patientenansicht eines Tages: nur belegte Uhrzeiten, keine Namen"""
+    if not zeiten:
+        return f"Für {datum} sind viele Termine verfügbar. Wann passt es Ihnen am besten?"
+    return f"Für {datum} sind folgende Zeiten bereits belegt: {', '.join(zeiten)}"
+
+
+def suchergebnis_text(suchbegriff: str, termine: List[Termin]) -> str:
+    if not termine:
+        return f"🔍 Keine Termine gefunden für '{suchbegriff}' im angegebenen Zeitraum."
+
+    zeilen = [f"🔍 **Suchergebnisse für '{suchbegriff}'** ({len(termine)} Termine gefunden):\n"]
+    for i, termin in enumerate(termine, 1):
+        zeilen += [
+            f"{i}. **{termin.datum} um {termin.uhrzeit}**",
+            f"   👤 Patient: {termin.patient_name}",
+            f"   📞 Telefon: {termin.telefon}",
+            f"   🦷 Behandlung: {termin.behandlungsart}",
+            f"   📊 Status: {termin.status}\n",
+        ]
+    return '\n'.join(zeilen) + '\n'
+
+
+def historie_text(telefon: str, patient: Optional[Patient], termine: List[Termin]) -> str:
+    if not patient:
+        return f"❌ Patient mit Telefon {telefon} nicht in der Datenbank gefunden."
+
+    zeilen = [
+        f"📋 **Patientenhistorie - {patient.name}**\n",
+        f"📞 Telefon: {telefon}",
+        f"📧 Email: {patient.email or 'Nicht verfügbar'}",
+        f"🎂 Geburtsdatum: {patient.geburtsdatum or 'Nicht verfügbar'}\n",
+    ]
+    if not termine:
+        zeilen.append("📅 Keine Termine in der Historie gefunden.")
+        return '\n'.join(zeilen) + '\n'
+
+    zeilen.append(f"🗓️ **Terminhistorie ({len(termine)} Termine):**\n")
+    for i, termin in enumerate(termine, 1):
+        zeilen += [
+            f"{i}. {'✅' if termin.bestaetigt else '❌'} {termin.datum} um {termin.uhrzeit}",
+            f"   🦷 {termin.behandlungsart}",
+            f"   📝 {termin.beschreibung or 'Keine Beschreibung'}",
+            f"   📋 {termin.notizen or 'Keine Notizen'}\n",
+        ]
+    return '\n'.join(zeilen) + '\n'
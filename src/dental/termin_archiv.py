@@ -0,0 +1,287 @@
+"""
+Jahresarchiv für alte Termine
+
+Termine vor einem Stichtag (Standard: älter als ein Jahr) werden aus der
+Tabelle `termine` in eine SQLite-Datei pro Jahr verschoben:
+
+    <Verzeichnis der Datenbank>/archiv/termine_2019.db
+
+Die Haupt-Datenbank bleibt so klein. Bereichsabfragen, Indizes und Backups
+betreffen nur die aktuellen Termine, und Sofia schaut fast nur auf die
+nächsten Wochen.
+
+Gelesen wird das Archiv transparent: `archive_anhaengen` hängt die
+Jahresdateien per ATTACH an eine Verbindung an und legt die temporäre Ansicht
+`termine_gesamt` an, ein UNION ALL über `termine` und alle Jahrgänge. Das CRM
+(crm/termine_query.py) hält sich an dieselbe Ablage.
+
+Verschoben und gelöscht wird in Blöcken mit je einer kurzen Transaktion,
+damit Buchungen währenddessen nicht lange warten. Jahrgänge, die vollständig
+außerhalb der Aufbewahrungsfrist liegen, werden als Datei gelöscht.
+
+Während eines Blocks steht eine Zeile in `archivlauf`. Der Lösch-Trigger des
+CRM-Änderungsprotokolls meldet das Verschieben deshalb nicht als gelöschte
+Termine an die Dashboards. Einträge im Änderungsprotokoll, die älter als
+`AENDERUNGEN_AUFBEWAHRUNG_TAGE` sind, werden mit der Aufbewahrungsfrist gelöscht.
+
+    python scripts/archiviere_termine.py --db termine.db --nach-tagen 365 --aufbewahrung-jahre 10
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+ARCHIV_VERZEICHNIS = 'archiv'
+ARCHIV_DATEI = 'termine_{jahr}.db'
+GESAMT_ANSICHT = 'termine_gesamt'
+
+# Termine älter als so viele Tage wandern ins Archiv
+ARCHIV_NACH_TAGEN = 365
+# Patientenunterlagen sind zehn Jahre nach Abschluss der Behandlung aufzubewahren (§ 630f BGB)
+AUFBEWAHRUNG_JAHRE = 10
+# Zeilen pro Transaktion beim Verschieben und Löschen
+BATCH = 5000
+# So lange können SSE-Clients des CRM per Last-Event-ID verpasste Änderungen nachholen
+AENDERUNGEN_AUFBEWAHRUNG_TAGE = 30
+# Markierungstabelle wie in crm/termine_query.py; eine Zeile darin unterdrückt 'termin_geloescht'
+ARCHIV_MARKIERUNG = 'archivlauf'
+
+# Wie die CRM-Indizes auf `termine`, damit sortierte Listen über `termine_gesamt` die Jahrgänge mischen statt sortieren
+ARCHIV_INDIZES = (
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_archiv_datum ON termine(datum, uhrzeit, id)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_archiv_name ON termine(patient_name, datum, uhrzeit, id)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_archiv_status ON termine(status, datum, uhrzeit, id)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_archiv_telefon ON termine(telefon, datum)",
+)
+
+_JAHR_DATEI = re.compile(r'termine_(\d{4})\.db$')
+
+
+def archiv_verzeichnis(db_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIV_VERZEICHNIS)
+
+
+def archiv_dateien(db_path: str) -> Dict[int, str]:
+    """Jahr -> Pfad aller vorhandenen Jahresarchive, aufsteigend"""
+    dateien = {}
+    for pfad in glob.glob(os.path.join(archiv_verzeichnis(db_path), 'termine_*.db')):
+        treffer = _JAHR_DATEI.search(pfad)
+        if treffer:
+            dateien[int(treffer.group(1))] = pfad
+    return dict(sorted(dateien.items()))
+
+
+def _spalten(conn: sqlite3.Connection, schema: str) -> List[str]:
+    return [zeile[1] for zeile in conn.execute(f"PRAGMA {schema}.table_info(termine)")]
+
+
+def archive_anhaengen(conn: sqlite3.Connection, db_path: str) -> List[str]:
+    """Jahresarchive anhängen und die Ansicht `termine_gesamt` anlegen; gibt die Schema-Namen zurück
+
+    Ohne Archiv gibt es keine Ansicht; dann ist `termine` bereits alles. Mehr
+    Jahrgänge als SQLite gleichzeitig anhängen kann (meist 10) werden nicht
+    alle angehängt, sondern nur die neuesten.
+    """
+    angehaengt = {zeile[1] for zeile in conn.execute("PRAGMA database_list")}
+    dateien = archiv_dateien(db_path)
+    frei = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - len(angehaengt - {'main', 'temp'} - {
+        f"archiv_{jahr}" for jahr in dateien})
+    if len(dateien) > frei:
+        logging.warning(f"{len(dateien)} Archiv-Jahrgänge, aber nur {frei} anhängbar; ältere werden nicht gelesen")
+        dateien = dict(list(dateien.items())[-frei:]) if frei > 0 else {}
+
+    schemas = []
+    for jahr, pfad in dateien.items():
+        schema = f"archiv_{jahr}"
+        if schema not in angehaengt:
+            conn.execute("ATTACH DATABASE ? AS " + schema, (pfad,))
+        schemas.append(schema)
+    if not schemas:
+        return []
+
+    # Spaltenliste der Haupttabelle; ältere Jahrgänge ohne neue Spalten liefern dort NULL
+    spalten = _spalten(conn, 'main')
+    teile = [f"SELECT {', '.join(spalten)} FROM main.termine"]
+    for schema in schemas:
+        vorhanden = set(_spalten(conn, schema))
+        auswahl = ', '.join(s if s in vorhanden else f"NULL AS {s}" for s in spalten)
+        teile.append(f"SELECT {auswahl} FROM {schema}.termine")
+    conn.execute(f"DROP VIEW IF EXISTS temp.{GESAMT_ANSICHT}")
+    conn.execute(f"CREATE TEMP VIEW {GESAMT_ANSICHT} AS " + " UNION ALL ".join(teile))
+    return schemas
+
+
+class TerminArchiv:
+    """Verschiebt alte Termine in Jahresarchive und setzt die Aufbewahrungsfrist durch"""
+
+    def __init__(self, db_path: str, nach_tagen: int = ARCHIV_NACH_TAGEN,
+                 aufbewahrung_jahre: int = AUFBEWAHRUNG_JAHRE, batch: int = BATCH):
+        self.db_path = db_path
+        self.nach_tagen = nach_tagen
+        self.aufbewahrung_jahre = aufbewahrung_jahre
+        self.batch = batch
+
+    def stichtag(self, heute: Optional[date] = None) -> date:
+        """Termine vor diesem Tag werden archiviert"""
+        return (heute or date.today()) - timedelta(days=self.nach_tagen)
+
+    def loeschfrist(self, heute: Optional[date] = None) -> date:
+        """Termine vor diesem Tag werden endgültig gelöscht"""
+        heute = heute or date.today()
+        try:
+            return heute.replace(year=heute.year - self.aufbewahrung_jahre)
+        except ValueError:  # 29. Februar
+            return heute.replace(year=heute.year - self.aufbewahrung_jahre, day=28)
+
+    def _verbinden(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
+
+    def _markierung_anlegen(self, conn: sqlite3.Connection) -> None:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS main.{ARCHIV_MARKIERUNG} (id INTEGER PRIMARY KEY)")
+
+    def _tabelle_vorhanden(self, conn: sqlite3.Connection, name: str) -> bool:
+        return conn.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                            (name,)).fetchone() is not None
+
+    def _archiv_anlegen(self, conn: sqlite3.Connection, jahr: int) -> str:
+        """Jahresdatei anhängen und bei Bedarf mit dem Tabellenschema von `termine` anlegen"""
+        os.makedirs(archiv_verzeichnis(self.db_path), exist_ok=True)
+        schema = f"archiv_{jahr}"
+        if schema not in {zeile[1] for zeile in conn.execute("PRAGMA database_list")}:
+            pfad = os.path.join(archiv_verzeichnis(self.db_path), ARCHIV_DATEI.format(jahr=jahr))
+            conn.execute("ATTACH DATABASE ? AS " + schema, (pfad,))
+        sql = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = 'termine'").fetchone()[0]
+        conn.execute(re.sub(r'^CREATE TABLE\s+("?termine"?)', f'CREATE TABLE IF NOT EXISTS {schema}.termine', sql))
+        for index in ARCHIV_INDIZES:
+            conn.execute(index.format(schema=schema))
+        return schema
+
+    def archivieren(self, heute: Optional[date] = None) -> Dict[int, int]:
+        """Termine vor dem Stichtag ins Jahresarchiv verschieben; gibt Jahr -> verschobene Termine zurück"""
+        stichtag = str(self.stichtag(heute))
+        conn = self._verbinden()
+        verschoben: Dict[int, int] = {}
+        try:
+            jahre = [int(j) for (j,) in conn.execute(
+                "SELECT DISTINCT substr(datum, 1, 4) FROM termine WHERE datum < ? ORDER BY 1", (stichtag,))
+                if j and j.isdigit()]
+            spalten = ', '.join(_spalten(conn, 'main'))
+            if jahre:
+                self._markierung_anlegen(conn)
+            for jahr in jahre:
+                schema = self._archiv_anlegen(conn, jahr)
+                bis = min(f"{jahr + 1}-01-01", stichtag)
+                verschoben[jahr] = 0
+                while True:
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        ids = json.dumps([i for (i,) in conn.execute(
+                            "SELECT id FROM main.termine WHERE datum >= ? AND datum < ? LIMIT ?",
+                            (f"{jahr}-01-01", bis, self.batch))])
+                        # OR REPLACE: im WAL-Modus ist der Commit über zwei Dateien nicht atomar;
+                        # ein nach Abbruch wiederholter Block überschreibt dann nur sich selbst
+                        conn.execute(f"INSERT OR REPLACE INTO {schema}.termine ({spalten}) "
+                                     f"SELECT {spalten} FROM main.termine WHERE id IN (SELECT value FROM json_each(?))",
+                                     (ids,))
+                        conn.execute(f"INSERT INTO main.{ARCHIV_MARKIERUNG} VALUES (1)")
+                        anzahl = conn.execute("DELETE FROM main.termine WHERE id IN (SELECT value FROM json_each(?))",
+                                              (ids,)).rowcount
+                        conn.execute(f"DELETE FROM main.{ARCHIV_MARKIERUNG}")
+                        conn.execute("COMMIT")
+                    except sqlite3.Error:
+                        conn.execute("ROLLBACK")
+                        raise
+                    verschoben[jahr] += anzahl
+                    if anzahl < self.batch:
+                        break
+                conn.execute(f"DETACH DATABASE {schema}")
+                logging.info(f"Archiv {jahr}: {verschoben[jahr]} Termine verschoben")
+        finally:
+            conn.close()
+        return verschoben
+
+    def _blockweise_loeschen(self, conn: sqlite3.Connection, schema: str, frist: str) -> int:
+        geloescht = 0
+        markieren = schema == 'main'
+        if markieren:
+            self._markierung_anlegen(conn)
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if markieren:
+                    conn.execute(f"INSERT INTO main.{ARCHIV_MARKIERUNG} VALUES (1)")
+                anzahl = conn.execute(
+                    f"DELETE FROM {schema}.termine WHERE id IN "
+                    f"(SELECT id FROM {schema}.termine WHERE datum < ? LIMIT ?)", (frist, self.batch)
+                ).rowcount
+                if markieren:
+                    conn.execute(f"DELETE FROM main.{ARCHIV_MARKIERUNG}")
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            geloescht += anzahl
+            if anzahl < self.batch:
+                return geloescht
+
+    def aenderungen_kuerzen(self, conn: sqlite3.Connection, heute: Optional[date] = None) -> int:
+        """Einträge des CRM-Änderungsprotokolls vor dem Aufbewahrungsfenster löschen; gibt die Anzahl zurück"""
+        if not self._tabelle_vorhanden(conn, 'aenderungen'):
+            return 0
+        grenze = datetime.combine((heute or date.today()) - timedelta(days=AENDERUNGEN_AUFBEWAHRUNG_TAGE),
+                                  datetime.min.time()).timestamp()
+        geloescht = 0
+        while True:
+            anzahl = conn.execute(
+                "DELETE FROM aenderungen WHERE seq IN "
+                "(SELECT seq FROM aenderungen WHERE zeitpunkt < ? ORDER BY seq LIMIT ?)", (grenze, self.batch)
+            ).rowcount
+            geloescht += anzahl
+            if anzahl < self.batch:
+                return geloescht
+
+    def aufbewahrung_durchsetzen(self, heute: Optional[date] = None) -> int:
+        """Termine vor der Löschfrist löschen, in Haupt-Datenbank und Archiv; gibt die Anzahl zurück"""
+        frist = self.loeschfrist(heute)
+        conn = self._verbinden()
+        geloescht = 0
+        try:
+            geloescht += self._blockweise_loeschen(conn, 'main', str(frist))
+            for jahr, pfad in archiv_dateien(self.db_path).items():
+                if jahr < frist.year:
+                    # Ganzer Jahrgang abgelaufen: die Datei löschen statt Zeile für Zeile
+                    archiv = sqlite3.connect(pfad)
+                    try:
+                        geloescht += archiv.execute("SELECT COUNT(*) FROM termine").fetchone()[0]
+                    finally:
+                        archiv.close()
+                    os.remove(pfad)
+                    logging.info(f"Archiv {jahr} nach Ablauf der Aufbewahrungsfrist gelöscht")
+                elif jahr == frist.year:
+                    schema = self._archiv_anlegen(conn, jahr)
+                    geloescht += self._blockweise_loeschen(conn, schema, str(frist))
+                    conn.execute(f"DETACH DATABASE {schema}")
+            self.aenderungen_kuerzen(conn, heute)
+            if geloescht and self._tabelle_vorhanden(conn, 'datenversion'):
+                # Das CRM leitet ETags und Caches aus der Datenversion ab; Löschungen im Archiv sieht kein Trigger
+                conn.execute("UPDATE datenversion SET version = version + 1, "
+                             "geaendert_am = (julianday('now') - 2440587.5) * 86400.0 WHERE tabelle = 'termine'")
+        finally:
+            conn.close()
+        return geloescht
+
+    def ausfuehren(self, heute: Optional[date] = None) -> Dict:
+        """Aufbewahrungsfrist durchsetzen und archivieren, wie es der nächtliche Job tut
+
+        Erst löschen, dann verschieben: Abgelaufenes wird nicht noch ins Archiv kopiert.
+        """
+        geloescht = self.aufbewahrung_durchsetzen(heute)
+        verschoben = self.archivieren(heute)
+        return {'verschoben': verschoben, 'geloescht': geloescht}
@@ -0,0 +1,306 @@
+"""
+Massenimport von Terminen und Patienten aus CSV oder JSONL
+
+Für die Übernahme einer Praxis mit zehntausenden Altterminen. Anders als
+`termin_hinzufuegen` (eine Verbindung, eine Verfügbarkeitsprüfung, ein INSERT
+und ein Patienten-Upsert pro Termin) läuft der Import in einem Durchgang:
+
+- Die Eingabe wird zeilenweise gelesen und nie komplett in den Speicher geladen
+- Telefonnummern werden nach denselben Regeln wie bei der Buchung geprüft,
+  Datum darf ISO (2024-03-18) oder deutsch (18.03.2024) sein
+- Belegte Slots und bekannte Patienten werden einmal vorab geladen, danach wird
+  nur noch im Speicher geprüft und dedupliziert
+- Geschrieben wird mit `executemany` in großen Transaktionen, innerhalb eines
+  Blocks nach Datum/Uhrzeit sortiert, damit Indizes der Reihe nach wachsen
+- Abgelehnte Zeilen landen mit Zeilennummer und Grund in einer Seitendatei
+
+Vergangene Termine sind erlaubt, es geht ja gerade um die Historie.
+"""
+
+import csv
+import json
+import logging
+import re
+import sqlite3
+import time
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional, Set, TextIO, Tuple, Union
+
+FELDER = ('patient_name', 'telefon', 'email', 'datum', 'uhrzeit', 'behandlungsart',
+          'beschreibung', 'status', 'notizen')
+PFLICHTFELDER = ('patient_name', 'telefon', 'datum', 'uhrzeit', 'behandlungsart')
+STATUS_WERTE = ('bestätigt', 'abgesagt')
+
+# Alternative Spaltennamen, u.a. die Überschriften des CRM-Exports
+SPALTEN_ALIASE = {
+    'name': 'patient_name',
+    'patient': 'patient_name',
+    'patientenname': 'patient_name',
+    'telefonnummer': 'telefon',
+    'phone': 'telefon',
+    'e-mail': 'email',
+    'zeit': 'uhrzeit',
+    'behandlung': 'behandlungsart',
+}
+
+# Zeilen pro Transaktion
+BATCH = 20000
+
+TERMIN_INSERT = '''
+    INSERT INTO termine (patient_name, telefon, email, datum, uhrzeit,
+                         behandlungsart, beschreibung, status, notizen)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+PATIENT_INSERT = 'INSERT OR IGNORE INTO patienten (name, telefon, email) VALUES (?, ?, ?)'
+
+_MOBIL = re.compile(r'^(49)?0?1[567]\d{7,8}$')
+_FESTNETZ = re.compile(r'^(49)?0?[2-9]\d{1,4}\d{4,8}$')
+_TRENNZEICHEN = re.compile(r'[\s\-\(\)\.\/]')
+_ISO_DATUM = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+_DEUTSCHES_DATUM = re.compile(r'^(\d{1,2})\.(\d{1,2})\.(\d{4})$')
+_UHRZEIT = re.compile(r'^(\d{1,2})[:.](\d{2})(?::00)?$')
+
+
+class ImportFehler(ValueError):
+    """Eine Zeile, die nicht importiert werden kann; die Meldung ist der Ablehnungsgrund"""
+
+
+def ist_deutsche_telefonnummer(telefon: str) -> bool:
+    """Deutsche Mobil- oder Festnetznummer, mit oder ohne +49 und Trennzeichen"""
+    nummer = _TRENNZEICHEN.sub('', telefon.strip())
+    if nummer.startswith('+'):
+        nummer = nummer[1:]
+    return bool(_MOBIL.match(nummer) or _FESTNETZ.match(nummer))
+
+
+def datum_normalisieren(datum: str) -> str:
+    """'2024-03-18' oder '18.03.2024' -> '2024-03-18'; ImportFehler bei ungültigem Datum"""
+    treffer = _ISO_DATUM.match(datum)
+    if treffer:
+        jahr, monat, tag = treffer.groups()
+    else:
+        treffer = _DEUTSCHES_DATUM.match(datum)
+        if not treffer:
+            raise ImportFehler(f"Ungültiges Datum: {datum}")
+        tag, monat, jahr = treffer.groups()
+    try:
+        return date(int(jahr), int(monat), int(tag)).isoformat()
+    except ValueError:
+        raise ImportFehler(f"Ungültiges Datum: {datum}")
+
+
+def uhrzeit_normalisieren(uhrzeit: str) -> str:
+    """'9:30', '09.30' oder '09:30:00' -> '09:30'; ImportFehler bei ungültiger Uhrzeit"""
+    treffer = _UHRZEIT.match(uhrzeit)
+    if not treffer or int(treffer.group(1)) > 23 or int(treffer.group(2)) > 59:
+        raise ImportFehler(f"Ungültige Uhrzeit: {uhrzeit}")
+    return f"{int(treffer.group(1)):02d}:{treffer.group(2)}"
+
+
+class ImportErgebnis:
+    """Zwischenstand und Ergebnis eines Imports; wird auch an den Fortschritts-Callback gegeben"""
+
+    def __init__(self):
+        self.gelesen = 0
+        self.importiert = 0
+        self.abgelehnt = 0
+        self.neue_patienten = 0
+        self.gestartet = time.perf_counter()
+        self.dauer = 0.0
+
+    @property
+    def zeilen_pro_sekunde(self) -> float:
+        return self.gelesen / self.dauer if self.dauer else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.gelesen} Zeilen gelesen, {self.importiert} Termine importiert, "
+                f"{self.abgelehnt} abgelehnt, {self.neue_patienten} neue Patienten "
+                f"({self.dauer:.1f}s, {self.zeilen_pro_sekunde:,.0f} Zeilen/s)")
+
+
+def _spaltenname(name: str) -> str:
+    name = (name or '').strip().lower()
+    return SPALTEN_ALIASE.get(name, name)
+
+
+def _csv_zeilen(datei: TextIO) -> Iterator[Tuple[int, Dict, Optional[str]]]:
+    anfang = datei.readline()
+    try:
+        dialekt = csv.Sniffer().sniff(anfang, delimiters=',;\t')
+    except csv.Error:
+        dialekt = csv.excel
+    spalten = [_spaltenname(s) for s in next(csv.reader([anfang], dialekt))]
+    for nummer, werte in enumerate(csv.reader(datei, dialekt), 2):
+        if not werte:
+            continue
+        yield nummer, dict(zip(spalten, werte)), None
+
+
+def _jsonl_zeilen(datei: TextIO) -> Iterator[Tuple[int, Dict, Optional[str]]]:
+    for nummer, zeile in enumerate(datei, 1):
+        if not zeile.strip():
+            continue
+        try:
+            daten = json.loads(zeile)
+        except json.JSONDecodeError as e:
+            yield nummer, {'zeile': zeile.rstrip('\n')}, f"Ungültiges JSON: {e.msg}"
+            continue
+        if not isinstance(daten, dict):
+            yield nummer, {'zeile': zeile.rstrip('\n')}, "Ungültiges JSON: Objekt erwartet"
+            continue
+        yield nummer, {_spaltenname(k): v for k, v in daten.items()}, None
+
+
+def format_erkennen(pfad: str) -> str:
+    return 'jsonl' if pfad.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+class _Ablehnungen:
+    """Seitendatei für abgelehnte Zeilen; im Format der Eingabe, ergänzt um Zeilennummer und Grund"""
+
+    def __init__(self, ziel: Optional[TextIO], format_: str):
+        self.ziel = ziel
+        self.format_ = format_
+        self._csv = None
+
+    def schreiben(self, nummer: int, daten: Dict, grund: str) -> None:
+        if self.ziel is None:
+            return
+        if self.format_ == 'jsonl':
+            self.ziel.write(json.dumps({'zeile': nummer, 'fehler': grund, 'daten': daten},
+                                       ensure_ascii=False, default=str) + '\n')
+            return
+        if self._csv is None:
+            self._csv = csv.DictWriter(self.ziel, fieldnames=('zeile', 'fehler') + FELDER,
+                                       delimiter=';', extrasaction='ignore')
+            self._csv.writeheader()
+        self._csv.writerow({'zeile': nummer, 'fehler': grund, **daten})
+
+
+class TerminImport:
+    """Ein Importlauf gegen eine Datenbank; siehe `AppointmentManager.termine_importieren`"""
+
+    def __init__(self, db_path: str, batch: int = BATCH, belegung_pruefen: bool = True,
+                 fortschritt: Optional[Callable[[ImportErgebnis], None]] = None):
+        self.db_path = db_path
+        self.batch = batch
+        self.belegung_pruefen = belegung_pruefen
+        self.fortschritt = fortschritt
+        # Prüfergebnisse pro Rohwert; Daten, Uhrzeiten und Nummern wiederholen sich stark
+        self._daten: Dict[str, str] = {}
+        self._uhrzeiten: Dict[str, str] = {}
+        self._telefone: Dict[str, bool] = {}
+
+    def _zelle(self, daten: Dict, feld: str) -> str:
+        wert = daten.get(feld)
+        return '' if wert is None else str(wert).strip()
+
+    def pruefen(self, daten: Dict) -> Tuple:
+        """Eine Eingabezeile als Werte-Tupel für TERMIN_INSERT; ImportFehler mit Grund, wenn ungültig"""
+        werte = {feld: self._zelle(daten, feld) for feld in FELDER}
+        for feld in PFLICHTFELDER:
+            if not werte[feld]:
+                raise ImportFehler(f"Pflichtfeld fehlt: {feld}")
+
+        telefon = werte['telefon']
+        gueltig = self._telefone.get(telefon)
+        if gueltig is None:
+            gueltig = self._telefone[telefon] = ist_deutsche_telefonnummer(telefon)
+        if not gueltig:
+            raise ImportFehler(f"Keine deutsche Telefonnummer: {telefon}")
+
+        datum = self._daten.get(werte['datum'])
+        if datum is None:
+            datum = self._daten[werte['datum']] = datum_normalisieren(werte['datum'])
+        uhrzeit = self._uhrzeiten.get(werte['uhrzeit'])
+        if uhrzeit is None:
+            uhrzeit = self._uhrzeiten[werte['uhrzeit']] = uhrzeit_normalisieren(werte['uhrzeit'])
+
+        status = werte['status'] or 'bestätigt'
+        if status not in STATUS_WERTE:
+            raise ImportFehler(f"Unbekannter Status: {status}")
+
+        return (werte['patient_name'], telefon, werte['email'], datum, uhrzeit, werte['behandlungsart'],
+                werte['beschreibung'], status, werte['notizen'])
+
+    def ausfuehren(self, quelle: Union[str, TextIO], format_: Optional[str] = None,
+                   ablehnungen: Union[str, TextIO, None] = None) -> ImportErgebnis:
+        if isinstance(quelle, str):
+            format_ = format_ or format_erkennen(quelle)
+            with open(quelle, encoding='utf-8-sig', newline='') as datei:
+                return self.ausfuehren(datei, format_, ablehnungen)
+        if isinstance(ablehnungen, str):
+            with open(ablehnungen, 'w', encoding='utf-8', newline='') as ziel:
+                return self.ausfuehren(quelle, format_, ziel)
+
+        format_ = format_ or 'csv'
+        if format_ not in ('csv', 'jsonl'):
+            raise ValueError(f"Unbekanntes Importformat: {format_}")
+        zeilen = _jsonl_zeilen(quelle) if format_ == 'jsonl' else _csv_zeilen(quelle)
+        return self._importieren(zeilen, _Ablehnungen(ablehnungen, format_))
+
+    def _importieren(self, zeilen: Iterator[Tuple[int, Dict, Optional[str]]],
+                     ablehnungen: _Ablehnungen) -> ImportErgebnis:
+        ergebnis = ImportErgebnis()
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            # Großer Seiten-Cache, damit die Index-Seiten während des Imports im Speicher bleiben
+            conn.execute("PRAGMA cache_size = -65536")
+            bekannte_patienten: Set[str] = {t for (t,) in conn.execute("SELECT telefon FROM patienten")}
+            belegt: Set[Tuple[str, str]] = set()
+            if self.belegung_pruefen:
+                belegt = set(conn.execute("SELECT datum, uhrzeit FROM termine WHERE status = 'bestätigt'"))
+
+            termine: List[Tuple] = []
+            patienten: Dict[str, Tuple] = {}
+            for nummer, daten, fehler in zeilen:
+                ergebnis.gelesen += 1
+                try:
+                    if fehler:
+                        raise ImportFehler(fehler)
+                    termin = self.pruefen(daten)
+                    if self.belegung_pruefen and termin[7] == 'bestätigt':
+                        slot = (termin[3], termin[4])
+                        if slot in belegt:
+                            raise ImportFehler(f"Termin am {slot[0]} um {slot[1]} ist bereits belegt")
+                        belegt.add(slot)
+                except ImportFehler as e:
+                    ergebnis.abgelehnt += 1
+                    ablehnungen.schreiben(nummer, daten, str(e))
+                    continue
+
+                termine.append(termin)
+                telefon = termin[1]
+                if telefon not in bekannte_patienten:
+                    bekannte_patienten.add(telefon)
+                    patienten[telefon] = (termin[0], telefon, termin[2])
+                if len(termine) >= self.batch:
+                    self._schreiben(conn, termine, patienten, ergebnis)
+
+            self._schreiben(conn, termine, patienten, ergebnis)
+        finally:
+            conn.close()
+        ergebnis.dauer = time.perf_counter() - ergebnis.gestartet
+        return ergebnis
+
+    def _schreiben(self, conn: sqlite3.Connection, termine: List[Tuple], patienten: Dict[str, Tuple],
+                   ergebnis: ImportErgebnis) -> None:
+        """Ein Block in einer Transaktion; sortiert, damit die Indizes auf datum/uhrzeit der Reihe nach wachsen"""
+        if termine or patienten:
+            termine.sort(key=lambda t: (t[3], t[4]))
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(TERMIN_INSERT, termine)
+                conn.executemany(PATIENT_INSERT, patienten.values())
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                logging.error(f"Import abgebrochen nach {ergebnis.importiert} Terminen")
+                raise
+            ergebnis.importiert += len(termine)
+            ergebnis.neue_patienten += len(patienten)
+            termine.clear()
+            patienten.clear()
+        ergebnis.dauer = time.perf_counter() - ergebnis.gestartet
+        if self.fortschritt:
+            self.fortschritt(ergebnis)
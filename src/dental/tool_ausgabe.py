@@ -0,0 +1,247 @@
+"""
+Ausgabeformate der Buchungs-Tools
+
+Was ein Tool zurückgibt, landet vollständig im Kontext des Realtime-Modells.
+Die ausführlichen Markdown-Antworten mit Emojis und Überschriften kosten bei
+jedem Aufruf Tokens und damit Antwortzeit, obwohl Sofia daraus nur wenige
+Fakten vorliest. Deshalb gibt es drei Modi, pro Deployment wählbar über
+`SOFIA_TOOL_AUSGABE`:
+
+    markdown  bisherige Antworten (Standard)
+    kompakt   eine Zeile "schlüssel: wert" pro Fakt
+    json      dieselben Fakten als kompaktes JSON
+
+In `kompakt` und `json` nennt `naechster_schritt`, was Sofia als Nächstes
+fragen soll. Die Markdown-Antworten enden mit derselben Frage. Der Text wird
+nur im Modus `markdown` gebaut.
+
+    python benchmarks/tool_tokens.py   # Token-Bericht über den Tool-Korpus
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+AUSGABE_MODI = ('markdown', 'kompakt', 'json')
+PRAXIS_TELEFON = '0123 456 789'
+
+
+def _modus_pruefen(modus: str) -> str:
+    modus = (modus or '').strip().lower()
+    if modus not in AUSGABE_MODI:
+        raise ValueError(f"Unbekannter Ausgabemodus: {modus!r} (erlaubt: {', '.join(AUSGABE_MODI)})")
+    return modus
+
+
+try:
+    _modus = _modus_pruefen(os.getenv('SOFIA_TOOL_AUSGABE', 'markdown'))
+except ValueError as e:
+    print(f"Warning: {e} - verwende markdown")
+    _modus = 'markdown'
+
+
+def ausgabe_modus() -> str:
+    return _modus
+
+
+def ausgabe_modus_setzen(modus: str) -> str:
+    """Setzt den Modus für den Prozess und gibt den bisherigen zurück"""
+    global _modus
+    vorheriger, _modus = _modus, _modus_pruefen(modus)
+    return vorheriger
+
+
+def _kompakt(wert: Any) -> str:
+    if isinstance(wert, bool):
+        return 'ja' if wert else 'nein'
+    if isinstance(wert, (list, tuple)):
+        return '; '.join(_kompakt(eintrag) for eintrag in wert)
+    return str(wert)
+
+
+def ergebnis(fakten: Dict[str, Any], markdown: Callable[[], str], modus: Optional[str] = None) -> str:
+    """Tool-Ergebnis im eingestellten Modus; leere Fakten (None, '', []) entfallen"""
+    modus = modus or _modus
+    if modus == 'markdown':
+        return markdown()
+    fakten = {schluessel: wert for schluessel, wert in fakten.items() if wert is not None and wert != '' and wert != []}
+    if modus == 'json':
+        return json.dumps(fakten, ensure_ascii=False, separators=(',', ':'))
+    return '\n'.join(f"{schluessel}: {_kompakt(wert)}" for schluessel, wert in fakten.items())
+
+
+def vorschlag_kurz(termin: Dict) -> str:
+    """Ein Eintrag aus AppointmentManager.terminvorschlaege() als 'Dienstag 2025-07-15 09:30 (morgen)'"""
+    # Den Wochentag nennt Sofia beim Vorlesen; ohne ihn müsste das Modell ihn selbst ausrechnen
+    return f"{termin['wochentag']} {termin['datum']} {termin['uhrzeit']}{termin.get('zeit_info', '')}"
+
+
+def _arbeitszeiten(arbeitszeiten: Dict) -> str:
+    return ', '.join(zeit for zeit in (arbeitszeiten['vormittag'], arbeitszeiten['nachmittag']) if zeit)
+
+
+# ----------------------------------------------------------------------------
+# Tools
+# ----------------------------------------------------------------------------
+
+def terminwunsch(text: str, datum: str, uhrzeit: Optional[str], behandlungsart: str, kontext: Dict,
+                 verfuegbar: Optional[bool], freie_zeiten: List[str], alternativen: List[Dict],
+                 alternativen_text: Callable[[], str], modus: Optional[str] = None) -> str:
+    """parse_terminwunsch: erkannter Wunsch, Verfügbarkeit und ggf. Alternativen"""
+    heute_gewuenscht = kontext["ist_heute_arbeitstag"] and datum == kontext.get("aktuelles_datum")
+
+    def markdown() -> str:
+        response = f"📋 **Terminwunsch verstanden:**\n\n"
+        response += f"� Originaltext: '{text}'\n"
+        response += f"�📅 Datum: {datum}\n"
+        response += f"🕐 Uhrzeit: {uhrzeit or 'Flexibel'}\n"
+        response += f"🦷 Behandlung: {behandlungsart}\n\n"
+
+        # Zusätzliche Kontextinformationen
+        if heute_gewuenscht:
+            response += f"ℹ️ **Hinweis**: Sie möchten heute einen Termin.\n"
+            if kontext["praxis_offen"]:
+                response += f"✅ Die Praxis ist derzeit geöffnet.\n"
+            else:
+                response += f"❌ Die Praxis ist derzeit geschlossen.\n"
+                arbeitszeiten = kontext["arbeitszeiten_heute"]
+                response += f"⏰ Öffnungszeiten heute: {arbeitszeiten['vormittag']}"
+                if arbeitszeiten['nachmittag']:
+                    response += f", {arbeitszeiten['nachmittag']}"
+                response += "\n"
+            response += "\n"
+
+        if uhrzeit:
+            if verfuegbar:
+                response += f"✅ **Der gewünschte Termin ist verfügbar!**\n"
+                response += f"📅 {datum} um {uhrzeit} für {behandlungsart}\n\n"
+                response += f"💡 Möchten Sie diesen Termin buchen?"
+            else:
+                response += f"❌ **Der gewünschte Termin ist bereits belegt.**\n"
+                response += f"📅 {datum} um {uhrzeit}\n\n"
+                response += f"🔄 **Alternative Vorschläge:**\n{alternativen_text()}"
+        elif freie_zeiten:
+            response += f"✅ **Verfügbare Zeiten am {datum}:**\n"
+            for i, zeit in enumerate(freie_zeiten[:5], 1):
+                response += f"  {i}. {zeit} Uhr\n"
+            response += f"\n💡 Welche Uhrzeit passt Ihnen am besten?"
+        else:
+            response += f"❌ **Am {datum} sind keine Termine verfügbar.**\n"
+            response += f"\n🔄 **Alternative Termine:**\n{alternativen_text()}"
+        return response
+
+    if uhrzeit:
+        naechster_schritt = 'Buchung anbieten' if verfuegbar else 'Alternative wählen lassen'
+    else:
+        naechster_schritt = 'Uhrzeit wählen lassen' if freie_zeiten else 'Alternative wählen lassen'
+    fakten = {
+        'datum': datum,
+        'uhrzeit': uhrzeit or 'flexibel',
+        'behandlung': behandlungsart,
+        'praxis_jetzt_offen': kontext["praxis_offen"] if heute_gewuenscht else None,
+        'oeffnungszeiten_heute': (_arbeitszeiten(kontext["arbeitszeiten_heute"])
+                                  if heute_gewuenscht and not kontext["praxis_offen"] else None),
+        'verfuegbar': verfuegbar if uhrzeit else bool(freie_zeiten),
+        'freie_zeiten': freie_zeiten[:5],
+        'alternativen': [vorschlag_kurz(t) for t in alternativen],
+        'naechster_schritt': naechster_schritt,
+    }
+    return ergebnis(fakten, markdown, modus)
+
+
+def terminvorschlaege(behandlungsart: str, vorschlaege: List[Dict], zeitinfo: Dict,
+                      vorschlaege_text: Callable[[], str], modus: Optional[str] = None) -> str:
+    """get_intelligente_terminvorschlaege; `zeitinfo` aus AppointmentManager.get_current_datetime_info()"""
+    fakten = {
+        'behandlung': behandlungsart,
+        'jetzt': zeitinfo['formatiert'],
+        'praxis_heute': (_arbeitszeiten(zeitinfo['arbeitszeiten_heute'])
+                         if vorschlaege and zeitinfo['ist_heute_arbeitstag'] else None),
+        'vorschlaege': [vorschlag_kurz(t) for t in vorschlaege] or 'keine freien Termine in nächster Zeit',
+        'naechster_schritt': 'Termin wählen lassen' if vorschlaege else None,
+    }
+    return ergebnis(fakten, vorschlaege_text, modus)
+
+
+def buchung(status: str, patient_name: str, telefon: str, datum: str, uhrzeit: str, behandlungsart: str,
+            notizen: str = '', grund: str = '', alternativen: Optional[List[Dict]] = None,
+            alternativen_text: Callable[[], str] = lambda: '', modus: Optional[str] = None) -> str:
+    """
+    termin_direkt_buchen; `status` ist 'gebucht', 'belegt' (Slot vergeben),
+    'abgelehnt' (Eingabe ungültig) oder 'fehler' (Speichern abgelehnt, `grund` vom AppointmentManager)
+    """
+    def markdown() -> str:
+        if status == 'abgelehnt':
+            return f"❌ {grund}"
+        if status == 'belegt':
+            return f"❌ **Der gewünschte Termin am {datum} um {uhrzeit} ist leider nicht verfügbar.**\n\n" \
+                   f"🔄 **Ich habe diese Alternativen für Sie:**\n{alternativen_text()}\n\n" \
+                   f"Welcher Termin passt Ihnen?"
+        if status == 'gebucht':
+            return f"**✅ Perfekt! Ihr Termin ist gebucht!**\n\n" \
+                   f"👤 **Name**: {patient_name}\n" \
+                   f"📞 **Telefon**: {telefon}\n" \
+                   f"📅 **Termin**: {datum} um {uhrzeit}\n" \
+                   f"🦷 **Behandlung**: {behandlungsart}\n" \
+                   f"📝 **Notizen**: {notizen if notizen else 'Keine besonderen Notizen'}\n\n" \
+                   f"🎉 **Ihr Termin ist bestätigt!** Wir freuen uns auf Sie!\n" \
+                   f"📞 Bei Fragen erreichen Sie uns unter: {PRAXIS_TELEFON}\n\n" \
+                   f"💡 **Kann ich Ihnen noch bei etwas anderem helfen?**"
+        return f"{grund}\n\n" \
+               f"🔄 **Keine Sorge! Hier sind alternative Termine:**\n{alternativen_text()}\n\n" \
+               f"💡 **Welcher Termin würde Ihnen passen?**"
+
+    gebucht = status == 'gebucht'
+    fakten = {
+        'status': status,
+        'grund': grund.lstrip('❌ ').strip() if grund else None,
+        'name': patient_name if gebucht else None,
+        'telefon': telefon if gebucht else None,
+        'datum': datum,
+        'uhrzeit': uhrzeit,
+        'behandlung': behandlungsart if gebucht else None,
+        'notizen': notizen if gebucht else None,
+        'praxis_telefon': PRAXIS_TELEFON if gebucht else None,
+        'alternativen': [vorschlag_kurz(t) for t in alternativen or []],
+        'naechster_schritt': ('Fragen, ob noch etwas anderes gewünscht ist' if gebucht
+                              else 'Eingabe korrigieren lassen' if status == 'abgelehnt'
+                              else 'Alternative wählen lassen'),
+    }
+    return ergebnis(fakten, markdown, modus)
+
+
+def meine_termine(patient_name: str, telefon: str, zeitraum: str, termine: list,
+                  termine_text: Callable[[], str], modus: Optional[str] = None) -> str:
+    """meine_termine_finden; `termine` sind Termin-Objekte aus src/dental/termin_abfragen.py"""
+    def markdown() -> str:
+        if not termine:
+            response = f"📅 **Keine Termine für Sie gefunden**\n\n"
+            if patient_name:
+                response += f"Für Ihren Namen '{patient_name}' "
+            if telefon:
+                response += f"Für Ihre Telefonnummer '{telefon}' "
+            response += f"wurden keine Termine im Zeitraum '{zeitraum}' gefunden.\n\n"
+            response += "💡 **Möchten Sie:**\n"
+            response += "• Einen neuen Termin vereinbaren?\n"
+            response += "• Prüfen, ob Sie unter einem anderen Namen registriert sind?\n"
+            response += "• In einem anderen Zeitraum suchen?"
+            return response
+
+        response = f"📅 **Ihre persönlichen Termine**\n\n"
+        if patient_name:
+            response += f"👤 **Ihr Name:** {patient_name}\n"
+        if telefon:
+            response += f"📞 **Ihre Telefonnummer:** {telefon}\n"
+        response += f"📆 **Zeitraum:** {zeitraum}\n\n"
+        response += termine_text()
+        response += f"\n\n💡 **Benötigen Sie Änderungen an Ihren Terminen?**"
+        return response
+
+    fakten = {
+        'zeitraum': zeitraum,
+        'anzahl': len(termine),
+        'termine': [f"{t.datum} {t.uhrzeit} {t.behandlungsart}" for t in termine],
+        'naechster_schritt': ('Fragen, ob Änderungen gewünscht sind' if termine else
+                              'Neuen Termin, anderen Namen oder anderen Zeitraum anbieten'),
+    }
+    return ergebnis(fakten, markdown, modus)
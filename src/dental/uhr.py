@@ -0,0 +1,174 @@
+"""
+Zentrale Uhr für Tools und Terminverwaltung
+
+`zeitinfo()` liefert dieselben Felder wie früher `get_current_datetime_info()`,
+berechnet sie aber höchstens einmal pro Minute: Der Schnappschuss gehört zur
+angebrochenen Minute und wird neu aufgebaut, sobald die Zeitquelle eine andere
+Minute meldet (damit auch beim Tageswechsel um Mitternacht). Er ist
+unveränderlich, weil ihn alle Aufrufer derselben Minute teilen.
+
+Für Tests lässt sich die Uhr einfrieren:
+
+    with eingefrorene_uhr(datetime(2025, 7, 14, 9, 30)) as u:
+        ...
+        u.vorstellen(days=1)
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Mapping, Optional, Tuple
+
+GERMAN_WEEKDAYS = {
+    0: 'Montag', 1: 'Dienstag', 2: 'Mittwoch', 3: 'Donnerstag',
+    4: 'Freitag', 5: 'Samstag', 6: 'Sonntag'
+}
+
+GERMAN_MONTHS = {
+    1: 'Januar', 2: 'Februar', 3: 'März', 4: 'April', 5: 'Mai', 6: 'Juni',
+    7: 'Juli', 8: 'August', 9: 'September', 10: 'Oktober', 11: 'November', 12: 'Dezember'
+}
+
+
+def _lang(tag: datetime) -> str:
+    return f"{GERMAN_WEEKDAYS[tag.weekday()]}, {tag.day}. {GERMAN_MONTHS[tag.month]} {tag.year}"
+
+
+def zeitinfo_berechnen(now: datetime) -> Mapping[str, Any]:
+    """Alle Datums- und Zeitfelder für den Zeitpunkt `now` als unveränderliche Abbildung"""
+    weekday_german = GERMAN_WEEKDAYS[now.weekday()]
+    month_german = GERMAN_MONTHS[now.month]
+
+    morgen = now + timedelta(days=1)
+    übermorgen = now + timedelta(days=2)
+
+    # Nächste Woche = Montag der nächsten Woche (heute Montag -> in sieben Tagen)
+    naechste_woche = now + timedelta(days=(7 - now.weekday()) % 7 or 7)
+
+    return MappingProxyType({
+        # datetime-Objekte für Berechnungen
+        'datetime': now,
+        'date': now.date(),
+        'time': now.time(),
+
+        # Formatierte Strings für Anzeige
+        'date_formatted': f"{weekday_german}, {now.day}. {month_german} {now.year}",
+        'time_formatted': f"{now.hour:02d}:{now.minute:02d}",
+        'date_iso': now.strftime("%Y-%m-%d"),
+        'time_iso': now.strftime("%H:%M"),
+
+        # Automatische Datum-Einfügung für Antworten
+        'auto_date': f"Heute ist {weekday_german}, der {now.day}. {month_german} {now.year}",
+        'auto_time': f"Es ist {now.hour:02d}:{now.minute:02d} Uhr",
+
+        # Deutsche Bezeichnungen
+        'weekday': weekday_german,
+        'month': month_german,
+
+        # Numerische Werte
+        'hour': now.hour,
+        'minute': now.minute,
+        'day': now.day,
+        'month_num': now.month,
+        'year': now.year,
+        'weekday_num': now.weekday(),
+
+        # Berechnete Werte
+        'is_weekend': now.weekday() >= 5,
+        'tomorrow_weekday': GERMAN_WEEKDAYS[(now.weekday() + 1) % 7],
+
+        # Relative Daten
+        'morgen': _lang(morgen),
+        'morgen_iso': morgen.strftime("%Y-%m-%d"),
+        'übermorgen': _lang(übermorgen),
+        'übermorgen_iso': übermorgen.strftime("%Y-%m-%d"),
+        'nächste_woche': _lang(naechste_woche),
+        'nächste_woche_iso': naechste_woche.strftime("%Y-%m-%d"),
+        'kalenderwoche': now.isocalendar()[1],
+
+        'morgen_datetime': morgen,
+        'übermorgen_datetime': übermorgen,
+        'nächste_woche_datetime': naechste_woche,
+    })
+
+
+class Uhr:
+    """Liest die Zeit aus `zeitquelle` und hält den Schnappschuss der laufenden Minute"""
+
+    def __init__(self, zeitquelle: Callable[[], datetime] = datetime.now):
+        self._zeitquelle = zeitquelle
+        self._schnappschuss: Optional[Tuple[datetime, Mapping[str, Any]]] = None
+
+    def jetzt(self) -> datetime:
+        """Sekundengenaue Zeit, z.B. für Zeitstempel und Vergangenheitsprüfungen"""
+        return self._zeitquelle()
+
+    def heute(self) -> date:
+        return self._zeitquelle().date()
+
+    def zeitinfo(self) -> Mapping[str, Any]:
+        """Schnappschuss der aktuellen Minute; `datetime` und `time` stehen auf Sekunde 0"""
+        minute = self._zeitquelle().replace(second=0, microsecond=0)
+        # Einmal lesen, einmal ersetzen: parallele Aufrufer sehen immer ein vollständiges Paar
+        schnappschuss = self._schnappschuss
+        if schnappschuss is None or schnappschuss[0] != minute:
+            schnappschuss = (minute, zeitinfo_berechnen(minute))
+            self._schnappschuss = schnappschuss
+            logging.debug(f"DATUM-DEBUG: Neuer Zeit-Schnappschuss für {minute}")
+        return schnappschuss[1]
+
+
+class EingefroreneUhr(Uhr):
+    """Steht still, bis ein Test sie stellt oder vorstellt"""
+
+    def __init__(self, zeitpunkt: datetime):
+        self._zeitpunkt = zeitpunkt
+        super().__init__(lambda: self._zeitpunkt)
+
+    def stellen(self, zeitpunkt: datetime) -> None:
+        self._zeitpunkt = zeitpunkt
+
+    def vorstellen(self, **dauer) -> datetime:
+        """`vorstellen(minutes=1)`, `vorstellen(days=1)` usw.; gibt die neue Zeit zurück"""
+        self._zeitpunkt += timedelta(**dauer)
+        return self._zeitpunkt
+
+
+_uhr: Uhr = Uhr()
+_uhr_sperre = threading.Lock()
+
+
+def aktuelle_uhr() -> Uhr:
+    return _uhr
+
+
+def uhr_setzen(uhr: Uhr) -> Uhr:
+    """Ersetzt die prozessweite Uhr und gibt die bisherige zurück"""
+    global _uhr
+    with _uhr_sperre:
+        vorherige, _uhr = _uhr, uhr
+    return vorherige
+
+
+@contextmanager
+def eingefrorene_uhr(zeitpunkt: datetime) -> Iterator[EingefroreneUhr]:
+    uhr = EingefroreneUhr(zeitpunkt)
+    vorherige = uhr_setzen(uhr)
+    try:
+        yield uhr
+    finally:
+        uhr_setzen(vorherige)
+
+
+def jetzt() -> datetime:
+    return _uhr.jetzt()
+
+
+def heute() -> date:
+    return _uhr.heute()
+
+
+def zeitinfo() -> Mapping[str, Any]:
+    return _uhr.zeitinfo()
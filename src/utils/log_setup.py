@@ -0,0 +1,223 @@
+"""
+Shared logging setup for the WebSocket bridge, the agent adapter and the LiveKit agent
+
+Loggers only put records on an in-memory queue (QueueHandler). A
+QueueListener thread does the formatting and the file/console I/O, so a slow
+disk never stalls the asyncio event loop.
+
+- File output is JSON lines. Each line carries the call and session IDs
+  bound with `bind_log_context()`, or passed per call via `extra=`.
+- Console output stays human readable.
+- High-frequency DEBUG events can be sampled: only every Nth record per call
+  site is kept.
+- The log file rotates both by size and by time.
+
+Environment overrides: SOFIA_LOG_LEVEL, SOFIA_LOG_FILE, SOFIA_LOG_FORMAT
+(json|text), SOFIA_LOG_MAX_MB, SOFIA_LOG_ROTATE_WHEN, SOFIA_LOG_BACKUPS and
+SOFIA_LOG_DEBUG_SAMPLE.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Context of the call being handled; copied into every record logged within it
+CONTEXT_FIELDS = ('call_id', 'session_id', 'trace_id')
+_log_context: Dict[str, contextvars.ContextVar] = {
+    name: contextvars.ContextVar(name, default=None) for name in CONTEXT_FIELDS
+}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def bind_log_context(**fields) -> None:
+    """Set call_id / session_id / trace_id for everything logged in the current task from now on"""
+    for name, value in fields.items():
+        _log_context[name].set(value)
+
+
+@contextmanager
+def log_context(**fields):
+    """Like bind_log_context, but restores the previous values on exit"""
+    tokens = [(_log_context[name], _log_context[name].set(value)) for name, value in fields.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the bound context onto the record; runs in the logging thread, not the listener"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in _log_context.items():
+            if getattr(record, name, None) is None:
+                setattr(record, name, var.get())
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps the first and then every Nth record per call site at or below `max_level`"""
+
+    def __init__(self, rate: float = 1.0, max_level: int = logging.DEBUG):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self.max_level = max_level
+        self._seen: Dict[Tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or self.every == 1:
+            return True
+        if self.every == 0:
+            return False
+        key = (record.pathname, record.lineno)
+        count = self._seen.get(key, 0)
+        self._seen[key] = count + 1
+        if count % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if getattr(record, 'sampled', None):
+            entry['sampled'] = record.sampled
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        elif record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """Rolls over at the time boundary or when the file would exceed max_bytes, whichever comes first"""
+
+    def __init__(self, filename: str, max_bytes: int = 0, when: str = 'midnight', backup_count: int = 7,
+                 encoding: str = 'utf-8'):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes
+
+    def rotation_filename(self, default_name: str) -> str:
+        # Several size rollovers within one interval must not overwrite each other
+        name, index = default_name, 0
+        while os.path.exists(name):
+            index += 1
+            name = f"{default_name}.{index}"
+        return super().rotation_filename(name)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: the message is merged here, everything else happens in the listener"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks reference live frames; render them now, they are rare
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(log_file: Optional[str] = None, level=None, log_format: Optional[str] = None,
+                  max_bytes: Optional[int] = None, when: Optional[str] = None, backup_count: Optional[int] = None,
+                  debug_sample_rate: Optional[float] = None, console: bool = True,
+                  queue_size: int = 10000) -> logging.handlers.QueueListener:
+    """Route all logging through one queue and a listener thread; replaces existing root handlers"""
+    global _listener, _queue_handler
+    stop_logging()
+
+    level = level or os.getenv('SOFIA_LOG_LEVEL', 'INFO')
+    log_file = log_file if log_file is not None else os.getenv('SOFIA_LOG_FILE')
+    log_format = log_format or os.getenv('SOFIA_LOG_FORMAT', 'json')
+    max_bytes = max_bytes if max_bytes is not None else int(os.getenv('SOFIA_LOG_MAX_MB', '50')) * 1024 * 1024
+    when = when or os.getenv('SOFIA_LOG_ROTATE_WHEN', 'midnight')
+    backup_count = backup_count if backup_count is not None else int(os.getenv('SOFIA_LOG_BACKUPS', '7'))
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.getenv('SOFIA_LOG_DEBUG_SAMPLE', '1.0'))
+
+    handlers = []
+    if log_file:
+        file_handler = SizeAndTimeRotatingFileHandler(log_file, max_bytes, when, backup_count)
+        file_handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(console_handler)
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+    queue_handler.addFilter(SamplingFilter(debug_sample_rate))
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    _queue_handler = queue_handler
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush the queue and stop the listener thread"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
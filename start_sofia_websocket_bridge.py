@@ -236,14 +236,8 @@ Examples:
     
     # Setup logging
     log_level = logging.DEBUG if args.debug or args.dev else logging.INFO
-    logging.basicConfig(
-        level=log_level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('sofia_websocket_bridge.log'),
-            logging.StreamHandler()
-        ]
-    )
+    from src.utils.log_setup import setup_logging
+    setup_logging(log_file='sofia_websocket_bridge.log', level=log_level)
     
     # Print configuration
     print_configuration(args)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Tests für Zugangskontrolle (Token-Buckets pro Client, globale STT/TTS-Limits, Lastabwurf) der WebSocket-Bridge
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.admission import BUSY_MESSAGE, ConcurrencyLimit, RateLimiter, TokenBucket
+from src.bridge.tts_cache import TTSCache
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+
+class Sink:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def messages(self):
+        return [json.loads(m) for m in self.sent if isinstance(m, str)]
+
+
+class ZaehlAdapter:
+    def __init__(self):
+        self.calls = []
+
+    async def process_message(self, session_id, user_message):
+        self.calls.append(user_message)
+        return {'success': True, 'message': 'Gern.'}
+
+
+def verbinde(bridge, client_id):
+    bridge.clients[client_id] = Sink()
+    bridge.sofia_sessions[client_id] = bridge.new_session()
+    return bridge.clients[client_id]
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(rate=2.0, burst=3.0)
+    now = bucket.updated_at
+    assert [bucket.try_acquire(now=now) for _ in range(4)] == [True, True, True, False]
+    assert bucket.try_acquire(now=now + 0.5)
+    assert not bucket.try_acquire(now=now + 0.5)
+
+    limiter = RateLimiter({'text': (1.0, 2.0)})
+    assert limiter.allow('a', 'text') and limiter.allow('a', 'text')
+    assert not limiter.allow('a', 'text')
+    assert limiter.allow('b', 'text')          # buckets are per client
+    assert limiter.allow('a', 'unbegrenzt')    # kinds without a limit pass
+    assert limiter.rejected == {'text': 1}
+
+
+def test_flooding_client_is_throttled_without_affecting_others():
+    adapter = ZaehlAdapter()
+    bridge = SofiaWebSocketBridge(tts_backend='none', tts_cache=TTSCache(), agent_adapter=adapter,
+                                  rate_limits={'text': (1.0, 5.0), 'control': (20.0, 40.0)})
+    flooder = verbinde(bridge, 'laut')
+    polite = verbinde(bridge, 'leise')
+
+    async def run():
+        for i in range(50):
+            await bridge.process_client_message('laut', json.dumps({'type': 'text_message', 'text': f'spam {i}'}))
+        await bridge.process_client_message('leise', json.dumps({'type': 'text_message', 'text': 'Termin bitte'}))
+
+    asyncio.run(run())
+
+    assert adapter.calls.count('Termin bitte') == 1
+    assert len(adapter.calls) == 6  # burst of 5 plus the polite client
+    assert bridge.stats['rate_limited'] == 45
+    assert bridge.get_stats()['admission']['rate_limited']['text'] == 45
+    busy = [m for m in flooder.messages() if m['type'] == 'busy']
+    assert len(busy) == 1 and busy[0]['message'] == BUSY_MESSAGE
+    assert not any(m['type'] == 'busy' for m in polite.messages())
+
+
+def test_audio_bytes_are_limited_per_client():
+    bridge = SofiaWebSocketBridge(tts_backend='none', tts_cache=TTSCache(),
+                                  rate_limits={'audio': (100.0, 100.0), 'audio_bytes': (32000.0, 64000.0)})
+    bridge.transcribe_audio = lambda audio: None
+    verbinde(bridge, 'c1')
+
+    async def run():
+        for _ in range(10):
+            await bridge.process_client_message('c1', bytes(16000))
+
+    asyncio.run(run())
+    assert bridge.stats['audio_bytes_received'] == 64000
+    assert bridge.stats['rate_limited'] == 6
+
+
+def test_overload_sheds_stt_and_keeps_admitted_latency_bounded():
+    bridge = SofiaWebSocketBridge(tts_backend='none', tts_cache=TTSCache(), agent_adapter=ZaehlAdapter(),
+                                  stt_concurrency=2, admission_queue=2)
+
+    def langsame_erkennung(audio):
+        time.sleep(0.1)
+        return 'Hallo'
+
+    bridge.transcribe_audio = langsame_erkennung
+    sinks = [verbinde(bridge, f'c{i}') for i in range(12)]
+    latencies = []
+
+    async def turn(client_id):
+        started = time.monotonic()
+        text = await bridge.transcribe_turn(client_id, bytes(3200))
+        if text:
+            latencies.append(time.monotonic() - started)
+
+    async def run():
+        await asyncio.gather(*(turn(f'c{i}') for i in range(12)))
+
+    asyncio.run(run())
+
+    # 2 running + 2 waiting were admitted, the rest shed at once
+    assert len(latencies) == 4
+    assert bridge.stats['stt_shed'] == 8
+    assert max(latencies) < 0.35
+    shed = [sink for sink in sinks if any(m['type'] == 'busy' for m in sink.messages())]
+    assert len(shed) == 8
+
+
+def test_concurrency_limit_counts_active_and_waiting():
+    async def run():
+        limit = ConcurrencyLimit(1, max_waiting=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limit:
+                await release.wait()
+
+        first = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        assert limit.try_reserve()
+        second = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        assert limit.metrics() == {'limit': 1, 'active': 1, 'waiting': 1, 'shed': 0}
+        assert not limit.try_reserve()
+        release.set()
+        await asyncio.gather(first, second)
+        return limit
+
+    limit = asyncio.run(run())
+    assert limit.metrics() == {'limit': 1, 'active': 0, 'waiting': 0, 'shed': 1}
+
+
+def test_admit_reserves_atomically_so_the_wait_queue_is_not_overfilled():
+    async def run():
+        limit = ConcurrencyLimit(1, max_waiting=1)
+        release = asyncio.Event()
+
+        async def hold(admission):
+            async with admission:
+                await release.wait()
+
+        # Alle prüfen im selben Schritt, bevor einer eingetreten ist
+        admissions = [limit.admit() for _ in range(5)]
+        assert admissions.count(None) == 3
+        tasks = [asyncio.ensure_future(hold(a)) for a in admissions if a is not None]
+        await asyncio.sleep(0)
+        assert limit.metrics() == {'limit': 1, 'active': 1, 'waiting': 1, 'shed': 3}
+        release.set()
+        await asyncio.gather(*tasks)
+        return limit
+
+    limit = asyncio.run(run())
+    assert limit.metrics() == {'limit': 1, 'active': 0, 'waiting': 0, 'shed': 3}
+
+
+class BusyAdapter:
+    async def process_message(self, session_id, user_message):
+        return {'success': False, 'message': BUSY_MESSAGE, 'intent': 'busy', 'session_id': session_id}
+
+
+def test_busy_reply_from_the_adapter_is_not_treated_as_sofias_answer():
+    bridge = SofiaWebSocketBridge(tts_backend='none', tts_cache=TTSCache(), agent_adapter=BusyAdapter())
+    sink = verbinde(bridge, 'c1')
+    gesprochen = []
+
+    async def sprechen(client_id, text):
+        gesprochen.append(text)
+
+    bridge.stream_speech = sprechen
+    asyncio.run(bridge.send_to_sofia('c1', 'Ich hätte gern einen Termin'))
+
+    assert [m['type'] for m in sink.messages()] == ['status', 'busy']
+    assert bridge.sofia_sessions['c1']['conversation_history'] == []
+    assert gesprochen == [] and bridge.stats['agent_shed'] == 1
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests für die Normalisierung des Eingangs-Audios (Abtastrate, Kanäle, Pegel) der WebSocket-Bridge
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.audio_format import AudioNormalizer, benchmark
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+
+def ton(rate: int, sekunden: float, frequenz: float = 440.0, amplitude: float = 0.5) -> np.ndarray:
+    t = np.arange(int(rate * sekunden)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequenz * t)).astype(np.float32)
+
+
+def pcm16(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768
+
+
+def dominante_frequenz(samples: np.ndarray, rate: int = 16000) -> float:
+    spectrum = np.abs(np.fft.rfft(samples))
+    return np.argmax(spectrum) * rate / len(samples)
+
+
+def test_float32_stereo_48k_becomes_16k_mono_int16():
+    left = ton(48000, 1.0, 440)
+    stereo = np.stack([left, left], axis=1).astype('<f4').tobytes()
+
+    whole = AudioNormalizer(48000, 2, 'float32').process(stereo)
+    chunked_normalizer = AudioNormalizer(48000, 2, 'float32')
+    # Odd chunk sizes split samples and frames
+    chunked = b''.join(chunked_normalizer.process(stereo[i:i + 4001]) for i in range(0, len(stereo), 4001))
+
+    assert len(whole) == 16000 * 2
+    assert chunked == whole
+    out = pcm16(whole)[800:]
+    assert abs(dominante_frequenz(out) - 440) < 5
+    assert abs(np.sqrt(np.mean(out ** 2)) - 0.5 / np.sqrt(2)) < 0.01
+
+
+def test_int16_44k_resample_suppresses_aliasing():
+    # 12 kHz cannot be represented at 16 kHz and must not fold back to 4 kHz
+    tone = (ton(44100, 1.0, 12000) * 32767).astype('<i2').tobytes()
+    out = pcm16(AudioNormalizer(44100, 1, 'int16').process(tone))[800:]
+    assert np.sqrt(np.mean(out ** 2)) < 0.005
+
+
+def test_gain_and_agc():
+    quiet = (ton(16000, 2.0, amplitude=0.01) * 32767).astype('<i2').tobytes()
+
+    boosted = pcm16(AudioNormalizer(gain_db=20).process(quiet))
+    assert abs(np.max(np.abs(boosted)) - 0.1) < 0.005
+
+    agc = AudioNormalizer(agc=True)
+    out = b''.join(agc.process(quiet[i:i + 3200]) for i in range(0, len(quiet), 3200))
+    level = np.sqrt(np.mean(pcm16(out)[-3200:] ** 2))
+    assert abs(20 * np.log10(level) - (-20)) < 1.5
+
+    # Silence is not pumped up to the target level
+    gate = AudioNormalizer(agc=True)
+    gate.process(bytes(32000))
+    assert gate.gain == 1.0
+
+
+def test_passthrough_is_untouched():
+    normalizer = AudioNormalizer()
+    assert normalizer.passthrough
+    assert normalizer.process(b'\x01\x02\x03\x04') == b'\x01\x02\x03\x04'
+
+
+def test_real_time_factor():
+    result = benchmark(48000, 2, 'float32', seconds=2.0, agc=True)
+    assert result['real_time_factor'] < 0.1
+    assert abs(result['output_seconds'] - 2.0) < 0.01
+
+
+def test_bridge_handshake_declares_client_format():
+    bridge = SofiaWebSocketBridge()
+    transcribed = []
+    bridge.transcribe_audio = lambda audio: transcribed.append(audio) or 'ja'
+
+    async def no_reply(client_id, text):
+        return None
+
+    bridge.process_with_sofia = no_reply
+
+    class Sink:
+        def __init__(self):
+            self.sent = []
+
+        async def send(self, message):
+            self.sent.append(message)
+
+    ws = Sink()
+    bridge.clients['c1'] = ws
+    bridge.sofia_sessions['c1'] = bridge.new_session()
+
+    browser_audio = np.concatenate([
+        np.zeros(48000, dtype=np.float32), ton(48000, 0.5, 220, 0.3), np.zeros(48000, dtype=np.float32)
+    ]).astype('<f4').tobytes()
+
+    async def run():
+        await bridge.process_client_message('c1', json.dumps({
+            'type': 'configure', 'audio_format': {'sample_rate': 96000}
+        }))
+        await bridge.process_client_message('c1', json.dumps({
+            'type': 'configure',
+            'audio_transport': 'binary',
+            'audio_format': {'sample_rate': 48000, 'channels': 1, 'sample_format': 'float32'}
+        }))
+        for i in range(0, len(browser_audio), 8192):
+            await bridge.process_client_message('c1', browser_audio[i:i + 8192])
+
+    asyncio.run(run())
+
+    messages = [json.loads(m) for m in ws.sent if isinstance(m, str)]
+    assert messages[0]['type'] == 'error'
+    configured = next(m for m in messages if m['type'] == 'configured')
+    assert configured['audio_format']['sample_rate'] == 48000
+    assert bridge.stats['audio_bytes_received'] == len(browser_audio)
+    # One utterance, converted to 16 kHz int16 before VAD and STT
+    assert len(transcribed) == 1
+    assert 0.5 <= len(transcribed[0]) / 32000 <= 1.2
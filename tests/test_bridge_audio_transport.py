@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests für den binären Audio-Transport und den Ring-Puffer der WebSocket-Bridge
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sofia_websocket_bridge
+from src.bridge.audio_buffer import AudioRingBuffer
+from sofia_websocket_bridge import SofiaWebSocketBridge, AUDIO_TRANSPORT_BINARY
+
+
+class FakeWebSocket:
+    """Minimaler WebSocket-Ersatz: liefert vorgegebene Nachrichten und sammelt Antworten"""
+
+    def __init__(self, incoming=()):
+        self.incoming = list(incoming)
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        # Like a real socket, waiting for the next message lets the writer task run
+        for message in self.incoming:
+            await asyncio.sleep(0.01)
+            yield message
+        await asyncio.sleep(0.01)
+
+    def json_messages(self):
+        return [json.loads(m) for m in self.sent if isinstance(m, str)]
+
+
+def test_ring_buffer_wraps_and_preserves_order():
+    buf = AudioRingBuffer(8)
+    buf.write(b'abcdef')
+    assert buf.read(4) == b'abcd'
+    buf.write(b'ghijk')  # wraps around the end of the backing array
+    assert len(buf) == 7
+    assert buf.read() == b'efghijk'
+    assert buf.dropped_bytes == 0
+
+
+def test_ring_buffer_overwrites_oldest_on_overflow():
+    buf = AudioRingBuffer(4)
+    buf.write(b'abc')
+    buf.write(memoryview(b'def'))
+    assert buf.peek() == b'cdef'
+    assert buf.dropped_bytes == 2
+
+    buf.write(b'0123456789')
+    assert buf.read() == b'6789'
+    assert buf.dropped_bytes == 12
+
+
+def test_binary_handshake_and_audio_frames(monkeypatch):
+    # Fixed-size segmentation keeps the raw bytes in the ring for inspection
+    monkeypatch.setattr(sofia_websocket_bridge, 'HAS_VAD', False)
+    bridge = SofiaWebSocketBridge()
+    pcm = bytes(range(256)) * 8
+    ws = FakeWebSocket([
+        json.dumps({'type': 'configure', 'audio_transport': 'binary'}),
+        pcm,
+    ])
+
+    async def run():
+        client_task = asyncio.ensure_future(bridge.handle_client(ws))
+        # Session is removed on disconnect, so inspect it from inside the handler
+        original = bridge.buffer_audio
+        captured = {}
+
+        async def spy(client_id, data):
+            await original(client_id, data)
+            captured['session'] = dict(bridge.sofia_sessions[client_id])
+            captured['buffered'] = bridge.sofia_sessions[client_id]['audio_buffer'].peek()
+
+        bridge.buffer_audio = spy
+        await client_task
+        return captured
+
+    captured = asyncio.run(run())
+    messages = ws.json_messages()
+
+    assert 'binary' in messages[0]['capabilities']['audio_transports']
+    assert messages[1] == {'type': 'configured', 'audio_transport': 'binary'}
+    assert captured['session']['audio_transport'] == AUDIO_TRANSPORT_BINARY
+    assert captured['buffered'] == pcm
+    assert bridge.stats['audio_bytes_received'] == len(pcm)
+    assert bridge.stats['binary_clients'] == 0
+
+
+def test_json_clients_keep_base64_audio():
+    bridge = SofiaWebSocketBridge()
+    ws = FakeWebSocket()
+    bridge.clients['c1'] = ws
+    bridge.sofia_sessions['c1'] = bridge.new_session()
+    bridge.sofia_sessions['c1']['vad'] = None
+
+    async def run():
+        await bridge.process_client_message('c1', json.dumps({
+            'type': 'audio_chunk',
+            'audio_data': base64.b64encode(b'\x01\x02' * 10).decode('ascii'),
+        }))
+        await bridge.send_audio_to_client('c1', b'mp3-bytes', 'mp3')
+
+    asyncio.run(run())
+
+    assert bridge.sofia_sessions['c1']['audio_buffer'].peek() == b'\x01\x02' * 10
+    reply = ws.json_messages()[-1]
+    assert reply['type'] == 'sofia_audio'
+    assert base64.b64decode(reply['audio_data']) == b'mp3-bytes'
+
+
+def test_binary_clients_receive_raw_audio_frames():
+    bridge = SofiaWebSocketBridge()
+    ws = FakeWebSocket()
+    bridge.clients['c1'] = ws
+    bridge.sofia_sessions['c1'] = bridge.new_session()
+    bridge.sofia_sessions['c1']['audio_transport'] = AUDIO_TRANSPORT_BINARY
+
+    audio = b'\xff' * 3000
+    asyncio.run(bridge.send_audio_to_client('c1', audio, 'mp3'))
+
+    header, frame = ws.sent
+    assert json.loads(header) == {
+        'type': 'sofia_audio', 'transport': 'binary', 'format': 'mp3', 'size': len(audio)
+    }
+    assert frame == audio
+    # Binary frame carries the payload without the 4/3 base64 expansion
+    assert len(frame) + len(header) < len(base64.b64encode(audio))
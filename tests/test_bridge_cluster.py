@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests für den Mehrprozess-Betrieb (gemeinsame Sitzungsregistrierung, SO_REUSEPORT) der WebSocket-Bridge
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.cluster import SessionRegistry, create_reuseport_socket
+from src.bridge.tts_cache import TTSCache
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+
+class Sink:
+    def __init__(self, incoming=()):
+        self.incoming = list(incoming)
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for message in self.incoming:
+            await asyncio.sleep(0.05)
+            yield message
+        await asyncio.sleep(0.1)
+
+    def messages(self):
+        return [json.loads(m) for m in self.sent if isinstance(m, str)]
+
+
+def worker_bridge(registry, worker_id):
+    bridge = SofiaWebSocketBridge(tts_backend='none', tts_cache=TTSCache(), registry=registry, worker_id=worker_id)
+    bridge.agent_adapter = None
+    return bridge
+
+
+def test_registry_claim_release_and_expiry(tmp_path):
+    registry = SessionRegistry(str(tmp_path / 'sessions.db'))
+    registry.save_session('s1', 'worker-0', {'conversation_history': [{'user': 'hallo'}]})
+
+    # A second process sees the same data
+    other = SessionRegistry(str(tmp_path / 'sessions.db'))
+    state = other.claim_session('s1', 'worker-1')
+    assert state['conversation_history'] == [{'user': 'hallo'}]
+    assert registry.session_owner('s1') == 'worker-1'
+
+    registry.release_session('s1', 'worker-0')  # not the owner any more
+    assert registry.session_owner('s1') == 'worker-1'
+    other.release_session('s1', 'worker-1')
+    assert registry.session_owner('s1') is None
+
+    assert other.claim_session('unbekannt', 'worker-1') is None
+    time.sleep(0.01)
+    assert registry.expire_sessions(max_age=0) == 1
+    assert registry.claim_session('s1', 'worker-0') is None
+
+
+def test_stats_are_summed_across_workers(tmp_path):
+    registry = SessionRegistry(str(tmp_path / 'sessions.db'))
+    registry.publish_stats('worker-0', {'messages_processed': 3, 'start_time': 100.0, 'active_clients': 1})
+    registry.publish_stats('worker-1', {'messages_processed': 4, 'start_time': 200.0, 'active_clients': 2})
+
+    totals = registry.aggregate_stats()
+    assert totals['workers'] == 2
+    assert totals['worker_ids'] == ['worker-0', 'worker-1']
+    assert totals['messages_processed'] == 7
+    assert totals['active_clients'] == 3
+    assert 'start_time' not in totals
+
+
+def test_two_sockets_share_one_port():
+    first = create_reuseport_socket('127.0.0.1', 0)
+    port = first.getsockname()[1]
+    second = create_reuseport_socket('127.0.0.1', port)
+    try:
+        assert second.getsockname()[1] == port
+    finally:
+        first.close()
+        second.close()
+
+
+def test_session_resumes_on_another_worker(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    worker_a = worker_bridge(SessionRegistry(path), 'worker-0')
+    worker_b = worker_bridge(SessionRegistry(path), 'worker-1')
+
+    first = Sink([json.dumps({'type': 'text_message', 'text': 'Ich brauche einen Termin'})])
+    asyncio.run(worker_a.handle_client(first))
+    session_id = first.messages()[0]['session_id']
+    assert worker_a.registry.session_owner(session_id) is None  # released on disconnect
+
+    # Reconnect lands on the other worker
+    second = Sink([json.dumps({'type': 'resume', 'session_id': session_id})])
+    asyncio.run(worker_b.handle_client(second))
+    resumed = next(m for m in second.messages() if m['type'] == 'resumed')
+    assert resumed['session_id'] == session_id
+    assert resumed['worker_id'] == 'worker-1'
+    assert resumed['history_length'] == 2  # caller and Sofia
+    assert worker_b.stats['sessions_resumed'] == 1
+
+    third = Sink([json.dumps({'type': 'resume', 'session_id': 'abgelaufen'})])
+    asyncio.run(worker_b.handle_client(third))
+    failed = next(m for m in third.messages() if m['type'] == 'resume_failed')
+    assert failed['session_id'] != 'abgelaufen'
+    assert worker_b.stats['resume_failures'] == 1
+
+    worker_a.registry.publish_stats('worker-0', worker_a.stats)
+    worker_b.registry.publish_stats('worker-1', worker_b.stats)
+    cluster = worker_b.get_stats()['cluster']
+    assert cluster['workers'] == 2
+    assert cluster['connections'] == 3
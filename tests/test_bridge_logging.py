@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests für das gemeinsame, warteschlangenbasierte Logging (JSON-Zeilen, Kontext-IDs, Sampling, Rotation)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.log_setup import bind_log_context, log_context, setup_logging, stop_logging
+
+
+def zeilen(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_json_lines_carry_call_and_session_ids(tmp_path):
+    log_file = tmp_path / 'bridge.log'
+    setup_logging(log_file=str(log_file), level='DEBUG', console=False)
+    logger = logging.getLogger('test.kontext')
+
+    async def call(call_id):
+        bind_log_context(call_id=call_id, session_id=f'sitzung-{call_id}')
+        await asyncio.sleep(0)
+        logger.info("Anruf %s angenommen", call_id)
+
+    try:
+        async def run():
+            await asyncio.gather(call('a'), call('b'))
+        asyncio.run(run())
+        with log_context(trace_id='t1'):
+            try:
+                raise ValueError('kaputt')
+            except ValueError:
+                logger.exception("Fehler in Runde")
+        logger.info("ohne Kontext")
+    finally:
+        stop_logging()
+
+    entries = zeilen(log_file)
+    by_call = {e.get('call_id'): e for e in entries if e['msg'].startswith('Anruf')}
+    assert by_call['a']['session_id'] == 'sitzung-a' and by_call['a']['msg'] == 'Anruf a angenommen'
+    assert by_call['b']['session_id'] == 'sitzung-b'
+    error = next(e for e in entries if e['msg'] == 'Fehler in Runde')
+    assert error['trace_id'] == 't1' and 'ValueError: kaputt' in error['exc'] and error['level'] == 'ERROR'
+    assert 'trace_id' not in entries[-1] and 'call_id' not in entries[-1]
+
+
+def test_debug_events_are_sampled_per_call_site(tmp_path):
+    log_file = tmp_path / 'bridge.log'
+    setup_logging(log_file=str(log_file), level='DEBUG', console=False, debug_sample_rate=0.1)
+    logger = logging.getLogger('test.sampling')
+    try:
+        for i in range(100):
+            logger.debug("Audio-Frame %d", i)
+            if i % 10 == 0:
+                logger.info("Wichtig %d", i)
+    finally:
+        stop_logging()
+
+    entries = zeilen(log_file)
+    debug = [e for e in entries if e['level'] == 'DEBUG']
+    assert [e['msg'] for e in debug] == [f'Audio-Frame {i}' for i in range(0, 100, 10)]
+    assert all(e['sampled'] == 10 for e in debug)
+    assert len([e for e in entries if e['level'] == 'INFO']) == 10
+
+
+def test_file_rotates_by_size(tmp_path):
+    log_file = tmp_path / 'bridge.log'
+    setup_logging(log_file=str(log_file), console=False, max_bytes=2000, backup_count=50)
+    logger = logging.getLogger('test.rotation')
+    try:
+        for i in range(100):
+            logger.info("Zeile %03d %s", i, 'x' * 40)
+    finally:
+        stop_logging()
+
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) > 3
+    assert all(os.path.getsize(tmp_path / name) <= 2000 for name in files)
+    # Nothing is lost across rotations
+    total = sum(len(zeilen(tmp_path / name)) for name in files)
+    assert total == 100
+
+
+def test_logging_call_does_not_wait_for_slow_io(tmp_path):
+    class LangsamerHandler(logging.Handler):
+        def emit(self, record):
+            time.sleep(0.01)
+
+    listener = setup_logging(log_file=None, console=False)
+    listener.handlers = (LangsamerHandler(),)
+    logger = logging.getLogger('test.langsam')
+    try:
+        started = time.perf_counter()
+        for i in range(200):
+            logger.info("Runde %d", i)
+        elapsed = time.perf_counter() - started
+    finally:
+        stop_logging()
+    # 200 records x 10 ms of I/O happen in the listener thread, not here
+    assert elapsed < 0.2
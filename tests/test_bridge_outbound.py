@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests für die ausgehende Warteschlange (Writer-Task pro Verbindung) der WebSocket-Bridge
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.outbound import ClientWriter
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+
+class SlowSocket:
+    """Empfänger, dessen send() pro Nachricht `delay` Sekunden braucht"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.received_at = []
+        self.closed_with = None
+
+    async def send(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(message)
+        self.received_at.append(time.monotonic())
+
+    async def close(self, code=1000, reason=''):
+        self.closed_with = code
+
+
+def test_audio_is_dropped_but_control_messages_are_kept():
+    async def run():
+        ws = SlowSocket(delay=0.01)
+        writer = ClientWriter(ws, 'c1', max_items=3)
+        writer.start()
+        for i in range(10):
+            writer.enqueue([f'audio-{i}'], droppable=True)
+            writer.enqueue([f'control-{i}'])
+        await writer.drain(timeout=2)
+        writer.stop()
+        return ws, writer
+
+    ws, writer = asyncio.run(run())
+    assert [m for m in ws.sent if m.startswith('control')] == [f'control-{i}' for i in range(10)]
+    assert writer.dropped_messages > 0
+    assert len([m for m in ws.sent if m.startswith('audio')]) == 10 - writer.dropped_messages
+
+
+def test_coalesced_messages_keep_only_the_latest():
+    async def run():
+        ws = SlowSocket(delay=0.02)
+        writer = ClientWriter(ws, 'c1')
+        writer.start()
+        writer.enqueue(['first'])
+        await asyncio.sleep(0)  # 'first' is now in flight
+        for i in range(5):
+            writer.enqueue([f'partial-{i}'], coalesce_key='partial:1')
+        writer.enqueue(['final'])
+        await writer.drain(timeout=2)
+        writer.stop()
+        return ws, writer
+
+    ws, writer = asyncio.run(run())
+    assert ws.sent == ['first', 'partial-4', 'final']
+    assert writer.coalesced_messages == 4
+
+
+def test_slow_client_does_not_delay_others_and_is_disconnected():
+    bridge = SofiaWebSocketBridge(outbound_config={'lag_budget_ms': 50, 'lag_grace_ms': 100})
+    fast, slow = SlowSocket(), SlowSocket(delay=0.2)
+
+    async def run():
+        for client_id, ws in (('fast', fast), ('slow', slow)):
+            bridge.clients[client_id] = ws
+            bridge.sofia_sessions[client_id] = bridge.new_session()
+            bridge.writers[client_id] = ClientWriter(ws, client_id, on_disconnect=bridge.on_slow_client,
+                                                     **bridge.outbound_config)
+            bridge.writers[client_id].start()
+
+        started = time.monotonic()
+        for i in range(20):
+            for client_id in ('fast', 'slow'):
+                await bridge.send_to_client(client_id, {'type': 'status', 'n': i})
+                await bridge.send_audio_to_client(client_id, b'\x00' * 320, 'wav')
+            await asyncio.sleep(0.01)
+        handler_time = time.monotonic() - started
+        await bridge.writers['fast'].drain()
+        await asyncio.sleep(0.05)
+        return started, handler_time
+
+    started, handler_time = asyncio.run(run())
+
+    # Handlers never waited for the slow socket
+    assert handler_time < 0.5
+    assert len(fast.sent) == 40
+    assert max(fast.received_at) - started < 0.5
+    assert slow.closed_with == 1013
+    assert bridge.stats['slow_client_disconnects'] == 1
+    assert bridge.writers['slow'].closed
+    assert bridge.get_stats()['outbound']['fast']['max_lag_ms'] < 100
+    assert json.loads(fast.sent[0]) == {'type': 'status', 'n': 0}
+
+
+class StalledSocket(SlowSocket):
+    """Client, der nicht mehr liest: send() kehrt nie zurück"""
+
+    async def send(self, message):
+        await asyncio.Event().wait()
+
+
+def test_stalled_send_is_disconnected_after_grace():
+    async def run():
+        ws = StalledSocket()
+        getrennt = []
+        writer = ClientWriter(ws, 'c1', lag_budget_ms=50, lag_grace_ms=100, on_disconnect=getrennt.append)
+        writer.start()
+        started = time.monotonic()
+        writer.enqueue(['hallo'])
+        while not writer.closed and time.monotonic() - started < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        return ws, writer, getrennt, time.monotonic() - started
+
+    ws, writer, getrennt, elapsed = asyncio.run(run())
+    assert writer.closed and getrennt == ['c1']
+    assert ws.closed_with == 1013
+    assert elapsed < 0.5
+
+
+def test_coalescing_replaces_the_sent_callback():
+    async def run():
+        ws = SlowSocket(delay=0.02)
+        writer = ClientWriter(ws, 'c1')
+        writer.start()
+        writer.enqueue(['first'])
+        await asyncio.sleep(0)
+        gesendet = []
+        writer.enqueue(['alt'], coalesce_key='k', on_sent=lambda: gesendet.append('alt'))
+        writer.enqueue(['neu'], coalesce_key='k', on_sent=lambda: gesendet.append('neu'))
+        await writer.drain(timeout=2)
+        writer.stop()
+        return ws, gesendet
+
+    ws, gesendet = asyncio.run(run())
+    assert ws.sent == ['first', 'neu'] and gesendet == ['neu']
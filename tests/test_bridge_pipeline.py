@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests für die Gesprächs-Pipeline (STT -> Agent -> TTS) pro Sitzung der WebSocket-Bridge
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.pipeline import SessionPipeline
+from src.bridge.tts_cache import TTSCache
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+
+class Protokoll:
+    """Stufen-Attrappen, die Beginn und Ende jeder Stufe mitschreiben"""
+
+    def __init__(self, stt=0.05, agent=0.02, tts=0.3):
+        self.delays = {'stt': stt, 'agent': agent, 'tts': tts}
+        self.events = []
+        self.started = time.monotonic()
+
+    def log(self, event):
+        self.events.append((event, time.monotonic() - self.started))
+
+    def at(self, event):
+        return next(t for name, t in self.events if name == event)
+
+    async def transcribe(self, audio, utterance):
+        self.log(f'stt-start-{utterance}')
+        await asyncio.sleep(self.delays['stt'])
+        return f'satz {utterance}'
+
+    async def respond(self, text):
+        await asyncio.sleep(self.delays['agent'])
+        self.log(f'reply-{text}')
+        return f'Antwort auf {text}'
+
+    async def speak(self, text):
+        self.log(f'tts-start-{text}')
+        await asyncio.sleep(self.delays['tts'])
+        self.log(f'tts-end-{text}')
+
+
+def test_next_utterance_is_transcribed_while_sofia_speaks():
+    async def run():
+        log = Protokoll()
+        pipeline = SessionPipeline('c1', log.transcribe, log.respond, log.speak)
+        pipeline.start()
+        pipeline.submit_audio(b'a', 1)
+        await asyncio.sleep(0.15)  # reply 1 is being spoken now
+        pipeline.submit_audio(b'b', 2)
+        await pipeline.join()
+        await pipeline.stop()
+        return log
+
+    log = asyncio.run(run())
+    assert log.at('stt-start-2') < log.at('tts-end-Antwort auf satz 1')
+    assert log.at('reply-satz 2') < log.at('tts-end-Antwort auf satz 1')
+    # Replies are still spoken one after another
+    assert log.at('tts-start-Antwort auf satz 2') >= log.at('tts-end-Antwort auf satz 1')
+
+
+def test_barge_in_cancels_current_and_queued_replies():
+    async def run():
+        log = Protokoll(tts=0.5)
+        pipeline = SessionPipeline('c1', log.transcribe, log.respond, log.speak)
+        pipeline.start()
+        pipeline.submit_text('eins')
+        pipeline.submit_text('zwei')
+        await asyncio.sleep(0.1)
+        assert pipeline.speaking
+        interrupted = pipeline.barge_in()
+        await pipeline.join()
+        await pipeline.stop()
+        return log, interrupted, pipeline
+
+    log, interrupted, pipeline = asyncio.run(run())
+    names = [name for name, _ in log.events]
+    assert interrupted and pipeline.barge_ins == 1
+    assert 'tts-start-Antwort auf eins' in names
+    assert 'tts-end-Antwort auf eins' not in names
+    assert 'tts-start-Antwort auf zwei' not in names
+    assert not pipeline.barge_in()
+
+
+class FakeAdapter:
+    def __init__(self):
+        self.calls = []
+        self.ended = []
+
+    async def process_message(self, session_id, user_message):
+        self.calls.append((session_id, user_message))
+        return {'success': True,
+                'message': f'Gerne helfe ich bei: {user_message}. Ich schaue sofort nach freien Terminen.'}
+
+    def end_session(self, session_id):
+        self.ended.append(session_id)
+
+
+class Sink:
+    def __init__(self, incoming=()):
+        self.incoming = list(incoming)
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for message, pause in self.incoming:
+            await asyncio.sleep(pause)
+            yield message
+        await asyncio.sleep(0.5)
+
+
+def test_bridge_uses_adapter_and_reports_barge_in():
+    adapter = FakeAdapter()
+    bridge = SofiaWebSocketBridge(tts_backend='local', tts_cache=TTSCache(), agent_adapter=adapter)
+    bridge.tts_backend.ms_per_char = 10  # ~0.4 s per sentence
+    ws = Sink([
+        (json.dumps({'type': 'text_message', 'text': 'Termin am Montag'}), 0.0),
+        (json.dumps({'type': 'text_message', 'text': 'Doch lieber Dienstag'}), 0.2),
+    ])
+    spoken = []
+
+    async def run():
+        async def barge_in_on_second(client_id, data):
+            session = bridge.sofia_sessions[client_id]
+            if data.get('text', '').startswith('Doch'):
+                # The caller talks over Sofia, as the VAD would report it
+                await bridge.handle_barge_in(client_id, session)
+            await original(client_id, data)
+
+        original = bridge.handle_text_message
+        bridge.handle_text_message = barge_in_on_second
+        await bridge.handle_client(ws)
+
+    original_stream = bridge.stream_speech
+
+    async def record(client_id, text):
+        spoken.append(text)
+        await original_stream(client_id, text)
+
+    bridge.stream_speech = record
+    asyncio.run(run())
+
+    messages = [json.loads(m) for m in ws.sent]
+    types = [m['type'] for m in messages]
+    assert [text for _, text in adapter.calls] == ['Termin am Montag', 'Doch lieber Dienstag']
+    assert len(adapter.ended) == 1
+    assert 'barge_in' in types
+    assert bridge.stats['barge_ins'] == 1
+    replies = [m['text'] for m in messages if m['type'] == 'sofia_response']
+    assert replies[0].startswith('Gerne helfe ich bei: Termin am Montag')
+    # First reply was cut off before its audio was complete; the second one is spoken in full
+    barge_in = types.index('barge_in')
+    assert not any(m.get('final') for m in messages[:barge_in] if m['type'] == 'sofia_audio')
+    assert [m['final'] for m in messages[barge_in:] if m['type'] == 'sofia_audio'] == [False, True]
+    assert spoken == replies
+
+
+def test_full_turn_queue_answers_busy_instead_of_dropping_silently():
+    bridge = SofiaWebSocketBridge(tts_backend='none', tts_cache=TTSCache())
+    ws = Sink([])
+
+    async def run():
+        session = bridge.sofia_sessions['c1'] = bridge.new_session()
+        bridge.clients['c1'] = ws
+        log = Protokoll()
+        # Nicht gestartet: nichts leert die Warteschlange
+        session['pipeline'] = SessionPipeline('c1', log.transcribe, log.respond, max_queued=2)
+        for i in range(3):
+            await bridge.handle_text_message('c1', {'text': f'Nachricht {i}'})
+        return session['pipeline']
+
+    pipeline = asyncio.run(run())
+    assert pipeline.turn_queue.qsize() == 2 and pipeline.dropped_texts == 1
+    assert [json.loads(m)['type'] for m in ws.sent] == ['busy']
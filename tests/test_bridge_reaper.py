@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests für das Aufräumen inaktiver Sitzungen und die Speichergrenzen der WebSocket-Bridge
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.reaper import SessionReaper, session_bytes
+from src.bridge.tts_cache import TTSCache
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+
+def neue_bridge(**reaper_args):
+    bridge = SofiaWebSocketBridge(tts_backend='none', tts_cache=TTSCache(), reaper=SessionReaper(**reaper_args))
+    bridge.agent_adapter = None
+    return bridge
+
+
+def verlauf(anzahl):
+    return [{'type': 'user', 'text': f'Nachricht {i}', 'timestamp': '2026-01-01T10:00:00'} for i in range(anzahl)]
+
+
+class Verbindung:
+    """Offene Verbindung, die erst endet, wenn der Server sie schließt"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = asyncio.Event()
+        self.close_code = None
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000, reason=''):
+        self.close_code = code
+        self.closed.set()
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self.closed.wait()
+        return
+        yield
+
+
+def test_trim_caps_history_and_buffered_audio():
+    bridge = neue_bridge(max_history=10, max_buffered_audio=8000)
+    session = bridge.new_session()
+    session['conversation_history'] = verlauf(25)
+    session['audio_buffer'].write(bytes(20000))
+    history_before = session_bytes(session) - session['audio_buffer'].capacity
+
+    reclaimed, discarded = bridge.reaper.trim(session)
+
+    assert len(session['conversation_history']) == 10
+    assert session['conversation_history'][0]['text'] == 'Nachricht 15'
+    assert len(session['audio_buffer']) == 8000
+    history_after = session_bytes(session) - session['audio_buffer'].capacity
+    assert reclaimed == history_before - history_after
+    assert discarded == 12000
+
+
+def test_idle_sessions_are_closed_and_reclaimed():
+    bridge = neue_bridge(idle_timeout=60)
+    bridge.sofia_sessions['alt'] = bridge.new_session()
+    bridge.sofia_sessions['aktiv'] = bridge.new_session()
+    bridge.sofia_sessions['alt']['last_activity'] = time.time() - 120
+
+    result = asyncio.run(bridge.reap_sessions())
+
+    assert result.idle == ['alt']
+    assert list(bridge.sofia_sessions) == ['aktiv']
+    assert bridge.stats['sessions_reaped'] == 1
+    assert bridge.stats['bytes_reclaimed'] >= bridge.audio_buffer_capacity
+
+
+def test_memory_budget_evicts_least_recently_active_first():
+    bridge = neue_bridge(memory_budget=SofiaWebSocketBridge().audio_buffer_capacity * 2)
+    now = time.time()
+    for index, client_id in enumerate(['c1', 'c2', 'c3', 'c4']):
+        bridge.sofia_sessions[client_id] = bridge.new_session()
+        bridge.sofia_sessions[client_id]['last_activity'] = now - 40 + index * 10
+    bridge.sofia_sessions['c2']['last_activity'] = now - 100  # oldest
+
+    result = asyncio.run(bridge.reap_sessions(now))
+
+    assert result.idle == []
+    assert result.evicted == ['c2', 'c1']
+    assert sorted(bridge.sofia_sessions) == ['c3', 'c4']
+    assert bridge.stats['sessions_evicted'] == 2
+    assert bridge.get_stats()['memory']['session_bytes'] <= bridge.reaper.memory_budget
+
+
+def test_idle_connection_is_closed_with_notice():
+    bridge = neue_bridge(idle_timeout=0.05)
+    ws = Verbindung()
+
+    async def run():
+        client = asyncio.ensure_future(bridge.handle_client(ws))
+        await asyncio.sleep(0.2)
+        await bridge.reap_sessions()
+        await asyncio.wait_for(client, 2)
+
+    asyncio.run(run())
+
+    messages = [json.loads(m) for m in ws.sent]
+    assert messages[-1] == {'type': 'session_closed', 'reason': 'idle timeout'}
+    assert ws.close_code == 1000
+    assert bridge.sofia_sessions == {} and bridge.clients == {} and bridge.writers == {}
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests für die Streaming-Spracherkennung mit Teilergebnissen (transcription_partial)
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.stt import LocalSTTBackend, StreamingTranscriber, create_stt_backend
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+SAMPLE_RATE = 16000
+
+
+def sprache(sekunden: float) -> bytes:
+    """Tonfolge mit wechselnder Frequenz als Sprach-Ersatz"""
+    t = np.arange(int(SAMPLE_RATE * sekunden)) / SAMPLE_RATE
+    frequenz = 180 + 60 * np.sin(2 * np.pi * 1.3 * t)
+    return (3000 * np.sin(2 * np.pi * frequenz * t)).astype('<i2').tobytes()
+
+
+def stille(sekunden: float) -> bytes:
+    return bytes(int(SAMPLE_RATE * sekunden) * 2)
+
+
+def test_local_backend_is_deterministic_and_prefix_stable():
+    backend = create_stt_backend('local')
+    audio = sprache(2.0)
+    full = backend.transcribe(audio)
+    assert full == backend.transcribe(audio)
+    assert len(full.split()) == 8
+    assert full.startswith(backend.transcribe(audio[:SAMPLE_RATE * 2]))
+    assert backend.transcribe(stille(1.0)) is None
+
+
+def test_stable_words_are_never_revised():
+    stream = StreamingTranscriber(1, window_ms=3000, step_ms=500)
+    first = stream.update('ich möchte', 0)
+    assert first['stable'] == ''
+
+    second = stream.update('ich möchte einen', 0)
+    assert second['stable'] == 'ich möchte'
+
+    # The recognizer changes its mind about an already stable word
+    third = stream.update('ich mochte einen termin', 0)
+    assert third['text'].startswith('ich möchte')
+    assert third['stable'] == 'ich möchte'
+
+
+def test_sliding_window_merges_overlap():
+    stream = StreamingTranscriber(1, window_ms=1000, step_ms=500)
+    stream.update('ich möchte einen', 0)
+    stream.update('ich möchte einen termin', 0)
+    # Window now starts later: its text repeats the tail of the committed words
+    merged = stream.update('einen termin morgen', 16000)
+    assert merged['text'] == 'ich möchte einen termin morgen'
+
+
+def test_closed_stream_ignores_late_results():
+    stream = StreamingTranscriber(1)
+    stream.close()
+    assert stream.update('zu spät', 0) is None
+
+
+def test_bridge_sends_partials_before_final_transcription():
+    bridge = SofiaWebSocketBridge(stt_backend='local', partial_interval_ms=500)
+    bridge.stt_backend = LocalSTTBackend(latency_ms=20)
+
+    async def no_reply(client_id, text):
+        return None
+
+    bridge.process_with_sofia = no_reply
+
+    class Sink:
+        def __init__(self):
+            self.sent = []
+
+        async def send(self, message):
+            self.sent.append(message)
+
+    ws = Sink()
+    bridge.clients['c1'] = ws
+    bridge.sofia_sessions['c1'] = bridge.new_session()
+
+    audio = sprache(3.0) + stille(1.0)
+    chunk = 1600  # 50 ms
+
+    async def run():
+        for start in range(0, len(audio), chunk):
+            await bridge.process_client_message('c1', audio[start:start + chunk])
+            await asyncio.sleep(0.005)
+
+    asyncio.run(run())
+
+    messages = [json.loads(m) for m in ws.sent if isinstance(m, str)]
+    types = [m['type'] for m in messages]
+    partials = [m for m in messages if m['type'] == 'transcription_partial']
+    final = next(m for m in messages if m['type'] == 'transcription')
+
+    assert partials, types
+    assert types.index('transcription_partial') < types.index('transcription')
+    # First text arrives long before the utterance is over
+    assert partials[0]['audio_ms'] <= 1000
+    assert final['final'] is True
+    assert final['utterance'] == partials[0]['utterance'] == 1
+    assert final['text'].startswith(partials[-1]['stable'])
+    assert bridge.stats['stt_partials_sent'] == len(partials)
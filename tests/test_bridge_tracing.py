@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests für die Latenz-Messung pro Gesprächsrunde (Trace-IDs, turn_timing, Perzentile) der WebSocket-Bridge
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.request
+
+import pytest
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.tracing import TraceRecorder, percentile
+from src.bridge.tts_cache import TTSCache
+from sofia_websocket_bridge import LATENCY_PATH, SofiaWebSocketBridge
+
+
+class Sink:
+    def __init__(self, incoming=()):
+        self.incoming = list(incoming)
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for message in self.incoming:
+            yield message
+        await asyncio.sleep(0.6)
+
+
+class LangsamerAdapter:
+    async def process_message(self, session_id, user_message):
+        await asyncio.sleep(0.05)
+        return {'success': True, 'message': 'Gerne, ich schaue nach einem freien Termin für Sie.'}
+
+
+def test_spans_and_percentiles():
+    recorder = TraceRecorder(capacity=3)
+    for agent_ms in (10, 20, 30, 40):
+        trace = recorder.start('c1', 'text', origin=0.0)
+        trace.marks.update({'agent_start': 0.001, 'agent_end': 0.001 + agent_ms / 1000})
+        recorder.finish(trace)
+
+    assert recorder.recorded == 4
+    assert len(recorder.traces) == 3  # ring buffer keeps the newest
+    stats = recorder.percentiles()['agent']
+    assert stats['count'] == 3
+    assert stats['p50'] == 30.0 and stats['p99'] == 40.0
+    assert 'stt' not in recorder.percentiles()
+    assert percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 90) == 9
+
+    # Interrupted turns stay visible but do not count towards the percentiles
+    recorder.traces[-1].interrupted = True
+    assert recorder.percentiles()['agent']['count'] == 2
+
+
+def test_text_turn_reports_turn_timing():
+    bridge = SofiaWebSocketBridge(tts_backend='local', tts_cache=TTSCache(), agent_adapter=LangsamerAdapter())
+    ws = Sink([json.dumps({'type': 'text_message', 'text': 'Termin bitte'})])
+    asyncio.run(bridge.handle_client(ws))
+
+    messages = [json.loads(m) for m in ws.sent]
+    timing = next(m for m in messages if m['type'] == 'turn_timing')
+    types = [m['type'] for m in messages]
+    # Sent after the reply's audio
+    assert types.index('turn_timing') > max(i for i, t in enumerate(types) if t == 'sofia_audio')
+    assert timing['kind'] == 'text' and timing['trace_id']
+    spans = timing['spans']
+    assert spans['agent'] >= 50
+    assert 0 < spans['tts_first_byte'] <= spans['tts']
+    assert spans['response'] >= spans['agent'] + spans['tts_first_byte']
+    assert bridge.tracer.recorded == 1
+    assert bridge.get_stats()['latency']['response']['count'] == 1
+
+
+def test_latency_endpoint_serves_percentiles():
+    bridge = SofiaWebSocketBridge(tts_backend='none', tts_cache=TTSCache())
+    trace = bridge.tracer.start('c1', 'audio')
+    for name in ('vad_end', 'stt_start', 'stt_end', 'agent_start', 'agent_end'):
+        time.sleep(0.002)
+        trace.mark(name)
+    bridge.tracer.finish(trace)
+
+    async def run():
+        async with websockets.serve(bridge.handle_client, '127.0.0.1', 0,
+                                    process_request=bridge.process_http_request) as server:
+            port = server.sockets[0].getsockname()[1]
+            url = f'http://127.0.0.1:{port}{LATENCY_PATH}?recent=5'
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, urllib.request.urlopen, url)
+            body = json.loads(response.read())
+
+            # The WebSocket endpoint on the same port is unaffected
+            async with websockets.connect(f'ws://127.0.0.1:{port}') as ws:
+                connected = json.loads(await ws.recv())
+            return response.headers['Content-Type'], body, connected
+
+    content_type, body, connected = asyncio.run(run())
+    assert content_type == 'application/json'
+    assert body['turns'] == 1
+    assert set(body['spans']) >= {'stt', 'agent', 'stt_wait', 'utterance'}
+    assert body['spans']['stt']['p95'] > 0
+    assert body['recent'][0]['trace_id'] == trace.trace_id
+    assert connected['type'] == 'connected'
+
+
+def test_latency_endpoint_on_legacy_server():
+    """websockets 11-13 rufen process_request mit (path, headers) auf"""
+    legacy_server = pytest.importorskip('websockets.legacy.server')
+    bridge = SofiaWebSocketBridge(tts_backend='none', tts_cache=TTSCache())
+
+    async def run():
+        async with legacy_server.serve(bridge.handle_client, '127.0.0.1', 0,
+                                       process_request=bridge.process_http_request) as server:
+            port = server.sockets[0].getsockname()[1]
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, urllib.request.urlopen,
+                                                  f'http://127.0.0.1:{port}{LATENCY_PATH}')
+            body = json.loads(response.read())
+
+            async with websockets.connect(f'ws://127.0.0.1:{port}') as ws:
+                connected = json.loads(await ws.recv())
+            return response.headers['Content-Type'], body, connected
+
+    content_type, body, connected = asyncio.run(run())
+    assert content_type == 'application/json'
+    assert body['turns'] == 0 and 'recent' not in body
+    assert connected['type'] == 'connected'
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests für die satzweise Sprachsynthese (Streaming-TTS) der WebSocket-Bridge
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.tts import LocalTTSBackend, TTSPipeline, split_sentences
+from src.bridge.tts_cache import TTSCache
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+ANTWORT = (
+    "Gerne! Bei Dr. Weber ist am 15.07. um 10.30 Uhr noch ein Termin frei. "
+    "Bitte bringen Sie z.B. Ihre Versichertenkarte mit. "
+    "Kann ich sonst noch etwas für Sie tun?"
+)
+
+
+def test_split_sentences_keeps_abbreviations_and_dates():
+    sentences = split_sentences(ANTWORT)
+    assert sentences == [
+        "Gerne! Bei Dr. Weber ist am 15.07. um 10.30 Uhr noch ein Termin frei.",
+        "Bitte bringen Sie z.B. Ihre Versichertenkarte mit.",
+        "Kann ich sonst noch etwas für Sie tun?",
+    ]
+    assert split_sentences("Ja.") == ["Ja."]
+    assert split_sentences("   ") == []
+
+
+def test_pipeline_yields_in_order_and_first_audio_early():
+    # Long sentences take longer, so later short ones finish first
+    backend = LocalTTSBackend(ms_per_char=3)
+    text = ("Das ist ein kurzer Satz. " + "Dieser Satz ist deutlich länger als alle anderen Sätze zusammen. " * 2
+            + "Ende der Antwort hier.")
+
+    async def run():
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        pipeline = TTSPipeline(backend, executor, max_parallel=4)
+        start = time.monotonic()
+        chunks = []
+        async for index, total, sentence, audio in pipeline.stream(text):
+            chunks.append((index, total, sentence, audio, time.monotonic() - start))
+        executor.shutdown()
+        return chunks
+
+    chunks = asyncio.run(run())
+    assert [c[0] for c in chunks] == list(range(len(chunks)))
+    assert all(c[1] == len(chunks) for c in chunks)
+    assert [c[2] for c in chunks] == split_sentences(text)
+    assert all(c[3] == backend.synthesize(c[2]) for c in chunks)
+
+    whole_reply = len(text) * 3 / 1000
+    # First chunk only waits for its own sentence, not the whole reply
+    assert chunks[0][4] < whole_reply / 2
+
+
+def test_bridge_streams_sentence_chunks():
+    bridge = SofiaWebSocketBridge(tts_backend='local', tts_cache=TTSCache())
+
+    async def fake_sofia(client_id, text):
+        return ANTWORT
+
+    bridge.process_with_sofia = fake_sofia
+
+    class Sink:
+        def __init__(self):
+            self.sent = []
+
+        async def send(self, message):
+            self.sent.append(message)
+
+    ws = Sink()
+    bridge.clients['c1'] = ws
+    bridge.sofia_sessions['c1'] = bridge.new_session()
+
+    asyncio.run(bridge.send_to_sofia('c1', 'Ich brauche einen Termin'))
+
+    messages = [json.loads(m) for m in ws.sent]
+    types = [m['type'] for m in messages]
+    assert types.index('sofia_response') < types.index('sofia_audio')
+    audio = [m for m in messages if m['type'] == 'sofia_audio']
+    assert [m['sequence'] for m in audio] == [0, 1, 2]
+    assert [m['final'] for m in audio] == [False, False, True]
+    assert all(m['format'] == 'wav' and m['total'] == 3 for m in audio)
+    assert bridge.stats['tts_chunks_sent'] == 3
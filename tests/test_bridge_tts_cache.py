@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests für den TTS-Cache (Speicher- und Festplattenstufe) der WebSocket-Bridge
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.tts import LocalTTSBackend, TTSPipeline
+from src.bridge.tts_cache import TTSCache, cache_key, phrase_catalog
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+
+class CountingBackend(LocalTTSBackend):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def synthesize(self, text):
+        self.calls.append(text)
+        return super().synthesize(text)
+
+
+def stream(pipeline, text):
+    async def run():
+        return [audio async for _, _, _, audio in pipeline.stream(text)]
+    return asyncio.run(run())
+
+
+def test_key_normalizes_text_but_not_voice_settings():
+    key = cache_key("Guten  Tag!\n", 'de-DE-Wavenet-F', 1.0, 'mp3')
+    assert key == cache_key("Guten Tag!", 'de-DE-Wavenet-F', 1.0, 'mp3')
+    assert key != cache_key("Guten Tag!", 'de-DE-Wavenet-B', 1.0, 'mp3')
+    assert key != cache_key("Guten Tag!", 'de-DE-Wavenet-F', 1.1, 'mp3')
+    assert key != cache_key("Guten Tag!", 'de-DE-Wavenet-F', 1.0, 'wav')
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = TTSCache(memory_items=2)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    assert cache.get('a') == b'1'
+    cache.put('c', b'3')
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1' and cache.get('c') == b'3'
+
+
+def test_disk_tier_survives_restart_and_respects_size(tmp_path):
+    cache = TTSCache(disk_dir=str(tmp_path), disk_bytes=250)
+    for name in ('a', 'b', 'c'):
+        cache.put(name, bytes(100))
+    stats = cache.stats()
+    assert stats['disk_bytes'] <= 250
+    assert stats['evictions'] == 1
+
+    restarted = TTSCache(disk_dir=str(tmp_path), disk_bytes=250)
+    assert restarted.get('c') == bytes(100)
+    assert restarted.get('a') is None
+    assert restarted.stats()['disk_hits'] == 1
+    # Promoted to memory on the disk hit
+    assert restarted.get_memory('c') == bytes(100)
+
+
+def test_cache_hits_skip_synthesis():
+    backend = CountingBackend()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    pipeline = TTSPipeline(backend, executor, cache=TTSCache())
+    text = "Guten Tag! Ich bin Sofia, Ihre Assistentin. Wie kann ich Ihnen heute helfen?"
+
+    first = stream(pipeline, text)
+    calls = len(backend.calls)
+    second = stream(pipeline, text)
+    executor.shutdown()
+
+    assert first == second
+    assert len(backend.calls) == calls
+    assert pipeline.cache.stats()['hit_ratio'] == 0.5
+
+
+def test_warmup_covers_phrase_catalog():
+    catalog = phrase_catalog()
+    assert any(phrase.startswith("Guten Abend!") for phrase in catalog)
+    assert "Einen Moment bitte, ich prüfe das..." in catalog
+    assert "greeting" not in catalog
+
+    bridge = SofiaWebSocketBridge(tts_backend='local', tts_cache=TTSCache(memory_items=10000))
+    result = asyncio.run(bridge.warmup_tts_cache())
+    assert result['failed'] == 0
+    assert result['synthesized'] == result['sentences'] > len(catalog)
+
+    # Every sentence of a catalog reply is now answered from the cache
+    before = bridge.tts_pipeline.sentences_synthesized
+    stream(bridge.tts_pipeline, catalog[0])
+    assert bridge.tts_pipeline.sentences_synthesized == before
+    assert bridge.get_stats()['tts_cache']['hit_ratio'] > 0
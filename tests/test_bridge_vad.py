@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests für die Sprachaktivitätserkennung (VAD) der WebSocket-Bridge
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bridge.vad import StreamingVAD
+from sofia_websocket_bridge import SofiaWebSocketBridge
+
+SAMPLE_RATE = 16000
+
+
+def ton(sekunden: float, amplitude: int = 3000) -> bytes:
+    """Stimmhafter Testton (220 Hz) als int16-PCM"""
+    t = np.arange(int(SAMPLE_RATE * sekunden)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype('<i2').tobytes()
+
+
+def stille(sekunden: float) -> bytes:
+    rng = np.random.default_rng(1)
+    return rng.normal(0, 30, int(SAMPLE_RATE * sekunden)).astype('<i2').tobytes()
+
+
+def in_chunks(audio: bytes, size: int = 1234):
+    for start in range(0, len(audio), size):
+        yield audio[start:start + size]
+
+
+def test_silence_is_never_emitted():
+    vad = StreamingVAD()
+    segments = []
+    for chunk in in_chunks(stille(3.0)):
+        segments += vad.process(chunk)
+    assert segments == []
+    assert vad.flush() is None
+    assert vad.silence_frames_dropped > 0
+
+
+def test_short_answer_is_emitted_after_hangover():
+    vad = StreamingVAD(hangover_ms=300, preroll_ms=200)
+    # "ja": 250 ms of speech, then the caller pauses
+    audio = stille(0.5) + ton(0.25) + stille(1.0)
+
+    emitted_at = None
+    segments = []
+    consumed = 0
+    for chunk in in_chunks(audio, 320):
+        consumed += len(chunk)
+        new = vad.process(chunk)
+        if new and emitted_at is None:
+            emitted_at = consumed
+        segments += new
+
+    assert len(segments) == 1
+    speech_end = len(stille(0.5) + ton(0.25))
+    # Segment is ready one hangover after the pause, not after a fixed buffer size
+    assert (emitted_at - speech_end) / (SAMPLE_RATE * 2) <= 0.32
+    # Pre-roll + speech + hangover
+    assert abs(len(segments[0]) / (SAMPLE_RATE * 2) - 0.75) < 0.03
+
+
+def test_short_pause_does_not_split_utterance():
+    vad = StreamingVAD(hangover_ms=300)
+    audio = ton(0.4) + stille(0.15) + ton(0.4) + stille(0.6)
+    segments = []
+    for chunk in in_chunks(audio):
+        segments += vad.process(chunk)
+    assert len(segments) == 1
+
+
+def test_flush_returns_open_utterance():
+    vad = StreamingVAD()
+    assert vad.process(ton(0.5)) == []
+    assert vad.in_speech
+    segment = vad.flush()
+    assert segment and len(segment) >= len(ton(0.5)) - vad.frame_bytes
+
+
+def test_bridge_transcribes_each_utterance_once():
+    bridge = SofiaWebSocketBridge()
+    transcribed = []
+
+    def fake_transcribe(audio):
+        transcribed.append(len(audio))
+        return "ja"
+
+    async def fake_sofia(client_id, text):
+        return None
+
+    bridge.transcribe_audio = fake_transcribe
+    bridge.process_with_sofia = fake_sofia
+
+    class Sink:
+        def __init__(self):
+            self.sent = []
+
+        async def send(self, message):
+            self.sent.append(message)
+
+    ws = Sink()
+    bridge.clients['c1'] = ws
+    bridge.sofia_sessions['c1'] = bridge.new_session()
+
+    async def run():
+        for chunk in in_chunks(stille(1.0) + ton(0.3) + stille(1.0) + ton(0.3) + stille(1.0), 3200):
+            await bridge.process_client_message('c1', chunk)
+
+    asyncio.run(run())
+
+    types = [json.loads(m)['type'] for m in ws.sent if isinstance(m, str)]
+    assert len(transcribed) == 2
+    assert types.count('speech_started') == 2
+    assert types.count('transcription') == 2
+    assert bridge.stats['vad_segments'] == 2
+    assert bridge.stats['vad_silence_bytes_dropped'] > 0
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests für das Änderungsprotokoll per Trigger und den SSE-Änderungs-Feed des CRM
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'crm'))
+
+import pytest
+
+import app as crm_app
+from aenderungs_feed import AenderungsFeed
+from src.dental.appointment_manager import AppointmentManager
+from termine_query import schema_einrichten
+
+NAECHSTE_WOCHE = str(date.today() + timedelta(days=7))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    db_path = str(tmp_path / 'termine.db')
+    manager = AppointmentManager(db_path)
+    conn = sqlite3.connect(db_path)
+    schema_einrichten(conn)
+    conn.close()
+    return manager
+
+
+def protokoll(db_path):
+    conn = sqlite3.connect(db_path)
+    zeilen = conn.execute("SELECT seq, typ, daten FROM aenderungen ORDER BY seq").fetchall()
+    conn.close()
+    return [(seq, typ, json.loads(daten)) for seq, typ, daten in zeilen]
+
+
+def sammeln(feed, ergebnis, anzahl, letzte_id=None):
+    for aenderung in feed.ereignisse(letzte_id, heartbeat=0.05):
+        if aenderung is not None:
+            ergebnis.append(aenderung)
+        if len(ergebnis) >= anzahl:
+            return
+
+
+def test_triggers_log_bookings_cancellations_and_patients(manager):
+    assert manager.termin_hinzufuegen('Erika Muster', '030 12345678', NAECHSTE_WOCHE, '10:00', 'Kontrolle').startswith('✅')
+    termin_id = protokoll(manager.db_path)[0][2]['id']
+    manager.termin_absagen(termin_id, 'krank')
+
+    eintraege = protokoll(manager.db_path)
+    assert [typ for _, typ, _ in eintraege] == ['termin_neu', 'patient_neu', 'termin_abgesagt']
+    assert eintraege[0][2]['patient_name'] == 'Erika Muster' and eintraege[0][2]['uhrzeit'] == '10:00'
+    assert eintraege[1][2]['telefon'] == '030 12345678'
+    assert eintraege[2][2]['status'] == 'abgesagt'
+    assert [seq for seq, _, _ in eintraege] == sorted(seq for seq, _, _ in eintraege)
+
+
+def test_one_tailer_fans_out_to_all_subscribers(manager):
+    feed = AenderungsFeed(manager.db_path, intervall=0.02).start()
+    ergebnisse = [[], [], []]
+    threads = [threading.Thread(target=sammeln, args=(feed, ergebnis, 6)) for ergebnis in ergebnisse]
+    for thread in threads:
+        thread.start()
+    while feed.abonnenten < 3:
+        time.sleep(0.01)
+    abfragen_vorher = feed.abfragen
+
+    for i in range(3):
+        manager.termin_hinzufuegen(f'Patient {i}', f'030 1234567{i}', NAECHSTE_WOCHE, f'1{i}:00', 'Kontrolle')
+    for thread in threads:
+        thread.join(timeout=5)
+    feed.stop()
+
+    seqs = [[a.seq for a in ergebnis] for ergebnis in ergebnisse]
+    assert seqs[0] == seqs[1] == seqs[2] and len(seqs[0]) == 6
+    # 3 bookings = 6 commits (appointment + patient); at most one read per commit, not per subscriber
+    assert feed.abfragen - abfragen_vorher <= 6
+
+
+def test_resume_with_last_event_id_replays_missed_changes(manager):
+    for i in range(3):
+        manager.termin_hinzufuegen(f'Patient {i}', f'030 1234567{i}', NAECHSTE_WOCHE, f'1{i}:00', 'Kontrolle')
+    alle = protokoll(manager.db_path)
+    feed = AenderungsFeed(manager.db_path, intervall=0.02).start()
+
+    nachgeholt = []
+    sammeln(feed, nachgeholt, 4, letzte_id=alle[1][0])
+    feed.stop()
+    assert [a.seq for a in nachgeholt] == [seq for seq, _, _ in alle[2:]]
+
+
+def test_sse_endpoint_streams_events(manager, monkeypatch):
+    monkeypatch.setattr(crm_app, 'DB_PATH', manager.db_path)
+    monkeypatch.setattr(crm_app, 'SSE_HEARTBEAT', 0.05)
+    manager.termin_hinzufuegen('Erika Muster', '030 12345678', NAECHSTE_WOCHE, '10:00', 'Kontrolle')
+
+    with crm_app.app.test_client() as client:
+        response = client.get('/api/aenderungen', headers={'Last-Event-ID': '0'}, buffered=False)
+        assert response.mimetype == 'text/event-stream'
+        chunks = response.response
+        assert next(chunks).startswith(b'retry:')
+        event = next(chunks).decode()
+        response.close()
+        assert client.get('/api/aenderungen?letzte_id=x').status_code == 400
+
+    zeilen = dict(line.split(': ', 1) for line in event.strip().splitlines())
+    assert zeilen['id'] == '1' and zeilen['event'] == 'termin_neu'
+    assert json.loads(zeilen['data'])['patient_name'] == 'Erika Muster'
+    crm_app._feeds.pop(manager.db_path).stop()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests für die Auslastungsanalyse des CRM (Heatmap, Absagequoten, Vorlaufzeiten, Cache nach Datenversion)
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'crm'))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import app as crm_app
+from analytics import auswerten, spalten_laden
+from src.dental.appointment_manager import AppointmentManager
+
+VON, BIS = date(2030, 1, 1), date(2030, 12, 31)
+
+
+def anlegen(db_path, zeilen):
+    AppointmentManager(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart, status, erstellt_am) "
+                     "VALUES ('P', '030', ?, ?, ?, ?, ?)", zeilen)
+    conn.commit()
+    return conn
+
+
+def test_heatmap_rates_and_lead_times_match_hand_counts(tmp_path):
+    # 2030-01-07 ist ein Montag
+    conn = anlegen(str(tmp_path / 't.db'), [
+        ('2030-01-07', '09:00', 'Kontrolle', 'bestätigt', '2030-01-06 09:00:00'),
+        ('2030-01-14', '09:15', 'Kontrolle', 'bestätigt', '2029-12-01 09:00:00'),
+        ('2030-01-14', '09:30', 'Füllung', 'abgesagt', '2030-01-13 12:00:00'),
+        ('2030-02-02', '12:00', 'Füllung', 'bestätigt', None),
+        ('2029-12-31', '09:00', 'Kontrolle', 'bestätigt', '2029-12-01 09:00:00'),  # außerhalb
+    ])
+    result = auswerten(spalten_laden(conn, VON, BIS), VON, BIS)
+
+    assert result['termine'] == 4 and result['abgesagt'] == 1 and result['absagequote'] == 0.25
+    slots = result['heatmap']['slots']
+    montag = result['heatmap']['termine'][0]
+    assert montag[slots.index('09:00')] == 2 and montag[slots.index('09:30')] == 0  # abgesagt zählt nicht
+    assert result['heatmap']['termine'][5][slots.index('12:00')] == 1  # Samstag
+    # 2030 hat 52 Montage
+    assert result['heatmap']['auslastung'][0][slots.index('09:00')] == round(2 / 52, 4)
+    assert result['absagequote_wochentag']['Montag'] == round(1 / 3, 4)
+    assert {b['behandlungsart']: b['absagequote'] for b in result['behandlungen']} == {'Füllung': 0.5, 'Kontrolle': 0.0}
+    monate = result['behandlungen_monatlich']
+    assert len(monate['monate']) == 12 and monate['reihen']['Kontrolle'][0] == 2 and monate['reihen']['Füllung'][1] == 1
+    verteilung = {k['klasse']: k['anzahl'] for k in result['vorlaufzeit']['verteilung']}
+    assert verteilung['< 1 Tag'] == 1 and verteilung['< 2 Tage'] == 1 and verteilung['< 60 Tage'] == 1
+
+
+def test_year_of_data_computes_in_milliseconds(tmp_path):
+    random.seed(1)
+    zeilen = []
+    tag = VON
+    while tag <= BIS:
+        if tag.weekday() < 6:
+            for minute in range(9 * 60, 18 * 60, 30):
+                if random.random() < 0.7:
+                    zeilen.append((str(tag), f'{minute // 60:02d}:{minute % 60:02d}',
+                                   random.choice(['Kontrolle', 'Füllung', 'Prophylaxe', 'Implantat']),
+                                   'abgesagt' if random.random() < 0.1 else 'bestätigt',
+                                   str(datetime.combine(tag, datetime.min.time()) - timedelta(days=random.randint(0, 90)))))
+        tag += timedelta(days=1)
+    conn = anlegen(str(tmp_path / 't.db'), zeilen)
+
+    started = time.perf_counter()
+    result = auswerten(spalten_laden(conn, VON, BIS), VON, BIS)
+    elapsed = time.perf_counter() - started
+    assert result['termine'] == len(zeilen) > 3000
+    assert 0.05 < result['absagequote'] < 0.15
+    assert elapsed < 0.5
+
+
+def test_vorlauf_rechnet_erstellt_am_in_ortszeit_um(tmp_path, monkeypatch):
+    monkeypatch.setenv('TZ', 'Europe/Berlin')
+    time.tzset()
+    try:
+        conn = anlegen(str(tmp_path / 't.db'), [
+            # 07:30 UTC im Winter = 08:30 Ortszeit, eine halbe Stunde vor dem Termin
+            ('2030-01-07', '09:00', 'Kontrolle', 'bestätigt', '2030-01-07 07:30:00'),
+            # Sommerzeit: 06:00 UTC = 08:00 Ortszeit, genau ein Tag vor dem Termin
+            ('2030-07-09', '08:00', 'Kontrolle', 'bestätigt', '2030-07-08 06:00:00'),
+        ])
+        vorlauf = spalten_laden(conn, VON, BIS)['vorlauf']
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert vorlauf.tolist() == [pytest.approx(0.5 / 24), pytest.approx(1.0)]
+
+
+def test_endpoint_caches_by_data_version(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 't.db')
+    anlegen(db_path, [('2030-01-07', '09:00', 'Kontrolle', 'bestätigt', '2030-01-01 09:00:00')]).close()
+    monkeypatch.setattr(crm_app, 'DB_PATH', db_path)
+
+    with crm_app.app.test_client() as client:
+        url = '/api/auslastung?von=2030-01-01&bis=2030-12-31'
+        assert client.get(url).get_json()['termine'] == 1
+        assert client.get(url + '&x=1').get_json()['termine'] == 1  # anderer Cache-Schlüssel, gleiche Analyse
+        analyse = crm_app._analysen[db_path]
+        assert analyse.berechnungen == 1
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart) "
+                     "VALUES ('Q', '030', '2030-01-08', '10:00', 'Füllung')")
+        conn.commit()
+        conn.close()
+        assert client.get(url).get_json()['termine'] == 2
+        assert analyse.berechnungen == 2
+
+        page = client.get('/auslastung?von=2030-01-01&bis=2030-12-31')
+        assert page.status_code == 200 and 'Montag' in page.get_data(as_text=True)
+        assert client.get('/api/auslastung?von=2030-12-31&bis=2030-01-01').status_code == 400
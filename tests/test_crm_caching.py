@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests für bedingte GETs im CRM (Datenversion per Trigger, ETag/Last-Modified, 304, Antwort-Cache)
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'crm'))
+
+import pytest
+
+import app as crm_app
+from antwort_cache import AntwortCache
+from src.dental.appointment_manager import AppointmentManager
+
+MORGEN = str(date.today() + timedelta(days=1))
+
+
+def termin_eintragen(db_path, name='Erika Muster'):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart) "
+                 "VALUES (?, '030 1234567', ?, '10:00', 'Kontrolle')", (name, MORGEN))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'termine.db')
+    AppointmentManager(db_path)
+    termin_eintragen(db_path)
+    monkeypatch.setattr(crm_app, 'DB_PATH', db_path)
+    monkeypatch.setattr(crm_app, 'antwort_cache', AntwortCache())
+    with crm_app.app.test_client() as client:
+        client.db_path = db_path
+        yield client
+
+
+class ZaehlendeSeite:
+    def __init__(self):
+        self.aufrufe = 0
+
+    def __call__(self, *args, **kwargs):
+        self.aufrufe += 1
+        return self.original(*args, **kwargs)
+
+
+@pytest.fixture
+def seiten_zaehler(monkeypatch):
+    zaehler = ZaehlendeSeite()
+    zaehler.original = crm_app.seite_laden
+    monkeypatch.setattr(crm_app, 'seite_laden', zaehler)
+    return zaehler
+
+
+def test_unchanged_data_answers_304_without_querying(client, seiten_zaehler):
+    first = client.get('/api/termine?zeitraum=zukunft&patient_name=Erika')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and 'Last-Modified' not in first.headers
+
+    again = client.get('/api/termine?zeitraum=zukunft&patient_name=Erika', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    assert seiten_zaehler.aufrufe == 1
+
+
+def test_if_modified_since_allein_liefert_kein_304(client):
+    first = client.get('/api/termine?zeitraum=zukunft&patient_name=Muster')
+    # Änderung in derselben Sekunde wie die Antwort; ein Sekunden-Zeitstempel sähe sie nicht
+    termin_eintragen(client.db_path, 'Max Muster')
+
+    since = client.get('/api/termine?zeitraum=zukunft&patient_name=Muster',
+                       headers={'If-Modified-Since': first.headers['Date']})
+    assert since.status_code == 200 and len(since.get_json()) == 2
+
+
+def test_writes_from_outside_the_crm_bump_the_version(client):
+    first = client.get('/api/termine?zeitraum=zukunft&patient_name=Muster')
+    termin_eintragen(client.db_path, 'Max Muster')
+
+    after_insert = client.get('/api/termine?zeitraum=zukunft&patient_name=Muster',
+                              headers={'If-None-Match': first.headers['ETag']})
+    assert after_insert.status_code == 200
+    assert len(after_insert.get_json()) == 2
+    assert after_insert.headers['ETag'] != first.headers['ETag']
+
+    conn = sqlite3.connect(client.db_path)
+    conn.execute("UPDATE termine SET status = 'abgesagt' WHERE patient_name = 'Max Muster'")
+    conn.commit()
+    conn.close()
+    after_update = client.get('/api/termine?zeitraum=zukunft&patient_name=Muster')
+    assert after_update.headers['ETag'] != after_insert.headers['ETag']
+    assert {t['status'] for t in after_update.get_json()} == {'bestätigt', 'abgesagt'}
+
+
+def test_repeated_polls_are_served_from_cache(client, seiten_zaehler):
+    for _ in range(5):
+        response = client.get('/alle_termine?zeitraum=zukunft')
+        assert response.status_code == 200 and 'Erika Muster' in response.get_data(as_text=True)
+    client.get('/alle_termine?zeitraum=alle')
+    assert seiten_zaehler.aufrufe == 2
+    assert crm_app.antwort_cache.treffer == 4
+
+    # Exports are streamed and never cached
+    client.get('/api/termine?zeitraum=alle&patient_name=Erika&export=ndjson')
+    assert len(crm_app.antwort_cache) == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = AntwortCache(max_eintraege=2)
+    cache.put('a', b'1', 'text/html', {})
+    cache.put('b', b'2', 'text/html', {})
+    assert cache.get('a') is not None
+    cache.put('c', b'3', 'text/html', {})
+    assert cache.get('b') is None and cache.get('a') is not None and len(cache) == 2
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests für den Streaming-Export (CSV/XLSX) des CRM
+"""
+
+import csv
+import io
+import os
+import sqlite3
+import sys
+import tracemalloc
+import zipfile
+from datetime import date, timedelta
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'crm'))
+
+import pytest
+
+import app as crm_app
+from export import EXPORT_SPALTEN, csv_stream, xlsx_stream
+from src.dental.appointment_manager import AppointmentManager
+
+HEUTE = date.today()
+NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def termine(anzahl):
+    for i in range(anzahl):
+        yield {'id': i + 1, 'datum': str(HEUTE + timedelta(days=i % 30 - 15)), 'uhrzeit': '09:30',
+               'patient_name': f'Jörg Müller {i}', 'telefon': '030 1234567', 'behandlungsart': 'Füllung',
+               'status': 'bestätigt', 'beschreibung': 'Schmerzen <links> & "oben"', 'notizen': None}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'termine.db')
+    AppointmentManager(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart, beschreibung) "
+                     "VALUES (:patient_name, :telefon, :datum, :uhrzeit, :behandlungsart, :beschreibung)",
+                     list(termine(1200)))
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(crm_app, 'DB_PATH', db_path)
+    with crm_app.app.test_client() as client:
+        yield client
+
+
+def blatt_zeilen(daten):
+    with zipfile.ZipFile(io.BytesIO(daten)) as archiv:
+        assert archiv.testzip() is None
+        blatt = ElementTree.fromstring(archiv.read('xl/worksheets/sheet1.xml'))
+    return [[(c.findtext('s:is/s:t', namespaces=NS) or c.findtext('s:v', namespaces=NS))
+             for c in row.findall('s:c', NS)] for row in blatt.find('s:sheetData', NS)]
+
+
+def test_csv_export_uses_filters_and_excel_friendly_format(client):
+    response = client.get('/export/termine.csv?zeitraum=zukunft&sortierung=datum_asc')
+    assert response.headers['Content-Disposition'].startswith('attachment; filename="termine_zukunft_')
+    text = response.get_data().decode('utf-8')
+    assert text.startswith('\ufeff')
+    rows = list(csv.reader(io.StringIO(text.lstrip('\ufeff')), delimiter=';'))
+    assert rows[0] == [titel for _, titel in EXPORT_SPALTEN]
+    daten = [row[1] for row in rows[1:]]
+    assert daten == sorted(daten) and min(daten) >= str(HEUTE)
+    assert len(rows) - 1 == 1200 // 30 * 15
+    assert rows[1][7] == 'Schmerzen <links> & "oben"'
+
+    bereich = client.get(f'/export/termine.csv?von={HEUTE}&bis={HEUTE}').get_data().decode('utf-8')
+    assert len(bereich.strip().splitlines()) == 1 + 1200 // 30
+    assert client.get('/export/termine.csv?von=gestern').status_code == 400
+    assert client.get('/export/termine.pdf').status_code == 404
+
+
+def test_xlsx_export_is_a_valid_workbook(client):
+    response = client.get('/export/termine.xlsx?sortierung=name')
+    assert response.mimetype == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    rows = blatt_zeilen(response.get_data())
+    assert rows[0] == [titel for _, titel in EXPORT_SPALTEN]
+    assert len(rows) == 1201
+    assert rows[1][3] == 'Jörg Müller 0' and rows[1][7] == 'Schmerzen <links> & "oben"'
+
+
+@pytest.mark.parametrize('schreiber', [csv_stream, xlsx_stream])
+def test_export_memory_does_not_grow_with_row_count(schreiber):
+    def spitze(anzahl):
+        tracemalloc.start()
+        groesse = 0
+        for block in schreiber(termine(anzahl)):
+            groesse += len(block)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, groesse
+
+    klein_peak, klein = spitze(1000)
+    gross_peak, gross = spitze(20000)
+    assert gross > 15 * klein
+    assert gross_peak < 2 * klein_peak
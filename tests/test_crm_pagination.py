@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests für die seitenweisen CRM-Listen (Keyset-Cursor, Zähler aus dem Tages-Rollup, NDJSON-Export)
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'crm'))
+
+import pytest
+
+import app as crm_app
+from src.dental.appointment_manager import AppointmentManager
+
+HEUTE = date.today()
+
+
+def termine_anlegen(db_path, anzahl):
+    AppointmentManager(db_path)
+    conn = sqlite3.connect(db_path)
+    rows = []
+    for i in range(anzahl):
+        tag = HEUTE + timedelta(days=i % 20 - 10)
+        rows.append((f'Patient {i % 7}', f'030 1234{i % 7:03d}', str(tag), f'{8 + i % 3:02d}:00',
+                     'Kontrolle', 'abgesagt' if i % 5 == 0 else 'bestätigt'))
+    conn.executemany("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart, status) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'termine.db')
+    termine_anlegen(db_path, 230)
+    monkeypatch.setattr(crm_app, 'DB_PATH', db_path)
+    crm_app.app.config['TESTING'] = True
+    with crm_app.app.test_client() as client:
+        client.db_path = db_path
+        yield client
+
+
+def alle_seiten(client, url):
+    ids, cursor = [], None
+    while True:
+        response = client.get(url + (f'&nach={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        seite = response.get_json()
+        assert len(seite) <= 40
+        ids.extend(t['id'] for t in seite)
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize('zeitraum,order', [
+    ('zukunft', 'datum, uhrzeit, id'),
+    ('alle', 'datum DESC, uhrzeit ASC, id ASC'),
+])
+def test_api_pages_cover_every_row_exactly_once(client, zeitraum, order):
+    ids = alle_seiten(client, f'/api/termine?zeitraum={zeitraum}&patient_name=Patient&limit=40')
+
+    conn = sqlite3.connect(client.db_path)
+    where = "WHERE datum >= ?" if zeitraum == 'zukunft' else "WHERE ? = ?"
+    params = (str(HEUTE),) if zeitraum == 'zukunft' else (1, 1)
+    expected = [r[0] for r in conn.execute(f"SELECT id FROM termine {where} ORDER BY {order}", params)]
+    conn.close()
+    assert ids == expected
+
+
+def test_counts_come_from_rollup_and_follow_writes(client):
+    conn = sqlite3.connect(client.db_path)
+    client.get('/alle_termine')  # legt Rollup und Trigger an
+    conn.execute("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart) "
+                 "VALUES ('Neu', '030 999', ?, '12:00', 'Kontrolle')", (str(HEUTE),))
+    conn.execute("UPDATE termine SET datum = ? WHERE id = 1", (str(HEUTE + timedelta(days=100)),))
+    conn.execute("DELETE FROM termine WHERE id = 2")
+    conn.commit()
+
+    def erwartet(where, params=()):
+        total, heute, zukunft = conn.execute(
+            f"SELECT COUNT(*), SUM(datum = ?), SUM(datum > ?) FROM termine {where}",
+            (str(HEUTE), str(HEUTE)) + params).fetchone()
+        return {'total': total, 'heute': heute or 0, 'zukunft': zukunft or 0}
+
+    assert crm_app.zaehlen(conn, 'alle', HEUTE) == erwartet('')
+    assert crm_app.zaehlen(conn, 'vergangen', HEUTE) == erwartet('WHERE datum < ?', (str(HEUTE),))
+    page = client.get('/alle_termine?zeitraum=alle').get_data(as_text=True)
+    assert f"50 von {erwartet('')['total']} Terminen" in page
+    assert 'Weitere Termine' in page
+    conn.close()
+
+
+def test_html_pages_follow_cursor_and_reject_garbage(client):
+    first = client.get('/alle_termine?sortierung=name').get_data(as_text=True)
+    start = first.index('nach=') + len('nach=')
+    cursor = first[start:first.index('"', start)]
+    second = client.get(f'/alle_termine?sortierung=name&nach={cursor}')
+    assert second.status_code == 200 and 'Erste Seite' in second.get_data(as_text=True)
+    assert client.get('/alle_termine?nach=kaputt').status_code == 400
+    assert client.get('/api/termine?limit=abc').status_code == 400
+
+    mine = client.get('/meine_termine?patient_name=Patient 3&zeitraum=alle')
+    assert mine.status_code == 200
+
+
+def test_ndjson_export_streams_all_rows(client):
+    response = client.get('/api/termine?zeitraum=alle&patient_name=Patient&export=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 230
+    assert json.loads(lines[0])['datum'] >= json.loads(lines[-1])['datum']
+
+    as_json = client.get('/api/termine?zeitraum=zukunft&patient_name=Patient&export=json').get_json()
+    assert [t['id'] for t in as_json] == alle_seiten(client, '/api/termine?zeitraum=zukunft&patient_name=Patient&limit=40')
+
+
+def test_sortierung_nach_spalte_mit_null_verliert_keine_zeilen(client):
+    conn = sqlite3.connect(client.db_path)
+    conn.execute("UPDATE termine SET status = NULL WHERE id % 3 = 0")
+    conn.commit()
+    conn.row_factory = sqlite3.Row
+    crm_app.schema_einrichten(conn)
+
+    ids, cursor = [], None
+    while True:
+        seite, cursor = crm_app.seite_laden(conn, '', (), 'status', nach=cursor, limit=40)
+        ids.extend(zeile['id'] for zeile in seite)
+        if not cursor:
+            break
+    erwartet = [r[0] for r in conn.execute(
+        "SELECT id FROM termine ORDER BY COALESCE(status, ''), datum, uhrzeit, id")]
+    conn.close()
+    assert len(ids) == 230 and ids == erwartet
+
+
+def test_api_vergangen_liefert_vergangene_termine(client):
+    # Bis zum Keyset-Umbau fiel /api/termine bei 'vergangen' auf die Zukunft zurück
+    ids = alle_seiten(client, '/api/termine?zeitraum=vergangen&patient_name=Patient&limit=40')
+
+    conn = sqlite3.connect(client.db_path)
+    expected = [r[0] for r in conn.execute(
+        "SELECT id FROM termine WHERE datum < ? ORDER BY datum DESC, uhrzeit ASC, id ASC", (str(HEUTE),))]
+    conn.close()
+    assert ids and ids == expected
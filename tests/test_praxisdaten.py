@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests für den Praxisdaten-Generator und den Vergleich von Benchmark-Läufen
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import pytest
+
+import vergleichen
+from praxisdaten import dauer_in_tagen, praxis_erzeugen
+
+HEUTE = date(2026, 3, 16)
+
+
+def abfrage(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_praxis_ist_realistisch_und_reproduzierbar(tmp_path):
+    db_path = str(tmp_path / 'praxis.db')
+    kennzahlen = praxis_erzeugen(db_path, '6m', heute=HEUTE)
+
+    assert kennzahlen['termine'] == abfrage(db_path, "SELECT COUNT(*) FROM termine")[0][0] > 1000
+    assert 0.05 < kennzahlen['abgesagt'] / kennzahlen['termine'] < 0.2
+    # Kein Slot ist doppelt bestätigt, sonntags ist zu, nur Sprechzeiten
+    assert abfrage(db_path, "SELECT datum, uhrzeit FROM termine WHERE status = 'bestätigt' "
+                            "GROUP BY datum, uhrzeit HAVING COUNT(*) > 1") == []
+    assert abfrage(db_path, "SELECT COUNT(*) FROM termine WHERE strftime('%w', datum) = '0'") == [(0,)]
+    assert abfrage(db_path, "SELECT MIN(uhrzeit), MAX(uhrzeit) FROM termine") == [('09:00', '17:30')]
+    # Stammpatienten kommen mehrfach, jeder Patient steht in der Patiententabelle
+    mehrfach = abfrage(db_path, "SELECT COUNT(*) FROM (SELECT telefon FROM termine GROUP BY telefon "
+                                "HAVING COUNT(*) >= 5)")[0][0]
+    assert mehrfach > 10
+    assert abfrage(db_path, "SELECT COUNT(*) FROM patienten")[0][0] == kennzahlen['patienten']
+    assert len(abfrage(db_path, "SELECT DISTINCT behandlungsart FROM termine")) >= 8
+
+    zweite = str(tmp_path / 'zweite.db')
+    praxis_erzeugen(zweite, '6m', heute=HEUTE)
+    sql = "SELECT patient_name, telefon, datum, uhrzeit, behandlungsart, status FROM termine ORDER BY id"
+    assert abfrage(db_path, sql) == abfrage(zweite, sql)
+
+
+def test_dauer_von_einer_woche_bis_fuenf_jahren():
+    assert dauer_in_tagen('1w') == 7
+    assert dauer_in_tagen('6m') == 180
+    assert dauer_in_tagen('5j') == dauer_in_tagen('5y') == 1825
+    with pytest.raises(ValueError):
+        dauer_in_tagen('bald')
+
+
+def lauf(pfad, **mediane):
+    pfad.write_text(json.dumps({
+        'praxis': {'dauer': '1j', 'seed': 42},
+        'benchmarks': [{'fullname': f'benchmarks/test_bench.py::{name}', 'stats': {'median': wert, 'mean': wert,
+                                                                                    'min': wert}}
+                       for name, wert in mediane.items()],
+    }), encoding='utf-8')
+    return str(pfad)
+
+
+def test_vergleich_meldet_regressionen_mit_exit_code(tmp_path, capsys):
+    vorher = lauf(tmp_path / 'vorher.json', test_a=0.010, test_b=0.002, test_c=0.005)
+    nachher = lauf(tmp_path / 'nachher.json', test_a=0.0105, test_b=0.003, test_d=0.001)
+
+    assert vergleichen.main([vorher, nachher, '--schwelle', '20']) == 1
+    ausgabe = capsys.readouterr().out
+    zeilen = {zeile.split()[0]: zeile.split()[-1] for zeile in ausgabe.splitlines() if zeile.startswith('test_')}
+    assert zeilen == {'test_a': 'ok', 'test_b': 'REGRESSION', 'test_c': 'entfallen', 'test_d': 'neu'}
+    assert '+50.0%' in ausgabe
+
+    assert vergleichen.main([vorher, nachher, '--schwelle', '60']) == 0
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests für die aiohttp-Version des Sofia Web Interface (eine Event-Loop, CORS, Hintergrund-Loop)
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import sofia_web
+
+
+def mit_client(test):
+    async def run():
+        async with TestClient(TestServer(sofia_web.create_app())) as client:
+            return await test(client)
+    return asyncio.run(run())
+
+
+def test_chat_runs_on_the_server_loop():
+    loops = set()
+    original = sofia_web.sofia.process_message
+
+    async def merke_loop(message):
+        loops.add(asyncio.get_running_loop())
+        return await original(message)
+
+    async def test(client):
+        sofia_web.sofia.process_message = merke_loop
+        try:
+            replies = []
+            for _ in range(3):
+                response = await client.post('/api/chat', json={'message': 'Hallo'})
+                assert response.status == 200
+                replies.append(await response.json())
+            empty = await client.post('/api/chat', json={})
+            broken = await client.post('/api/chat', data='kein json')
+            return replies, empty.status, broken.status
+        finally:
+            sofia_web.sofia.process_message = original
+
+    replies, empty_status, broken_status = mit_client(test)
+    assert all('Sofia' in r['response'] and r['timestamp'] for r in replies)
+    assert len(loops) == 1
+    assert empty_status == 400 and broken_status == 400
+
+
+def test_cors_only_for_known_origins():
+    async def test(client):
+        allowed = await client.post('/api/chat', json={'message': 'Hilfe'},
+                                    headers={'Origin': 'http://localhost:3005'})
+        foreign = await client.post('/api/chat', json={'message': 'Hilfe'},
+                                    headers={'Origin': 'http://example.com'})
+        preflight = await client.options('/api/book_appointment', headers={
+            'Origin': 'http://localhost:5001',
+            'Access-Control-Request-Method': 'POST',
+            'Access-Control-Request-Headers': 'Content-Type',
+        })
+        return allowed.headers, foreign.headers, preflight.status, preflight.headers
+
+    allowed, foreign, preflight_status, preflight = mit_client(test)
+    assert allowed['Access-Control-Allow-Origin'] == 'http://localhost:3005'
+    assert 'Access-Control-Allow-Origin' not in foreign
+    assert preflight_status == 200
+    assert preflight['Access-Control-Allow-Origin'] == 'http://localhost:5001'
+    assert 'POST' in preflight['Access-Control-Allow-Methods']
+
+
+def test_calendar_endpoints_report_unavailable_calendar(monkeypatch):
+    monkeypatch.setattr(sofia_web, 'CALENDAR_AVAILABLE', False)
+
+    async def test(client):
+        booking = await client.post('/api/book_appointment', json={'name': 'A', 'phone': '1', 'date': '2030-01-07'})
+        times = await client.get('/api/available_times/2030-01-07')
+        return booking.status, times.status
+
+    assert mit_client(test) == (503, 503)
+
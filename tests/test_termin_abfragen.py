@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests für die strukturierten Terminabfragen und ihre Textdarstellung
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from src.dental.appointment_manager import AppointmentManager
+from src.dental.termin_abfragen import Termin
+from src.dental.termin_archiv import TerminArchiv
+from src.dental.uhr import EingefroreneUhr
+
+JETZT = datetime(2025, 7, 14, 8, 0)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = AppointmentManager(str(tmp_path / 'termine.db'), uhr=EingefroreneUhr(JETZT))
+    manager.patient_hinzufuegen('Anna Schmidt', '030 1234567', email='anna@example.de')
+    manager.termin_hinzufuegen('Anna Schmidt', '030 1234567', '2025-07-15', '10:00', 'Füllung',
+                               email='anna@example.de', beschreibung='Schmerzen unten links', notizen='Angst')
+    manager.termin_hinzufuegen('Jörg Müller', '0170 1234567', '2025-07-15', '09:00', 'Kontrolluntersuchung')
+    manager.termin_hinzufuegen('Anna Schmidt', '030 1234567', '2025-07-18', '14:00', 'Professionelle Zahnreinigung')
+    return manager
+
+
+def test_felder_kommen_aus_den_richtigen_spalten(manager):
+    termine = manager.tagesplan_termine('2025-07-15')
+
+    assert [t.uhrzeit for t in termine] == ['09:00', '10:00']
+    fuellung = termine[1]
+    assert isinstance(fuellung, Termin) and not hasattr(fuellung, '__dict__')
+    assert fuellung.to_dict()['notizen'] == 'Angst'
+    assert (fuellung.behandlungsart, fuellung.beschreibung, fuellung.status, fuellung.notizen) == (
+        'Füllung', 'Schmerzen unten links', 'bestätigt', 'Angst')
+
+    plan = manager.get_tagesplan('2025-07-15', fuer_arzt=True)
+    assert "**2. 10:00 Uhr** - Füllung" in plan
+    assert "📝 Beschreibung: Schmerzen unten links" in plan and "📋 Notizen: Angst" in plan
+
+
+def test_patientenansicht_zeigt_nur_belegte_zeiten(manager):
+    assert manager.get_tagesplan('2025-07-15') == "Für 2025-07-15 sind folgende Zeiten bereits belegt: 09:00, 10:00"
+    assert 'viele Termine verfügbar' in manager.get_tagesplan('2025-07-16')
+
+
+def test_suche_nutzt_den_zeitraum_der_uhr(manager):
+    assert [t.datum for t in manager.termine_finden('Schmidt', 'morgen')] == ['2025-07-15']
+    assert [t.behandlungsart for t in manager.termine_finden('Schmidt')] == ['Füllung', 'Professionelle Zahnreinigung']
+    assert manager.termine_finden('Schmidt', 'heute') == []
+
+    text = manager.termin_suchen('Schmidt')
+    assert "(2 Termine gefunden)" in text and "🦷 Behandlung: Professionelle Zahnreinigung" in text
+    assert "📊 Status: bestätigt" in text
+
+
+def test_historie_mit_status_und_archiv(manager):
+    conn = sqlite3.connect(manager.db_path)
+    conn.execute("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart, status) "
+                 "VALUES ('Anna Schmidt', '030 1234567', '2022-03-01', '09:00', 'Wurzelbehandlung', 'abgesagt')")
+    conn.commit()
+    conn.close()
+    TerminArchiv(manager.db_path, nach_tagen=365).archivieren(JETZT.date())
+
+    patient, termine = manager.patientenhistorie_laden('030 1234567')
+    assert patient.email == 'anna@example.de'
+    assert [(t.datum, t.bestaetigt) for t in termine] == [
+        ('2025-07-18', True), ('2025-07-15', True), ('2022-03-01', False)]
+
+    historie = manager.get_patientenhistorie('030 1234567')
+    assert "1. ✅ 2025-07-18 um 14:00" in historie and "3. ❌ 2022-03-01 um 09:00" in historie
+    assert manager.patientenhistorie_laden('089 7654321') == (None, [])
+    assert 'nicht in der Datenbank gefunden' in manager.get_patientenhistorie('089 7654321')
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests für das Jahresarchiv alter Termine und die Aufbewahrungsfrist
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'crm'))
+
+import pytest
+
+import app as crm_app
+from src.dental.appointment_manager import AppointmentManager
+from src.dental.termin_archiv import TerminArchiv, archiv_dateien
+
+HEUTE = date.today()
+
+
+def termin_eintragen(db_path, tage, name='Anna Schmidt', telefon='030 1234567', status='bestätigt'):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart, status) "
+                 "VALUES (?, ?, ?, '09:00', 'Kontrolluntersuchung', ?)",
+                 (name, telefon, str(HEUTE + timedelta(days=tage)), status))
+    conn.commit()
+    conn.close()
+
+
+def anzahl(pfad):
+    conn = sqlite3.connect(pfad)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM termine").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = AppointmentManager(str(tmp_path / 'termine.db'))
+    manager.patient_hinzufuegen('Anna Schmidt', '030 1234567')
+    return manager
+
+
+def test_alte_termine_wandern_ins_jahresarchiv_und_bleiben_in_der_historie(manager):
+    for tage in (-800, -500, -400, -30, 5):
+        termin_eintragen(manager.db_path, tage)
+
+    verschoben = TerminArchiv(manager.db_path, nach_tagen=365, batch=1).archivieren(HEUTE)
+
+    jahre = sorted({(HEUTE + timedelta(days=t)).year for t in (-800, -500, -400)})
+    assert sorted(verschoben) == jahre and sum(verschoben.values()) == 3
+    assert list(archiv_dateien(manager.db_path)) == jahre
+    assert anzahl(manager.db_path) == 2
+    assert sum(anzahl(pfad) for pfad in archiv_dateien(manager.db_path).values()) == 3
+
+    # Neue Spalte nach dem Archivieren: ältere Jahrgänge liefern dort NULL
+    conn = sqlite3.connect(manager.db_path)
+    conn.execute("ALTER TABLE termine ADD COLUMN raum TEXT")
+    conn.commit()
+    conn.close()
+
+    historie = manager.get_patientenhistorie('030 1234567')
+    assert "Terminhistorie (5 Termine)" in historie
+    assert str(HEUTE - timedelta(days=800)) in historie
+
+
+def test_aufbewahrungsfrist_loescht_abgelaufene_jahrgaenge_und_blockweise(manager, tmp_path):
+    stichtag = date(2030, 6, 15)
+    conn = sqlite3.connect(manager.db_path)
+    conn.executemany("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart) "
+                     "VALUES ('Alt', '030 7654321', ?, '10:00', 'Füllung')",
+                     [(d,) for d in ('2018-03-01', '2019-02-01', '2020-01-10', '2020-01-11', '2020-01-12',
+                                     '2020-09-01', '2021-04-01', '2030-06-01')])
+    conn.commit()
+    conn.close()
+
+    archiv = TerminArchiv(manager.db_path, nach_tagen=30, aufbewahrung_jahre=99, batch=2)
+    archiv.archivieren(stichtag)
+    assert list(archiv_dateien(manager.db_path)) == [2018, 2019, 2020, 2021]
+
+    archiv.aufbewahrung_jahre = 10
+    assert archiv.loeschfrist(stichtag) == date(2020, 6, 15)
+    assert archiv.aufbewahrung_durchsetzen(stichtag) == 5
+
+    dateien = archiv_dateien(manager.db_path)
+    assert list(dateien) == [2020, 2021]
+    assert anzahl(dateien[2020]) == 1
+    assert anzahl(manager.db_path) == 1
+
+
+def test_crm_liest_archivierte_termine_transparent(manager, monkeypatch):
+    for tage in range(-900, -300, 100):
+        termin_eintragen(manager.db_path, tage)
+    termin_eintragen(manager.db_path, 3, name='Jörg Müller', telefon='0170 1234567')
+    monkeypatch.setattr(crm_app, 'DB_PATH', manager.db_path)
+
+    with crm_app.app.test_client() as client:
+        client.get('/api/termine?zeitraum=alle&telefon=030')  # CRM-Schema anlegen, bevor archiviert wird
+        TerminArchiv(manager.db_path, nach_tagen=200).archivieren()
+        assert anzahl(manager.db_path) == 1
+
+        seite = client.get('/api/termine?zeitraum=alle&patient_name=Anna&telefon=-&limit=4')
+        assert len(seite.get_json()) == 4
+        rest = client.get(f"/api/termine?zeitraum=alle&patient_name=Anna&telefon=-&limit=4"
+                          f"&nach={seite.headers['X-Next-Cursor']}").get_json()
+        daten = [t['datum'] for t in seite.get_json() + rest]
+        assert daten == sorted((str(HEUTE + timedelta(days=t)) for t in range(-900, -300, 100)), reverse=True)
+
+        # Zukünftige Termine kommen weiter nur aus der Haupttabelle
+        assert [t['patient_name'] for t in client.get('/api/termine?zeitraum=zukunft&telefon=0170').get_json()] == [
+            'Jörg Müller']
+
+        alle = client.get('/alle_termine?zeitraum=alle').get_data(as_text=True)
+        assert str(HEUTE - timedelta(days=900)) in alle
+        archiviert_id = seite.get_json()[0]['id']
+        assert client.get(f'/termin_details/{archiviert_id}').status_code == 200
+
+
+def test_zaehler_summieren_archiv_und_haupttabelle(manager, monkeypatch):
+    for tage in (-700, -600, -10, 0, 4):
+        termin_eintragen(manager.db_path, tage)
+    monkeypatch.setattr(crm_app, 'DB_PATH', manager.db_path)
+    conn = crm_app.get_db_connection()
+    conn.close()
+    TerminArchiv(manager.db_path, nach_tagen=365).archivieren()
+
+    conn = crm_app.get_db_connection()
+    tabelle, archive = crm_app.archiv_quelle(conn, 'alle')
+    assert tabelle == 'termine_gesamt' and archive
+    assert crm_app.zaehlen(conn, 'alle', HEUTE, archive) == {'total': 5, 'heute': 1, 'zukunft': 1}
+    assert crm_app.archiv_quelle(conn, 'heute') == ('termine', [])
+    conn.close()
+
+
+def test_archivieren_erscheint_nicht_als_loeschung_im_aenderungsfeed(manager, monkeypatch):
+    for tage in (-800, -600, -500, -400, -370):
+        termin_eintragen(manager.db_path, tage)
+    termin_eintragen(manager.db_path, 3)
+    monkeypatch.setattr(crm_app, 'DB_PATH', manager.db_path)
+    crm_app.get_db_connection().close()  # Änderungsprotokoll und Trigger anlegen
+
+    conn = sqlite3.connect(manager.db_path)
+    vorher = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM aenderungen").fetchone()[0]
+    assert sum(TerminArchiv(manager.db_path, nach_tagen=365, batch=2).archivieren(HEUTE).values()) == 5
+    assert conn.execute("SELECT COUNT(*) FROM aenderungen WHERE seq > ?", (vorher,)).fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM archivlauf").fetchone()[0] == 0
+
+    # Echte Löschungen werden weiter gemeldet
+    conn.execute("DELETE FROM termine")
+    conn.commit()
+    assert [typ for (typ,) in conn.execute("SELECT typ FROM aenderungen WHERE seq > ?", (vorher,))] == [
+        'termin_geloescht']
+    conn.close()
+
+
+def test_aufbewahrung_kuerzt_das_aenderungsprotokoll(manager, monkeypatch):
+    termin_eintragen(manager.db_path, -365 * 12)
+    monkeypatch.setattr(crm_app, 'DB_PATH', manager.db_path)
+    crm_app.get_db_connection().close()
+    conn = sqlite3.connect(manager.db_path)
+    conn.execute("INSERT INTO aenderungen (typ, zeile_id, daten, zeitpunkt) VALUES ('termin_neu', 1, '{}', ?)",
+                 (time.time() - 90 * 86400,))
+    conn.commit()
+    termin_eintragen(manager.db_path, 5)
+
+    assert TerminArchiv(manager.db_path).aufbewahrung_durchsetzen(HEUTE) == 1
+    assert [typ for (typ,) in conn.execute("SELECT typ FROM aenderungen")] == ['termin_neu']
+    conn.close()
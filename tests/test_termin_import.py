@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests für den Massenimport von Terminen (CSV/JSONL)
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from src.dental.appointment_manager import AppointmentManager
+from src.dental.termin_import import ImportFehler, datum_normalisieren, ist_deutsche_telefonnummer, uhrzeit_normalisieren
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return AppointmentManager(str(tmp_path / 'termine.db'))
+
+
+def abfrage(manager, sql, params=()):
+    conn = sqlite3.connect(manager.db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def test_csv_import_normalisiert_und_legt_patienten_einmal_an(manager):
+    eingabe = io.StringIO(
+        "Patient;Telefon;Datum;Uhrzeit;Behandlung;Status\n"
+        "Anna Schmidt;030 1234567;18.03.2019;9:00;Kontrolluntersuchung;bestätigt\n"
+        "Anna Schmidt;030 1234567;2019-04-02;10.30;Füllung;\n"
+        "Jörg Müller;+49 170 1234567;02.01.2020;14:00;Zahnreinigung;abgesagt\n"
+    )
+    ergebnis = manager.termine_importieren(eingabe, format_='csv')
+
+    assert (ergebnis.gelesen, ergebnis.importiert, ergebnis.abgelehnt, ergebnis.neue_patienten) == (3, 3, 0, 2)
+    assert abfrage(manager, "SELECT datum, uhrzeit, status FROM termine ORDER BY datum") == [
+        ('2019-03-18', '09:00', 'bestätigt'),
+        ('2019-04-02', '10:30', 'bestätigt'),
+        ('2020-01-02', '14:00', 'abgesagt'),
+    ]
+    assert abfrage(manager, "SELECT name, telefon FROM patienten ORDER BY name") == [
+        ('Anna Schmidt', '030 1234567'), ('Jörg Müller', '+49 170 1234567')]
+
+
+def test_ungueltige_und_doppelt_belegte_zeilen_landen_in_der_seitendatei(manager, tmp_path):
+    manager.patient_hinzufuegen('Bestand', '030 7654321')
+    conn = sqlite3.connect(manager.db_path)
+    conn.execute("INSERT INTO termine (patient_name, telefon, datum, uhrzeit, behandlungsart) "
+                 "VALUES ('Bestand', '030 7654321', '2021-05-03', '08:00', 'Füllung')")
+    conn.commit()
+    conn.close()
+
+    quelle = tmp_path / 'alt.jsonl'
+    zeilen = [
+        {'patient_name': 'Belegt', 'telefon': '030 1111111', 'datum': '2021-05-03', 'uhrzeit': '08:00',
+         'behandlungsart': 'Füllung'},
+        {'patient_name': 'Ausland', 'telefon': '+1 555 0100', 'datum': '2021-05-04', 'uhrzeit': '08:00',
+         'behandlungsart': 'Füllung'},
+        {'patient_name': 'Kein Datum', 'telefon': '030 2222222', 'datum': '31.02.2021', 'uhrzeit': '08:00',
+         'behandlungsart': 'Füllung'},
+        {'patient_name': 'Ohne Behandlung', 'telefon': '030 3333333', 'datum': '2021-05-04', 'uhrzeit': '09:00'},
+        {'patient_name': 'Bestand', 'telefon': '030 7654321', 'datum': '2021-05-04', 'uhrzeit': '10:00',
+         'behandlungsart': 'Kontrolle'},
+    ]
+    quelle.write_text('\n'.join(json.dumps(z) for z in zeilen) + '\n{kaputt\n', encoding='utf-8')
+    ablehnungen = tmp_path / 'abgelehnt.jsonl'
+
+    ergebnis = manager.termine_importieren(str(quelle), ablehnungen=str(ablehnungen))
+
+    assert (ergebnis.importiert, ergebnis.abgelehnt, ergebnis.neue_patienten) == (1, 5, 0)
+    abgelehnt = [json.loads(z) for z in ablehnungen.read_text(encoding='utf-8').splitlines()]
+    assert [(a['zeile'], a['fehler'].split(':')[0]) for a in abgelehnt] == [
+        (1, 'Termin am 2021-05-03 um 08'),
+        (2, 'Keine deutsche Telefonnummer'),
+        (3, 'Ungültiges Datum'),
+        (4, 'Pflichtfeld fehlt'),
+        (6, 'Ungültiges JSON'),
+    ]
+    assert abgelehnt[0]['daten']['patient_name'] == 'Belegt'
+
+
+def test_grosser_import_schreibt_blockweise_und_meldet_fortschritt(manager):
+    eingabe = io.StringIO()
+    writer = csv.writer(eingabe)
+    writer.writerow(['patient_name', 'telefon', 'datum', 'uhrzeit', 'behandlungsart'])
+    for i in range(5000):
+        writer.writerow([f'Patient {i % 300}', f'0301{i % 300:06d}', str(date(2018, 1, 1) + timedelta(days=i // 20)),
+                         f'{8 + i % 20 // 2:02d}:{30 * (i % 2):02d}', 'Kontrolluntersuchung'])
+    writer.writerow(['Doppelt', '030 9999999', '2018-01-01', '08:00', 'Kontrolluntersuchung'])
+    eingabe.seek(0)
+
+    staende = []
+    ergebnis = manager.termine_importieren(eingabe, batch=1000,
+                                           fortschritt=lambda s: staende.append((s.gelesen, s.importiert)))
+
+    assert (ergebnis.importiert, ergebnis.abgelehnt, ergebnis.neue_patienten) == (5000, 1, 300)
+    assert staende[:5] == [(1000, 1000), (2000, 2000), (3000, 3000), (4000, 4000), (5000, 5000)]
+    assert staende[-1] == (5001, 5000)
+    assert abfrage(manager, "SELECT COUNT(*), COUNT(DISTINCT datum || uhrzeit) FROM termine") == [(5000, 5000)]
+
+
+def test_pruefregeln_entsprechen_der_einzelbuchung(manager):
+    assert ist_deutsche_telefonnummer('0170 1234567')
+    assert ist_deutsche_telefonnummer('+49 (30) 123-4567')
+    assert not ist_deutsche_telefonnummer('+1 555 0100')
+    assert datum_normalisieren('1.2.2024') == '2024-02-01'
+    assert uhrzeit_normalisieren('09:15:00') == '09:15'
+    with pytest.raises(ImportFehler):
+        uhrzeit_normalisieren('24:00')
+    assert manager.termin_hinzufuegen('Ausland', '+1 555 0100', '2099-01-05', '10:00', 'Füllung').startswith(
+        "❌ Nur deutsche Telefonnummern erlaubt")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests für die kompakten Ausgabemodi der Buchungs-Tools und den Token-Bericht
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import pytest
+
+import tool_tokens
+from praxisdaten import praxis_erzeugen
+from src.dental import tool_ausgabe
+from src.dental.appointment_manager import AppointmentManager
+from src.dental.uhr import EingefroreneUhr
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = AppointmentManager(str(tmp_path / 'termine.db'), uhr=EingefroreneUhr(datetime(2025, 7, 14, 10, 15)))
+    manager.termin_hinzufuegen('Anna Schmidt', '030 1234567', '2025-07-15', '09:00', 'Füllung')
+    return manager
+
+
+@pytest.fixture
+def modus():
+    vorher = tool_ausgabe.ausgabe_modus()
+    yield tool_ausgabe.ausgabe_modus_setzen
+    tool_ausgabe.ausgabe_modus_setzen(vorher)
+
+
+def test_markdown_bleibt_die_bisherige_antwort(manager, modus):
+    modus('markdown')
+    vorschlaege = manager.terminvorschlaege('2025-07-15', 3)
+    text = tool_ausgabe.terminvorschlaege('Füllung', vorschlaege, manager.get_current_datetime_info(),
+                                          lambda: manager.terminvorschlaege_text('Füllung', vorschlaege))
+    assert text == manager.get_intelligente_terminvorschlaege('Füllung', '2025-07-15', 3)
+    assert '1. Dienstag, 15.07.2025 um 09:30 Uhr (morgen)' in text
+
+
+def test_kompakt_und_json_enthalten_nur_die_fakten(manager, modus):
+    alternativen = manager.terminvorschlaege('2025-07-15', 2)
+    argumente = ('belegt', 'Anna Schmidt', '030 1234567', '2025-07-15', '09:00', 'Füllung')
+
+    modus('kompakt')
+    kompakt = tool_ausgabe.buchung(*argumente, alternativen=alternativen)
+    assert kompakt.splitlines() == [
+        'status: belegt',
+        'datum: 2025-07-15',
+        'uhrzeit: 09:00',
+        'alternativen: Dienstag 2025-07-15 09:30 (morgen); Dienstag 2025-07-15 10:00 (morgen)',
+        'naechster_schritt: Alternative wählen lassen',
+    ]
+
+    modus('json')
+    fakten = json.loads(tool_ausgabe.buchung(*argumente, alternativen=alternativen))
+    assert fakten['status'] == 'belegt' and len(fakten['alternativen']) == 2 and 'name' not in fakten
+
+    fehler = json.loads(tool_ausgabe.buchung('fehler', 'Anna Schmidt', '030 1234567', '2025-07-15', '09:30',
+                                             'Füllung', grund='❌ Der Zeitslot ist bereits belegt.'))
+    assert fehler['grund'] == 'Der Zeitslot ist bereits belegt.'
+
+
+def test_markdown_wird_in_kompakten_modi_nicht_gebaut(manager, modus):
+    modus('kompakt')
+
+    def nicht_aufrufen():
+        raise AssertionError('Markdown gebaut')
+
+    termine = manager.termine_finden('Schmidt')
+    text = tool_ausgabe.meine_termine('Anna Schmidt', '', 'naechste_woche', termine, nicht_aufrufen)
+    assert 'termine: 2025-07-15 09:00 Füllung' in text and 'anzahl: 1' in text
+
+    with pytest.raises(ValueError):
+        modus('yaml')
+    assert tool_ausgabe.ausgabe_modus() == 'kompakt'
+
+
+def test_token_bericht_zeigt_einsparung_je_tool(tmp_path):
+    db_path = str(tmp_path / 'praxis.db')
+    praxis_erzeugen(db_path, '1m', heute=tool_tokens.HEUTE)
+
+    summen = tool_tokens.bericht(AppointmentManager(db_path))
+
+    assert set(summen) == {'parse_terminwunsch', 'get_intelligente_terminvorschlaege',
+                           'termin_direkt_buchen', 'meine_termine_finden'}
+    for zeile in summen.values():
+        assert zeile['kompakt'] < zeile['json'] < zeile['markdown']
+    assert 'Gesamt' in tool_tokens.tabelle(summen)
+    assert tool_tokens.token_schaetzen('📅 Datum') == 4
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests für die zentrale Uhr mit Minuten-Schnappschuss
+"""
+
+import os
+import sys
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from src.dental import uhr
+from src.dental.appointment_manager import AppointmentManager
+from src.dental.uhr import EingefroreneUhr, eingefrorene_uhr
+
+
+def test_schnappschuss_gilt_eine_minute_und_ist_unveraenderlich():
+    eingefroren = EingefroreneUhr(datetime(2025, 7, 14, 9, 30, 5))
+    info = eingefroren.zeitinfo()
+
+    eingefroren.vorstellen(seconds=50)
+    assert eingefroren.zeitinfo() is info
+    assert info['datetime'] == datetime(2025, 7, 14, 9, 30)
+    assert info['date_formatted'] == 'Montag, 14. Juli 2025'
+    assert info['nächste_woche_iso'] == '2025-07-21'
+    with pytest.raises(TypeError):
+        info['hour'] = 10
+
+    eingefroren.vorstellen(seconds=5)
+    neu = eingefroren.zeitinfo()
+    assert neu is not info and neu['time_formatted'] == '09:31'
+
+
+def test_tageswechsel_um_mitternacht_und_zurueckgestellte_uhr():
+    eingefroren = EingefroreneUhr(datetime(2024, 12, 31, 23, 59, 30))
+    assert eingefroren.zeitinfo()['morgen_iso'] == '2025-01-01'
+
+    eingefroren.vorstellen(seconds=45)
+    info = eingefroren.zeitinfo()
+    assert info['date_iso'] == '2025-01-01'
+    assert (info['weekday'], info['kalenderwoche'], info['time_formatted']) == ('Mittwoch', 1, '00:00')
+
+    eingefroren.stellen(datetime(2024, 12, 31, 23, 59))
+    assert eingefroren.zeitinfo()['year'] == 2024
+
+
+def test_eingefrorene_uhr_ersetzt_die_prozessweite_uhr_nur_im_block():
+    vorher = uhr.aktuelle_uhr()
+    with eingefrorene_uhr(datetime(2025, 3, 1, 8, 0)) as eingefroren:
+        assert uhr.aktuelle_uhr() is eingefroren
+        assert uhr.heute() == date(2025, 3, 1)
+        assert uhr.zeitinfo()['is_weekend']
+    assert uhr.aktuelle_uhr() is vorher
+
+
+def test_terminverwaltung_rechnet_mit_der_eingefrorenen_uhr(tmp_path):
+    with eingefrorene_uhr(datetime(2025, 7, 14, 10, 15)) as eingefroren:
+        manager = AppointmentManager(str(tmp_path / 'termine.db'))
+        info = manager.get_current_datetime_info()
+        assert manager.get_current_datetime_info() is info
+        assert info['praxis_offen'] and info['aktuelles_datum'] == '2025-07-14'
+
+        _, datum, uhrzeit, _, _ = manager.parse_natural_language('Morgen um 10 Uhr zur Kontrolle')
+        assert (datum, uhrzeit) == ('2025-07-15', '10:00')
+
+        assert 'Vergangenheit' in manager.termin_hinzufuegen(
+            'Anna Schmidt', '030 1234567', '2025-07-14', '10:00', 'Kontrolluntersuchung')
+        assert manager.ist_verfuegbar('2025-07-14', '10:30')
+
+        eingefroren.vorstellen(hours=8)
+        assert not manager.get_current_datetime_info()['praxis_offen']
+        assert not manager.ist_verfuegbar('2025-07-14', '17:30')
+
+    # Eine eigene Uhr hat Vorrang vor der prozessweiten
+    eigene = AppointmentManager(str(tmp_path / 'termine.db'), uhr=EingefroreneUhr(datetime(2030, 1, 2, 9, 0)))
+    assert eigene.get_current_datetime_info()['aktuelles_datum'] == '2030-01-02'